@@ -16,6 +16,8 @@ class AppConfig:
 
     backups_dir: Path = base_dir / "backups"
     logs_dir: Path = base_dir / "logs"
+    # Локальные кэши (метрики шрифтов и т.п.), можно безопасно удалять
+    cache_dir: Path = base_dir / "cache"
 
     # UI
     date_format: str = "%d.%m.%Y"  # ДД.ММ.ГГГГ
@@ -39,7 +41,7 @@ CONFIG = AppConfig()
 
 
 def ensure_data_directories(config: AppConfig = CONFIG) -> None:
-    """Create data, backups and logs directories. Call explicitly during startup.
+    """Create data, backups, logs and cache directories. Call explicitly during startup.
 
     This avoids side-effects at module import time and makes the operation
     explicit and testable.
@@ -47,3 +49,4 @@ def ensure_data_directories(config: AppConfig = CONFIG) -> None:
     config.data_dir.mkdir(parents=True, exist_ok=True)
     config.backups_dir.mkdir(parents=True, exist_ok=True)
     config.logs_dir.mkdir(parents=True, exist_ok=True)
+    config.cache_dir.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Callable, Generic, Iterator, TypeVar
+
+from db.schema import ensure_import_log_tables
+
+logger = logging.getLogger(__name__)
+
+# Записей в одной пачке (одном SAVEPOINT и одной фиксации)
+IMPORT_BATCH_SIZE = 500
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+ProgressCb = Callable[[int, int, str], None]
+
+
+@contextmanager
+def savepoint(conn: sqlite3.Connection, name: str) -> Iterator[None]:
+    """SAVEPOINT name: при исключении откатывается только сделанное внутри блока."""
+    conn.execute(f"SAVEPOINT {name}")
+    try:
+        yield
+    except BaseException:
+        conn.execute(f"ROLLBACK TO {name}")
+        conn.execute(f"RELEASE {name}")
+        raise
+    conn.execute(f"RELEASE {name}")
+
+
+class BatchCommitter(Generic[T, R]):
+    """Пакетная запись импорта с журналом в import_runs / import_errors.
+
+    Записи копятся пачками по batch_size и пишутся вызовом write(conn, пачка)
+    в SAVEPOINT. Если пачка падает, она откатывается и пишется заново по одной
+    записи, каждая в своем SAVEPOINT: упавшие записи попадают в import_errors,
+    остальные сохраняются. После каждой пачки транзакция фиксируется вместе
+    с отметкой прогресса, поэтому сбой посреди импорта теряет не больше одной
+    пачки. Повторный импорт того же источника (source_key и kind) продолжает
+    незавершенный запуск: уже обработанные записи пропускаются, а state —
+    словарь, сохраняемый вместе с прогрессом, — восстанавливается.
+
+    write возвращает результат пачки (например, счетчики); результаты
+    успешных вызовов собираются в results.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        write: Callable[[sqlite3.Connection, list[T]], R],
+        *,
+        kind: str,
+        source_key: str | None = None,
+        batch_size: int = IMPORT_BATCH_SIZE,
+        progress_cb: ProgressCb | None = None,
+        total: int | None = None,
+        note: str = "Запись в БД",
+    ) -> None:
+        self.conn = conn
+        self.write = write
+        self.batch_size = max(1, int(batch_size))
+        self.progress_cb = progress_cb
+        self.total = total
+        self.note = note
+        self.kind = kind
+        self.results: list[R] = []
+        self._batch: list[T] = []
+        self._written = 0
+        self._started = perf_counter()
+        ensure_import_log_tables(conn)
+        row = None
+        if source_key is not None:
+            row = conn.execute(
+                "SELECT id, done, failed, state FROM import_runs"
+                " WHERE source_key = ? AND kind = ? AND status = 'running'"
+                " ORDER BY id DESC LIMIT 1",
+                (source_key, kind),
+            ).fetchone()
+        if row is not None:
+            self.run_id = int(row[0])
+            self.skip = int(row[1])
+            self.failed = int(row[2])
+            self.state: dict[str, Any] = json.loads(row[3]) if row[3] else {}
+            logger.info(
+                "Продолжение импорта %s: пропускаем %d уже записанных записей",
+                kind,
+                self.skip,
+            )
+        else:
+            cur = conn.execute(
+                "INSERT INTO import_runs(source_key, kind) VALUES (?, ?)",
+                (source_key, kind),
+            )
+            self.run_id = int(cur.lastrowid)
+            self.skip = 0
+            self.failed = 0
+            self.state = {}
+        # Обработано записей, включая пропущенные при продолжении
+        self.done = 0
+
+    @property
+    def resumed(self) -> bool:
+        return self.skip > 0
+
+    @property
+    def rate(self) -> float:
+        """Записей в секунду, записанных в этом запуске."""
+        elapsed = perf_counter() - self._started
+        return self._written / elapsed if elapsed > 0 else 0.0
+
+    def add(self, record: T) -> None:
+        if self.done < self.skip:
+            self.done += 1
+            return
+        self._batch.append(record)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        batch, self._batch = self._batch, []
+        # Пачка, ее import_errors и отметка прогресса — одна транзакция. Без
+        # явного BEGIN внешний SAVEPOINT сам открыл бы транзакцию, и его
+        # RELEASE зафиксировал бы пачку отдельно от import_runs.done
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+        try:
+            if batch:
+                first_no = self.done
+                try:
+                    with savepoint(self.conn, "import_batch"):
+                        result = self.write(self.conn, batch)
+                    self.results.append(result)
+                except Exception as exc:
+                    logger.warning(
+                        "Пачка записей %d-%d не записана (%s), пишем по одной",
+                        first_no,
+                        first_no + len(batch) - 1,
+                        exc,
+                    )
+                    for offset, record in enumerate(batch):
+                        self._write_one(first_no + offset, record)
+                self.done += len(batch)
+                self._written += len(batch)
+            self._checkpoint()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+        if batch:
+            self._report()
+
+    def _write_one(self, record_no: int, record: T) -> None:
+        try:
+            with savepoint(self.conn, "import_record"):
+                result = self.write(self.conn, [record])
+            self.results.append(result)
+        except Exception as exc:
+            self.failed += 1
+            self.conn.execute(
+                "INSERT INTO import_errors(run_id, record_no, payload, error) VALUES (?, ?, ?, ?)",
+                (
+                    self.run_id,
+                    record_no,
+                    json.dumps(record, ensure_ascii=False, default=str),
+                    f"{type(exc).__name__}: {exc}",
+                ),
+            )
+
+    def _checkpoint(self, status: str = "running") -> None:
+        self.conn.execute(
+            "UPDATE import_runs SET done = ?, failed = ?, state = ?, status = ?,"
+            " finished_at = CASE WHEN ? = 'done' THEN datetime('now') END"
+            " WHERE id = ?",
+            (
+                self.done,
+                self.failed,
+                json.dumps(self.state, ensure_ascii=False, default=str),
+                status,
+                status,
+                self.run_id,
+            ),
+        )
+
+    def _report(self) -> None:
+        if not self.progress_cb:
+            return
+        total = max(self.total or 0, self.done)
+        note = f"{self.note}: {self.done} из {total} ({self.rate:.0f} записей/с)"
+        if self.failed:
+            note += f", ошибок: {self.failed}"
+        try:
+            self.progress_cb(self.done, total, note)
+        except Exception as exc:
+            logger.exception("Ignored unexpected error: %s", exc)
+
+    def finish(self) -> None:
+        """Пишет остаток и отмечает запуск завершенным."""
+        self.flush()
+        self._checkpoint("done")
+        self.conn.commit()
+        if self.failed:
+            logger.warning(
+                "Импорт %s: %d записей не записано, см. import_errors (run_id=%d)",
+                self.kind,
+                self.failed,
+                self.run_id,
+            )
+
+    def __enter__(self) -> "BatchCommitter[T, R]":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # При сбое запуск остается незавершенным — его продолжит следующий импорт
+        if exc_type is None:
+            self.finish()
+
+
+def import_errors(conn: sqlite3.Connection, run_id: int) -> list[dict[str, Any]]:
+    """Отклоненные записи запуска импорта: record_no, payload, error."""
+    return [
+        {
+            "record_no": int(r[0]),
+            "payload": json.loads(r[1]) if r[1] else None,
+            "error": r[2],
+        }
+        for r in conn.execute(
+            "SELECT record_no, payload, error FROM import_errors WHERE run_id = ? ORDER BY record_no",
+            (run_id,),
+        )
+    ]
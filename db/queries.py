@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import Any, Sequence
+from typing import Any, Iterable, Sequence
 
+from db.schema import work_order_date_key_sql
 from utils.text import normalize_for_search
 
 import logging
@@ -33,6 +34,76 @@ def set_product_contract(
     )
 
 
+# --- Helpers for bulk upserts ---
+
+# Параметров в одном запросе вида "IN (?, ?, ...)"; с запасом ниже лимита SQLite
+_IN_CHUNK = 500
+
+
+def _count_rows(conn: sqlite3.Connection, table: str) -> int:
+    return int(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
+
+
+def _chunks(values: Sequence[Any], size: int = _IN_CHUNK) -> Iterable[Sequence[Any]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def get_rows_by_ids(
+    conn: sqlite3.Connection, table: str, ids: Iterable[int], columns: str = "*"
+) -> dict[int, sqlite3.Row]:
+    """id -> строка таблицы для набора id (запросами IN по _IN_CHUNK)."""
+    wanted = sorted({int(i) for i in ids})
+    out: dict[int, sqlite3.Row] = {}
+    for part in _chunks(wanted):
+        for r in conn.execute(
+            f"SELECT id, {columns} FROM {table} WHERE id IN ({','.join('?' * len(part))})",
+            tuple(part),
+        ):
+            out[int(r["id"])] = r
+    return out
+
+
+def _contract_ids_by_code_norm(
+    conn: sqlite3.Connection, code_norms: Iterable[str]
+) -> dict[str, int]:
+    """code_norm -> id контракта (при дублях — первый по id, как fetchone)."""
+    out: dict[str, int] = {}
+    norms = sorted({c for c in code_norms if c})
+    for part in _chunks(norms):
+        rows = conn.execute(
+            f"SELECT id, code_norm FROM contracts WHERE code_norm IN ({','.join('?' * len(part))}) ORDER BY id",
+            tuple(part),
+        ).fetchall()
+        for r in rows:
+            out.setdefault(r["code_norm"], int(r["id"]))
+    return out
+
+
+def get_or_create_contract_ids(
+    conn: sqlite3.Connection, codes: Iterable[str]
+) -> dict[str, int]:
+    """Bulk-версия get_or_create_contract_by_code.
+
+    Возвращает словарь normalize_for_search(code) -> id; недостающие контракты
+    создаются одним executemany. Коды, которые создать не удалось, в словарь
+    не попадают.
+    """
+    first_spelling: dict[str, str] = {}
+    for code in codes:
+        if code:
+            first_spelling.setdefault(normalize_for_search(code), code)
+    ids = _contract_ids_by_code_norm(conn, first_spelling)
+    missing = [norm for norm in first_spelling if norm not in ids]
+    if missing:
+        conn.executemany(
+            "INSERT INTO contracts(code, code_norm) VALUES (?, ?) ON CONFLICT(code) DO NOTHING",
+            [(first_spelling[norm], norm) for norm in missing],
+        )
+        ids.update(_contract_ids_by_code_norm(conn, missing))
+    return ids
+
+
 # Workers
 
 
@@ -129,6 +200,153 @@ def upsert_worker(
         return 0
 
 
+_UPDATE_WORKER_SQL = "UPDATE workers SET full_name = ?, full_name_norm=?, dept = ?, dept_norm=?, position = ?, position_norm=?, personnel_no = ?, personnel_no_norm=?, status = ?, status_norm=? WHERE id = ?"
+
+
+def _worker_params(w: dict[str, Any]) -> tuple[Any, ...]:
+    return (
+        w["full_name"],
+        normalize_for_search(w["full_name"]),
+        w["dept"],
+        normalize_for_search(w["dept"]),
+        w["position"],
+        normalize_for_search(w["position"]),
+        w["personnel_no"],
+        normalize_for_search(w["personnel_no"]),
+        w["status"],
+        normalize_for_search(w["status"]),
+    )
+
+
+def bulk_upsert_workers(
+    conn: sqlite3.Connection,
+    rows: Iterable[tuple[str, str | None, str | None, str, str | None]],
+) -> tuple[int, int]:
+    """Set-based upsert_worker для импорта.
+
+    rows — кортежи (full_name, dept, position, personnel_no, status).
+    Справочник читается одним запросом, сопоставление по табельному номеру и
+    ФИО (с теми же правилами, что и в upsert_worker) выполняется в памяти,
+    а изменения записываются двумя executemany: UPDATE существующих и INSERT
+    новых. Если набор переименовывает работников «по цепочке» или содержит
+    конфликт, на котором upsert_worker упал бы, строки проводятся построчно.
+    Возвращает (добавлено, обновлено).
+    """
+    rows = list(rows)
+    if not rows:
+        return 0, 0
+    state: dict[int, dict[str, Any]] = {}
+    by_name: dict[str, int] = {}
+    by_tab: dict[str, int] = {}
+    by_name_norm: dict[str, set[int]] = {}
+    by_tab_norm: dict[str, set[int]] = {}
+    for r in conn.execute(
+        "SELECT id, full_name, full_name_norm, dept, position, personnel_no, personnel_no_norm, status FROM workers"
+    ):
+        wid = int(r["id"])
+        state[wid] = {k: r[k] for k in ("full_name", "dept", "position", "personnel_no", "status")}
+        by_name[r["full_name"]] = wid
+        by_tab[r["personnel_no"]] = wid
+        by_name_norm.setdefault(r["full_name_norm"], set()).add(wid)
+        by_tab_norm.setdefault(r["personnel_no_norm"], set()).add(wid)
+    initial = {wid: (w["full_name"], w["personnel_no"]) for wid, w in state.items()}
+    next_id = max(state, default=0) + 1
+    inserted: list[int] = []
+    updated_ids: set[int] = set()
+    chained = False
+
+    def _move(index: dict[str, set[int]], old: str | None, new: str | None, wid: int) -> None:
+        if old == new:
+            return
+        index.get(old, set()).discard(wid)
+        index.setdefault(new, set()).add(wid)
+
+    for full_name, dept, position, personnel_no, status in rows:
+        name_owner = by_name.get(full_name)
+        tab_owner = by_tab.get(personnel_no)
+        if name_owner is None and tab_owner is None:
+            wid = next_id
+            next_id += 1
+            state[wid] = {
+                "full_name": full_name,
+                "dept": dept,
+                "position": position,
+                "personnel_no": personnel_no,
+                "status": status or "Работает",
+            }
+            by_name[full_name] = wid
+            by_tab[personnel_no] = wid
+            by_name_norm.setdefault(normalize_for_search(full_name), set()).add(wid)
+            by_tab_norm.setdefault(normalize_for_search(personnel_no), set()).add(wid)
+            inserted.append(wid)
+            continue
+        # Сначала по табельному номеру, затем по ФИО
+        candidates = by_tab_norm.get(normalize_for_search(personnel_no))
+        by_personnel = bool(candidates)
+        if not candidates:
+            candidates = by_name_norm.get(normalize_for_search(full_name))
+        if not candidates:
+            continue
+        wid = min(candidates)
+        w = state[wid]
+        new_name, new_tab = full_name, personnel_no
+        if by_personnel:
+            if tab_owner not in (None, wid):
+                chained = True
+                break
+            if name_owner not in (None, wid):
+                new_name = w["full_name"]
+        else:
+            if name_owner not in (None, wid):
+                chained = True
+                break
+            if tab_owner not in (None, wid):
+                new_tab = w["personnel_no"]
+        if by_name.get(w["full_name"]) == wid:
+            del by_name[w["full_name"]]
+        if by_tab.get(w["personnel_no"]) == wid:
+            del by_tab[w["personnel_no"]]
+        _move(by_name_norm, normalize_for_search(w["full_name"]), normalize_for_search(new_name), wid)
+        _move(by_tab_norm, normalize_for_search(w["personnel_no"]), normalize_for_search(new_tab), wid)
+        by_name[new_name] = wid
+        by_tab[new_tab] = wid
+        w.update(
+            full_name=new_name,
+            dept=dept,
+            position=position,
+            personnel_no=new_tab,
+            status=status or w["status"] or "Работает",
+        )
+        if wid in initial:
+            updated_ids.add(wid)
+
+    if not chained:
+        # Новое значение, совпадающее со старым значением другого работника,
+        # при пакетном UPDATE дало бы временный конфликт уникальности
+        old_names = {name: wid for wid, (name, _tab) in initial.items()}
+        old_tabs = {tab: wid for wid, (_name, tab) in initial.items()}
+        for wid in updated_ids:
+            w = state[wid]
+            if old_names.get(w["full_name"], wid) != wid or old_tabs.get(w["personnel_no"], wid) != wid:
+                chained = True
+                break
+    if chained:
+        before = _count_rows(conn, "workers")
+        done = sum(1 for row in rows if upsert_worker(conn, *row))
+        added = _count_rows(conn, "workers") - before
+        return added, max(0, done - added)
+
+    conn.executemany(
+        _UPDATE_WORKER_SQL,
+        [_worker_params(state[wid]) + (wid,) for wid in sorted(updated_ids)],
+    )
+    conn.executemany(
+        "INSERT INTO workers(full_name, full_name_norm, dept, dept_norm, position, position_norm, personnel_no, personnel_no_norm, status, status_norm) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [_worker_params(state[wid]) for wid in inserted],
+    )
+    return len(inserted), len(updated_ids)
+
+
 def update_worker(
     conn: sqlite3.Connection,
     worker_id: int,
@@ -319,19 +537,74 @@ def delete_job_type(conn: sqlite3.Connection, job_type_id: int) -> None:
     conn.execute("DELETE FROM job_types WHERE id = ?", (job_type_id,))
 
 
-def upsert_job_type(
-    conn: sqlite3.Connection, name: str, unit: str, price: float
-) -> int:
-    sql = """
+_UPSERT_JOB_TYPE_SQL = """
     INSERT INTO job_types(name, name_norm, unit, unit_norm, price) VALUES (?, ?, ?, ?, ?)
     ON CONFLICT(name) DO UPDATE SET unit=excluded.unit, unit_norm=excluded.unit_norm, price=excluded.price
     """
+
+
+def upsert_job_type(
+    conn: sqlite3.Connection, name: str, unit: str, price: float
+) -> int:
     cur = conn.execute(
-        sql, (name, normalize_for_search(name), unit, normalize_for_search(unit), price)
+        _UPSERT_JOB_TYPE_SQL,
+        (name, normalize_for_search(name), unit, normalize_for_search(unit), price),
     )
     return cur.lastrowid or cur.rowcount
 
 
+def bulk_upsert_job_types(
+    conn: sqlite3.Connection, rows: Iterable[tuple[str, str, float]]
+) -> tuple[int, int]:
+    """upsert_job_type для набора строк (name, unit, price) одним executemany.
+
+    Возвращает (добавлено, обновлено): добавленные — прирост числа строк
+    таблицы, обновленные — остальные изменения (changes()).
+    """
+    params = [
+        (name, normalize_for_search(name), unit, normalize_for_search(unit), price)
+        for name, unit, price in rows
+    ]
+    if not params:
+        return 0, 0
+    before = _count_rows(conn, "job_types")
+    cur = conn.executemany(_UPSERT_JOB_TYPE_SQL, params)
+    added = _count_rows(conn, "job_types") - before
+    return added, max(0, cur.rowcount - added)
+
+
+def get_job_type_ids_by_names(
+    conn: sqlite3.Connection, names: Iterable[str]
+) -> dict[str, int]:
+    """Имя -> id вида работ для набора имен (как get_job_type_by_name, пачкой).
+
+    Сначала ищем по name_norm, затем по точному имени.
+    """
+    wanted = {n: normalize_for_search(n) for n in names if n}
+    by_norm: dict[str, int] = {}
+    by_exact: dict[str, int] = {}
+    norms = sorted(set(wanted.values()))
+    for part in _chunks(norms):
+        for r in conn.execute(
+            f"SELECT id, name_norm FROM job_types WHERE name_norm IN ({','.join('?' * len(part))}) ORDER BY id",
+            tuple(part),
+        ):
+            by_norm.setdefault(r["name_norm"], int(r["id"]))
+    missing = sorted(n for n, norm in wanted.items() if norm not in by_norm)
+    for part in _chunks(missing):
+        for r in conn.execute(
+            f"SELECT id, name FROM job_types WHERE name IN ({','.join('?' * len(part))})",
+            tuple(part),
+        ):
+            by_exact[r["name"]] = int(r["id"])
+    out: dict[str, int] = {}
+    for name, norm in wanted.items():
+        jt_id = by_norm.get(norm, by_exact.get(name))
+        if jt_id is not None:
+            out[name] = jt_id
+    return out
+
+
 def get_job_type_by_name(conn: sqlite3.Connection, name: str) -> sqlite3.Row | None:
     return conn.execute(
         "SELECT * FROM job_types WHERE name_norm = ?", (normalize_for_search(name),)
@@ -439,15 +712,17 @@ def delete_product(conn: sqlite3.Connection, product_id: int) -> None:
     conn.execute("DELETE FROM products WHERE id = ?", (product_id,))
 
 
-def upsert_product(
-    conn: sqlite3.Connection, name: str, product_no: str, contract_id: int | None = None
-) -> int:
-    sql = """
+_UPSERT_PRODUCT_SQL = """
     INSERT INTO products(name, name_norm, product_no, product_no_norm, contract_id) VALUES (?, ?, ?, ?, ?)
     ON CONFLICT(product_no) DO UPDATE SET name=excluded.name, name_norm=excluded.name_norm, contract_id=COALESCE(excluded.contract_id, products.contract_id)
     """
+
+
+def upsert_product(
+    conn: sqlite3.Connection, name: str, product_no: str, contract_id: int | None = None
+) -> int:
     cur = conn.execute(
-        sql,
+        _UPSERT_PRODUCT_SQL,
         (
             name,
             normalize_for_search(name),
@@ -459,6 +734,43 @@ def upsert_product(
     return cur.lastrowid or cur.rowcount
 
 
+def bulk_upsert_products(
+    conn: sqlite3.Connection, rows: Iterable[tuple[str, str, str | None]]
+) -> tuple[int, int]:
+    """upsert_product для набора строк (name, product_no, contract_code).
+
+    Коды контрактов разрешаются заранее одним проходом
+    (get_or_create_contract_ids); изделия без кода или с кодом, который не
+    удалось создать, привязываются к контракту "Без контракта".
+    Возвращает (добавлено, обновлено).
+    """
+    rows = list(rows)
+    if not rows:
+        return 0, 0
+    contract_ids = get_or_create_contract_ids(conn, (code for _n, _no, code in rows if code))
+    default_id: int | None = None
+    params = []
+    for name, product_no, code in rows:
+        contract_id = contract_ids.get(normalize_for_search(code)) if code else None
+        if contract_id is None:
+            if default_id is None:
+                default_id = get_or_create_default_contract(conn)
+            contract_id = default_id
+        params.append(
+            (
+                name,
+                normalize_for_search(name),
+                product_no,
+                normalize_for_search(product_no),
+                contract_id,
+            )
+        )
+    before = _count_rows(conn, "products")
+    cur = conn.executemany(_UPSERT_PRODUCT_SQL, params)
+    added = _count_rows(conn, "products") - before
+    return added, max(0, cur.rowcount - added)
+
+
 def get_product(conn: sqlite3.Connection, product_id: int) -> sqlite3.Row | None:
     """Получает изделие по ID"""
     return conn.execute("SELECT * FROM products WHERE id = ?", (product_id,)).fetchone()
@@ -611,6 +923,49 @@ def delete_contract(conn: sqlite3.Connection, contract_id: int) -> None:
     conn.execute("DELETE FROM contracts WHERE id = ?", (contract_id,))
 
 
+_UPSERT_CONTRACT_SQL = """
+    INSERT INTO contracts(code, code_norm, name, name_norm, contract_type, contract_type_norm, executor, executor_norm, igk, contract_number, bank_account, start_date, end_date, description) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(code) DO UPDATE SET 
+        name=excluded.name, name_norm=excluded.name_norm,
+        contract_type=excluded.contract_type, contract_type_norm=excluded.contract_type_norm,
+        executor=excluded.executor, executor_norm=excluded.executor_norm,
+        igk=excluded.igk, contract_number=excluded.contract_number, bank_account=excluded.bank_account,
+        start_date=excluded.start_date, end_date=excluded.end_date, description=excluded.description
+    """
+
+_CONTRACT_HISTORY_COLUMNS = "contract_id, code, name, contract_type, executor, igk, contract_number, bank_account, start_date, end_date, description"
+
+
+def _contract_params(
+    code: str,
+    start_date: str | None,
+    end_date: str | None,
+    description: str | None,
+    name: str | None = None,
+    contract_type: str | None = None,
+    executor: str | None = None,
+    igk: str | None = None,
+    contract_number: str | None = None,
+    bank_account: str | None = None,
+) -> tuple[Any, ...]:
+    return (
+        code,
+        normalize_for_search(code),
+        name,
+        normalize_for_search(name) if name else None,
+        contract_type,
+        normalize_for_search(contract_type) if contract_type else None,
+        executor,
+        normalize_for_search(executor) if executor else None,
+        igk,
+        contract_number,
+        bank_account,
+        start_date,
+        end_date,
+        description,
+    )
+
+
 def upsert_contract(
     conn: sqlite3.Connection,
     code: str,
@@ -626,22 +981,13 @@ def upsert_contract(
 ) -> int:
     # Save history snapshot when updating existing contract
     existing = get_contract_by_code(conn, code)
-    sql = """
-    INSERT INTO contracts(code, code_norm, name, name_norm, contract_type, contract_type_norm, executor, executor_norm, igk, contract_number, bank_account, start_date, end_date, description) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ON CONFLICT(code) DO UPDATE SET 
-        name=excluded.name, name_norm=excluded.name_norm,
-        contract_type=excluded.contract_type, contract_type_norm=excluded.contract_type_norm,
-        executor=excluded.executor, executor_norm=excluded.executor_norm,
-        igk=excluded.igk, contract_number=excluded.contract_number, bank_account=excluded.bank_account,
-        start_date=excluded.start_date, end_date=excluded.end_date, description=excluded.description
-    """
     # If will update existing, snapshot the previous state BEFORE update
     if existing:
         prev = existing
         if prev:
             conn.execute(
-                """
-                INSERT INTO contract_history(contract_id, code, name, contract_type, executor, igk, contract_number, bank_account, start_date, end_date, description)
+                f"""
+                INSERT INTO contract_history({_CONTRACT_HISTORY_COLUMNS})
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
@@ -659,27 +1005,73 @@ def upsert_contract(
                 ),
             )
     cur = conn.execute(
-        sql,
-        (
+        _UPSERT_CONTRACT_SQL,
+        _contract_params(
             code,
-            normalize_for_search(code),
-            name,
-            normalize_for_search(name) if name else None,
-            contract_type,
-            normalize_for_search(contract_type) if contract_type else None,
-            executor,
-            normalize_for_search(executor) if executor else None,
-            igk,
-            contract_number,
-            bank_account,
             start_date,
             end_date,
             description,
+            name=name,
+            contract_type=contract_type,
+            executor=executor,
+            igk=igk,
+            contract_number=contract_number,
+            bank_account=bank_account,
         ),
     )
     return cur.lastrowid or cur.rowcount
 
 
+def bulk_upsert_contracts(
+    conn: sqlite3.Connection, rows: Iterable[dict[str, Any]]
+) -> tuple[int, int]:
+    """upsert_contract для набора строк-словарей (ключи — аргументы upsert_contract).
+
+    Снимки в contract_history для уже существующих контрактов делаются одним
+    INSERT ... SELECT на контракт, затем строки проводятся одним executemany.
+    Повторы кода внутри набора идут следующими волнами, чтобы, как и при
+    построчной записи, сохранить в историю промежуточное состояние.
+    Возвращает (добавлено, обновлено).
+    """
+    fields = (
+        "start_date",
+        "end_date",
+        "description",
+        "name",
+        "contract_type",
+        "executor",
+        "igk",
+        "contract_number",
+        "bank_account",
+    )
+    waves: list[list[tuple[Any, ...]]] = []
+    seen: dict[str, int] = {}
+    for r in rows:
+        params = _contract_params(r["code"], *(r.get(f) for f in fields))
+        wave = seen.get(params[1], 0)
+        seen[params[1]] = wave + 1
+        if wave == len(waves):
+            waves.append([])
+        waves[wave].append(params)
+    added = 0
+    changed = 0
+    for wave_params in waves:
+        existing = _contract_ids_by_code_norm(conn, (p[1] for p in wave_params))
+        conn.executemany(
+            f"""
+            INSERT INTO contract_history({_CONTRACT_HISTORY_COLUMNS})
+            SELECT id, code, name, contract_type, executor, igk, contract_number, bank_account, start_date, end_date, description
+            FROM contracts WHERE id = ?
+            """,
+            [(existing[p[1]],) for p in wave_params if p[1] in existing],
+        )
+        before = _count_rows(conn, "contracts")
+        cur = conn.executemany(_UPSERT_CONTRACT_SQL, wave_params)
+        added += _count_rows(conn, "contracts") - before
+        changed += cur.rowcount
+    return added, max(0, changed - added)
+
+
 def get_contract_by_code(conn: sqlite3.Connection, code: str) -> sqlite3.Row | None:
     return conn.execute(
         "SELECT * FROM contracts WHERE code_norm = ?", (normalize_for_search(code),)
@@ -841,11 +1233,73 @@ def set_work_order_workers_with_amounts(
     )
 
 
+# Счетчик не отстает от введенных вручную номеров: MAX(order_no) берется по индексу
+_ORDER_NO_FLOOR_SQL = "(SELECT COALESCE(MAX(order_no), 0) + 1 FROM work_orders)"
+
+
 def next_order_no(conn: sqlite3.Connection) -> int:
+    """Номер, который получит следующий наряд (без резервирования — для показа)."""
+    row = conn.execute(
+        f"SELECT MAX(next_no, {_ORDER_NO_FLOOR_SQL}) AS next_no"
+        " FROM order_no_seq WHERE name = 'work_orders'"
+    ).fetchone()
+    if row is None:
+        row = conn.execute(f"SELECT {_ORDER_NO_FLOOR_SQL} AS next_no").fetchone()
+    return int(row["next_no"])
+
+
+def reserve_order_nos(conn: sqlite3.Connection, count: int = 1) -> int:
+    """Резервирует count подряд идущих номеров нарядов. Возвращает первый.
+
+    Один UPDATE ... RETURNING: блокировка записи берется сразу, поэтому
+    параллельные пользователи общей БД получают разные блоки, а не ловят
+    UNIQUE при сохранении.
+    """
     row = conn.execute(
-        "SELECT COALESCE(MAX(order_no), 0) + 1 AS next_no FROM work_orders"
+        f"UPDATE order_no_seq SET next_no = MAX(next_no, {_ORDER_NO_FLOOR_SQL}) + ?"
+        " WHERE name = 'work_orders' RETURNING next_no",
+        (count,),
     ).fetchone()
-    return int(row["next_no"]) if row else 1
+    if row is None:
+        raise sqlite3.OperationalError(
+            "Нет счетчика номеров нарядов (order_no_seq), выполните initialize_schema"
+        )
+    return int(row["next_no"]) - count
+
+
+def order_no_gaps(conn: sqlite3.Connection) -> list[tuple[int, int]]:
+    """Пропуски в нумерации до текущего счетчика: диапазоны (с, по) включительно."""
+    upper = next_order_no(conn) - 1
+    rows = conn.execute(
+        """
+        SELECT prev_no + 1 AS gap_from, order_no - 1 AS gap_to
+        FROM (
+            SELECT order_no, LAG(order_no, 1, 0) OVER (ORDER BY order_no) AS prev_no
+            FROM work_orders
+            UNION ALL
+            SELECT ? + 1, COALESCE(MAX(order_no), 0) FROM work_orders
+        )
+        WHERE order_no - prev_no > 1
+        ORDER BY gap_from
+        """,
+        (upper,),
+    ).fetchall()
+    return [(int(r["gap_from"]), int(r["gap_to"])) for r in rows]
+
+
+def get_order_ids_by_numbers(
+    conn: sqlite3.Connection, order_nos: Iterable[int]
+) -> dict[int, int]:
+    """Номер наряда -> id для набора номеров (занятые номера — ключи результата)."""
+    wanted = sorted({int(n) for n in order_nos})
+    out: dict[int, int] = {}
+    for part in _chunks(wanted):
+        for r in conn.execute(
+            f"SELECT id, order_no FROM work_orders WHERE order_no IN ({','.join('?' * len(part))})",
+            tuple(part),
+        ):
+            out[int(r["order_no"])] = int(r["id"])
+    return out
 
 
 def order_no_in_use(
@@ -874,6 +1328,95 @@ def fetch_work_orders(
     return conn.execute(sql, params or []).fetchall()
 
 
+# Колонки списка нарядов -> ключ сортировки (у всех, кроме контракта, есть
+# индекс, см. schema.DDL_INDEXES). Ключи не бывают NULL, иначе продолжение
+# по ключу теряло бы строки.
+WORK_ORDER_SORT_KEYS = {
+    "no": "wo.order_no",
+    "date": work_order_date_key_sql("wo."),
+    "contract": "COALESCE(c.code, '')",
+    "product": "wo.product_names",
+    "total": "wo.total_amount",
+}
+
+
+def _iso_date(value: str) -> str:
+    # ДД.ММ.ГГГГ -> ГГГГ-ММ-ДД, как work_order_date_key_sql; иное — как есть
+    parts = value.split(".")
+    if len(parts) == 3 and len(parts[2]) == 4:
+        return f"{parts[2]}-{parts[1].zfill(2)}-{parts[0].zfill(2)}"
+    return value
+
+
+def list_work_orders_page(
+    conn: sqlite3.Connection,
+    *,
+    sort: str = "no",
+    descending: bool = True,
+    after: tuple[Any, int] | None = None,
+    limit: int = 100,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    contract: str | None = None,
+    product: str | None = None,
+    worker: str | None = None,
+) -> list[sqlite3.Row]:
+    """Страница списка нарядов с продолжением по ключу (keyset).
+
+    Сортировка по колонке sort (WORK_ORDER_SORT_KEYS), при равенстве — по id.
+    after — (sort_key, id) последней показанной строки: следующая страница
+    начинается сразу за ней, без OFFSET, поэтому глубокая прокрутка не
+    пересчитывает пропущенные строки. Даты — ДД.ММ.ГГГГ включительно;
+    contract, product, worker — подстроки кода/названия контракта, названия/
+    номера изделия и ФИО работника.
+    """
+    key = WORK_ORDER_SORT_KEYS[sort]
+    where: list[str] = []
+    params: list[Any] = []
+    date_key = WORK_ORDER_SORT_KEYS["date"]
+    if date_from:
+        where.append(f"{date_key} >= ?")
+        params.append(_iso_date(date_from))
+    if date_to:
+        where.append(f"{date_key} <= ?")
+        params.append(_iso_date(date_to))
+    if contract:
+        like = f"%{normalize_for_search(contract)}%"
+        where.append("(c.code_norm LIKE ? OR c.name_norm LIKE ?)")
+        params.extend([like, like])
+    if product:
+        like = f"%{normalize_for_search(product)}%"
+        where.append(
+            "EXISTS (SELECT 1 FROM work_order_products wop"
+            " JOIN products p ON p.id = wop.product_id"
+            " WHERE wop.work_order_id = wo.id"
+            " AND (p.name_norm LIKE ? OR p.product_no_norm LIKE ?))"
+        )
+        params.extend([like, like])
+    if worker:
+        where.append(
+            "EXISTS (SELECT 1 FROM work_order_workers wow"
+            " JOIN workers w ON w.id = wow.worker_id"
+            " WHERE wow.work_order_id = wo.id AND w.full_name_norm LIKE ?)"
+        )
+        params.append(f"%{normalize_for_search(worker)}%")
+    if after is not None:
+        # Развернутое (key, id) < (?, ?): так SQLite ищет по индексу ключа
+        op = "<" if descending else ">"
+        where.append(f"{key} {op}= ? AND ({key} {op} ? OR wo.id {op} ?)")
+        params.extend([after[0], after[0], after[1]])
+    direction = "DESC" if descending else "ASC"
+    sql = (
+        f"SELECT wo.id, wo.order_no, wo.date, c.code AS contract_code,"
+        f" wo.product_names AS product_name, wo.total_amount, {key} AS sort_key"
+        " FROM work_orders wo LEFT JOIN contracts c ON c.id = wo.contract_id"
+        + (f" WHERE {' AND '.join(where)}" if where else "")
+        + f" ORDER BY {key} {direction}, wo.id {direction} LIMIT ?"
+    )
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
 def get_work_order_header(
     conn: sqlite3.Connection, work_order_id: int
 ) -> sqlite3.Row | None:
@@ -980,6 +1523,57 @@ def get_work_order_products(
     ).fetchall()
 
 
+_WORK_ORDERS_FULL_SQL = """
+    SELECT wo.id, wo.order_no, wo.date, wo.contract_id, wo.total_amount,
+           c.code AS contract_code, c.name AS contract_name,
+           (SELECT json_group_array(json_array(job_type_id, job_name, quantity, unit_price, line_amount))
+              FROM (SELECT woi.job_type_id, jt.name AS job_name, woi.quantity,
+                           woi.unit_price, woi.line_amount
+                      FROM work_order_items woi
+                      JOIN job_types jt ON jt.id = woi.job_type_id
+                     WHERE woi.work_order_id = wo.id
+                     ORDER BY woi.id)) AS items_json,
+           (SELECT json_group_array(json_array(worker_id, full_name, amount))
+              FROM (SELECT wow.worker_id, w.full_name, COALESCE(wow.amount, 0) AS amount
+                      FROM work_order_workers wow
+                      JOIN workers w ON w.id = wow.worker_id
+                     WHERE wow.work_order_id = wo.id
+                     ORDER BY w.full_name)) AS workers_json,
+           (SELECT json_group_array(json_array(id, product_no, name))
+              FROM (SELECT p.id, p.product_no, p.name
+                      FROM work_order_products wop
+                      JOIN products p ON p.id = wop.product_id
+                     WHERE wop.work_order_id = wo.id
+                     ORDER BY p.name)) AS products_json
+    FROM work_orders wo
+    LEFT JOIN contracts c ON c.id = wo.contract_id
+    WHERE wo.id IN ({marks})
+"""
+
+
+def get_work_orders_full(
+    conn: sqlite3.Connection, work_order_ids: Iterable[int]
+) -> list[sqlite3.Row]:
+    """Наряды целиком одним запросом на пачку id.
+
+    Шапка с кодом и названием контракта плюс JSON-массивы строк:
+    items_json — [job_type_id, job_name, quantity, unit_price, line_amount],
+    workers_json — [worker_id, full_name, amount],
+    products_json — [id, product_no, name]
+    (порядок тот же, что у get_work_order_items/workers/products).
+    """
+    ids = sorted({int(i) for i in work_order_ids})
+    rows: list[sqlite3.Row] = []
+    for part in _chunks(ids):
+        rows.extend(
+            conn.execute(
+                _WORK_ORDERS_FULL_SQL.format(marks=",".join("?" * len(part))),
+                tuple(part),
+            )
+        )
+    return rows
+
+
 def get_contract_from_products(
     conn: sqlite3.Connection, product_ids: list[int]
 ) -> int | None:
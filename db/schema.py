@@ -3,11 +3,29 @@ from __future__ import annotations
 import logging
 import sqlite3
 
+import numpy as np
+
+from utils.allocation import allocate_batch, from_kopecks, to_kopecks
 from utils.text import normalize_for_search
 
 logger = logging.getLogger(__name__)
 
 
+def work_order_date_key_sql(alias: str = "") -> str:
+    """Дата наряда как ГГГГ-ММ-ДД для сравнения и сортировки.
+
+    Формы пишут ДД.ММ.ГГГГ, импорт CSV — ГГГГ-ММ-ДД. Тем же выражением
+    (без alias) построен индекс idx_work_orders_date_key: чтобы он
+    использовался, запросы должны брать выражение отсюда.
+    """
+    col = f"{alias}date"
+    return (
+        f"(CASE WHEN {col} LIKE '__.__.____'"
+        f" THEN substr({col}, 7, 4) || '-' || substr({col}, 4, 2) || '-' || substr({col}, 1, 2)"
+        f" ELSE substr({col}, 1, 10) END)"
+    )
+
+
 DDL_TABLES_SQL = r"""
 CREATE TABLE IF NOT EXISTS workers (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -66,6 +84,7 @@ CREATE TABLE IF NOT EXISTS work_orders (
     date TEXT NOT NULL,
     contract_id INTEGER,
     total_amount NUMERIC NOT NULL DEFAULT 0 CHECK (total_amount >= 0),
+    product_names TEXT NOT NULL DEFAULT '',
     FOREIGN KEY (contract_id) REFERENCES contracts(id) ON UPDATE CASCADE ON DELETE SET NULL
 );
 
@@ -225,6 +244,32 @@ DDL_INDEXES = (
         ("order_no",),
         "CREATE INDEX IF NOT EXISTS idx_work_orders_order_no ON work_orders(order_no)",
     ),
+    # Сортировка и постраничный вывод списка нарядов (queries.list_work_orders_page)
+    (
+        "idx_work_orders_date_key",
+        "work_orders",
+        ("date",),
+        "CREATE INDEX IF NOT EXISTS idx_work_orders_date_key"
+        f" ON work_orders({work_order_date_key_sql()})",
+    ),
+    (
+        "idx_work_orders_product_names",
+        "work_orders",
+        ("product_names",),
+        "CREATE INDEX IF NOT EXISTS idx_work_orders_product_names ON work_orders(product_names)",
+    ),
+    (
+        "idx_work_orders_total",
+        "work_orders",
+        ("total_amount",),
+        "CREATE INDEX IF NOT EXISTS idx_work_orders_total ON work_orders(total_amount)",
+    ),
+    (
+        "idx_work_orders_contract_id",
+        "work_orders",
+        ("contract_id",),
+        "CREATE INDEX IF NOT EXISTS idx_work_orders_contract_id ON work_orders(contract_id)",
+    ),
     (
         "idx_wo_products_wo",
         "work_order_products",
@@ -261,6 +306,9 @@ def initialize_schema(conn: sqlite3.Connection) -> None:
     ensure_products_contract_column(conn)
     ensure_contracts_extended_columns(conn)
     ensure_contract_history_table(conn)
+    ensure_import_log_tables(conn)
+    ensure_order_no_sequence(conn)
+    ensure_work_order_product_names(conn)
 
     # Ensure new columns for worker allocations are present and backfilled
     ensure_work_order_workers_amounts(conn)
@@ -483,6 +531,126 @@ def ensure_contract_history_table(conn: sqlite3.Connection) -> None:
         logger.warning("ensure_contract_history_table failed: %s", exc)
 
 
+# Журнал пакетного импорта (db.batch_commit): прогресс запусков и отклоненные записи
+_IMPORT_LOG_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS import_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source_key TEXT,
+        kind TEXT NOT NULL,
+        done INTEGER NOT NULL DEFAULT 0,
+        failed INTEGER NOT NULL DEFAULT 0,
+        state TEXT,
+        status TEXT NOT NULL DEFAULT 'running',
+        started_at TEXT NOT NULL DEFAULT (datetime('now')),
+        finished_at TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_import_runs_source ON import_runs(source_key, kind, status)",
+    """
+    CREATE TABLE IF NOT EXISTS import_errors (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id INTEGER NOT NULL,
+        record_no INTEGER NOT NULL,
+        payload TEXT,
+        error TEXT NOT NULL,
+        created_at TEXT NOT NULL DEFAULT (datetime('now')),
+        FOREIGN KEY (run_id) REFERENCES import_runs(id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_import_errors_run ON import_errors(run_id, record_no)",
+)
+
+
+def ensure_import_log_tables(conn: sqlite3.Connection) -> None:
+    # Без executescript: он фиксирует открытую транзакцию, а вызывается и посреди импорта
+    for sql in _IMPORT_LOG_DDL:
+        conn.execute(sql)
+
+
+def ensure_order_no_sequence(conn: sqlite3.Connection) -> None:
+    """Счетчик номеров нарядов; при создании продолжает текущий максимум."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS order_no_seq (
+            name TEXT PRIMARY KEY,
+            next_no INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO order_no_seq(name, next_no)"
+        " SELECT 'work_orders', COALESCE(MAX(order_no), 0) + 1 FROM work_orders"
+    )
+
+
+# Названия изделий наряда через запятую, по алфавиту (как в форме наряда)
+_PRODUCT_NAMES_SQL = """
+    COALESCE((SELECT group_concat(name, ', ') FROM (
+        SELECT p.name FROM work_order_products wop
+        JOIN products p ON p.id = wop.product_id
+        WHERE wop.work_order_id = {order_id}
+        ORDER BY p.name
+    )), '')
+"""
+
+_PRODUCT_NAMES_TRIGGERS = (
+    (
+        "trg_wo_products_insert",
+        "AFTER INSERT ON work_order_products",
+        "NEW.work_order_id",
+    ),
+    (
+        "trg_wo_products_delete",
+        "AFTER DELETE ON work_order_products",
+        "OLD.work_order_id",
+    ),
+    (
+        "trg_wo_products_update_old",
+        "AFTER UPDATE ON work_order_products",
+        "OLD.work_order_id",
+    ),
+    (
+        "trg_wo_products_update_new",
+        "AFTER UPDATE ON work_order_products",
+        "NEW.work_order_id",
+    ),
+)
+
+
+def ensure_work_order_product_names(conn: sqlite3.Connection) -> None:
+    """Колонка work_orders.product_names для списка нарядов.
+
+    Поддерживается триггерами на work_order_products и переименование
+    изделий, поэтому список нарядов не собирает GROUP_CONCAT на каждую
+    страницу. При добавлении колонки заполняется для всех нарядов.
+    """
+    if not table_exists(conn, "work_orders"):
+        return
+    if "product_names" not in get_table_columns(conn, "work_orders"):
+        conn.execute(
+            "ALTER TABLE work_orders ADD COLUMN product_names TEXT NOT NULL DEFAULT ''"
+        )
+        conn.execute(
+            "UPDATE work_orders SET product_names = "
+            + _PRODUCT_NAMES_SQL.format(order_id="work_orders.id")
+        )
+    for name, event, order_id in _PRODUCT_NAMES_TRIGGERS:
+        conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN"
+            f" UPDATE work_orders SET product_names = {_PRODUCT_NAMES_SQL.format(order_id=order_id)}"
+            f" WHERE id = {order_id}; END"
+        )
+    conn.execute(
+        "CREATE TRIGGER IF NOT EXISTS trg_products_name_update"
+        " AFTER UPDATE OF name ON products BEGIN"
+        " UPDATE work_orders SET product_names = "
+        + _PRODUCT_NAMES_SQL.format(order_id="work_orders.id")
+        + " WHERE id IN (SELECT work_order_id FROM work_order_products"
+        " WHERE product_id = NEW.id); END"
+    )
+
+
 def create_indexes_if_possible(conn: sqlite3.Connection) -> None:
     for idx_name, table, required_cols, create_sql in DDL_INDEXES:
         if not table_exists(conn, table):
@@ -506,7 +674,7 @@ def ensure_work_order_workers_amounts(conn: sqlite3.Connection) -> None:
     """Add amount column to work_order_workers and backfill equal shares if empty.
 
     - Adds column if missing
-    - Backfills per worker amount = total_amount / count, rounding to 2 decimals and fixing remainder
+    - Backfills per worker amount = total_amount / count in kopecks (utils.allocation)
     """
     try:
         if not table_exists(conn, "work_order_workers"):
@@ -516,30 +684,34 @@ def ensure_work_order_workers_amounts(conn: sqlite3.Connection) -> None:
             conn.execute(
                 "ALTER TABLE work_order_workers ADD COLUMN amount NUMERIC NOT NULL DEFAULT 0"
             )
-        # For each work order, if all amounts are zero, distribute equally
-        orders = conn.execute("SELECT id, total_amount FROM work_orders").fetchall()
-        for o in orders:
-            rows = conn.execute(
-                "SELECT worker_id, amount FROM work_order_workers WHERE work_order_id=? ORDER BY worker_id",
-                (o["id"],),
-            ).fetchall()
-            if not rows:
-                continue
-            if all((r["amount"] is None or float(r["amount"]) == 0.0) for r in rows):
-                n = len(rows)
-                total = (
-                    float(o["total_amount"]) if o["total_amount"] is not None else 0.0
-                )
-                per = round((total / n) if n else 0.0, 2)
-                amounts = [per] * n
-                # Adjust last to correct rounding diff
-                diff = round(total - round(per * n, 2), 2)
-                if n > 0 and abs(diff) >= 0.01:
-                    amounts[-1] = round(amounts[-1] + diff, 2)
-                for idx, r in enumerate(rows):
-                    conn.execute(
-                        "UPDATE work_order_workers SET amount=? WHERE work_order_id=? AND worker_id=?",
-                        (amounts[idx], o["id"], r["worker_id"]),
-                    )
+        # Наряды, где у всех работников нулевые суммы, делим поровну — одним
+        # проходом по всей таблице (allocate_batch)
+        rows = conn.execute(
+            """
+            SELECT wow.work_order_id, wow.worker_id, wo.total_amount
+            FROM work_order_workers wow
+            JOIN work_orders wo ON wo.id = wow.work_order_id
+            WHERE wow.work_order_id IN (
+                SELECT work_order_id FROM work_order_workers
+                GROUP BY work_order_id
+                HAVING MAX(ABS(COALESCE(amount, 0))) = 0
+            )
+            ORDER BY wow.work_order_id, wow.worker_id
+            """
+        ).fetchall()
+        if not rows:
+            return
+        order_ids = np.array([r["work_order_id"] for r in rows], dtype=np.int64)
+        starts = np.flatnonzero(np.r_[True, order_ids[1:] != order_ids[:-1]])
+        sizes = np.diff(np.r_[starts, len(rows)])
+        totals = np.array([to_kopecks(rows[i]["total_amount"]) for i in starts])
+        shares = allocate_batch(totals, sizes)
+        conn.executemany(
+            "UPDATE work_order_workers SET amount=? WHERE work_order_id=? AND worker_id=?",
+            [
+                (from_kopecks(int(kop)), r["work_order_id"], r["worker_id"])
+                for kop, r in zip(shares, rows)
+            ],
+        )
     except Exception as exc:  # safety: don't break startup
         logger.warning("ensure_work_order_workers_amounts failed: %s", exc)
@@ -4,13 +4,13 @@ import customtkinter as ctk
 from tkinter import filedialog, messagebox
 
 from db.sqlite import get_connection
+from utils.export_ui import export_all_tables_with_progress
 from import_export.excel_io import (
     import_workers_from_excel,
     import_job_types_from_excel,
     import_products_from_excel,
     import_contracts_from_excel,
     export_table_to_excel,
-    export_all_tables_to_excel,
     generate_workers_template,
     generate_job_types_template,
     generate_products_template,
@@ -173,15 +173,7 @@ class ImportExportView(ctk.CTkFrame):
             messagebox.showerror("Экспорт", str(exc))
 
     def _export_all(self) -> None:
-        directory = filedialog.askdirectory(title="Выберите папку для экспорта")
-        if not directory:
-            return
-        try:
-            with get_connection() as conn:
-                export_all_tables_to_excel(conn, directory)
-            messagebox.showinfo("Экспорт", "Готово")
-        except Exception as exc:
-            messagebox.showerror("Экспорт", str(exc))
+        export_all_tables_with_progress(self)
 
     # Templates
     def _save_template(self, kind: str) -> None:
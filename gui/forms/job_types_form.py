@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import datetime as dt
 import sqlite3
 import customtkinter as ctk
 from tkinter import ttk, messagebox
@@ -9,6 +10,7 @@ from db.sqlite import get_connection
 from utils.readonly_ui import guard_readonly
 from utils.export_ui import create_export_button
 from services import reference_data as ref
+from services.repricing import apply_repricing, plan_repricing
 from db import queries as q
 from utils.usage_history import record_use, get_recent
 from utils.autocomplete_positioning import (
@@ -87,6 +89,10 @@ class JobTypesForm(ctk.CTkFrame):
         )
         for b in (save_btn, cancel_btn, clear_btn, del_btn):
             b.pack(side="left", padx=5)
+        reprice_btn = ctk.CTkButton(
+            btns, text="Пересчитать наряды…", command=self._open_repricing
+        )
+        reprice_btn.pack(side="left", padx=5)
         export_btn = create_export_button(btns, "job_types", "Экспорт видов работ")
         export_btn.pack(side="right")
         if self._readonly:
@@ -97,7 +103,7 @@ class JobTypesForm(ctk.CTkFrame):
                     logging.getLogger(__name__).exception(
                         "Ignored unexpected error: %s", exc
                     )
-            for b in (save_btn, cancel_btn, clear_btn, del_btn):
+            for b in (save_btn, cancel_btn, clear_btn, del_btn, reprice_btn):
                 b.configure(state="disabled")
 
         table_frame = ctk.CTkFrame(self)
@@ -395,5 +401,89 @@ class JobTypesForm(ctk.CTkFrame):
         self._load()
         self._clear()
 
+    def _open_repricing(self) -> None:
+        """Пересчет нарядов за период по текущим ценам: проверка, затем запись."""
+        if not guard_readonly("пересчет нарядов"):
+            return
+        today = dt.date.today()
+        from_var = ctk.StringVar(
+            value=today.replace(day=1).strftime(CONFIG.date_format)
+        )
+        to_var = ctk.StringVar(value=today.strftime(CONFIG.date_format))
+        only_selected = ctk.BooleanVar(value=self._selected_id is not None)
+        plan_holder: dict = {}
+
+        dlg = ctk.CTkToplevel(self)
+        dlg.title("Пересчет нарядов по новым ценам")
+        dlg.geometry("620x460")
+        top = ctk.CTkFrame(dlg)
+        top.pack(fill="x", padx=10, pady=10)
+        ctk.CTkLabel(top, text="Период с").pack(side="left", padx=5)
+        ctk.CTkEntry(top, textvariable=from_var, width=110).pack(side="left")
+        ctk.CTkLabel(top, text="по").pack(side="left", padx=5)
+        ctk.CTkEntry(top, textvariable=to_var, width=110).pack(side="left")
+        sel_box = ctk.CTkCheckBox(
+            dlg, text="Только выбранный вид работ", variable=only_selected
+        )
+        sel_box.pack(anchor="w", padx=12)
+        if self._selected_id is None:
+            sel_box.configure(state="disabled")
+        text = ctk.CTkTextbox(dlg)
+        text.pack(fill="both", expand=True, padx=10, pady=10)
+        btns = ctk.CTkFrame(dlg)
+        btns.pack(fill="x", padx=10, pady=(0, 10))
+
+        def _show(message: str) -> None:
+            text.delete("1.0", "end")
+            text.insert("1.0", message)
+
+        def _check() -> None:
+            plan_holder.clear()
+            apply_btn.configure(state="disabled")
+            job_ids = [self._selected_id] if only_selected.get() else None
+            try:
+                with get_connection() as conn:
+                    plan = plan_repricing(
+                        conn,
+                        from_var.get().strip() or None,
+                        to_var.get().strip() or None,
+                        job_ids,
+                    )
+            except ValueError as exc:
+                _show(str(exc))
+                return
+            _show(plan.summary())
+            if plan.orders:
+                plan_holder["plan"] = plan
+                apply_btn.configure(state="normal")
+
+        def _apply() -> None:
+            plan = plan_holder.get("plan")
+            if plan is None:
+                return
+            if not messagebox.askyesno(
+                "Подтверждение",
+                f"Пересчитать нарядов: {len(plan.orders)}?",
+                parent=dlg,
+            ):
+                return
+            try:
+                with get_connection() as conn:
+                    count = apply_repricing(conn, plan)
+            except ValueError as exc:
+                messagebox.showwarning("Пересчет", str(exc), parent=dlg)
+                _check()
+                return
+            plan_holder.clear()
+            apply_btn.configure(state="disabled")
+            _show(f"Пересчитано нарядов: {count}")
+
+        apply_btn = ctk.CTkButton(
+            btns, text="Применить", command=_apply, state="disabled"
+        )
+        apply_btn.pack(side="right", padx=5)
+        ctk.CTkButton(btns, text="Проверить", command=_check).pack(side="right", padx=5)
+        dlg.transient(self)
+
     def _export_job_types(self) -> None:
         pass
@@ -7,6 +7,7 @@ import pandas as pd
 import os
 import sys
 import subprocess
+from pathlib import Path
 
 from config.settings import CONFIG
 from utils.text import normalize_for_search
@@ -160,6 +161,14 @@ class ReportsView(ctk.CTkFrame):
         ctk.CTkButton(
             toolbar, text="Экспорт в 1С (JSON)", command=self._export_1c_json
         ).pack(side="left", padx=4)
+        ctk.CTkButton(
+            toolbar, text="Экспорт Parquet/Arrow", command=self._export_columnar
+        ).pack(side="left", padx=4)
+        ctk.CTkButton(
+            toolbar,
+            text="Вся история в Parquet/Arrow",
+            command=self._export_columnar_history,
+        ).pack(side="left", padx=4)
 
         # Простая табличка предпросмотра списка (не обязательна для печати)
         self.tree = ttk.Treeview(self, show="headings")
@@ -1260,6 +1269,60 @@ class ReportsView(ctk.CTkFrame):
             return
         self._open_file(path)
 
+    def _export_columnar(self) -> None:
+        # Колоночный снимок отчета для pandas/Polars/DuckDB: типизированные колонки
+        from reports.columnar_export import save_columnar
+
+        if self._df is None or self._df.empty:
+            messagebox.showwarning("Экспорт Parquet/Arrow", "Сначала сформируйте отчет")
+            return
+        path = self._ask_save_path(
+            "Сохранить Parquet/Arrow",
+            ".parquet",
+            [("Parquet", "*.parquet"), ("Arrow IPC", "*.arrow")],
+        )
+        if not path:
+            return
+        try:
+            save_columnar(self._df, path)
+        except Exception as e:
+            messagebox.showerror("Экспорт Parquet/Arrow", f"Ошибка сохранения: {e}")
+            return
+        messagebox.showinfo("Экспорт Parquet/Arrow", f"Сохранено: {path}")
+
+    def _export_columnar_history(self) -> None:
+        # Полная история без фильтров отчета: строки нарядов в выбранный файл,
+        # начисления работникам — рядом, в <имя>_начисления.<расширение>
+        from reports.columnar_export import (
+            export_work_order_lines_history,
+            export_worker_amounts_history,
+        )
+
+        path = filedialog.asksaveasfilename(
+            title="Сохранить историю нарядов",
+            defaultextension=".parquet",
+            initialfile="история_нарядов.parquet",
+            filetypes=[("Parquet", "*.parquet"), ("Arrow IPC", "*.arrow")],
+        )
+        if not path:
+            return
+        lines_path = Path(path)
+        workers_path = lines_path.with_name(
+            f"{lines_path.stem}_начисления{lines_path.suffix}"
+        )
+        try:
+            with get_connection() as conn:
+                lines = export_work_order_lines_history(conn, lines_path)
+                amounts = export_worker_amounts_history(conn, workers_path)
+        except Exception as e:
+            messagebox.showerror("Экспорт истории", f"Ошибка сохранения: {e}")
+            return
+        messagebox.showinfo(
+            "Экспорт истории",
+            f"Строк нарядов: {lines} — {lines_path}\n"
+            f"Начислений работникам: {amounts} — {workers_path}",
+        )
+
     def _export_1c_json(self) -> None:
         # Экспорт в 1С: единый формат JSON
         from reports.export_1c import build_orders_unified, save_1c_json
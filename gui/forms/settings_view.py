@@ -1006,11 +1006,11 @@ class SettingsView(ctk.CTkFrame):
         filetypes = []
         if filter_name:
             pat = patterns or (
-                f"*{default_ext}" if default_ext else "*.xlsx;*.xls;*.ods"
+                f"*{default_ext}" if default_ext else "*.xlsx;*.xls;*.xlsb;*.ods"
             )
             filetypes = [(filter_name, pat)]
         else:
-            filetypes = [("Книги", "*.xlsx;*.xls;*.ods"), ("Все файлы", "*.*")]
+            filetypes = [("Книги", "*.xlsx;*.xls;*.xlsb;*.ods"), ("Все файлы", "*.*")]
         return filedialog.askopenfilename(title=title, filetypes=filetypes)
 
     def _ask_save(
@@ -1040,7 +1040,7 @@ class SettingsView(ctk.CTkFrame):
             filetypes=[
                 (
                     "Поддерживаемые",
-                    "*.txt;*.csv;*.xls;*.xlsx;*.ods;*.docx;*.odt;*.html;*.xml;*.pdf;*.dbf;*.json",
+                    "*.txt;*.csv;*.xls;*.xlsx;*.xlsb;*.ods;*.docx;*.odt;*.html;*.xml;*.pdf;*.dbf;*.json",
                 ),
                 ("Все файлы", "*.*"),
             ],
@@ -1080,129 +1080,141 @@ class SettingsView(ctk.CTkFrame):
         if not done.get():
             return
 
-        # Окно прогресса
-        win = ctk.CTkToplevel(self)
-        win.title("Импорт данных")
-        win.geometry("480x160")
-        ctk.CTkLabel(win, text="Выполняется импорт...").pack(
-            anchor="w", padx=10, pady=(10, 6)
-        )
-        pb = ctk.CTkProgressBar(win)
-        pb.pack(fill="x", padx=10)
-        pb.set(0)
-        note_var = tk.StringVar(value="")
-        ctk.CTkLabel(win, textvariable=note_var).pack(anchor="w", padx=10, pady=(6, 10))
-
-        def progress_cb(step: int, total: int, note: str):
-            # Обновляем UI из главного потока через after, безопасно для Tk
-            def _do():
+        def _start(dry_run: bool) -> None:
+            # Окно прогресса
+            win = ctk.CTkToplevel(self)
+            win.title("Импорт данных")
+            win.geometry("480x160")
+            ctk.CTkLabel(win, text="Выполняется импорт...").pack(
+                anchor="w", padx=10, pady=(10, 6)
+            )
+            pb = ctk.CTkProgressBar(win)
+            pb.pack(fill="x", padx=10)
+            pb.set(0)
+            note_var = tk.StringVar(value="")
+            ctk.CTkLabel(win, textvariable=note_var).pack(
+                anchor="w", padx=10, pady=(6, 10)
+            )
+
+            def progress_cb(step: int, total: int, note: str):
+                # Обновляем UI из главного потока через after, безопасно для Tk
+                def _do():
+                    try:
+                        # окно могло быть закрыто
+                        if not tk.Toplevel.winfo_exists(win):
+                            return
+                        pb.set(step / max(total, 1))
+                        note_var.set(note)
+                    except Exception as exc:
+                        logging.getLogger(__name__).exception(
+                            "Ignored unexpected error: %s", exc
+                        )
+
                 try:
-                    # окно могло быть закрыто
-                    if not tk.Toplevel.winfo_exists(win):
-                        return
-                    pb.set(step / max(total, 1))
-                    note_var.set(note)
+                    self.after(0, _do)
                 except Exception as exc:
                     logging.getLogger(__name__).exception(
                         "Ignored unexpected error: %s", exc
                     )
 
-            try:
-                self.after(0, _do)
-            except Exception as exc:
-                logging.getLogger(__name__).exception(
-                    "Ignored unexpected error: %s", exc
-                )
-
-        def run():
-            import os
+            def run():
+                import os
 
-            try:
-                preset_code = {
-                    "Авто": "auto",
-                    "Наряды": "orders",
-                    "Цена-лист": "price",
-                    "Справочники": "refs",
-                }.get(preset.get(), "auto")
-                res = import_data(
-                    path,
-                    dry_run=bool(dry.get()),
-                    preset=preset_code,
-                    progress_cb=progress_cb,
-                    backup_before=True,
-                )
-                report_path = getattr(res, "details_html", None)
+                try:
+                    preset_code = {
+                        "Авто": "auto",
+                        "Наряды": "orders",
+                        "Цена-лист": "price",
+                        "Справочники": "refs",
+                    }.get(preset.get(), "auto")
+                    res = import_data(
+                        path,
+                        dry_run=dry_run,
+                        preset=preset_code,
+                        progress_cb=progress_cb,
+                        backup_before=True,
+                    )
+                    report_path = getattr(res, "details_html", None)
 
-                def _show_success():
-                    try:
-                        if report_path:
-                            if os.name == "nt":
-                                try:
-                                    os.startfile(report_path)  # type: ignore[attr-defined]
-                                except Exception as exc:
-                                    logging.getLogger(__name__).exception(
-                                        "Ignored unexpected error: %s", exc
-                                    )
-                            messagebox.showinfo(
-                                "Импорт (черновой)", f"Готово. Отчёт: {report_path}"
-                            )
-                        else:
-                            messagebox.showinfo("Импорт", "Готово.")
-                        # После успешного импорта/чернового прогона — освежить списки в открытых формах
+                    def _show_success():
                         try:
-                            root = self.winfo_toplevel()
-                            # Простой способ: отправим виртуальные событие для всех слушателей
-                            root.event_generate("<<DataImported>>", when="tail")
+                            if report_path:
+                                if os.name == "nt":
+                                    try:
+                                        os.startfile(report_path)  # type: ignore[attr-defined]
+                                    except Exception as exc:
+                                        logging.getLogger(__name__).exception(
+                                            "Ignored unexpected error: %s", exc
+                                        )
+                                messagebox.showinfo(
+                                    "Импорт (черновой)", f"Готово. Отчёт: {report_path}"
+                                )
+                                # Разобранные строки сохранены — импорт их только применит
+                                if dry_run and messagebox.askyesno(
+                                    "Импорт",
+                                    "Записать данные в базу по результатам чернового прогона?",
+                                ):
+                                    _start(False)
+                            else:
+                                messagebox.showinfo("Импорт", "Готово.")
+                            # После успешного импорта/чернового прогона — освежить списки в открытых формах
+                            try:
+                                root = self.winfo_toplevel()
+                                # Простой способ: отправим виртуальные событие для всех слушателей
+                                root.event_generate("<<DataImported>>", when="tail")
+                            except Exception as exc:
+                                logging.getLogger(__name__).exception(
+                                    "Ignored unexpected error: %s", exc
+                                )
                         except Exception as exc:
                             logging.getLogger(__name__).exception(
                                 "Ignored unexpected error: %s", exc
                             )
+
+                    try:
+                        self.after(0, _show_success)
                     except Exception as exc:
                         logging.getLogger(__name__).exception(
                             "Ignored unexpected error: %s", exc
                         )
+                except Exception as e:
+                    msg = str(e)
 
-                try:
-                    self.after(0, _show_success)
-                except Exception as exc:
-                    logging.getLogger(__name__).exception(
-                        "Ignored unexpected error: %s", exc
-                    )
-            except Exception:
+                    def _show_err():
+                        try:
+                            messagebox.showerror("Импорт", msg)
+                        except Exception as exc:
+                            logging.getLogger(__name__).exception(
+                                "Ignored unexpected error: %s", exc
+                            )
 
-                def _show_err():
                     try:
-                        messagebox.showerror("Импорт", str(e))
+                        self.after(0, _show_err)
                     except Exception as exc:
                         logging.getLogger(__name__).exception(
                             "Ignored unexpected error: %s", exc
                         )
+                finally:
 
-                try:
-                    self.after(0, _show_err)
-                except Exception as exc:
-                    logging.getLogger(__name__).exception(
-                        "Ignored unexpected error: %s", exc
-                    )
-            finally:
+                    def _close():
+                        try:
+                            if tk.Toplevel.winfo_exists(win):
+                                win.destroy()
+                        except Exception as exc:
+                            logging.getLogger(__name__).exception(
+                                "Ignored unexpected error: %s", exc
+                            )
 
-                def _close():
                     try:
-                        if tk.Toplevel.winfo_exists(win):
-                            win.destroy()
+                        self.after(0, _close)
                     except Exception as exc:
                         logging.getLogger(__name__).exception(
                             "Ignored unexpected error: %s", exc
                         )
 
-                try:
-                    self.after(0, _close)
-                except Exception as exc:
-                    logging.getLogger(__name__).exception(
-                        "Ignored unexpected error: %s", exc
-                    )
+            threading.Thread(target=run, daemon=True).start()
 
-        threading.Thread(target=run, daemon=True).start()
+        _start(bool(dry.get()))
 
     def _export_table(self, table: str) -> None:
         from import_export.excel_io import export_table_to_excel
@@ -1229,17 +1241,9 @@ class SettingsView(ctk.CTkFrame):
             messagebox.showerror("Экспорт", str(exc))
 
     def _export_all(self) -> None:
-        from import_export.excel_io import export_all_tables_to_excel
+        from utils.export_ui import export_all_tables_with_progress
 
-        directory = filedialog.askdirectory(title="Выберите папку для экспорта")
-        if not directory:
-            return
-        try:
-            with get_connection() as conn:
-                export_all_tables_to_excel(conn, directory)
-            messagebox.showinfo("Экспорт", "Готово")
-        except Exception as exc:
-            messagebox.showerror("Экспорт", str(exc))
+        export_all_tables_with_progress(self)
 
     # ---- Password handlers ----
     def _set_user_password(self) -> None:
@@ -14,6 +14,8 @@ from config.settings import CONFIG
 from db.sqlite import get_connection
 from services import suggestions
 from services.work_orders import (
+    ValidationPlanner,
+    WorkOrderCache,
     WorkOrderInput,
     WorkOrderItemInput,
     WorkOrderWorkerInput,
@@ -22,6 +24,8 @@ from services.work_orders import (
 from services.validation import validate_date
 from db import queries as q
 from gui.widgets.date_picker import open_for_anchor
+from utils.allocation import from_kopecks, split_kopecks, to_kopecks
+from utils.drafts import DraftJournal
 from utils.usage_history import record_use, get_recent
 from utils.autocomplete_positioning import (
     place_suggestions_under_entry,
@@ -83,10 +87,28 @@ class WorkOrdersForm(ctk.CTkFrame):
 
         # Пагинация списка нарядов
         self._orders_page_size: int = 100
-        self._orders_offset: int = 0
+        # Продолжение списка по ключу: (sort_key, id) последней строки
+        self._orders_after: tuple | None = None
+        # Сортировка списка на стороне БД: (колонка, по убыванию)
+        self._orders_sort: tuple[str, bool] = ("no", True)
         self._orders_loading: bool = False
         self._orders_can_load_more: bool = True
         self._orders_vsb: ttk.Scrollbar | None = None
+        # Недавно просмотренные наряды и предзагрузка соседей выбранной строки
+        self._orders_cache = WorkOrderCache()
+        self._orders_prefetch_span: int = 2
+        self._prefetch_job: str | None = None
+        # Справочники для проверки при сохранении: кэш на время сессии формы,
+        # сбрасывается при возврате на вкладку и после импорта
+        self._validation = ValidationPlanner()
+        # Подсказанный номер нового наряда: если его не меняли, номер
+        # резервируется при сохранении (другой пользователь мог его занять)
+        self._suggested_order_no: str | None = None
+        # Черновик формы: изменения копятся и раз в _draft_delay_ms дописываются
+        # в локальный журнал (не в БД), при запуске предлагается восстановить
+        self._drafts = DraftJournal()
+        self._draft_delay_ms: int = 3000
+        self._draft_job: str | None = None
 
         # Инициализация коллекций для доп. полей
         self._extra_product_entries: list[ctk.CTkEntry] = []
@@ -98,6 +120,19 @@ class WorkOrdersForm(ctk.CTkFrame):
         # Старый метод _refresh_products_display удален
         self._update_totals()
         self._load_recent_orders()
+        # Справочники могли измениться на других вкладках или при импорте
+        self.bind("<Map>", lambda e: self._validation.invalidate(), add="+")
+        try:
+            self.winfo_toplevel().bind(
+                "<<DataImported>>", lambda e: self._validation.invalidate(), add="+"
+            )
+        except Exception as exc:
+            logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
+        if not self._readonly:
+            self.date_var.trace_add("write", self._touch_draft)
+            self.order_no_var.trace_add("write", self._touch_draft)
+            self.bind("<Destroy>", self._on_destroy_flush_draft, add="+")
+            self.after_idle(self._offer_draft_restore)
 
     def _build_ui(self) -> None:
         # Контейнер без разделителя: правая панель фиксированной ширины, левая — остальное
@@ -151,7 +186,8 @@ class WorkOrdersForm(ctk.CTkFrame):
         # Подставим следующий свободный номер сразу
         try:
             with get_connection() as conn:
-                self.order_no_var.set(str(q.next_order_no(conn)))
+                self._suggested_order_no = str(q.next_order_no(conn))
+                self.order_no_var.set(self._suggested_order_no)
         except Exception as exc:
             logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
 
@@ -328,6 +364,21 @@ class WorkOrdersForm(ctk.CTkFrame):
             filter_frame, text="Фильтр", width=80, command=self._apply_filter
         ).pack(side="left", padx=6)
 
+        # Поиск по контракту, изделию или работнику (на стороне БД)
+        search_frame = ctk.CTkFrame(right)
+        search_frame.pack(fill="x", padx=10, pady=(0, 5))
+        self.filter_field = ctk.StringVar(value="Изделие")
+        ctk.CTkOptionMenu(
+            search_frame,
+            values=["Контракт", "Изделие", "Работник"],
+            variable=self.filter_field,
+            width=110,
+        ).pack(side="left")
+        self.filter_text = ctk.StringVar()
+        filter_text_entry = ctk.CTkEntry(search_frame, textvariable=self.filter_text)
+        filter_text_entry.pack(side="left", fill="x", expand=True, padx=(6, 0))
+        filter_text_entry.bind("<Return>", lambda e: self._apply_filter())
+
         list_frame = ctk.CTkFrame(right)
         list_frame.pack(fill="both", expand=True, padx=10, pady=5)
         self.orders_tree = ttk.Treeview(
@@ -999,14 +1050,8 @@ class WorkOrdersForm(ctk.CTkFrame):
         self._update_items_columns_widths()
 
     def _clear_items(self) -> None:
-        # Очистить табличный контейнер
-        try:
-            for child in self.items_table.winfo_children():
-                child.destroy()
-            self._item_widgets.clear()
-            self._item_row_widgets.clear()
-        except Exception as exc:
-            logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
+        # Строки виджета видов работ скрываются и остаются в пуле
+        self.job_types_widget.clear_items()
         self.item_rows.clear()
         self._update_totals()
 
@@ -1202,15 +1247,9 @@ class WorkOrdersForm(ctk.CTkFrame):
             and self.worker_amounts.get(wid, 0.0) > 0.0
         }
         unspecified = [wid for wid in ids if wid not in manual]
-        remaining = max(0.0, total - sum(manual.values()))
-        if unspecified:
-            per = round(remaining / len(unspecified), 2)
-            amounts = [per] * len(unspecified)
-            diff = round(remaining - round(per * len(unspecified), 2), 2)
-            if amounts and abs(diff) >= 0.01:
-                amounts[-1] = round(amounts[-1] + diff, 2)
-            for wid, amt in zip(unspecified, amounts):
-                self.worker_amounts[wid] = float(amt)
+        remaining = max(0, to_kopecks(total) - sum(map(to_kopecks, manual.values())))
+        for wid, kop in zip(unspecified, split_kopecks(remaining, len(unspecified))):
+            self.worker_amounts[wid] = from_kopecks(kop)
         for wid, amt in manual.items():
             self.worker_amounts[wid] = float(amt)
 
@@ -1292,7 +1331,8 @@ class WorkOrdersForm(ctk.CTkFrame):
 
     # ---- Orders list ----
     def _load_recent_orders(self) -> None:
-        # Сбросить и загрузить первую страницу
+        # Сбросить и загрузить первую страницу; наряды могли измениться
+        self._orders_cache.invalidate()
         self._reset_orders_list()
         self._load_more_orders()
 
@@ -1305,51 +1345,40 @@ class WorkOrdersForm(ctk.CTkFrame):
                     "Ignored unexpected error: %s", exc
                 )
         self._order_rows = []
-        self._orders_offset = 0
+        self._orders_after = None
         self._orders_can_load_more = True
         self._orders_loading = False
 
-    def _fetch_orders_page(self, limit: int, offset: int) -> list:
-        date_from = (
-            (self.filter_from.get().strip() or None)
-            if hasattr(self, "filter_from")
-            else None
-        )
-        date_to = (
-            (self.filter_to.get().strip() or None)
-            if hasattr(self, "filter_to")
-            else None
-        )
-        where = []
-        params: list = []
-        if date_from:
-            where.append("wo.date >= ?")
-            params.append(date_from)
-        if date_to:
-            where.append("wo.date <= ?")
-            params.append(date_to)
-        sql = (
-            "SELECT wo.id, wo.order_no, wo.date, c.code AS contract_code, GROUP_CONCAT(p.name, ', ') AS product_name, wo.total_amount "
-            "FROM work_orders wo "
-            "LEFT JOIN contracts c ON c.id = wo.contract_id "
-            "LEFT JOIN work_order_products wop ON wop.work_order_id = wo.id "
-            "LEFT JOIN products p ON p.id = wop.product_id "
-        )
-        if where:
-            sql += "WHERE " + " AND ".join(where) + " "
-        sql += "GROUP BY wo.id, wo.order_no, wo.date, c.code, wo.total_amount "
-        # По умолчанию сортируем по номеру наряда по убыванию
-        sql += "ORDER BY wo.order_no DESC, wo.date DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+    def _fetch_orders_page(self, limit: int) -> list:
+        filters: dict[str, str | None] = {
+            "date_from": self.filter_from.get().strip() or None,
+            "date_to": self.filter_to.get().strip() or None,
+        }
+        text = self.filter_text.get().strip()
+        if text:
+            field_name = {
+                "Контракт": "contract",
+                "Изделие": "product",
+                "Работник": "worker",
+            }[self.filter_field.get()]
+            filters[field_name] = text
+        sort, descending = self._orders_sort
         with get_connection() as conn:
-            return conn.execute(sql, params).fetchall()
+            return q.list_work_orders_page(
+                conn,
+                sort=sort,
+                descending=descending,
+                after=self._orders_after,
+                limit=limit,
+                **filters,
+            )
 
     def _load_more_orders(self) -> None:
         if self._orders_loading or not self._orders_can_load_more:
             return
         self._orders_loading = True
         try:
-            rows = self._fetch_orders_page(self._orders_page_size, self._orders_offset)
+            rows = self._fetch_orders_page(self._orders_page_size)
             for r in rows:
                 iid = str(r["id"])  # уникальный идентификатор строки
                 if iid in self._order_rows:
@@ -1367,7 +1396,8 @@ class WorkOrdersForm(ctk.CTkFrame):
                     ),
                 )
                 self._order_rows.append(iid)
-            self._orders_offset += len(rows)
+            if rows:
+                self._orders_after = (rows[-1]["sort_key"], rows[-1]["id"])
             if len(rows) < self._orders_page_size:
                 self._orders_can_load_more = False
             self._autosize_orders_columns()
@@ -1396,47 +1426,12 @@ class WorkOrdersForm(ctk.CTkFrame):
         self._load_more_orders()
 
     def _sort_orders_by(self, col: str) -> None:
-        # Текущее направление
-        direction = getattr(self, "_orders_sort_dir", {}).get(col, "asc")
-        new_dir = "desc" if direction == "asc" else "asc"
-        # Собираем все элементы и сортируем локально
-        rows = []
-        for iid in self.orders_tree.get_children(""):
-            vals = self.orders_tree.item(iid, "values")
-            rows.append((iid, vals))
-        index_map = {"no": 0, "date": 1, "contract": 2, "product": 3, "total": 4}
-        idx = index_map[col]
-
-        def key_func(item):
-            vals = item[1]
-            val = vals[idx]
-            if col == "no":
-                try:
-                    return int(val)
-                except Exception:
-                    return 0
-            if col == "total":
-                try:
-                    return float(val.replace(" ", "").replace(",", "."))
-                except Exception:
-                    return 0.0
-            if col == "date":
-                # ДД.ММ.ГГГГ -> ГГГГММДД для корректной сортировки строкой
-                try:
-                    d, m, y = val.split(".")
-                    return f"{y}{m}{d}"
-                except Exception:
-                    return val
-            return val.casefold() if isinstance(val, str) else val
-
-        rows.sort(key=key_func, reverse=(new_dir == "desc"))
-        # Переставляем элементы
-        for pos, (iid, _vals) in enumerate(rows):
-            self.orders_tree.move(iid, "", pos)
-        # Сохраняем направление для колонки
-        if not hasattr(self, "_orders_sort_dir"):
-            self._orders_sort_dir = {}
-        self._orders_sort_dir[col] = new_dir
+        # Повторный клик по той же колонке меняет направление; сортирует БД,
+        # поэтому порядок верен для всего списка, а не только загруженной части
+        sort, descending = self._orders_sort
+        self._orders_sort = (col, not descending if col == sort else col == "no")
+        self._reset_orders_list()
+        self._load_more_orders()
 
     def _on_order_select(self, _evt=None) -> None:
         sel = self.orders_tree.selection()
@@ -1444,17 +1439,43 @@ class WorkOrdersForm(ctk.CTkFrame):
             return
         work_order_id = int(sel[0])
         try:
-            from services.work_orders import load_work_order  # lazy import
-
-            with get_connection() as conn:
-                data = load_work_order(conn, work_order_id)
+            data = self._orders_cache.get(work_order_id)
+            if data is None:
+                with get_connection() as conn:
+                    data = self._orders_cache.load(conn, work_order_id)
         except Exception as exc:
             messagebox.showerror("Ошибка", f"Не удалось загрузить наряд: {exc}")
             return
         self._fill_form_from_loaded(data)
+        # Соседей догружаем после отрисовки, чтобы листание стрелками не ждало БД
+        if self._prefetch_job is not None:
+            self.after_cancel(self._prefetch_job)
+        self._prefetch_job = self.after_idle(self._prefetch_neighbours, sel[0])
+
+    def _prefetch_neighbours(self, iid: str) -> None:
+        self._prefetch_job = None
+        ids: list[int] = []
+        prev_iid = next_iid = iid
+        for _ in range(self._orders_prefetch_span):
+            prev_iid = self.orders_tree.prev(prev_iid) if prev_iid else ""
+            next_iid = self.orders_tree.next(next_iid) if next_iid else ""
+            ids.extend(int(i) for i in (prev_iid, next_iid) if i)
+        ids = [i for i in ids if i not in self._orders_cache]
+        if not ids:
+            return
+        try:
+            with get_connection() as conn:
+                self._orders_cache.prefetch(conn, ids)
+        except Exception as exc:
+            logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
 
     def _fill_form_from_loaded(self, data) -> None:
+        # Недописанный черновик прежнего наряда сохраняем до переключения
+        if self._draft_job is not None:
+            self._cancel_draft_job()
+            self._write_draft()
         self.editing_order_id = data.id
+        self._suggested_order_no = None
         self._loaded_snapshot = data
         # визуально показать режим редактирования
         try:
@@ -1467,129 +1488,66 @@ class WorkOrdersForm(ctk.CTkFrame):
             self.order_no_var.set(str(data.order_no))
         except Exception as exc:
             logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
-        # Загружаем изделия и контракт
-        with get_connection() as conn:
-            # Загружаем изделия наряда
-            products = q.get_work_order_products(conn, data.id)
-            self.selected_product_ids = [p["id"] for p in products]
-            
-            # Заполняем новую структуру selected_products
-            self.selected_products.clear()
-            product_items = []
-            for i, product in enumerate(products):
-                # Используем положительные ID для реальных изделий
-                product_id = product["id"]
-                product_name = f"{product['product_no']} — {product['name']}"
-                self.selected_products[product_id] = product_name
-                product_items.append((product_id, product_name, {}))
-            
-            # Загружаем в новый виджет
-            if hasattr(self, 'products_widget'):
-                self.products_widget.set_items(product_items)
-                
-            # Старый метод _refresh_products_display удален
+        # Изделия и контракт уже загружены вместе с нарядом
+        self.selected_product_ids = list(data.product_ids)
 
-            # Загружаем контракт
-            self.selected_contract_id = data.contract_id
-            if data.contract_id:
-                contract = q.get_contract(conn, data.contract_id)
-                if contract:
-                    self.contract_entry.delete(0, "end")
-                    self.contract_entry.insert(
-                        0, f"{contract['code']} — {contract['name']}"
-                    )
-            else:
-                self.contract_entry.delete(0, "end")
-        # items (редактируемые строки)
-        self._clear_items()
-        for job_type_id, name, qty, unit_price, line_amount in data.items:
-            # модель
-            self.item_rows.append(
-                ItemRow(
-                    job_type_id=job_type_id,
-                    job_type_name=name,
-                    quantity=qty,
-                    unit_price=unit_price,
-                    line_amount=line_amount,
-                )
-            )
-            row_index = len(self._item_widgets)
-            name_var = ctk.StringVar(value=name)
-            name_entry = ctk.CTkEntry(self.items_table, textvariable=name_var)
-            name_entry.grid(row=row_index, column=0, sticky="ew", padx=4, pady=2)
-            cur_idx = len(self.item_rows) - 1
-            name_entry.bind(
-                "<KeyRelease>",
-                lambda _e=None, ent=name_entry, i=cur_idx: self._on_job_key_edit(
-                    ent, i
-                ),
-            )
-            name_entry.bind(
-                "<FocusIn>",
-                lambda _e=None, ent=name_entry, i=cur_idx: self._on_job_key_edit(
-                    ent, i
-                ),
-            )
-            name_entry.bind(
-                "<Button-1>",
-                lambda e, ent=name_entry, i=cur_idx: self._on_job_click_show(e, ent, i),
-            )
-            qty_var = ctk.StringVar(value=str(qty))
-            qty_entry = ctk.CTkEntry(
-                self.items_table, textvariable=qty_var, width=self._col_qty_w
-            )
-            qty_entry.grid(row=row_index, column=1, sticky="e", padx=4, pady=2)
-            qty_entry.bind(
-                "<KeyRelease>",
-                lambda _e=None, i=cur_idx, v=qty_var: self._on_qty_change(i, v),
-            )
-            price_label = ctk.CTkLabel(
-                self.items_table, text=f"{unit_price:.2f}", anchor="e"
-            )
-            price_label.grid(row=row_index, column=2, sticky="e", padx=4, pady=2)
-            amount_label = ctk.CTkLabel(
-                self.items_table, text=f"{line_amount:.2f}", anchor="e"
-            )
-            amount_label.grid(row=row_index, column=3, sticky="e", padx=4, pady=2)
-            add_btn_row = ctk.CTkButton(
-                self.items_table, text="+", width=28, command=self._add_blank_item_row
-            )
-            add_btn_row.grid(row=row_index, column=4, sticky="e", padx=2, pady=2)
-            del_btn = ctk.CTkButton(
-                self.items_table,
-                text="Удалить",
-                width=self._col_delete_w - self._col_pad_px,
-                fg_color="#b91c1c",
-                hover_color="#7f1d1d",
-                command=lambda i=cur_idx: self._remove_item_row(i),
+        # Заполняем новую структуру selected_products
+        self.selected_products.clear()
+        product_items = []
+        for product_id, product_no, name in data.products:
+            product_name = f"{product_no} — {name}"
+            self.selected_products[product_id] = product_name
+            product_items.append((product_id, product_name, {}))
+
+        # Загружаем в новый виджет
+        if hasattr(self, 'products_widget'):
+            self.products_widget.set_items(product_items)
+
+        # Старый метод _refresh_products_display удален
+
+        # Загружаем контракт
+        self.selected_contract_id = data.contract_id
+        self.contract_entry.delete(0, "end")
+        if data.contract_id and data.contract_code is not None:
+            self.contract_entry.insert(
+                0, f"{data.contract_code} — {data.contract_name}"
             )
-            del_btn.grid(row=row_index, column=5, sticky="e", padx=4, pady=2)
-            self._item_row_widgets.append(name_entry)
-            self._item_widgets.append(
-                {
-                    "name": name_entry,
-                    "qty": qty_entry,
-                    "price": price_label,
-                    "amount": amount_label,
-                    "btn_add": add_btn_row,
-                    "btn_del": del_btn,
-                    "name_var": name_var,
-                    "qty_var": qty_var,
-                }
+        # items: строки виджета переиспользуются, а не создаются заново
+        self.item_rows = [
+            ItemRow(
+                job_type_id=job_type_id,
+                job_type_name=name,
+                quantity=qty,
+                unit_price=unit_price,
+                line_amount=line_amount,
             )
+            for job_type_id, name, qty, unit_price, line_amount in data.items
+        ]
+        self.job_types_widget.set_items(
+            [
+                (
+                    it.job_type_id,
+                    it.job_type_name,
+                    {"quantity": it.quantity, "price": it.unit_price},
+                )
+                for it in self.item_rows
+            ]
+        )
         # workers — показываем в режиме просмотра, суммы не пересчитываем
         self.selected_workers.clear()
         self.worker_amounts.clear()
-        with get_connection() as conn:
-            for wid, amount in data.workers:
-                r = conn.execute(
-                    "SELECT full_name FROM workers WHERE id=?", (wid,)
-                ).fetchone()
-                self.selected_workers[wid] = r["full_name"] if r else str(wid)
-                try:
-                    self.worker_amounts[wid] = float(amount)
-                except Exception:
-                    self.worker_amounts[wid] = 0.0
+        for wid, amount in data.workers:
+            self.selected_workers[wid] = data.worker_names.get(wid, str(wid))
+            try:
+                self.worker_amounts[wid] = float(amount)
+            except Exception:
+                self.worker_amounts[wid] = 0.0
+        self.workers_widget.set_items(
+            [
+                (wid, name, {"amount": self.worker_amounts[wid]})
+                for wid, name in self.selected_workers.items()
+            ]
+        )
         # Просмотр: фиксируем ручные значения, чтобы не пересчитывать
         self._manual_amount_ids = set(self.selected_workers.keys())
         self._set_edit_locked(True)
@@ -1603,6 +1561,136 @@ class WorkOrdersForm(ctk.CTkFrame):
         except Exception as exc:
             logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
 
+    # ---- Черновик ----
+    def _draft_key(self) -> str:
+        return str(self.editing_order_id) if self.editing_order_id else "new"
+
+    def _touch_draft(self, *_args) -> None:
+        """Отметить изменение формы; черновик запишется по таймеру одной строкой."""
+        if self._readonly or self._draft_job is not None:
+            return
+        self._draft_job = self.after(self._draft_delay_ms, self._write_draft)
+
+    def _cancel_draft_job(self) -> None:
+        if self._draft_job is not None:
+            try:
+                self.after_cancel(self._draft_job)
+            except Exception as exc:
+                logging.getLogger(__name__).exception(
+                    "Ignored unexpected error: %s", exc
+                )
+            self._draft_job = None
+
+    def _draft_state(self) -> dict:
+        raw_no = (self.order_no_var.get() or "").strip()
+        return {
+            "date": self.date_var.get(),
+            # Подсказанный номер не фиксируем: при восстановлении подставится новый
+            "order_no": "" if raw_no == self._suggested_order_no else raw_no,
+            "products": [
+                [it.id, it.name] for it in self.products_widget.get_items() if it.name
+            ],
+            "items": [
+                [d["id"], d["name"], d["quantity"], d["price"]]
+                for d in self.job_types_widget.get_items_data()
+                if d["name"]
+            ],
+            "workers": [
+                [wid, name, self.worker_amounts.get(wid, 0.0)]
+                for wid, name in self.selected_workers.items()
+            ],
+            "manual_amounts": sorted(self._manual_amount_ids),
+        }
+
+    def _write_draft(self) -> None:
+        self._draft_job = None
+        # Просмотр наряда без правки черновиком не считается
+        if self._edit_locked:
+            return
+        try:
+            state = self._draft_state()
+            empty = not (state["products"] or state["items"] or state["workers"])
+            self._drafts.stage(self._draft_key(), None if empty else state)
+            self._drafts.flush()
+        except Exception as exc:
+            logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
+
+    def _on_destroy_flush_draft(self, event) -> None:
+        if event.widget is self and self._draft_job is not None:
+            self._cancel_draft_job()
+            self._write_draft()
+
+    def _apply_draft(self, state: dict) -> None:
+        if state.get("date"):
+            self.date_var.set(state["date"])
+        if state.get("order_no"):
+            self.order_no_var.set(state["order_no"])
+        products = [(pid, name, {}) for pid, name in state.get("products", [])]
+        self.products_widget.set_items(products)
+        self.selected_products = {pid: name for pid, name, _d in products if pid > 0}
+        self.selected_product_ids = list(self.selected_products)
+        self._update_contract_from_products()
+        self.item_rows = [
+            ItemRow(
+                job_type_id=jt_id,
+                job_type_name=name,
+                quantity=qty,
+                unit_price=price,
+                line_amount=qty * price,
+            )
+            for jt_id, name, qty, price in state.get("items", [])
+        ]
+        self.job_types_widget.set_items(
+            [
+                (
+                    it.job_type_id,
+                    it.job_type_name,
+                    {"quantity": it.quantity, "price": it.unit_price},
+                )
+                for it in self.item_rows
+            ]
+        )
+        self.selected_workers.clear()
+        self.worker_amounts.clear()
+        for wid, name, amount in state.get("workers", []):
+            self.selected_workers[wid] = name
+            self.worker_amounts[wid] = float(amount or 0.0)
+        self.workers_widget.set_items(
+            [
+                (wid, name, {"amount": self.worker_amounts[wid]})
+                for wid, name in self.selected_workers.items()
+            ]
+        )
+        self._manual_amount_ids = set(state.get("manual_amounts", []))
+        self._update_totals()
+
+    def _offer_draft_restore(self) -> None:
+        drafts = self._drafts.load()
+        if not drafts:
+            return
+        draft = list(drafts.values())[-1]
+        when = dt.datetime.fromtimestamp(draft.saved_at).strftime("%d.%m.%Y %H:%M")
+        what = (
+            "нового наряда"
+            if draft.key == "new"
+            else f"наряда №{draft.state.get('order_no') or draft.key}"
+        )
+        if not messagebox.askyesno(
+            "Черновик", f"Найден несохраненный черновик {what} от {when}. Восстановить?"
+        ):
+            self._drafts.discard(draft.key)
+            return
+        if draft.key != "new":
+            try:
+                with get_connection() as conn:
+                    data = self._orders_cache.load(conn, int(draft.key))
+            except Exception as exc:
+                messagebox.showerror("Ошибка", f"Не удалось загрузить наряд: {exc}")
+                return
+            self._fill_form_from_loaded(data)
+            self._enable_editing()
+        self._apply_draft(draft.state)
+
     # ---- Save/Update/Delete ----
     def _build_input(self) -> Optional[WorkOrderInput]:
         # Получаем данные из нового виджета видов работ
@@ -1623,6 +1711,8 @@ class WorkOrdersForm(ctk.CTkFrame):
         # Номер наряда (необязателен; если указан — проверим число)
         order_no_val: int | None = None
         raw_no = (self.order_no_var.get() or "").strip()
+        if not self.editing_order_id and raw_no == self._suggested_order_no:
+            raw_no = ""
         if raw_no:
             try:
                 order_no_val = int(raw_no)
@@ -1734,19 +1824,26 @@ class WorkOrdersForm(ctk.CTkFrame):
                 from services.work_orders import update_work_order  # lazy import
 
                 with get_connection() as conn:
-                    update_work_order(conn, self.editing_order_id, wo)
-                messagebox.showinfo("Сохранено", "Наряд обновлен")
+                    changes = update_work_order(
+                        conn, self.editing_order_id, wo, self._validation
+                    )
+                if changes.changed:
+                    messagebox.showinfo("Сохранено", "Наряд обновлен")
+                else:
+                    messagebox.showinfo("Сохранено", "Изменений нет")
                 logger.info("Наряд %s успешно обновлен", self.editing_order_id)
             else:
                 with get_connection() as conn:
-                    _id = create_work_order(conn, wo)
+                    _id = create_work_order(conn, wo, self._validation)
                 messagebox.showinfo("Сохранено", "Наряд успешно сохранен")
                 logger.info("Наряд %s успешно создан", _id)
         except sqlite3.IntegrityError as exc:
+            self._validation.invalidate()
             logger.error("Ошибка целостности БД при сохранении наряда: %s", exc)
             messagebox.showerror("Ошибка", f"Ошибка сохранения: {exc}")
             return
         except Exception as exc:
+            self._validation.invalidate()
             logger.error(
                 "Неожиданная ошибка при сохранении наряда: %s", exc, exc_info=True
             )
@@ -1780,6 +1877,9 @@ class WorkOrdersForm(ctk.CTkFrame):
         self._reset_form()
 
     def _reset_form(self) -> None:
+        # Наряд сохранен, удален или правка отменена — черновик больше не нужен
+        self._cancel_draft_job()
+        self._drafts.discard(self._draft_key())
         self.editing_order_id = None
         self.selected_contract_id = None
         self.selected_product_ids.clear()
@@ -1834,18 +1934,12 @@ class WorkOrdersForm(ctk.CTkFrame):
         try:
             # Автозаполнение следующего номера при создании нового наряда
             with get_connection() as conn:
-                self.order_no_var.set(str(q.next_order_no(conn)))
+                self._suggested_order_no = str(q.next_order_no(conn))
+                self.order_no_var.set(self._suggested_order_no)
         except Exception as exc:
             logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
         self.contract_entry.delete(0, "end")
         self.product_entry.delete(0, "end")
-        try:
-            for child in self.items_table.winfo_children():
-                child.destroy()
-            self._item_widgets.clear()
-            self._item_row_widgets.clear()
-        except Exception as exc:
-            logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
         # Стартовая пустая строка для видов работ - удалена, используется новый виджет
         self._update_totals()
         try:
@@ -1923,6 +2017,7 @@ class WorkOrdersForm(ctk.CTkFrame):
                 self.selected_product_ids.append(product_id)
                 self._update_contract_from_products()
                 record_use("work_orders.product", product_name)
+            self._touch_draft()
         except Exception as exc:
             logger.exception("Ошибка добавления изделия: %s", exc)
     
@@ -1932,6 +2027,7 @@ class WorkOrdersForm(ctk.CTkFrame):
             if product_id in self.selected_product_ids:
                 self.selected_product_ids.remove(product_id)
                 self._update_contract_from_products()
+            self._touch_draft()
         except Exception as exc:
             logger.exception("Ошибка удаления изделия: %s", exc)
     
@@ -1945,6 +2041,7 @@ class WorkOrdersForm(ctk.CTkFrame):
                 record_use("work_orders.worker", worker_name)
                 # Пересчитываем суммы работников
                 self._redistribute_worker_amounts()
+            self._touch_draft()
         except Exception as exc:
             logger.exception("Ошибка добавления работника: %s", exc)
     
@@ -1958,6 +2055,7 @@ class WorkOrdersForm(ctk.CTkFrame):
                 self._update_totals()
                 # Пересчитываем суммы работников
                 self._redistribute_worker_amounts()
+            self._touch_draft()
         except Exception as exc:
             logger.exception("Ошибка удаления работника: %s", exc)
     
@@ -1966,6 +2064,7 @@ class WorkOrdersForm(ctk.CTkFrame):
         try:
             self.worker_amounts[worker_id] = amount
             self._update_totals()
+            self._touch_draft()
         except Exception as exc:
             logger.exception("Ошибка изменения суммы работника: %s", exc)
     
@@ -1983,12 +2082,14 @@ class WorkOrdersForm(ctk.CTkFrame):
             self.item_rows.append(item)
             # Старый метод _add_blank_item_row удален - используется новый виджет
             record_use("work_orders.job_type", job_type_name)
+            self._touch_draft()
         except Exception as exc:
             logger.exception("Ошибка добавления вида работ: %s", exc)
     
     def _on_job_type_remove(self, job_type_id: int):
         """Обработчик удаления вида работ"""
         try:
+            self._touch_draft()
             # Находим и удаляем соответствующий элемент
             for i, item in enumerate(self.item_rows):
                 if item.job_type_id == job_type_id:
@@ -2010,6 +2111,7 @@ class WorkOrdersForm(ctk.CTkFrame):
             
             # Пересчитываем суммы работников
             self._redistribute_worker_amounts()
+            self._touch_draft()
         except Exception as exc:
             logger.exception("Ошибка изменения количества вида работ: %s", exc)
 
@@ -2032,10 +2134,10 @@ class WorkOrdersForm(ctk.CTkFrame):
                 for worker_id in self.worker_amounts:
                     self.worker_amounts[worker_id] = 0.0
             else:
-                # Распределяем сумму равномерно между работниками
-                amount_per_worker = total_job_amount / worker_count
-                for worker_id in self.selected_workers:
-                    self.worker_amounts[worker_id] = amount_per_worker
+                # Распределяем сумму поровну между работниками (до копейки)
+                shares = split_kopecks(to_kopecks(total_job_amount), worker_count)
+                for worker_id, kop in zip(self.selected_workers, shares):
+                    self.worker_amounts[worker_id] = from_kopecks(kop)
             
             # Обновляем отображение сумм работников
             self._update_totals()
@@ -45,6 +45,18 @@ class ListConfig:
     on_price_change: Optional[Callable] = None  # Callback для изменения цены
 
 
+@dataclass
+class _ListRow:
+    """Строка списка; создается один раз и переиспользуется при перерисовке"""
+    frame: Any
+    name_var: ctk.StringVar
+    item_id: Any = None  # Текущий элемент строки (меняется при перепривязке)
+    quantity_var: Optional[ctk.StringVar] = None
+    price_var: Optional[ctk.StringVar] = None
+    total_var: Optional[ctk.StringVar] = None
+    amount_var: Optional[ctk.StringVar] = None
+
+
 class UnifiedListWidget(ctk.CTkFrame):
     """Единый виджет для управления списками"""
     
@@ -74,6 +86,10 @@ class UnifiedListWidget(ctk.CTkFrame):
         self._total_vars: Dict[Any, ctk.StringVar] = {}  # Для хранения переменных общей суммы
         self._price_vars: Dict[Any, ctk.StringVar] = {}  # Для хранения переменных цены
         self._quantity_vars: Dict[Any, ctk.StringVar] = {}  # Для хранения переменных количества
+        self._amount_vars: Dict[Any, ctk.StringVar] = {}  # Для хранения переменных суммы работника
+        # Пул строк: первые _visible_rows показаны, остальные скрыты до следующего раза
+        self._rows: List[_ListRow] = []
+        self._visible_rows = 0
         self._saved_values: Dict[Any, Dict[str, str]] = {}  # Для сохранения значений при обновлении
         
         # UI элементы
@@ -161,31 +177,63 @@ class UnifiedListWidget(ctk.CTkFrame):
         self._refresh_display()
     
     def _refresh_display(self):
-        """Обновить отображение списка"""
+        """Обновить отображение списка.
+
+        Строки не пересоздаются: существующие перепривязываются к элементам
+        по порядку, недостающие создаются, лишние скрываются (pack_forget).
+        """
         # Сохраняем текущие данные полей
         self._save_current_field_values()
-        
-        # Очищаем список
-        for child in self.list_frame.winfo_children():
-            try:
-                child.destroy()
-            except Exception as exc:
-                logger.exception("Ошибка удаления дочернего элемента: %s", exc)
-        
-        # Создаем строки для каждого элемента
-        for item_id, item in self.items.items():
-            self._create_item_row(item_id, item)
-            
+        self._total_vars.clear()
+        self._price_vars.clear()
+        self._quantity_vars.clear()
+        self._amount_vars.clear()
+
+        for index, (item_id, item) in enumerate(self.items.items()):
+            if index == len(self._rows):
+                self._rows.append(self._create_item_row())
+            row = self._rows[index]
+            self._bind_row(row, item_id, item)
+            # Показанные строки всегда идут подряд с начала пула, поэтому
+            # скрытая строка возвращается в конец списка на свое место
+            if index >= self._visible_rows:
+                row.frame.pack(fill="x", pady=2)
+
+        # Лишние строки прячем до следующего использования
+        for row in self._rows[len(self.items):self._visible_rows]:
+            row.frame.pack_forget()
+            row.item_id = None
+        self._visible_rows = len(self.items)
+
         # Восстанавливаем данные полей
         self._restore_field_values()
-    
-    def _create_item_row(self, item_id: Any, item: ListItem):
-        """Создать строку элемента"""
+
+    def _bind_row(self, row: _ListRow, item_id: Any, item: ListItem):
+        """Привязать строку пула к элементу списка"""
+        row.item_id = item_id
+        row.name_var.set(item.name)
+        data = item.data or {}
+        if row.quantity_var is not None:
+            quantity = data.get('quantity')
+            row.quantity_var.set("1" if quantity is None else str(quantity))
+            self._quantity_vars[item_id] = row.quantity_var
+        if row.price_var is not None:
+            row.price_var.set(f"{float(data.get('price') or 0):.2f}")
+            self._price_vars[item_id] = row.price_var
+        if row.total_var is not None:
+            self._total_vars[item_id] = row.total_var
+            self._update_total_for_item(item_id)
+        if row.amount_var is not None:
+            row.amount_var.set(f"{float(data.get('amount') or 0):.2f}")
+            self._amount_vars[item_id] = row.amount_var
+
+    def _create_item_row(self) -> _ListRow:
+        """Создать строку пула (без привязки к элементу и без размещения)"""
         row_frame = create_modern_frame(self.list_frame, style_type="frame")
-        row_frame.pack(fill="x", pady=2)
         
         # Поле ввода названия
-        name_var = ctk.StringVar(value=item.name)
+        name_var = ctk.StringVar()
+        row = _ListRow(frame=row_frame, name_var=name_var)
         name_entry = create_modern_entry(
             row_frame,
             textvariable=name_var,
@@ -193,10 +241,10 @@ class UnifiedListWidget(ctk.CTkFrame):
         )
         name_entry.pack(side="left", padx=4, fill="x", expand=True)
         
-        # Бинды для автодополнения
+        # Бинды для автодополнения (элемент строки берется в момент события)
         if self.config.suggest_function and not self.readonly:
             def _show_suggestions(evt=None, ent=name_entry):
-                self._handle_suggestions(ent, item_id)
+                self._handle_suggestions(ent, row.item_id)
             
             name_entry.bind("<KeyRelease>", _show_suggestions)
             name_entry.bind("<FocusIn>", _show_suggestions)
@@ -204,7 +252,7 @@ class UnifiedListWidget(ctk.CTkFrame):
         # Поле количества (для видов работ)
         if self.config.show_quantity_field and not self.readonly:
             qty_var = ctk.StringVar(value="1")  # По умолчанию 1
-            self._quantity_vars[item_id] = qty_var
+            row.quantity_var = qty_var
             qty_entry = create_modern_entry(
                 row_frame,
                 textvariable=qty_var,
@@ -213,13 +261,13 @@ class UnifiedListWidget(ctk.CTkFrame):
             )
             qty_entry.pack(side="left", padx=4)
             
-            def _on_qty_change(_e=None, var=qty_var, i=item_id):
+            def _on_qty_change(_e=None, var=qty_var):
                 try:
                     qty = float(var.get() or "0")
                     if self.on_amount_change:
-                        self.on_amount_change(i, qty)
+                        self.on_amount_change(row.item_id, qty)
                     # Пересчитываем общую сумму если есть цена
-                    self._update_total_for_item(item_id)
+                    self._update_total_for_item(row.item_id)
                 except ValueError:
                     pass
             
@@ -228,7 +276,7 @@ class UnifiedListWidget(ctk.CTkFrame):
         # Поле цены (для видов работ)
         if self.config.show_price_field and not self.readonly:
             price_var = ctk.StringVar(value="0.00")
-            self._price_vars[item_id] = price_var
+            row.price_var = price_var
             price_entry = create_modern_entry(
                 row_frame,
                 textvariable=price_var,
@@ -237,11 +285,11 @@ class UnifiedListWidget(ctk.CTkFrame):
             )
             price_entry.pack(side="left", padx=4)
             
-            def _on_price_change(_e=None, var=price_var, i=item_id):
+            def _on_price_change(_e=None, var=price_var):
                 try:
-                    price = float(var.get() or "0")
+                    float(var.get() or "0")
                     # Пересчитываем общую сумму
-                    self._update_total_for_item(item_id)
+                    self._update_total_for_item(row.item_id)
                 except ValueError:
                     pass
             
@@ -250,6 +298,7 @@ class UnifiedListWidget(ctk.CTkFrame):
         # Поле общей суммы (для видов работ, только для чтения)
         if self.config.show_total_field and not self.readonly:
             total_var = ctk.StringVar(value="0.00")
+            row.total_var = total_var
             total_entry = create_modern_entry(
                 row_frame,
                 textvariable=total_var,
@@ -258,13 +307,11 @@ class UnifiedListWidget(ctk.CTkFrame):
                 state="readonly"
             )
             total_entry.pack(side="left", padx=4)
-            
-            # Сохраняем ссылку на переменную для обновления
-            self._total_vars[item_id] = total_var
         
         # Поле суммы (для работников)
         if self.config.show_amount_field and not self.readonly:
             amount_var = ctk.StringVar(value="0.00")
+            row.amount_var = amount_var
             amount_entry = create_modern_entry(
                 row_frame,
                 textvariable=amount_var,
@@ -273,11 +320,11 @@ class UnifiedListWidget(ctk.CTkFrame):
             )
             amount_entry.pack(side="left", padx=4)
             
-            def _on_amount_change(_e=None, var=amount_var, i=item_id):
+            def _on_amount_change(_e=None, var=amount_var):
                 try:
                     amount = float(var.get() or "0")
                     if self.on_amount_change:
-                        self.on_amount_change(i, amount)
+                        self.on_amount_change(row.item_id, amount)
                 except ValueError:
                     pass
             
@@ -301,9 +348,10 @@ class UnifiedListWidget(ctk.CTkFrame):
                 text="Удалить",
                 style_type="button_danger",
                 width=80,
-                command=lambda: self._remove_item(item_id)
+                command=lambda: self._remove_item(row.item_id)
             )
             del_btn.pack(side="left", padx=4)
+        return row
     
     def _handle_suggestions(self, entry: ctk.CTkEntry, item_id: Any):
         """Обработать показ подсказок"""
@@ -386,6 +434,8 @@ class UnifiedListWidget(ctk.CTkFrame):
                 del self._price_vars[item_id]
             if item_id in self._quantity_vars:
                 del self._quantity_vars[item_id]
+            if item_id in self._amount_vars:
+                del self._amount_vars[item_id]
             
             if self.on_item_remove:
                 self.on_item_remove(item_id)
@@ -448,6 +498,7 @@ class UnifiedListWidget(ctk.CTkFrame):
         self._total_vars.clear()
         self._price_vars.clear()
         self._quantity_vars.clear()
+        self._amount_vars.clear()
         self._saved_values.clear()
         if not self.readonly:
             self._add_empty_row()
@@ -463,7 +514,7 @@ class UnifiedListWidget(ctk.CTkFrame):
         result = []
         for item_id, item in self.items.items():
             data = {
-                'id': item_id,
+                'id': item.id,
                 'name': item.name,
                 'quantity': 0.0,
                 'price': 0.0,
@@ -502,6 +553,8 @@ class UnifiedListWidget(ctk.CTkFrame):
                 values['price'] = self._price_vars[item_id].get()
             if item_id in self._total_vars:
                 values['total'] = self._total_vars[item_id].get()
+            if item_id in self._amount_vars:
+                values['amount'] = self._amount_vars[item_id].get()
             self._saved_values[item_id] = values
     
     def _restore_field_values(self):
@@ -516,17 +569,31 @@ class UnifiedListWidget(ctk.CTkFrame):
                 self._price_vars[item_id].set(values['price'])
             if item_id in self._total_vars and 'total' in values:
                 self._total_vars[item_id].set(values['total'])
+            if item_id in self._amount_vars and 'amount' in values:
+                self._amount_vars[item_id].set(values['amount'])
     
     def get_item_ids(self) -> List[Any]:
         """Получить список ID элементов"""
         return [item.id for item in self.items.values() if item.id > 0]
     
     def set_items(self, items: List[Tuple[Any, str, Dict[str, Any]]]):
-        """Установить список элементов"""
+        """Установить список элементов.
+
+        Значения полей берутся из data (quantity, price, amount); повторяющийся
+        id (один вид работ в двух строках) получает отдельный ключ строки.
+        """
+        # Поля прежних элементов не переносим: значения задает data
         self.items.clear()
+        self._total_vars.clear()
+        self._price_vars.clear()
+        self._quantity_vars.clear()
+        self._amount_vars.clear()
         for item_id, name, data in items:
-            item = ListItem(id=item_id, name=name, data=data or {})
-            self.items[item_id] = item
+            key = item_id
+            if key in self.items:
+                self.manual_counter -= 1
+                key = self.manual_counter
+            self.items[key] = ListItem(id=item_id, name=name, data=data or {})
         
         if not self.readonly:
             self._add_empty_row()
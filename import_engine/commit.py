@@ -13,83 +13,48 @@ import logging
 def upsert_job_types(
     conn: sqlite3.Connection, rows: Iterable[dict[str, Any]]
 ) -> tuple[int, int]:
-    added = 0
-    updated = 0
+    prepared: list[tuple[str, str, float]] = []
     for r in rows:
         name = (r.get("name") or "").strip()
         unit = (r.get("unit") or "шт.").strip() or "шт."
         price = float(r.get("price") or 0.0)
         if not name:
             continue
-        res_id = q.upsert_job_type(conn, name, unit, price)
-        if isinstance(res_id, int) and res_id > 0:
-            added += 1
-        else:
-            updated += 1
-    return added, updated
+        prepared.append((name, unit, price))
+    return q.bulk_upsert_job_types(conn, prepared)
 
 
 def upsert_products(
     conn: sqlite3.Connection, rows: Iterable[dict[str, Any]]
 ) -> tuple[int, int]:
-    added = 0
-    updated = 0
+    prepared: list[tuple[str, str, str | None]] = []
     for r in rows:
         name = (r.get("name") or "").strip()
         product_no = (r.get("product_no") or "").strip()
         if not (name and product_no):
             continue
-        contract_code = (r.get("contract_code") or "").strip()
-        contract_id = None
-        if contract_code:
-            try:
-                contract_id = q.get_or_create_contract_by_code(conn, contract_code)
-            except Exception:
-                contract_id = q.get_or_create_default_contract(conn)
-        else:
-            contract_id = q.get_or_create_default_contract(conn)
-        res_id = q.upsert_product(conn, name, product_no, contract_id)
-        if isinstance(res_id, int) and res_id > 0:
-            added += 1
-        else:
-            updated += 1
-    return added, updated
+        # Пустой код — контракт "Без контракта" (подставляется в bulk_upsert_products)
+        contract_code = (r.get("contract_code") or "").strip() or None
+        prepared.append((name, product_no, contract_code))
+    return q.bulk_upsert_products(conn, prepared)
 
 
 def upsert_contracts(
     conn: sqlite3.Connection, rows: Iterable[dict[str, Any]]
 ) -> tuple[int, int]:
-    added = 0
-    updated = 0
+    prepared: list[dict[str, Any]] = []
     for r in rows:
         code = (r.get("code") or "").strip()
         if not code:
             continue
-        res_id = q.upsert_contract(
-            conn,
-            code,
-            r.get("start_date"),
-            r.get("end_date"),
-            r.get("description"),
-            name=r.get("name"),
-            contract_type=r.get("contract_type"),
-            executor=r.get("executor"),
-            igk=r.get("igk"),
-            contract_number=r.get("contract_number"),
-            bank_account=r.get("bank_account"),
-        )
-        if isinstance(res_id, int) and res_id > 0:
-            added += 1
-        else:
-            updated += 1
-    return added, updated
+        prepared.append({**r, "code": code})
+    return q.bulk_upsert_contracts(conn, prepared)
 
 
 def upsert_workers(
     conn: sqlite3.Connection, rows: Iterable[dict[str, Any]]
 ) -> tuple[int, int]:
-    added = 0
-    updated = 0
+    prepared: list[tuple[str, str | None, str | None, str, str | None]] = []
     for r in rows:
         fio = (r.get("full_name") or "").strip()
         if not fio:
@@ -128,9 +93,5 @@ def upsert_workers(
                 )
         position = r.get("position") or None
         status = r.get("status") or None
-        res = q.upsert_worker(conn, fio, dept, position, personnel_no, status)
-        if res:
-            added += 1
-        else:
-            updated += 0
-    return added, updated
+        prepared.append((fio, dept, position, personnel_no, status))
+    return q.bulk_upsert_workers(conn, prepared)
@@ -7,13 +7,17 @@ from typing import Callable, Literal
 from datetime import datetime
 
 from db.sqlite import get_connection
-from .readers import read_any_tabular
+from .readers import TabularSource
+from .detect import detect_file
 from .resolve import split_and_route
 from .parsers import parse_job_types, parse_products, parse_contracts, parse_workers
 from .commit import upsert_job_types, upsert_products, upsert_contracts, upsert_workers
 from .reporting import write_html_report
 from .backup import make_backup_copy
 from .orders_csv import detect_orders_csv, import_orders_from_csv
+from .staging import ImportSession, load_import_session
+from utils.column_rules import WORKER_MARKERS
+from utils.timing import stage
 from import_export.products_contracts_import import import_products_from_contracts_csv  # type: ignore
 
 import logging
@@ -59,7 +63,9 @@ def import_data(
     if progress_cb:
         progress_cb(0, 1, f"Открытие файла: {p.name}")
     # Special-case CSV work orders like provided samples (лист один)
-    if p.suffix.lower() == ".csv" and detect_orders_csv(p):
+    with stage("detect"):
+        is_orders_csv = p.suffix.lower() == ".csv" and detect_orders_csv(p)
+    if is_orders_csv:
         if dry_run:
             # parse and render small HTML summary
             from .orders_csv import parse_orders_csv
@@ -95,7 +101,7 @@ def import_data(
         )
 
     # Special-case multi-sheet Excel workbooks with orders
-    if p.suffix.lower() in {".xlsx", ".xls", ".ods"}:
+    if p.suffix.lower() in {".xlsx", ".xls", ".xlsb", ".ods"}:
         # Спец-обработка нарядов запускается, только если реально обнаружены листы с нарядами
         if (
             preset in ("orders", "auto")
@@ -105,7 +111,8 @@ def import_data(
             summary: list[dict] = []
             has_orders = False
             try:
-                summary = analyze_orders_workbook(str(p))
+                with stage("detect"):
+                    summary = analyze_orders_workbook(str(p))
                 has_orders = any("date" in entry for entry in summary)
             except Exception:
                 summary = []
@@ -163,7 +170,9 @@ def import_data(
                 )
 
     # Special-case CSV ledger with products and contracts (Оборотно-сальдовая ведомость 002)
-    if p.suffix.lower() == ".csv" and _detect_ledger_csv(p):
+    with stage("detect"):
+        is_ledger_csv = p.suffix.lower() == ".csv" and _detect_ledger_csv(p)
+    if is_ledger_csv:
         if dry_run:
             rows = _summarize_ledger_csv(p)
             Path("data").mkdir(exist_ok=True)
@@ -192,90 +201,37 @@ def import_data(
             report_html_path=None,
         )
 
-    # Generic tabular readers (много листов/таблиц)
-    dfs = read_any_tabular(p)
-    # Принудительное распознавание листов работников (XLSX/ODS), даже если листов несколько
-    forced_workers: list[int] = []
-    if dfs:
-
-        def _has_worker_markers_df(df) -> bool:
-            try:
-                cols_low = [str(c).strip().lower() for c in df.columns]
-            except Exception:
-                cols_low = []
-            # Сканируем первые строки как текстовую шапку
-            try:
-                scan_rows = min(6, len(df))
-                head_text = " ".join(
-                    [
-                        " ".join(
-                            [
-                                str(x).strip().lower()
-                                for x in (list(df.iloc[i, :]) if i < len(df) else [])
-                            ]
-                        )
-                        for i in range(scan_rows)
-                    ]
-                )
-            except Exception:
-                head_text = ""
-
-            def any_marker(s: str) -> bool:
-                s = s or ""
-                return (
-                    "фио" in s
-                    and (
-                        "таб" in s
-                        or "табел" in s
-                        or "табель" in s
-                        or "персонал" in s
-                        or "разряд" in s
-                        or "должн" in s
-                        or "цех" in s
-                        or "отдел" in s
-                        or "участок" in s
-                        or "бригада" in s
-                    )
-                ) or ("список" in s and ("работник" in s or "сотрудник" in s))
-
-            return any_marker(" ".join(cols_low)) or any_marker(head_text)
-
-        for idx, df in enumerate(dfs):
-            try:
-                # Пропускаем пустые листы без колонок и строк
-                if getattr(df, "shape", (0, 0))[1] == 0 or len(df) == 0:
-                    continue
-            except Exception as exc:
-                logging.getLogger(__name__).exception(
-                    "Ignored unexpected error: %s", exc
-                )
-            if _has_worker_markers_df(df):
-                forced_workers.append(idx)
-    # Базовые маршруты детектора
-    routes = split_and_route(dfs)
-    # Добавим принудительно распознанные листы работников
-    for idx in forced_workers:
-        if ("workers", idx) not in routes:
-            routes.append(("workers", idx))
-    # Если детектор посчитал все листы unknown (score=0), предупредим пользователя в dry-run
-    detected = None
-    try:
-        from .detect import detect_file as _detect_file
+    # Generic tabular readers (много листов/таблиц).
+    # После чернового прогона того же файла применяем уже разобранные строки
+    if not dry_run:
+        with stage("read"):
+            staged = load_import_session(p, preset)
+        if staged is not None:
+            if progress_cb:
+                progress_cb(0, 1, "Применение результатов чернового прогона...")
+            if backup_before:
+                make_backup_copy(None)
+            with stage("commit"), get_connection() as conn:
+                adds, ups = _commit_parsed_rows(conn, staged.steps)
+            staged.discard()
+            return ImportResult(
+                added=adds, updated=ups, skipped=0, errors=0, report_html_path=None
+            )
 
-        detected = _detect_file(dfs)
-    except Exception:
-        detected = None
-    # Отфильтровать по профилю импорта
-    if preset == "orders":
-        routes = [(k, i) for (k, i) in routes if k == "orders"]
-    elif preset == "price":
-        routes = [(k, i) for (k, i) in routes if k == "job_types"]
-    elif preset == "refs":
-        routes = [
-            (k, i)
-            for (k, i) in routes
-            if k in ("workers", "products", "contracts", "job_types")
-        ]
+    # Книга закрывается при любой ошибке: иначе в Windows файл остается занят
+    with TabularSource(p) as source:
+        # Фаза 1: для распознавания читаем только первые строки каждого листа
+        with stage("read"):
+            dfs = source.samples()
+        with stage("detect"):
+            routes, detected = _route_sheets(dfs, preset)
+        # Фаза 2: полностью разбираем только листы, которые уйдут в парсеры
+        with stage("read"):
+            sheets = {
+                idx: source.sheet(idx)
+                for kind, idx in routes
+                if kind in ("job_types", "products", "contracts", "workers")
+            }
     adds = 0
     ups = 0
     skips = 0
@@ -284,33 +240,42 @@ def import_data(
     # Dry-run: just count and present summary
     if dry_run:
         html_parts: list[str] = []
-        for kind, idx in routes:
-            if kind == "job_types":
-                jt = parse_job_types(dfs[idx])
-                html_parts.append(f"<div>Виды работ: найдено строк: {len(jt)}</div>")
-            elif kind == "products":
-                pr = parse_products(dfs[idx])
-                html_parts.append(f"<div>Изделия: найдено строк: {len(pr)}</div>")
-            elif kind == "contracts":
-                ct = parse_contracts(dfs[idx])
-                # Подсветим, сколько строк с датой окончания распознано
-                end_marked = sum(1 for r in ct if r.get("end_date"))
-                html_parts.append(
-                    f"<div>Контракты: найдено строк: {len(ct)} (с датой окончания: {end_marked})</div>"
-                )
-            elif kind == "workers":
-                wk = parse_workers(dfs[idx])
-                # Подсветим полноту данных
-                with_tn = sum(1 for r in wk if r.get("personnel_no"))
-                html_parts.append(
-                    f"<div>Работники: найдено строк: {len(wk)} (с таб. номером: {with_tn})</div>"
-                )
-            elif kind == "orders":
-                html_parts.append(
-                    "<div>Наряды: обнаружен лист (используйте CSV-формат нарядов или XLSX с колонками)</div>"
-                )
-            else:
-                skips += 1
+        # Разобранные строки сохраняются для последующего импорта без повторного разбора
+        steps: list[tuple[str, list[dict]]] = []
+        with stage("parse"):
+            for kind, idx in routes:
+                if kind == "job_types":
+                    jt = parse_job_types(sheets[idx])
+                    steps.append((kind, jt))
+                    html_parts.append(
+                        f"<div>Виды работ: найдено строк: {len(jt)}</div>"
+                    )
+                elif kind == "products":
+                    pr = parse_products(sheets[idx])
+                    steps.append((kind, pr))
+                    html_parts.append(f"<div>Изделия: найдено строк: {len(pr)}</div>")
+                elif kind == "contracts":
+                    ct = parse_contracts(sheets[idx])
+                    steps.append((kind, ct))
+                    # Подсветим, сколько строк с датой окончания распознано
+                    end_marked = sum(1 for r in ct if r.get("end_date"))
+                    html_parts.append(
+                        f"<div>Контракты: найдено строк: {len(ct)} (с датой окончания: {end_marked})</div>"
+                    )
+                elif kind == "workers":
+                    wk = parse_workers(sheets[idx])
+                    steps.append((kind, wk))
+                    # Подсветим полноту данных
+                    with_tn = sum(1 for r in wk if r.get("personnel_no"))
+                    html_parts.append(
+                        f"<div>Работники: найдено строк: {len(wk)} (с таб. номером: {with_tn})</div>"
+                    )
+                elif kind == "orders":
+                    html_parts.append(
+                        "<div>Наряды: обнаружен лист (используйте CSV-формат нарядов или XLSX с колонками)</div>"
+                    )
+                else:
+                    skips += 1
         # Если ничего не распознано
         if not routes and detected is not None:
             html_parts.append(
@@ -327,6 +292,14 @@ def import_data(
                 html_parts.append(
                     f"<div>Лист #{d.sheet_index+1}: тип {d.kind} (уверенность {d.score}). Подсказки: {d.hints}</div>"
                 )
+        # Почему листу присвоен тип: какие правила сработали и на каких словах
+        if detected:
+            html_parts.append("<hr><div><b>Распознавание листов:</b></div>")
+            for d in detected:
+                why = "; ".join(d.reasons or []) or "ни одно правило не сработало"
+                html_parts.append(
+                    f"<div>Лист #{d.sheet_index+1}: {d.kind} ({d.score}) — {why}</div>"
+                )
         Path("data").mkdir(exist_ok=True)
         report_path = (
             Path("data")
@@ -335,6 +308,12 @@ def import_data(
         write_html_report(
             report_path, f"Предварительный отчёт по импорту — {p.name}", html_parts
         )
+        try:
+            session = ImportSession.for_file(p, preset)
+            session.steps = steps
+            session.save()
+        except Exception as exc:
+            logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
         return DryRunReport(
             added=adds,
             updated=ups,
@@ -346,38 +325,79 @@ def import_data(
     # Real import
     if backup_before:
         make_backup_copy(None)
-    with get_connection() as conn:
-        for kind, idx in routes:
-            if kind == "job_types":
-                rows = parse_job_types(dfs[idx])
-                a, u = upsert_job_types(conn, rows)
-                adds += a
-                ups += u
-            elif kind == "products":
-                rows = parse_products(dfs[idx])
-                a, u = upsert_products(conn, rows)
-                adds += a
-                ups += u
-            elif kind == "contracts":
-                rows = parse_contracts(dfs[idx])
-                a, u = upsert_contracts(conn, rows)
-                adds += a
-                ups += u
-            elif kind == "workers":
-                rows = parse_workers(dfs[idx])
-                a, u = upsert_workers(conn, rows)
-                adds += a
-                ups += u
-            elif kind == "orders":
-                warn.append(
-                    "Импорт нарядов из общих таблиц будет добавлен отдельно. Для CSV используйте текущую поддержку."
-                )
+    parsers = {
+        "job_types": parse_job_types,
+        "products": parse_products,
+        "contracts": parse_contracts,
+        "workers": parse_workers,
+    }
+    with stage("parse"):
+        steps = [
+            (kind, parsers[kind](sheets[idx]))
+            for kind, idx in routes
+            if kind in parsers
+        ]
+    if any(kind == "orders" for kind, _ in routes):
+        warn.append(
+            "Импорт нарядов из общих таблиц будет добавлен отдельно. Для CSV используйте текущую поддержку."
+        )
+    with stage("commit"), get_connection() as conn:
+        adds, ups = _commit_parsed_rows(conn, steps)
 
     return ImportResult(
         added=adds, updated=ups, skipped=skips, errors=0, report_html_path=None
     )
 
 
+def _route_sheets(dfs, preset: str):
+    """Маршруты (kind, индекс листа) по образцам листов и результат detect_file."""
+    # Каждый лист распознается один раз: оценка типа, маршрут и маркеры работников
+    # берутся из одного прохода по заголовкам и шапке (utils.column_rules)
+    detected = detect_file(dfs)
+    routes = split_and_route(dfs, detected)
+    # Принудительное распознавание листов работников (XLSX/ODS), даже если листов несколько
+    for d in detected:
+        df = dfs[d.sheet_index]
+        try:
+            # Пропускаем пустые листы без колонок и строк
+            if getattr(df, "shape", (0, 0))[1] == 0 or len(df) == 0:
+                continue
+        except Exception as exc:
+            logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
+        if d.scan is not None and d.scan.matches(WORKER_MARKERS):
+            if ("workers", d.sheet_index) not in routes:
+                routes.append(("workers", d.sheet_index))
+    # Отфильтровать по профилю импорта
+    if preset == "orders":
+        routes = [(k, i) for (k, i) in routes if k == "orders"]
+    elif preset == "price":
+        routes = [(k, i) for (k, i) in routes if k == "job_types"]
+    elif preset == "refs":
+        routes = [
+            (k, i)
+            for (k, i) in routes
+            if k in ("workers", "products", "contracts", "job_types")
+        ]
+    return routes, detected
+
+
+def _commit_parsed_rows(conn, steps: list[tuple[str, list[dict]]]) -> tuple[int, int]:
+    """Записывает разобранные строки по шагам (kind, rows). Возвращает (added, updated)."""
+    upserts = {
+        "job_types": upsert_job_types,
+        "products": upsert_products,
+        "contracts": upsert_contracts,
+        "workers": upsert_workers,
+    }
+    adds = 0
+    ups = 0
+    for kind, rows in steps:
+        a, u = upserts[kind](conn, rows)
+        adds += a
+        ups += u
+    return adds, ups
+
+
 def _detect_ledger_csv(p: Path) -> bool:
     try:
         text = p.read_text(encoding="utf-8", errors="ignore")
@@ -1,16 +1,20 @@
 from __future__ import annotations
 
-import csv
 import re
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Iterator
 
 import sqlite3
 
 from db import queries as q
+from db.batch_commit import BatchCommitter
 from db.sqlite import get_connection
+from utils.allocation import from_kopecks, split_kopecks, to_kopecks
+from utils.csv_stream import iter_csv_rows
+from utils.hashing import file_sha256
+from utils.timing import stage
 from utils.text import normalize_for_search
 
 
@@ -52,28 +56,24 @@ def detect_orders_csv(path: str | Path) -> bool:
         return False
 
 
-def parse_orders_csv(path: str | Path) -> ParsedOrder:
-    p = Path(path)
-    with open(p, "r", encoding="utf-8", errors="ignore") as f:
-        rows = list(csv.reader(f, delimiter=";"))
-
-    header_year: int | None = None
-    workers: list[dict[str, str]] = []
-    products: list[str] = []
-    items: list[dict[str, Any]] = []
-
-    # Year from first line
-    if rows:
-        m = re.search(r"(20\d{2})", " ".join(rows[0]))
-        if m:
-            try:
-                header_year = int(m.group(1))
-            except Exception:
-                header_year = None
+def iter_orders_csv(
+    path: str | Path, progress_cb: ProgressCb | None = None
+) -> Iterator[tuple[str, Any]]:
+    """Потоково разбирает CSV наряда, читая файл построчно.
 
+    Отдает пары (вид, значение) в порядке строк файла:
+      ("year", int) — год из первой строки; ("worker", {full_name, personnel_no});
+      ("product", номер изделия); ("item", {date,name,unit,price,qty,amount}).
+    """
     current_date_str: str | None = None
-    # parse
-    for r in rows:
+    rows = iter_csv_rows(path, progress_cb=progress_cb, note="Чтение наряда")
+    for idx, r in enumerate(rows):
+        # Year from first line
+        if idx == 0:
+            m = re.search(r"(20\d{2})", " ".join(r))
+            if m:
+                yield "year", int(m.group(1))
+
         full_text = " ".join([c for c in r if c]).strip()
         if not full_text:
             continue
@@ -95,7 +95,7 @@ def parse_orders_csv(path: str | Path) -> ParsedOrder:
                 else f"AUTO-{normalize_for_search(name)}"
             )
             if name:
-                workers.append({"full_name": name, "personnel_no": personnel_no})
+                yield "worker", {"full_name": name, "personnel_no": personnel_no}
             continue
 
         if full_text.startswith("Изделие №"):
@@ -105,7 +105,7 @@ def parse_orders_csv(path: str | Path) -> ParsedOrder:
             for part in parts:
                 part = re.sub(r"-\s*повтор.*$", "", part).strip()
                 if part:
-                    products.append(part)
+                    yield "product", part
             continue
 
         # Header line for items
@@ -125,16 +125,33 @@ def parse_orders_csv(path: str | Path) -> ParsedOrder:
         qty = _parse_int_or_float(cols[4])
         amount = _parse_price(cols[5])
         if name and (price > 0 or qty > 0 or amount > 0):
-            items.append(
-                {
-                    "date": current_date_str,
-                    "name": name,
-                    "unit": unit or "шт.",
-                    "price": price,
-                    "qty": qty if qty else (amount / price if price else 0),
-                    "amount": amount if amount else (price * qty),
-                }
-            )
+            yield "item", {
+                "date": current_date_str,
+                "name": name,
+                "unit": unit or "шт.",
+                "price": price,
+                "qty": qty if qty else (amount / price if price else 0),
+                "amount": amount if amount else (price * qty),
+            }
+
+
+def parse_orders_csv(
+    path: str | Path, progress_cb: ProgressCb | None = None
+) -> ParsedOrder:
+    header_year: int | None = None
+    workers: list[dict[str, str]] = []
+    products: list[str] = []
+    items: list[dict[str, Any]] = []
+
+    for kind, value in iter_orders_csv(path, progress_cb):
+        if kind == "item":
+            items.append(value)
+        elif kind == "worker":
+            workers.append(value)
+        elif kind == "product":
+            products.append(value)
+        elif kind == "year":
+            header_year = value
 
     return ParsedOrder(
         header_year=header_year, workers=workers, products=products, items=items
@@ -160,77 +177,106 @@ def _resolve_date(d: str | None, fallback_year: int | None) -> str:
 def import_orders_from_csv(
     path: str | Path, progress_cb: ProgressCb | None = None
 ) -> dict[str, int]:
-    parsed = parse_orders_csv(path)
+    with stage("parse"):
+        parsed = parse_orders_csv(path, progress_cb)
     if progress_cb:
         progress_cb(0, 1, "Подготовка к записи в БД...")
-    with get_connection() as conn:
-        return _commit_parsed_order(conn, parsed, progress_cb)
+    with stage("commit"), get_connection() as conn:
+        return _commit_parsed_order(
+            conn, parsed, progress_cb, source_key=file_sha256(path)
+        )
+
+
+def _write_order_items(
+    conn: sqlite3.Connection, wo_id: int, items: list[dict[str, Any]]
+) -> int:
+    """Пишет пачку позиций наряда: виды работ одним upsert, затем строки."""
+    q.bulk_upsert_job_types(
+        conn,
+        [
+            (it["name"], it.get("unit") or "шт.", float(it.get("price") or 0.0))
+            for it in items
+        ],
+    )
+    jt_ids = q.get_job_type_ids_by_names(conn, [it["name"] for it in items])
+    added = 0
+    for it in items:
+        jt_id = jt_ids.get(it["name"])
+        if jt_id is None:
+            continue
+        qty = float(it.get("qty") or 0.0)
+        price = float(it.get("price") or 0.0)
+        amount = float(it.get("amount") or (qty * price))
+        q.insert_work_order_item(conn, wo_id, jt_id, qty, price, amount)
+        added += 1
+    return added
 
 
 def _commit_parsed_order(
-    conn: sqlite3.Connection, parsed: ParsedOrder, progress_cb: ProgressCb | None
+    conn: sqlite3.Connection,
+    parsed: ParsedOrder,
+    progress_cb: ProgressCb | None,
+    source_key: str | None = None,
 ) -> dict[str, int]:
-    added_items = 0
-    added_workers = 0
-    added_products = 0
+    committer = BatchCommitter(
+        conn,
+        lambda c, batch: _write_order_items(
+            c, committer.state["work_order_id"], batch
+        ),
+        kind="orders_csv",
+        source_key=source_key,
+        progress_cb=progress_cb,
+        total=len(parsed.items),
+        note="Запись позиций",
+    )
     # Contract: default
     contract_id = q.get_or_create_default_contract(conn)
 
-    # Products
-    product_ids: list[int] = []
-    for pn in parsed.products:
-        existing = q.get_product_by_no(conn, pn)
-        if existing:
-            pid = int(existing["id"])  # type: ignore[index]
-        else:
-            name = f"Изделие {pn}"
-            pid = q.upsert_product(conn, name, pn, contract_id)
-            added_products += 1
-        product_ids.append(pid)
-
-    # Date heuristics
-    dates = [
-        _resolve_date(it.get("date"), parsed.header_year)
-        for it in parsed.items
-        if it.get("date")
-    ]
-    order_date = max(dates) if dates else datetime.now().strftime("%Y-%m-%d")
-
     # Total amount
     total_amount = round(sum(float(it.get("amount") or 0) for it in parsed.items), 2)
 
-    # Order header
-    order_no = q.next_order_no(conn)
-    first_product_id = product_ids[0] if product_ids else None
-    wo_id = q.insert_work_order(
-        conn,
-        order_no=order_no,
-        date=order_date,
-        product_id=first_product_id,
-        contract_id=contract_id,
-        total_amount=total_amount,
-    )
+    if committer.resumed and "work_order_id" in committer.state:
+        # Шапка наряда и изделия записаны прерванным запуском
+        wo_id = int(committer.state["work_order_id"])
+        added_products = int(committer.state.get("added_products", 0))
+    else:
+        # Products
+        added_products = 0
+        product_ids: list[int] = []
+        for pn in parsed.products:
+            existing = q.get_product_by_no(conn, pn)
+            if existing:
+                pid = int(existing["id"])  # type: ignore[index]
+            else:
+                name = f"Изделие {pn}"
+                pid = q.upsert_product(conn, name, pn, contract_id)
+                added_products += 1
+            product_ids.append(pid)
+
+        # Date heuristics
+        dates = [
+            _resolve_date(it.get("date"), parsed.header_year)
+            for it in parsed.items
+            if it.get("date")
+        ]
+        order_date = max(dates) if dates else datetime.now().strftime("%Y-%m-%d")
+
+        # Order header
+        order_no = q.reserve_order_nos(conn, 1)
+        wo_id = q.insert_work_order(
+            conn, order_no, order_date, contract_id, total_amount
+        )
 
-    # Link additional products
-    if len(product_ids) > 1:
-        q.set_work_order_products(conn, wo_id, product_ids)
+        # Link products
+        if product_ids:
+            q.set_work_order_products(conn, wo_id, product_ids)
+        committer.state.update(work_order_id=wo_id, added_products=added_products)
 
-    # Items
+    # Items: пачками, каждая фиксируется вместе с отметкой прогресса
     for it in parsed.items:
-        # Upsert job type (updates price if changed)
-        jt_id = q.upsert_job_type(
-            conn, it["name"], it.get("unit") or "шт.", float(it.get("price") or 0.0)
-        )
-        if isinstance(jt_id, int) and jt_id <= 0:
-            row = q.get_job_type_by_name(conn, it["name"]) or {}
-            jt_id = int(row.get("id")) if row else None  # type: ignore[arg-type]
-        if jt_id is None:
-            continue
-        qty = float(it.get("qty") or 0.0)
-        price = float(it.get("price") or 0.0)
-        amount = float(it.get("amount") or (qty * price))
-        q.insert_work_order_item(conn, wo_id, int(jt_id), qty, price, amount)
-        added_items += 1
+        committer.add(it)
+    committer.flush()
+    added_items = sum(committer.results)
 
     # Workers: upsert and allocations
     worker_ids: list[int] = []
@@ -247,21 +293,17 @@ def _commit_parsed_order(
         ) or q.get_worker_by_full_name(conn, full_name)
         if row:
             worker_ids.append(int(row["id"]))  # type: ignore[index]
-            added_workers += 1
 
     # Equal allocation if any workers
     allocations: list[tuple[int, float]] = []
     if worker_ids:
-        per = round(total_amount / len(worker_ids), 2)
-        amounts = [per] * len(worker_ids)
-        diff = round(total_amount - round(per * len(worker_ids), 2), 2)
-        if len(worker_ids) > 0 and abs(diff) >= 0.01:
-            amounts[-1] = round(amounts[-1] + diff, 2)
-        allocations = [(wid, amounts[idx]) for idx, wid in enumerate(worker_ids)]
+        shares = split_kopecks(to_kopecks(total_amount), len(worker_ids))
+        allocations = [(wid, from_kopecks(kop)) for wid, kop in zip(worker_ids, shares)]
         q.set_work_order_workers_with_amounts(conn, wo_id, allocations)
 
     # Update total amount to ensure consistency
     q.update_work_order_total(conn, wo_id, total_amount)
+    committer.finish()
 
     return {
         "orders": 1,
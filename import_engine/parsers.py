@@ -1,12 +1,25 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Callable
 
+import numpy as np
 import pandas as pd
 
-from utils.text import normalize_for_search
 from .normalize import normalize_date_text
+from utils.column_rules import (
+    CONTRACTS_COLUMNS,
+    JOB_TYPES_COLUMNS,
+    JOB_TYPES_HEADER_ROW,
+    PRODUCTS_COLUMNS,
+    WORKERS_COLUMNS,
+    WORKERS_HEADER_EXTRA,
+    WORKERS_HEADER_MAIN,
+    has_groups,
+    pick_columns,
+    row_keywords,
+)
 
 
 import logging
@@ -18,272 +31,171 @@ class ParsedBlock:
     rows: list[dict[str, Any]]
 
 
+# --- Поколоночная обработка ---
+#
+# Парсеры работают с колонками целиком, а не построчно. Значения берутся из
+# df.values — ровно те же, что раньше отдавал df.iterrows(), поэтому строковое
+# представление ячеек (в т.ч. "nan" для пустых и "2.0" для чисел) не меняется.
+
+
+def _column_pos(df: pd.DataFrame, col: Any) -> int | None:
+    if col is None:
+        return None
+    for i, c in enumerate(df.columns):
+        if c is col or c == col:
+            return i
+    return None
+
+
+def _texts(values: np.ndarray, pos: int | None, default: str = "") -> pd.Series:
+    """str(ячейка).strip() для всей колонки; default — если колонки нет."""
+    if pos is None:
+        return pd.Series([default] * len(values), dtype=object)
+    return pd.Series(values[:, pos], dtype=object).astype(str).str.strip()
+
+
+def _texts_or_none(values: np.ndarray, pos: int | None) -> pd.Series:
+    """Как _texts, но пустые строки заменяются на None."""
+    s = _texts(values, pos)
+    return s.mask(s == "", None)
+
+
+def _to_float(texts: pd.Series) -> np.ndarray:
+    """float(s) для колонки строк; то, что float() не разбирает, — NaN."""
+    out = np.full(len(texts), np.nan)
+    parsed = pd.to_numeric(texts, errors="coerce").notna().to_numpy()
+    if parsed.any():
+        try:
+            # astype разбирает строки так же, как float(): без потери точности
+            out[parsed] = texts[parsed].astype("float64").to_numpy()
+        except (TypeError, ValueError):
+            parsed[:] = False
+    rest = texts[~parsed]
+    if len(rest):
+        # Редкие формы, которые понимает только float(): "1_000", "inf", "١٢"
+        def _parse(v: str) -> float:
+            try:
+                return float(v)
+            except (TypeError, ValueError):
+                return np.nan
+
+        out[~parsed] = _map_unique(rest, _parse)
+    return out
+
+
+def _map_unique(texts: pd.Series, fn: Callable[[Any], Any]) -> list[Any]:
+    """Применяет fn к каждому уникальному значению колонки один раз."""
+    cache = {v: fn(v) for v in pd.unique(texts)}
+    return [cache[v] for v in texts]
+
+
+def _contains_any(texts: pd.Series, keys: tuple[str, ...]) -> np.ndarray:
+    mask = np.zeros(len(texts), dtype=bool)
+    for k in keys:
+        mask |= texts.str.contains(k, regex=False).to_numpy(dtype=bool)
+    return mask
+
+
+def _records(columns: dict[str, Any], keep: np.ndarray) -> list[dict[str, Any]]:
+    keys = list(columns)
+    cols = [
+        (v[keep] if isinstance(v, np.ndarray) else v.to_numpy(dtype=object)[keep]).tolist()
+        for v in columns.values()
+    ]
+    return [dict(zip(keys, row)) for row in zip(*cols)]
+
+
 def parse_job_types(df: pd.DataFrame) -> list[dict[str, Any]]:
     # Попробуем определить строку заголовков в первых строках, если текущие колонки не текстовые
     try:
-        import pandas as pd  # noqa
-
-        def _looks_like_header_row(vals: list[str]) -> bool:
-            s = " ".join(v.lower() for v in vals)
-            return (
-                ("вид" in s or "наимен" in s)
-                and ("ед" in s or "изм" in s or "unit" in s)
-                and ("цена" in s or "тариф" in s or "расцен" in s or "стоим" in s)
-            )
-
         if all((str(c).isdigit() or str(c).strip() == "") for c in df.columns):
             for i in range(min(8, len(df))):
                 vals = [str(x).strip() for x in df.iloc[i].tolist()]
-                if _looks_like_header_row(vals):
+                if has_groups(row_keywords(vals), JOB_TYPES_HEADER_ROW):
                     df = df.copy()
                     df.columns = vals
                     df = df.iloc[i + 1 :].reset_index(drop=True)
                     break
     except Exception as exc:
         logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
-    [str(c).strip().lower() for c in df.columns]
-    name_col = next(
-        (
-            c
-            for c in df.columns
-            if "вид" in str(c).lower() or "наимен" in str(c).lower()
-        ),
-        None,
-    )
-    unit_col = next(
-        (
-            c
-            for c in df.columns
-            if any(k in str(c).lower() for k in ("ед", "unit", "изм"))
-        ),
-        None,
-    )
-    price_col = next(
-        (
-            c
-            for c in df.columns
-            if any(k in str(c).lower() for k in ("цена", "тариф", "расцен", "стоим"))
-        ),
-        None,
-    )
-    code_col = next((c for c in df.columns if "код" in str(c).lower()), None)
-    out: list[dict[str, Any]] = []
-    for _, r in df.iterrows():
-        name = str(r.get(name_col, "")).strip()
-        unit = str(r.get(unit_col, "шт.")).strip() or "шт."
-        # Нормализуем цену: допускаем пустые/None/NaN/текст — считаем их нулевыми
-        price: float = 0.0
-        if price_col is not None:
-            raw_val = r.get(price_col, None)
-            try:
-                import pandas as pd  # local import safe
-
-                if pd.isna(raw_val):
-                    price = 0.0
-                else:
-                    s = str(raw_val)
-                    s = s.replace(" ", "").replace("\xa0", "").replace(",", ".")
-                    try:
-                        v = float(s)
-                    except Exception:
-                        v = 0.0
-                    # Защитимся от нечисловых значений (NaN, inf)
-                    try:
-                        import math
-
-                        price = v if math.isfinite(v) else 0.0
-                    except Exception:
-                        price = v
-            except Exception:
-                price = 0.0
-        if not name:
-            continue
-        out.append(
-            {
-                "name": name,
-                "unit": unit,
-                "price": price,
-                "code": str(r.get(code_col, "")).strip(),
-            }
+    cols = pick_columns(df.columns, JOB_TYPES_COLUMNS)
+    name_col, unit_col = cols["name"], cols["unit"]
+    price_col, code_col = cols["price"], cols["code"]
+    values = df.values
+    names = _texts(values, _column_pos(df, name_col))
+    units = _texts(values, _column_pos(df, unit_col), "шт.")
+    units = units.mask(units == "", "шт.")
+    # Нормализуем цену: допускаем пустые/None/NaN/текст — считаем их нулевыми
+    prices = np.zeros(len(df))
+    price_pos = _column_pos(df, price_col)
+    if price_pos is not None:
+        raw = pd.Series(values[:, price_pos], dtype=object)
+        cleaned = (
+            raw.astype(str)
+            .str.replace(" ", "", regex=False)
+            .str.replace("\xa0", "", regex=False)
+            .str.replace(",", ".", regex=False)
         )
-    return out
+        num = _to_float(cleaned)
+        # Защитимся от нечисловых значений (NaN, inf)
+        prices = np.where(raw.isna().to_numpy() | ~np.isfinite(num), 0.0, num)
+    return _records(
+        {
+            "name": names,
+            "unit": units,
+            "price": prices,
+            "code": _texts(values, _column_pos(df, code_col)),
+        },
+        (names != "").to_numpy(),
+    )
 
 
 def parse_products(df: pd.DataFrame) -> list[dict[str, Any]]:
-    name_col = next(
-        (
-            c
-            for c in df.columns
-            if "издел" in str(c).lower() or "наимен" in str(c).lower()
-        ),
-        None,
+    cols = pick_columns(df.columns, PRODUCTS_COLUMNS)
+    name_col, no_col = cols["name"], cols["product_no"]
+    contract_col = cols["contract_code"]
+    values = df.values
+    names = _texts(values, _column_pos(df, name_col))
+    prod_nos = _texts(values, _column_pos(df, no_col))
+    return _records(
+        {
+            "name": names,
+            "product_no": prod_nos,
+            "contract_code": _texts(values, _column_pos(df, contract_col)),
+        },
+        ((names != "") & (prod_nos != "")).to_numpy(),
     )
-    no_col = next(
-        (
-            c
-            for c in df.columns
-            if "зав" in str(c).lower()
-            or "номер" in str(c).lower()
-            or "№" in str(c).lower()
-        ),
-        None,
-    )
-    contract_col = next(
-        (
-            c
-            for c in df.columns
-            if "контракт" in str(c).lower()
-            or "договор" in str(c).lower()
-            or "шифр" in str(c).lower()
-        ),
-        None,
-    )
-    out: list[dict[str, Any]] = []
-    for _, r in df.iterrows():
-        name = str(r.get(name_col, "")).strip()
-        prod_no = str(r.get(no_col, "")).strip()
-        contract_code = str(r.get(contract_col, "")).strip()
-        if not (name and prod_no):
-            continue
-        out.append(
-            {"name": name, "product_no": prod_no, "contract_code": contract_code}
-        )
-    return out
 
 
 def parse_contracts(df: pd.DataFrame) -> list[dict[str, Any]]:
-    [str(c).strip().lower() for c in df.columns]
-    # Базовые колонки
-    code_col = next(
-        (
-            c
-            for c in df.columns
-            if "шифр" in str(c).lower() or "номер" in str(c).lower()
-        ),
-        None,
-    )
-    name_col = next((c for c in df.columns if "наимен" in str(c).lower()), None)
-    type_col = next(
-        (
-            c
-            for c in df.columns
-            if "вид контракт" in str(c).lower()
-            or ("вид" in str(c).lower() and "контракт" in str(c).lower())
-        ),
-        None,
-    )
-    exec_col = next((c for c in df.columns if "исполнител" in str(c).lower()), None)
-    if exec_col is None:
-        exec_col = next(
-            (
-                c
-                for c in df.columns
-                if "исполн" in str(c).lower() and "дата" not in str(c).lower()
-            ),
-            None,
-        )
-    igk_col = next((c for c in df.columns if "игк" in str(c).lower()), None)
-    cn_col = next(
-        (
-            c
-            for c in df.columns
-            if "номер контракт" in str(c).lower()
-            or ("номер" in str(c).lower() and "контракт" in str(c).lower())
-        ),
-        None,
-    )
-    acc_col = next(
-        (c for c in df.columns if "счет" in str(c).lower() or "р/с" in str(c).lower()),
-        None,
-    )
-    # Даты: стараемся различать начало и окончание, избегая путаницы с "исполнитель"
-    start_col = next(
-        (
-            c
-            for c in df.columns
-            if any(k in str(c).lower() for k in ("начал", "заключ"))
-            or (
-                "срок" in str(c).lower()
-                and "с" in str(c).lower()
-                and "по" not in str(c).lower()
-                and "до" not in str(c).lower()
-            )
-        ),
-        None,
-    )
-    # Для окончания используем более специфичные признаки: 'оконч', 'действует до', 'срок ... до', 'по'/'до' рядом с срок/действ
-    end_col = None
-    for c in df.columns:
-        s = str(c).lower()
-        if (
-            "оконч" in s
-            or "действует до" in s
-            or ("срок" in s and ("до" in s or "по" in s))
-            or ("действ" in s and ("до" in s or "по" in s))
-        ):
-            end_col = c
-            break
-    # Явное правило под подсказанный столбец: "Плановая дата исполнения контракта"
-    if end_col is None:
-        for c in df.columns:
-            s = str(c).lower()
-            if (
-                ("планов" in s or "плановая" in s)
-                and "дата" in s
-                and "исполн" in s
-                and "контракт" in s
-            ):
-                end_col = c
-                break
-    # если так и не нашли, попробуем англ
-    if end_col is None:
-        end_col = next(
-            (
-                c
-                for c in df.columns
-                if any(
-                    k in str(c).lower()
-                    for k in ("end", "finish", "valid to", "valid until")
-                )
-            ),
-            None,
-        )
-    desc_col = next(
-        (
-            c
-            for c in df.columns
-            if "коммент" in str(c).lower()
-            or "опис" in str(c).lower()
-            or "примеч" in str(c).lower()
-        ),
-        None,
+    # Колонки и правила их выбора — в CONTRACTS_COLUMNS
+    cols = pick_columns(df.columns, CONTRACTS_COLUMNS)
+    values = df.values
+
+    def _dates(col: Any) -> list[str | None]:
+        # Пустая ячейка (None) даст текст "None", который normalize_date_text
+        # так же, как и None, не распознает
+        return _map_unique(_texts(values, _column_pos(df, col)), normalize_date_text)
+
+    def _optional(field: str) -> pd.Series:
+        return _texts_or_none(values, _column_pos(df, cols[field]))
+
+    codes = _texts(values, _column_pos(df, cols["code"]))
+    return _records(
+        {
+            "code": codes,
+            "name": _optional("name"),
+            "contract_type": _optional("contract_type"),
+            "executor": _optional("executor"),
+            "igk": _optional("igk"),
+            "contract_number": _optional("contract_number"),
+            "bank_account": _optional("bank_account"),
+            "start_date": np.array(_dates(cols["start_date"]), dtype=object),
+            "end_date": np.array(_dates(cols["end_date"]), dtype=object),
+            "description": _optional("description"),
+        },
+        (codes != "").to_numpy(),
     )
-    out: list[dict[str, Any]] = []
-    for _, r in df.iterrows():
-        code = str(r.get(code_col, "")).strip()
-        if not code:
-            continue
-        start_val = r.get(start_col, None)
-        end_val = r.get(end_col, None)
-        out.append(
-            {
-                "code": code,
-                "name": str(r.get(name_col, "")).strip() or None,
-                "contract_type": str(r.get(type_col, "")).strip() or None,
-                "executor": str(r.get(exec_col, "")).strip() or None,
-                "igk": str(r.get(igk_col, "")).strip() or None,
-                "contract_number": str(r.get(cn_col, "")).strip() or None,
-                "bank_account": str(r.get(acc_col, "")).strip() or None,
-                "start_date": normalize_date_text(
-                    None if start_val is None else str(start_val).strip() or None
-                ),
-                "end_date": normalize_date_text(
-                    None if end_val is None else str(end_val).strip() or None
-                ),
-                "description": str(r.get(desc_col, "")).strip() or None,
-            }
-        )
-    return out
 
 
 def parse_workers(df: pd.DataFrame) -> list[dict[str, Any]]:
@@ -299,9 +211,7 @@ def parse_workers(df: pd.DataFrame) -> list[dict[str, Any]]:
             line = " ".join(row_vals)
             low = line.lower()
             # Ищем шаблоны вида: "Список работников цеха № 1", "Дизельный цех № 2", "Цех № 3"
-            import re as _re
-
-            m = _re.search(r"(?i)цех[ау]?\s*№\s*(\d+)", low)
+            m = re.search(r"(?i)цех[ау]?\s*№\s*(\d+)", low)
             if m:
                 dept_from_header = m.group(1)
                 break
@@ -311,43 +221,22 @@ def parse_workers(df: pd.DataFrame) -> list[dict[str, Any]]:
     # Нормализуем заголовки. Для XLSX бывает, что заголовки на строке > 0.
     # Ищем строку, содержащую "ФИО" и/или явные заголовки работника.
     try:
-        import pandas as pd  # noqa
-
         df = df.copy()
         # 1) Попытка: явная колонка "ФИО"
         header_row_index = None
         scan_limit = min(6, len(df))
         for i in range(scan_limit):
-            row_low = [str(x).strip().lower() for x in df.iloc[i].tolist()]
-            row_text = " ".join(row_low)
-            if "фио" in row_text:
+            if "фио" in row_keywords(df.iloc[i].tolist()):
                 header_row_index = i
                 break
         # 2) Если не нашли — эвристика по наибольшему числу ключевых слов заголовков в первых 20 строках
         if header_row_index is None:
             best_idx = None
             best_score = -1
-            keys_main = ("фио", "фамил", "имя", "отче", "сотрудник", "работник")
-            keys_extra = (
-                "таб",
-                "табел",
-                "табель",
-                "персонал",
-                "tn",
-                "personnel",
-                "должн",
-                "разряд",
-                "цех",
-                "отдел",
-                "подраздел",
-                "участок",
-                "бригада",
-            )
             for i in range(min(20, len(df))):
-                row_low = [str(x).strip().lower() for x in df.iloc[i].tolist()]
-                s = " ".join(row_low)
-                score = sum(1 for k in keys_main if k in s) * 2 + sum(
-                    1 for k in keys_extra if k in s
+                words = row_keywords(df.iloc[i].tolist())
+                score = sum(1 for k in WORKERS_HEADER_MAIN if k in words) * 2 + sum(
+                    1 for k in WORKERS_HEADER_EXTRA if k in words
                 )
                 if score > best_score:
                     best_score = score
@@ -366,10 +255,9 @@ def parse_workers(df: pd.DataFrame) -> list[dict[str, Any]]:
                     for c in df.columns
                 ):
                     for i in range(min(20, len(df))):
-                        vals = [str(x).strip() for x in df.iloc[i].tolist()]
-                        line = " ".join(vals).lower()
-                        if any(k in line for k in keys_main) or any(
-                            k in line for k in keys_extra
+                        words = row_keywords(df.iloc[i].tolist())
+                        if any(k in words for k in WORKERS_HEADER_MAIN) or any(
+                            k in words for k in WORKERS_HEADER_EXTRA
                         ):
                             df.columns = [str(x).strip() for x in df.iloc[i].tolist()]
                             df = df.iloc[i + 1 :].reset_index(drop=True)
@@ -382,162 +270,74 @@ def parse_workers(df: pd.DataFrame) -> list[dict[str, Any]]:
         logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
 
     # Определяем возможные колонки
-    fio_col = next(
-        (
-            c
-            for c in df.columns
-            if "фио" in str(c).lower()
-            or "сотрудник" in str(c).lower()
-            or "работник" in str(c).lower()
-        ),
-        None,
-    )
-    fam_col = next((c for c in df.columns if "фамил" in str(c).lower()), None)
-    im_col = next(
-        (c for c in df.columns if str(c) and "имя" == str(c).strip().lower()), None
-    )
-    otch_col = next((c for c in df.columns if "отче" in str(c).lower()), None)
-    tab_col = next(
-        (
-            c
-            for c in df.columns
-            if any(
-                k in str(c).lower()
-                for k in (
-                    "таб",
-                    "табел",
-                    "табель",
-                    "персонал",
-                    "tn",
-                    "personnel",
-                    "таб.№",
-                    "таб. №",
-                    "таб.н",
-                )
-            )
-        ),
-        None,
-    )
-    pos_col = next(
-        (
-            c
-            for c in df.columns
-            if any(k in str(c).lower() for k in ("должн", "разряд", "роль", "позиция"))
-        ),
-        None,
-    )
-    dept_col = next(
-        (
-            c
-            for c in df.columns
-            if any(
-                k in str(c).lower()
-                for k in (
-                    "цех",
-                    "цех№",
-                    "цех №",
-                    "отдел",
-                    "подраздел",
-                    "участок",
-                    "бригада",
-                    "dept",
-                    "department",
-                )
-            )
-        ),
-        None,
-    )
-    status_col = next(
-        (
-            c
-            for c in df.columns
-            if any(k in str(c).lower() for k in ("статус", "уволен", "работает"))
-        ),
-        None,
+    cols = pick_columns(df.columns, WORKERS_COLUMNS)
+    fio_col, fam_col = cols["full_name"], cols["last_name"]
+    im_col, otch_col = cols["first_name"], cols["middle_name"]
+    tab_col, pos_col = cols["personnel_no"], cols["position"]
+    dept_col, status_col = cols["dept"], cols["status"]
+
+    values = df.values
+    n = len(values)
+    if fio_col is not None:
+        fio = _texts(values, _column_pos(df, fio_col))
+    else:
+        # Попробуем собрать ФИО из отдельных колонок: непустые части через пробел
+        fio = pd.Series([""] * n, dtype=object)
+        for col in (fam_col, im_col, otch_col):
+            if col is None:
+                continue
+            part = _texts(values, _column_pos(df, col))
+            fio = fio.where(part == "", fio.where(fio == "", fio + " ") + part)
+    keep = (fio != "").to_numpy()
+
+    personnel_no = _texts(values, _column_pos(df, tab_col))
+    # Если в файле табельный в третьем столбце без заголовка — fallback на эвристику по позициям
+    if tab_col is None and values.shape[1] > 2:
+        third = pd.Series(values[:, 2], dtype=object)
+        personnel_no = third.astype(str).str.strip().mask(third.map(lambda v: v is None), "")
+    personnel_no = personnel_no.mask(
+        personnel_no == "", "AUTO-" + fio.str.casefold().str.strip()
     )
 
-    out: list[dict[str, Any]] = []
-    for _, r in df.iterrows():
-        fio_val = None
-        if fio_col is not None:
-            fio_val = str(r.get(fio_col, "")).strip()
-        else:
-            # Попробуем собрать ФИО из отдельных колонок
-            parts: list[str] = []
-            if fam_col is not None:
-                parts.append(str(r.get(fam_col, "")).strip())
-            if im_col is not None:
-                parts.append(str(r.get(im_col, "")).strip())
-            if otch_col is not None:
-                parts.append(str(r.get(otch_col, "")).strip())
-            fio_val = " ".join([p for p in parts if p])
-        fio = (fio_val or "").strip()
-        if not fio:
-            continue
-        personnel_no = str(r.get(tab_col, "")).strip() if tab_col is not None else ""
-        # Если в файле табельный в третьем столбце без заголовка — fallback на эвристику по позициям
-        if not personnel_no and tab_col is None:
-            try:
-                third_val = r.iloc[2] if len(r) > 2 else None
-                personnel_no = str(third_val).strip() if third_val is not None else ""
-            except Exception as exc:
-                logging.getLogger(__name__).exception(
-                    "Ignored unexpected error: %s", exc
-                )
-        if not personnel_no:
-            personnel_no = f"AUTO-{normalize_for_search(fio)}"
-        position = (
-            str(r.get(pos_col, "")).strip() or None if pos_col is not None else None
-        )
-        dept_raw = None
-        if dept_col is not None:
-            try:
-                dept_raw = r.get(dept_col, "")
-            except Exception:
-                dept_raw = ""
-        dept = None
-        if dept_raw is not None:
-            s = str(dept_raw).strip()
-            if s:
-                # Вырезаем цифры, поддержка форматов "2", 2, 2.0, "Цех № 2"
-                try:
-                    if s.isdigit():
-                        dept = s
-                    else:
-                        try:
-                            val = float(s.replace(",", "."))
-                            if val.is_integer():
-                                dept = str(int(val))
-                        except Exception as exc:
-                            logging.getLogger(__name__).exception(
-                                "Ignored unexpected error: %s", exc
-                            )
-                        if dept is None:
-                            import re as _re
-
-                            m = _re.search(r"(\d+)", s)
-                            dept = m.group(1) if m else None
-                except Exception:
-                    dept = None
-        if (dept is None or dept == "") and dept_from_header:
-            # Пользователь просил сохранить именно цифру номера цеха
-            dept = dept_from_header
-        status_raw = (
-            str(r.get(status_col, "")).strip().lower() if status_col is not None else ""
-        )
-        status: str | None = None
-        if status_raw:
-            if any(k in status_raw for k in ("уволен", "не работает", "fired")):
-                status = "Уволен"
-            elif any(k in status_raw for k in ("работ", "active", "актив")):
-                status = "Работает"
-        out.append(
-            {
-                "full_name": fio,
-                "personnel_no": personnel_no,
-                "position": position,
-                "dept": dept,
-                "status": status,
-            }
-        )
-    return out
+    if pos_col is not None:
+        position = _texts_or_none(values, _column_pos(df, pos_col))
+    else:
+        position = pd.Series([None] * n, dtype=object)
+
+    dept = pd.Series([None] * n, dtype=object)
+    dept_pos = _column_pos(df, dept_col)
+    if dept_pos is not None:
+        raw = pd.Series(values[:, dept_pos], dtype=object)
+        s = raw.astype(str).str.strip()
+        present = (s != "") & ~raw.map(lambda v: v is None)
+        # Вырезаем цифры, поддержка форматов "2", 2, 2.0, "Цех № 2"
+        digits = present & s.str.isdigit()
+        num = pd.Series(_to_float(s.str.replace(",", ".", regex=False)))
+        whole = present & ~digits & np.isfinite(num) & (num == np.floor(num))
+        other = present & ~digits & ~whole
+        dept[digits] = s[digits]
+        dept[whole] = num[whole].map(lambda v: str(int(v)))
+        dept[other] = s[other].str.extract(r"(\d+)", expand=False).astype(object)
+        dept = dept.where(dept.notna(), None)
+    if dept_from_header:
+        # Пользователь просил сохранить именно цифру номера цеха
+        dept = dept.mask(dept.isna() | (dept == ""), dept_from_header)
+
+    status = pd.Series([None] * n, dtype=object)
+    if status_col is not None:
+        status_raw = _texts(values, _column_pos(df, status_col)).str.lower()
+        fired = _contains_any(status_raw, ("уволен", "не работает", "fired"))
+        active = _contains_any(status_raw, ("работ", "active", "актив"))
+        status[fired] = "Уволен"
+        status[~fired & active] = "Работает"
+
+    return _records(
+        {
+            "full_name": fio,
+            "personnel_no": personnel_no,
+            "position": position,
+            "dept": dept,
+            "status": status,
+        },
+        keep,
+    )
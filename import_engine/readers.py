@@ -6,6 +6,8 @@ import pandas as pd
 
 import logging
 
+from utils.sheet_cache import CachedWorkbook, open_workbook
+
 try:
     from bs4 import BeautifulSoup  # type: ignore[import]
 except Exception:
@@ -31,6 +33,78 @@ except Exception:
     odf_load = None  # type: ignore[assignment]
 
 
+# Сколько первых строк листа читать для распознавания: detect_sheet смотрит
+# шапку и 8 строк, поиск строки заголовков в parse_workers — до 20 строк
+SAMPLE_ROWS = 20
+
+
+class TabularSource:
+    """Двухфазное чтение табличного файла.
+
+    Фаза 1 (samples): из каждого листа книги читаются только первые
+    sample_rows строк — этого достаточно для распознавания и маршрутизации.
+    Фаза 2 (sheet): лист разбирается полностью, только когда он нужен парсеру.
+    Для не-Excel форматов файл читается сразу целиком через read_any_tabular.
+    Листы и их порядок совпадают с read_any_tabular.
+    """
+
+    def __init__(self, path: str | Path, sample_rows: int = SAMPLE_ROWS) -> None:
+        self.path = Path(path)
+        self.sample_rows = max(1, int(sample_rows))
+        self._xls: pd.ExcelFile | CachedWorkbook | None = None
+        self._sheet_names: list[str] = []
+        self._samples: list[pd.DataFrame] | None = None
+        self._full: dict[int, pd.DataFrame] = {}
+        suffix = self.path.suffix.lower()
+        if suffix in {".xlsx", ".xls", ".xlsb"}:
+            self._xls = open_workbook(self.path)
+            self._sheet_names = list(self._xls.sheet_names)
+        elif suffix in {".ods"}:
+            self._xls = open_workbook(self.path, engine="odf")
+            # read_any_tabular читает из .ods только первый лист
+            self._sheet_names = list(self._xls.sheet_names[:1])
+        else:
+            self._full = dict(enumerate(read_any_tabular(self.path)))
+            self._samples = [self._full[i] for i in range(len(self._full))]
+
+    def __len__(self) -> int:
+        return len(self._sheet_names) if self._xls is not None else len(self._full)
+
+    def samples(self) -> list[pd.DataFrame]:
+        """Первые строки каждого листа (для detect_sheet и похожих проверок)."""
+        if self._samples is None:
+            assert self._xls is not None
+            self._samples = [
+                self._xls.parse(name, nrows=self.sample_rows)
+                for name in self._sheet_names
+            ]
+        return self._samples
+
+    def sheet(self, index: int) -> pd.DataFrame:
+        """Полностью разобранный лист; результат кэшируется."""
+        df = self._full.get(index)
+        if df is None:
+            assert self._xls is not None
+            df = self._xls.parse(self._sheet_names[index])
+            self._full[index] = df
+        return df
+
+    def close(self) -> None:
+        if self._xls is not None:
+            try:
+                self._xls.close()
+            except Exception as exc:
+                logging.getLogger(__name__).exception(
+                    "Ignored unexpected error: %s", exc
+                )
+
+    def __enter__(self) -> "TabularSource":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
 def read_any_tabular(path: str | Path) -> list[pd.DataFrame]:
     """Read file as list of DataFrames (one per sheet or table).
 
@@ -38,11 +112,12 @@ def read_any_tabular(path: str | Path) -> list[pd.DataFrame]:
     """
     p = Path(path)
     suffix = p.suffix.lower()
-    if suffix in {".xlsx", ".xls"}:
-        xls = pd.ExcelFile(p)
-        return [xls.parse(name) for name in xls.sheet_names]
+    if suffix in {".xlsx", ".xls", ".xlsb"}:
+        with open_workbook(p) as xls:
+            return [xls.parse(name) for name in xls.sheet_names]
     if suffix in {".ods"}:
-        return [pd.read_excel(p, engine="odf")]
+        with open_workbook(p, engine="odf") as xls:
+            return [xls.parse(xls.sheet_names[0])]
     if suffix in {".csv"}:
         return [pd.read_csv(p, sep=None, engine="python")]
     if suffix in {".txt"}:
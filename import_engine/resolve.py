@@ -3,15 +3,19 @@ from __future__ import annotations
 
 import pandas as pd
 
-from .detect import detect_file
+from .detect import Detected, detect_file
 
 
-def split_and_route(dfs: list[pd.DataFrame]) -> list[tuple[str, int]]:
+def split_and_route(
+    dfs: list[pd.DataFrame], detected: list[Detected] | None = None
+) -> list[tuple[str, int]]:
     """Return list of (kind, index) for each detected block.
 
     If unknown, skip for now (could prompt user later).
+    detected — готовый результат detect_file(dfs), чтобы не распознавать листы повторно.
     """
-    detected = detect_file(dfs)
+    if detected is None:
+        detected = detect_file(dfs)
     out: list[tuple[str, int]] = []
     for d in detected:
         if d.kind != "unknown":
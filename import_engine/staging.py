@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from config.settings import CONFIG
+from utils.hashing import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Сессии старше этого срока не используются и удаляются при следующем
+# черновом прогоне
+STAGING_TTL = timedelta(days=1)
+# Версия формата сохраненных строк: увеличивать при изменении парсеров или
+# состава шагов, чтобы разбор прежней сборки не применялся как есть
+STAGING_FORMAT_VERSION = 1
+
+_STAGING_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    preset TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS staged_rows (
+    session_key TEXT NOT NULL REFERENCES sessions(key) ON DELETE CASCADE,
+    step INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_staged_rows_session ON staged_rows(session_key, step);
+"""
+
+
+def staging_db_path() -> Path:
+    return CONFIG.cache_dir / "import_staging.db"
+
+
+def _connect() -> sqlite3.Connection:
+    path = staging_db_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(_STAGING_SCHEMA)
+    return conn
+
+
+@dataclass
+class ImportSession:
+    """Разобранные строки файла, сохраненные черновым прогоном.
+
+    steps — список (kind, rows) в порядке записи в БД, где kind — один из
+    "job_types", "products", "contracts", "workers", а rows — результат
+    соответствующего парсера. Сессия привязана к версии формата разбора,
+    содержимому файла (sha256), времени его изменения и профилю импорта.
+    """
+
+    path: Path
+    sha256: str
+    mtime_ns: int
+    size: int
+    preset: str
+    steps: list[tuple[str, list[dict]]] = field(default_factory=list)
+
+    @property
+    def key(self) -> str:
+        return (
+            f"v{STAGING_FORMAT_VERSION}:{self.sha256}:{self.mtime_ns}:{self.size}"
+            f":{self.preset}"
+        )
+
+    @classmethod
+    def for_file(cls, path: str | Path, preset: str) -> "ImportSession":
+        p = Path(path)
+        st = p.stat()
+        return cls(
+            path=p.resolve(),
+            sha256=file_sha256(p),
+            mtime_ns=st.st_mtime_ns,
+            size=st.st_size,
+            preset=preset,
+        )
+
+    def save(self) -> None:
+        """Сохраняет сессию в staging-БД (заменяя прежнюю для того же ключа)."""
+        cutoff = (datetime.now() - STAGING_TTL).isoformat(timespec="seconds")
+        with closing(_connect()) as conn, conn:
+            conn.execute("DELETE FROM sessions WHERE created_at < ?", (cutoff,))
+            conn.execute("DELETE FROM sessions WHERE key = ?", (self.key,))
+            conn.execute(
+                "INSERT INTO sessions(key, path, sha256, mtime_ns, size, preset, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.key,
+                    str(self.path),
+                    self.sha256,
+                    self.mtime_ns,
+                    self.size,
+                    self.preset,
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO staged_rows(session_key, step, kind, payload) VALUES (?, ?, ?, ?)",
+                (
+                    (self.key, step, kind, json.dumps(row, ensure_ascii=False))
+                    for step, (kind, rows) in enumerate(self.steps)
+                    for row in rows
+                ),
+            )
+            # Шаги без строк тоже сохраняем, чтобы порядок и состав совпадали
+            conn.executemany(
+                "INSERT INTO staged_rows(session_key, step, kind, payload) VALUES (?, ?, ?, 'null')",
+                (
+                    (self.key, step, kind)
+                    for step, (kind, rows) in enumerate(self.steps)
+                    if not rows
+                ),
+            )
+
+    def discard(self) -> None:
+        with closing(_connect()) as conn, conn:
+            conn.execute("DELETE FROM sessions WHERE key = ?", (self.key,))
+
+
+def load_import_session(path: str | Path, preset: str) -> ImportSession | None:
+    """Возвращает сохраненную сессию, если файл не менялся после чернового прогона.
+
+    Сессии старше STAGING_TTL и сохраненные другой версией формата разбора
+    не используются.
+    """
+    try:
+        p = Path(path)
+        st = p.stat()
+        cutoff = (datetime.now() - STAGING_TTL).isoformat(timespec="seconds")
+        with closing(_connect()) as conn:
+            candidates = conn.execute(
+                "SELECT key FROM sessions WHERE path = ? AND mtime_ns = ? AND size = ?"
+                " AND preset = ? AND created_at >= ?",
+                (str(p.resolve()), st.st_mtime_ns, st.st_size, preset, cutoff),
+            ).fetchall()
+            if not candidates:
+                return None
+            session = ImportSession.for_file(p, preset)
+            if session.key not in {r[0] for r in candidates}:
+                return None
+            steps: list[tuple[str, list[dict]]] = []
+            last_step = None
+            for step, kind, payload in conn.execute(
+                "SELECT step, kind, payload FROM staged_rows WHERE session_key = ? ORDER BY step, rowid",
+                (session.key,),
+            ):
+                if step != last_step:
+                    steps.append((kind, []))
+                    last_step = step
+                row = json.loads(payload)
+                if row is not None:
+                    steps[-1][1].append(row)
+            session.steps = steps
+            return session
+    except Exception as exc:
+        # Staging — только ускорение: при любой ошибке разбираем файл заново
+        logger.warning("Сохраненный разбор недоступен: %s", exc)
+        return None
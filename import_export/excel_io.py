@@ -9,8 +9,22 @@ import re
 from datetime import datetime
 
 from db import queries as q
+from db.batch_commit import BatchCommitter
 from db.sqlite import get_connection
+from db.schema import get_table_columns
 from config.settings import CONFIG
+from utils.column_rules import (
+    ORDERS_SHEET,
+    ORDERS_SHEET_COLUMNS,
+    ORDERS_SHEET_QUICK,
+    PRICE_SHEET,
+    PRICE_SHEET_COLUMNS,
+    rename_columns,
+    scan_sheet,
+)
+from utils.hashing import file_sha256
+from utils.sheet_cache import CachedWorkbook, open_workbook
+from utils.timing import stage
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +68,7 @@ TABLE_EXPORT_CONFIG: dict[str, dict] = {
             "unit": "Ед. изм.",
             "price": "Цена",
         },
+        "formats": {"price": "#,##0.00"},
     },
     "products": {
         "columns": ["id", "name", "product_no", "contract_id"],
@@ -109,6 +124,7 @@ TABLE_EXPORT_CONFIG: dict[str, dict] = {
             "contract_id": "ID контракта",
             "total_amount": "Итоговая сумма",
         },
+        "formats": {"total_amount": "#,##0.00"},
     },
     "work_order_items": {
         "columns": [
@@ -127,6 +143,11 @@ TABLE_EXPORT_CONFIG: dict[str, dict] = {
             "unit_price": "Цена",
             "line_amount": "Сумма",
         },
+        "formats": {
+            "quantity": "0.###",
+            "unit_price": "#,##0.00",
+            "line_amount": "#,##0.00",
+        },
     },
     "work_order_workers": {
         "columns": ["work_order_id", "worker_id"],
@@ -169,17 +190,20 @@ def _norm_str(val: object) -> str:
     return str(val).strip()
 
 
-def _open_workbook(file_path: str | Path) -> pd.ExcelFile:
-    """Open workbook supporting both .xlsx/.xls and .ods (if odfpy is installed)."""
+def _open_workbook(file_path: str | Path) -> pd.ExcelFile | CachedWorkbook:
+    """Open workbook supporting .xlsx/.xls/.xlsb and .ods (if odfpy is installed).
+
+    .xls/.xlsb/.ods читаются через кэш листов (utils.sheet_cache).
+    """
     file_path = str(file_path)
     try:
-        # Let pandas auto-detect engine for Excel formats (.xlsx/.xls)
-        return pd.ExcelFile(file_path)
+        # Let pandas auto-detect engine for Excel formats (.xlsx/.xls/.xlsb)
+        return open_workbook(file_path)
     except Exception:
         # Try ODS explicitly if extension suggests so
         if file_path.lower().endswith(".ods"):
             try:
-                return pd.ExcelFile(file_path, engine="odf")
+                return open_workbook(file_path, engine="odf")
             except Exception as exc2:
                 raise RuntimeError(
                     "Не удалось открыть .ods. Установите пакет 'odfpy' (pip install odfpy)."
@@ -194,28 +218,7 @@ def _parse_orders_sheet(df: pd.DataFrame, sheet_name: str | None = None) -> list
       { date: "ДД.ММ.ГГГГ", products: ["К01АТ0317/84", ...], items: [{job_name, unit, unit_price, qty, amount}], workers: [...] }
     """
     # 1) Стандартизируем заголовки столбцов для чтения строк таблицы
-    rename = {}
-    mapping = {
-        "дата": "date",
-        "наименование выполненых работ": "job_name",
-        "наименование выполненных работ": "job_name",
-        "ед. изм.": "unit",
-        "ед. изм": "unit",
-        "расценка  (руб.)": "unit_price",
-        "расценка (руб.)": "unit_price",
-        "расценка": "unit_price",
-        "объем выполненных работ": "qty",
-        "объем": "qty",
-        "кол-во": "qty",
-        "сумма  (руб)": "amount",
-        "сумма (руб)": "amount",
-        "сумма": "amount",
-        "примечание": "note",
-    }
-    for c in df.columns:
-        key = str(c).strip().lower()
-        if key in mapping:
-            rename[c] = mapping[key]
+    rename = rename_columns(df.columns, ORDERS_SHEET_COLUMNS)
     if rename:
         df = df.rename(columns=rename)
 
@@ -425,17 +428,7 @@ def _parse_orders_sheet(df: pd.DataFrame, sheet_name: str | None = None) -> list
 def _parse_jobtypes_sheet(df: pd.DataFrame) -> list[dict]:
     """Parse price list like samples 1-3 into job_types entries."""
     # Try to standardize header
-    rename = {}
-    for c in df.columns:
-        key = str(c).strip().lower()
-        if "наименование" in key:
-            rename[c] = "name"
-        elif key.startswith("ед"):
-            rename[c] = "unit"
-        elif "цена" in key or "расценка" in key:
-            rename[c] = "price"
-        elif key.startswith("№") or "п/п" in key:
-            rename[c] = "idx"
+    rename = rename_columns(df.columns, PRICE_SHEET_COLUMNS)
     if rename:
         df = df.rename(columns=rename)
     jobs: list[dict] = []
@@ -449,20 +442,344 @@ def _parse_jobtypes_sheet(df: pd.DataFrame) -> list[dict]:
     return jobs
 
 
+def _classify_sheet(df: pd.DataFrame) -> tuple[bool, bool]:
+    """Эвристики типа листа: (прайс видов работ, лист нарядов)."""
+    # Заголовки и первые 10 строк (6 колонок — там ищется "Изделие №")
+    scan = scan_sheet(df, rows=10, cols=6)
+    is_jobtypes = scan.matches(PRICE_SHEET)
+    is_orders = scan.matches(ORDERS_SHEET)
+    return is_jobtypes, is_orders
+
+
+def _sheet_contract_code(df: pd.DataFrame) -> str | None:
+    """Шифр контракта из шапки листа нарядов ("Контракт: ..." / "Шифр ...")."""
+    header_text = "\n".join(
+        [
+            ";".join([_norm_str(v) for v in df.iloc[i, :].tolist()[:8]])
+            for i in range(min(15, len(df)))
+        ]
+    )
+    mcode = re.search(
+        r"(контракт|шифр)[:\s]*([\w\-/.]+)", header_text, flags=re.IGNORECASE
+    )
+    return _norm_str(mcode.group(2)) if mcode else None
+
+
+def _parse_workbook_sheet(
+    xls: pd.ExcelFile | CachedWorkbook, sheet: str, include_jobtypes: bool, include_orders: bool
+) -> dict:
+    """Разбирает один лист в простые записи без обращения к БД.
+
+    Возвращает {"sheet", "kind"} и в зависимости от kind:
+      - "jobtypes": job_types — список (name, unit, price);
+      - "orders": groups (см. _parse_orders_sheet) и contract_code;
+      - None: лист пропускается.
+    """
+    df = xls.parse(sheet)
+    is_jobtypes, is_orders = _classify_sheet(df)
+    if include_jobtypes and (is_jobtypes and not is_orders):
+        job_types = [
+            (j["name"], j["unit"] or "шт.", float(j["price"]))
+            for j in _parse_jobtypes_sheet(df)
+            if j["name"]
+        ]
+        return {"sheet": sheet, "kind": "jobtypes", "job_types": job_types}
+    if include_orders and is_orders:
+        return {
+            "sheet": sheet,
+            "kind": "orders",
+            "groups": _parse_orders_sheet(df, sheet),
+            "contract_code": _sheet_contract_code(df),
+        }
+    return {"sheet": sheet, "kind": None}
+
+
+# Книга, открытая в процессе-исполнителе (см. _init_sheet_worker)
+_WORKER_BOOK: pd.ExcelFile | CachedWorkbook | None = None
+
+# Меньше листов разбираем в текущем процессе: запуск пула дороже разбора
+IMPORT_PARALLEL_MIN_SHEETS = 8
+
+
+def _init_sheet_worker(file_path: str) -> None:
+    """Инициализатор процесса-исполнителя: книга открывается один раз на процесс."""
+    global _WORKER_BOOK
+    _WORKER_BOOK = _open_workbook(file_path)
+
+
+def _parse_sheet_in_process(
+    sheet: str, include_jobtypes: bool, include_orders: bool
+) -> dict:
+    """Точка входа процесса-исполнителя для разбора листа."""
+    return _parse_workbook_sheet(_WORKER_BOOK, sheet, include_jobtypes, include_orders)
+
+
+def _iter_parsed_sheets(
+    xls: pd.ExcelFile | CachedWorkbook,
+    file_path: str | Path,
+    include_jobtypes: bool,
+    include_orders: bool,
+    max_workers: int | None,
+):
+    """Разобранные листы книги строго в порядке xls.sheet_names.
+
+    Листы разбираются параллельно в пуле процессов, но отдаются по порядку,
+    поэтому результат не зависит от того, какой процесс закончил раньше.
+    Если пул недоступен, оставшиеся листы разбираются в текущем процессе.
+    """
+    import multiprocessing
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    sheets = list(xls.sheet_names)
+    workers = max_workers or min(len(sheets), os.cpu_count() or 1)
+    done = 0
+    if workers > 1 and len(sheets) >= IMPORT_PARALLEL_MIN_SHEETS:
+        pool = None
+        try:
+            # spawn: вызывается из фонового потока GUI, fork при живом Tk небезопасен
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_sheet_worker,
+                initargs=(str(file_path),),
+            )
+            futures = [
+                pool.submit(
+                    _parse_sheet_in_process, sheet, include_jobtypes, include_orders
+                )
+                for sheet in sheets
+            ]
+            for fut in futures:
+                parsed = fut.result()
+                done += 1
+                yield parsed
+        except (BrokenProcessPool, NotImplementedError, PermissionError) as exc:
+            logger.warning(
+                "Параллельный разбор листов недоступен (%s), разбор по очереди", exc
+            )
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+    for sheet in sheets[done:]:
+        yield _parse_workbook_sheet(xls, sheet, include_jobtypes, include_orders)
+
+
+def _write_order_group(
+    conn: sqlite3.Connection,
+    g: dict,
+    contract_code: str | None,
+) -> tuple[int, int]:
+    """Создает наряды по одной разобранной группе листа. Возвращает (изделий, нарядов).
+
+    Ошибка создания наряда не подавляется: группа пишется целиком или не пишется
+    (см. _write_xlsx_records).
+    """
+    from services.work_orders import (
+        WorkOrderInput,
+        WorkOrderItemInput,
+        WorkOrderWorkerInput,
+        create_work_orders_bulk,
+    )
+
+    products_count = 0
+    products: list[str] = g.get("products") or []
+    items = g.get("items") or []
+    workers = g.get("workers") or []
+    date_str = g.get("date") or datetime.now().strftime(CONFIG.date_format)
+    if not items:
+        # пропускаем группы без строк работ
+        return 0, 0
+    if not products:
+        products = [""]
+    # Подготовка job types и получение их id: один executemany на группу
+    jt_rows = []
+    for it in items:
+        price = float(it.get("unit_price") or 0.0)
+        # Строки, которые не прошли бы ограничения таблицы, не пишем
+        if it.get("job_name") and price >= 0:
+            jt_rows.append((it["job_name"], it.get("unit") or "шт.", price))
+    try:
+        q.bulk_upsert_job_types(conn, jt_rows)
+    except Exception as exc:
+        logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
+    jt_by_name = q.get_job_type_ids_by_names(conn, [it["job_name"] for it in items])
+    jt_ids: list[tuple[int, float]] = []
+    for it in items:
+        jt_id = jt_by_name.get(it["job_name"])
+        if jt_id is not None:
+            qty_val = float(it.get("qty", 1.0) or 1.0)
+            jt_ids.append((jt_id, qty_val))
+    if not jt_ids:
+        # нет валидных работ — пропускаем
+        return 0, 0
+    # Контракт из шапки или ИМПОРТ_ГОД
+    code = contract_code or f"ИМПОРТ_{datetime.now().year}"
+    try:
+        q.upsert_contract(conn, code, None, None, "Импорт из XLSX")
+    except Exception as exc:
+        logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
+    c_row = conn.execute("SELECT id FROM contracts WHERE code=?", (code,)).fetchone()
+    contract_id = int(c_row[0]) if c_row else q.get_or_create_default_contract(conn)
+
+    # Шаблон работников
+    worker_inputs_template = []
+    manual_id_counter = -1
+    for w in workers or []:
+        nm = _norm_str(w.get("full_name"))
+        pn = _norm_str(w.get("personnel_no"))
+        if not nm:
+            continue
+        roww = q.get_worker_by_personnel_no(conn, pn) if pn else None
+        if not roww:
+            roww = q.get_worker_by_full_name(conn, nm)
+        if roww:
+            worker_inputs_template.append(
+                {"worker_id": int(roww["id"]), "worker_name": nm, "amount": None}
+            )
+        else:
+            worker_inputs_template.append(
+                {"worker_id": manual_id_counter, "worker_name": nm, "amount": None}
+            )
+            manual_id_counter -= 1
+    if not worker_inputs_template:
+        nm = "Неизвестный работник"
+        pn = f"TEMP_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        wid = q.insert_worker(conn, nm, None, None, pn)
+        worker_inputs_template = [
+            {"worker_id": int(wid), "worker_name": nm, "amount": None}
+        ]
+
+    # Создаём по наряду на каждое изделие — в сопоставлении один-к-одному с видами работ
+    order_inputs: list[WorkOrderInput] = []
+    n = min(len(products), len(jt_ids))
+    for idx in range(n):
+        prod_no = products[idx]
+        jt_id, qty = jt_ids[idx]
+        product_id = None
+        prod_no_clean = _norm_str(prod_no)
+        if prod_no_clean:
+            # Привязка к контракту листа (или Без контракта)
+            prod_cid = contract_id or q.get_or_create_default_contract(conn)
+            # Избежать дубликатов по product_no: обновить/создать
+            existing = q.get_product_by_no(conn, prod_no_clean)
+            if existing:
+                try:
+                    if not existing["contract_id"] and prod_cid:
+                        q.update_product(
+                            conn,
+                            int(existing["id"]),
+                            existing["name"],
+                            existing["product_no"],
+                            prod_cid,
+                        )
+                except Exception as exc:
+                    logging.getLogger(__name__).exception(
+                        "Ignored unexpected error: %s", exc
+                    )
+                product_id = int(existing["id"])
+            else:
+                try:
+                    # Имя делаем уникальным: "Изделие <номер>"
+                    prod_name = f"Изделие {prod_no_clean}"
+                    q.upsert_product(conn, prod_name, prod_no_clean, prod_cid)
+                    products_count += 1
+                except Exception as exc:
+                    logging.getLogger(__name__).exception(
+                        "Ignored unexpected error: %s", exc
+                    )
+                rowp = conn.execute(
+                    "SELECT id FROM products WHERE product_no_norm = ?",
+                    (_norm_str(prod_no_clean).casefold(),),
+                ).fetchone()
+                if rowp:
+                    try:
+                        product_id = int(rowp[0] if not isinstance(rowp, dict) else rowp["id"])  # type: ignore[index]
+                    except Exception:
+                        product_id = None
+        # Построить позиции работ: один вид работ на одно изделие
+        wo_items_inputs = [WorkOrderItemInput(job_type_id=jt_id, quantity=qty)]
+        wo_workers = [
+            WorkOrderWorkerInput(
+                worker_id=w["worker_id"],
+                worker_name=w["worker_name"],
+                amount=w.get("amount"),
+            )
+            for w in worker_inputs_template
+        ]
+        order_inputs.append(
+            WorkOrderInput(
+                date=date_str,
+                product_id=product_id,
+                contract_id=contract_id,
+                items=wo_items_inputs,
+                workers=wo_workers,
+                extra_product_ids=[product_id] if product_id else None,
+            )
+        )
+    # Наряды группы пишутся одним пакетом
+    created = create_work_orders_bulk(conn, order_inputs)
+    return products_count, len(created)
+
+
+def _write_xlsx_records(
+    conn: sqlite3.Connection, records: list[dict]
+) -> tuple[int, int, int]:
+    """Пишет пачку записей import_xlsx_full по порядку. Возвращает (видов работ, изделий, нарядов).
+
+    Запись — строка прайс-листа {"kind": "job_type", "row": (name, unit, price)}
+    или группа нарядов {"kind": "order_group", "group": ..., "contract_code": ...};
+    подряд идущие строки прайса пишутся одним executemany.
+    """
+    jt_count = 0
+    products_count = 0
+    orders_count = 0
+    pending: list[tuple[str, str, float]] = []
+
+    def flush_job_types() -> None:
+        nonlocal jt_count
+        if pending:
+            q.bulk_upsert_job_types(conn, pending)
+            jt_count += len(pending)
+            pending.clear()
+
+    for rec in records:
+        if rec["kind"] == "job_type":
+            pending.append(tuple(rec["row"]))
+            continue
+        flush_job_types()
+        added_products, added_orders = _write_order_group(
+            conn, rec["group"], rec["contract_code"]
+        )
+        products_count += added_products
+        orders_count += added_orders
+    flush_job_types()
+    return jt_count, products_count, orders_count
+
+
 def import_xlsx_full(
     file_path: str | Path,
     progress_cb: callable | None = None,
     *,
     include_jobtypes: bool = True,
     include_orders: bool = True,
+    max_workers: int | None = None,
 ) -> tuple[int, int, int]:
     """
     Import multi-sheet workbook:
     - detect and upsert job types
     - detect and create work orders with workers and items
     Returns: (num_jobtypes, num_products, num_orders)
+
+    Листы разбираются параллельно в пуле процессов (max_workers, по умолчанию
+    по числу ядер), а пишутся в БД одним соединением строго в порядке листов
+    через BatchCommitter: пачками записей, каждая пачка фиксируется вместе с
+    отметкой прогресса в import_runs. Прерванный импорт того же файла с теми
+    же флагами (source_key) продолжается с первой незаписанной пачки.
     """
-    xls = _open_workbook(file_path)
+    with stage("read"):
+        xls = _open_workbook(file_path)
 
     def report(step: int, total: int, note: str):
         if progress_cb:
@@ -474,263 +791,55 @@ def import_xlsx_full(
                 )
 
     total_steps = len(xls.sheet_names)
-    jt_count = 0
-    orders_count = 0
-    products_count = 0
-
-    with get_connection() as conn:
-        step = 0
-        for sheet in xls.sheet_names:
-            step += 1
-            report(step, total_steps, f"Лист: {sheet}")
-            df = xls.parse(sheet)
-            # Heuristic: job types
-            lower_cols = [str(c).strip().lower() for c in df.columns]
-            is_jobtypes = (
-                any("наименование" in c for c in lower_cols)
-                and any("ед" in c for c in lower_cols)
-                and any(("цена" in c or "расценка" in c) for c in lower_cols)
+    # Ключ запуска: прерванный импорт того же файла с теми же флагами продолжится
+    flags = f"{int(include_jobtypes)}{int(include_orders)}"
+    source_key = f"{file_sha256(file_path)}:{flags}"
+
+    # Время ожидания разобранных листов идет в parse, запись — в commit
+    with get_connection() as conn, stage("parse"):
+        with BatchCommitter(
+            conn, _write_xlsx_records, kind="xlsx_full", source_key=source_key
+        ) as committer:
+            parsed_sheets = _iter_parsed_sheets(
+                xls, file_path, include_jobtypes, include_orders, max_workers
             )
-            # Heuristic: orders — более строгая проверка
-            has_date = any("дата" in c for c in lower_cols)
-            has_name_col = any("наимен" in c for c in lower_cols)
-            has_unit = any("ед" in c for c in lower_cols)
-            has_price_or_sum = any(
-                ("цена" in c or "расценка" in c or "сумма" in c) for c in lower_cols
-            )
-            # Поиск "Изделие №" в первых строках
-            scan_cells: list[str] = []
-            try:
-                scan_rows = min(10, len(df))
-                scan_cols = min(6, df.shape[1]) if df.shape[1] else 0
-                for i in range(scan_rows):
-                    row_vals = [
-                        _norm_str(x).lower()
-                        for x in (df.iloc[i, :scan_cols].tolist() if scan_cols else [])
-                    ]
-                    scan_cells.extend(row_vals)
-            except Exception as exc:
-                logging.getLogger(__name__).exception(
-                    "Ignored unexpected error: %s", exc
-                )
-            has_izdelie = any("изделие №" in x for x in scan_cells)
-            is_orders = (
-                has_date and has_name_col and has_unit and has_price_or_sum
-            ) or has_izdelie
-
-            if include_jobtypes and (is_jobtypes and not is_orders):
-                jobs = _parse_jobtypes_sheet(df)
-                for j in jobs:
-                    if not j["name"]:
-                        continue
-                    q.upsert_job_type(
-                        conn, j["name"], j["unit"] or "шт.", float(j["price"])
-                    )
-                    jt_count += 1
-                continue
-
-            if include_orders and is_orders:
-                groups = _parse_orders_sheet(df, sheet)
-                for g in groups:
-                    products: list[str] = g.get("products") or []
-                    items = g.get("items") or []
-                    workers = g.get("workers") or []
-                    date_str = g.get("date") or datetime.now().strftime(
-                        CONFIG.date_format
-                    )
-                    if not items:
-                        # пропускаем группы без строк работ
-                        continue
-                    if not products:
-                        products = [""]
-                    # Подготовка job types и получение их id
-                    jt_ids: list[tuple[int, float]] = []
-                    for it in items:
-                        try:
-                            q.upsert_job_type(
-                                conn,
-                                it["job_name"],
-                                it.get("unit") or "шт.",
-                                float(it.get("unit_price") or 0.0),
-                            )
-                        except Exception as exc:
-                            logging.getLogger(__name__).exception(
-                                "Ignored unexpected error: %s", exc
-                            )
-                        jt_row = (
-                            q.get_job_type_by_name(conn, it["job_name"])
-                            or conn.execute(
-                                "SELECT id FROM job_types WHERE name=?",
-                                (it["job_name"],),
-                            ).fetchone()
-                        )
-                        if jt_row:
-                            jt_id = int(
-                                jt_row[0]
-                                if not isinstance(jt_row, dict)
-                                else jt_row["id"]
-                            )  # tolerate row/dict
-                            qty_val = float(it.get("qty", 1.0) or 1.0)
-                            jt_ids.append((jt_id, qty_val))
-                    if not jt_ids:
-                        # нет валидных работ — пропускаем
-                        continue
-                    # Контракт из шапки или ИМПОРТ_ГОД
-                    header_text = "\n".join(
-                        [
-                            ";".join([_norm_str(v) for v in df.iloc[i, :].tolist()[:8]])
-                            for i in range(min(15, len(df)))
-                        ]
-                    )
-                    mcode = re.search(
-                        r"(контракт|шифр)[:\s]*([\w\-/.]+)",
-                        header_text,
-                        flags=re.IGNORECASE,
-                    )
-                    code = (
-                        _norm_str(mcode.group(2))
-                        if mcode
-                        else f"ИМПОРТ_{datetime.now().year}"
-                    )
-                    try:
-                        q.upsert_contract(conn, code, None, None, "Импорт из XLSX")
-                    except Exception as exc:
-                        logging.getLogger(__name__).exception(
-                            "Ignored unexpected error: %s", exc
-                        )
-                    c_row = conn.execute(
-                        "SELECT id FROM contracts WHERE code=?", (code,)
-                    ).fetchone()
-                    contract_id = (
-                        int(c_row[0])
-                        if c_row
-                        else q.get_or_create_default_contract(conn)
-                    )
-
-                    # Шаблон работников
-                    worker_inputs_template = []
-                    manual_id_counter = -1
-                    for w in workers or []:
-                        nm = _norm_str(w.get("full_name"))
-                        pn = _norm_str(w.get("personnel_no"))
-                        if not nm:
-                            continue
-                        roww = q.get_worker_by_personnel_no(conn, pn) if pn else None
-                        if not roww:
-                            roww = q.get_worker_by_full_name(conn, nm)
-                        if roww:
-                            worker_inputs_template.append(
-                                {
-                                    "worker_id": int(roww["id"]),
-                                    "worker_name": nm,
-                                    "amount": None,
-                                }
+            for step, parsed in enumerate(parsed_sheets, start=1):
+                sheet = parsed["sheet"]
+                note = f"Лист: {sheet}"
+                if committer.done:
+                    note += f" ({committer.rate:.0f} записей/с)"
+                report(step, total_steps, note)
+                with stage("commit"):
+                    if parsed["kind"] == "jobtypes":
+                        for row in parsed["job_types"]:
+                            committer.add(
+                                {"kind": "job_type", "sheet": sheet, "row": row}
                             )
-                        else:
-                            worker_inputs_template.append(
+                    elif parsed["kind"] == "orders":
+                        for group in parsed["groups"]:
+                            committer.add(
                                 {
-                                    "worker_id": manual_id_counter,
-                                    "worker_name": nm,
-                                    "amount": None,
+                                    "kind": "order_group",
+                                    "sheet": sheet,
+                                    "group": group,
+                                    "contract_code": parsed["contract_code"],
                                 }
                             )
-                            manual_id_counter -= 1
-                    if not worker_inputs_template:
-                        nm = "Неизвестный работник"
-                        pn = f"TEMP_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                        wid = q.insert_worker(conn, nm, None, None, pn)
-                        worker_inputs_template = [
-                            {"worker_id": int(wid), "worker_name": nm, "amount": None}
-                        ]
-
-                    # Создаём по наряду на каждое изделие — в сопоставлении один-к-одному с видами работ
-                    from services.work_orders import (
-                        WorkOrderInput,
-                        WorkOrderItemInput,
-                        WorkOrderWorkerInput,
-                        create_work_order,
-                    )
-
-                    n = min(len(products), len(jt_ids))
-                    for idx in range(n):
-                        prod_no = products[idx]
-                        jt_id, qty = jt_ids[idx]
-                        product_id = None
-                        prod_no_clean = _norm_str(prod_no)
-                        if prod_no_clean:
-                            # Привязка к контракту листа (или Без контракта)
-                            prod_cid = contract_id or q.get_or_create_default_contract(
-                                conn
-                            )
-                            # Избежать дубликатов по product_no: обновить/создать
-                            existing = q.get_product_by_no(conn, prod_no_clean)
-                            if existing:
-                                try:
-                                    if not existing["contract_id"] and prod_cid:
-                                        q.update_product(
-                                            conn,
-                                            int(existing["id"]),
-                                            existing["name"],
-                                            existing["product_no"],
-                                            prod_cid,
-                                        )
-                                except Exception as exc:
-                                    logging.getLogger(__name__).exception(
-                                        "Ignored unexpected error: %s", exc
-                                    )
-                                product_id = int(existing["id"])
-                            else:
-                                try:
-                                    # Имя делаем уникальным: "Изделие <номер>"
-                                    prod_name = f"Изделие {prod_no_clean}"
-                                    q.upsert_product(
-                                        conn, prod_name, prod_no_clean, prod_cid
-                                    )
-                                    products_count += 1
-                                except Exception as exc:
-                                    logging.getLogger(__name__).exception(
-                                        "Ignored unexpected error: %s", exc
-                                    )
-                                rowp = conn.execute(
-                                    "SELECT id FROM products WHERE product_no_norm = ?",
-                                    (_norm_str(prod_no_clean).casefold(),),
-                                ).fetchone()
-                                if rowp:
-                                    try:
-                                        product_id = int(rowp[0] if not isinstance(rowp, dict) else rowp["id"])  # type: ignore[index]
-                                    except Exception:
-                                        product_id = None
-                        # Построить позиции работ: один вид работ на одно изделие
-                        wo_items_inputs = [
-                            WorkOrderItemInput(job_type_id=jt_id, quantity=qty)
-                        ]
-                        wo_workers = [
-                            WorkOrderWorkerInput(
-                                worker_id=w["worker_id"],
-                                worker_name=w["worker_name"],
-                                amount=w.get("amount"),
-                            )
-                            for w in worker_inputs_template
-                        ]
-                        data = WorkOrderInput(
-                            date=date_str,
-                            product_id=product_id,
-                            contract_id=contract_id,
-                            items=wo_items_inputs,
-                            workers=wo_workers,
-                        )
-                        try:
-                            create_work_order(conn, data)
-                            orders_count += 1
-                        except Exception as e:
-                            logger.exception(
-                                "Не удалось создать наряд с листа %s: %s", sheet, e
-                            )
-                continue
-
-            # Unknown sheet - skip
-            report(step, total_steps, f"Пропущен: {sheet}")
+                    else:
+                        # Unknown sheet - skip
+                        report(step, total_steps, f"Пропущен: {sheet}")
+            with stage("commit"):
+                committer.finish()
+        if committer.failed:
+            report(
+                total_steps,
+                total_steps,
+                f"Не записано записей: {committer.failed} (см. журнал import_errors)",
+            )
 
+    jt_count = sum(r[0] for r in committer.results)
+    products_count = sum(r[1] for r in committer.results)
+    orders_count = sum(r[2] for r in committer.results)
     return jt_count, products_count, orders_count
 
 
@@ -929,84 +1038,250 @@ def import_contracts_from_excel(conn: sqlite3.Connection, file_path: str | Path)
 # Exporters
 
 
-def export_table_to_excel(
-    conn: sqlite3.Connection, table: str, file_path: str | Path
-) -> Path:
-    cfg = TABLE_EXPORT_CONFIG.get(table)
+# Сортировка работников для экспорта: статус (Работает сначала), затем цех,
+# должность (начальники первыми), ФИО
+_WORKERS_EXPORT_SQL = (
+    "SELECT id, full_name, dept, position, personnel_no, COALESCE(status, 'Работает') AS status "
+    "FROM workers "
+    "ORDER BY CASE WHEN TRIM(COALESCE(status, 'Работает')) = 'Работает' THEN 0 ELSE 1 END, "
+    "COALESCE(dept_norm, ''), "
+    "CASE WHEN COALESCE(position_norm, '') LIKE '%начальник%' THEN 0 ELSE 1 END, "
+    "COALESCE(position_norm, ''), "
+    "full_name"
+)
+
+# Размер порции строк, читаемых из курсора за один раз при потоковом экспорте
+EXPORT_CHUNK_ROWS = 5000
+
+
+def _export_select_sql(conn: sqlite3.Connection, table: str) -> str:
     if table == "workers":
-        # Пользовательская сортировка: статус (Работает сначала), затем цех, должность (начальники первыми), ФИО
-        sql = (
-            "SELECT id, full_name, dept, position, personnel_no, COALESCE(status, 'Работает') AS status "
-            "FROM workers"
-        )
-        df = pd.read_sql_query(sql, conn)
-
-        # Ключи сортировки
-        def status_key(s: str) -> int:
-            return 0 if str(s).strip() == "Работает" else 1
-
-        def position_key(p: str) -> tuple[int, str]:
-            txt = (p or "").strip()
-            is_head = 0 if "начальник" in txt.casefold() else 1
-            return (is_head, txt.casefold())
-
-        df["_status_key"] = df["status"].map(status_key)
-        df["_dept_key"] = df["dept"].astype(str).str.casefold()
-        df["_pos_key_tuple"] = df["position"].apply(position_key)
-        # pandas не сортирует напрямую по tuple-колонке стабильно между версиями, развернем на два столбца
-        df["_pos_is_head"] = df["_pos_key_tuple"].apply(lambda t: t[0])
-        df["_pos_name"] = df["_pos_key_tuple"].apply(lambda t: t[1])
-        df.sort_values(
-            by=["_status_key", "_dept_key", "_pos_is_head", "_pos_name", "full_name"],
-            inplace=True,
-            kind="mergesort",
-        )
-        df.drop(
-            columns=[
-                "_status_key",
-                "_dept_key",
-                "_pos_key_tuple",
-                "_pos_is_head",
-                "_pos_name",
-            ],
-            inplace=True,
-        )
-        # Переименуем заголовки по конфигу
-        headers = TABLE_EXPORT_CONFIG["workers"]["headers"]
-        df.rename(columns=headers, inplace=True)
-    else:
-        if cfg and cfg.get("columns"):
-            cols = ", ".join(cfg["columns"])
-            df = pd.read_sql_query(f"SELECT {cols} FROM {table}", conn)
-            df.rename(columns=cfg.get("headers", {}), inplace=True)
-        else:
-            df = pd.read_sql_query(f"SELECT * FROM {table}", conn)
+        return _WORKERS_EXPORT_SQL
+    cfg = TABLE_EXPORT_CONFIG.get(table) or {}
+    existing = get_table_columns(conn, table)
+    # Колонки из конфига, которых уже нет в схеме (например, устаревший product_id), пропускаем
+    cols = [c for c in cfg.get("columns", []) if c in existing]
+    if not cols:
+        return f"SELECT * FROM {table}"
+    order_col = "id" if "id" in existing else "rowid"
+    return f"SELECT {', '.join(cols)} FROM {table} ORDER BY {order_col}"
+
+
+def export_table_to_excel_streaming(
+    conn: sqlite3.Connection,
+    table: str,
+    file_path: str | Path,
+    *,
+    chunk_size: int = EXPORT_CHUNK_ROWS,
+    progress_cb: callable | None = None,
+) -> Path:
+    """Потоковый экспорт таблицы в XLSX с постоянным потреблением памяти.
+
+    Строки читаются из курсора порциями по chunk_size и сразу пишутся в книгу
+    XlsxWriter в режиме constant_memory (строка сбрасывается на диск после записи).
+    Заголовки и числовые форматы берутся из TABLE_EXPORT_CONFIG.
+    progress_cb(done_rows, total_rows) вызывается после каждой порции.
+    """
+    import xlsxwriter
+
     file_path = Path(file_path)
-    df.to_excel(file_path, index=False)
+    cfg = TABLE_EXPORT_CONFIG.get(table) or {}
+    headers_map: dict[str, str] = cfg.get("headers", {})
+    formats_map: dict[str, str] = cfg.get("formats", {})
+
+    total_rows = int(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
+    cur = conn.execute(_export_select_sql(conn, table))
+    columns = [d[0] for d in cur.description]
+
+    workbook = xlsxwriter.Workbook(str(file_path), {"constant_memory": True})
+    try:
+        sheet = workbook.add_worksheet("Sheet1")
+        header_fmt = workbook.add_format({"bold": True, "border": 1})
+        col_formats = []
+        for idx, col in enumerate(columns):
+            title = headers_map.get(col, col)
+            num_fmt = formats_map.get(col)
+            fmt = workbook.add_format({"num_format": num_fmt}) if num_fmt else None
+            col_formats.append(fmt)
+            sheet.set_column(idx, idx, max(12, len(str(title)) + 2), fmt)
+            sheet.write_string(0, idx, str(title), header_fmt)
+
+        row_idx = 1
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            for r in rows:
+                for idx, value in enumerate(r):
+                    if value is None:
+                        continue
+                    sheet.write(row_idx, idx, value, col_formats[idx])
+                row_idx += 1
+            if progress_cb:
+                try:
+                    progress_cb(row_idx - 1, total_rows)
+                except Exception as exc:
+                    logger.exception("Ignored unexpected error: %s", exc)
+    finally:
+        workbook.close()
     return file_path
 
 
+def export_table_to_excel(
+    conn: sqlite3.Connection, table: str, file_path: str | Path
+) -> Path:
+    return export_table_to_excel_streaming(conn, table, file_path)
+
+
+# Таблицы полного экспорта в порядке выгрузки
+EXPORT_ALL_TABLES: tuple[str, ...] = (
+    "workers",
+    "job_types",
+    "products",
+    "contracts",
+    "work_orders",
+    "work_order_items",
+    "work_order_workers",
+)
+
+
 def export_all_tables_to_excel(
     conn: sqlite3.Connection, dir_path: str | Path
 ) -> list[Path]:
     dir_path = Path(dir_path)
     dir_path.mkdir(parents=True, exist_ok=True)
     outputs: list[Path] = []
-    for table in (
-        "workers",
-        "job_types",
-        "products",
-        "contracts",
-        "work_orders",
-        "work_order_items",
-        "work_order_workers",
-    ):
+    for table in EXPORT_ALL_TABLES:
         path = dir_path / f"{table}.xlsx"
         export_table_to_excel(conn, table, path)
         outputs.append(path)
     return outputs
 
 
+def _open_readonly_connection(db_path: str | Path) -> sqlite3.Connection:
+    uri = f"file:{Path(db_path)}?mode=ro"
+    return sqlite3.connect(uri, uri=True)
+
+
+def _export_table_in_process(
+    db_path: str, table: str, file_path: str, chunk_size: int
+) -> tuple[str, str]:
+    """Точка входа процесса-исполнителя: своя read-only копия соединения на таблицу."""
+    conn = _open_readonly_connection(db_path)
+    try:
+        export_table_to_excel_streaming(conn, table, file_path, chunk_size=chunk_size)
+    finally:
+        conn.close()
+    return table, file_path
+
+
+def export_all_tables_parallel(
+    db_path: str | Path,
+    dir_path: str | Path,
+    *,
+    max_workers: int | None = None,
+    progress_cb: callable | None = None,
+    zip_path: str | Path | None = None,
+    chunk_size: int = EXPORT_CHUNK_ROWS,
+) -> list[Path]:
+    """Экспорт всех таблиц в XLSX параллельно — по процессу на таблицу.
+
+    Каждый процесс открывает собственное соединение с БД в режиме только чтения.
+    progress_cb(step, total, note) получает суммарное число выгруженных строк
+    по мере завершения таблиц. Если задан zip_path, файлы упаковываются в один
+    ZIP-архив (промежуточные XLSX удаляются), и возвращается [zip_path].
+    """
+    import multiprocessing
+    import os
+    import tempfile
+    import zipfile
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from concurrent.futures.process import BrokenProcessPool
+
+    db_path = Path(db_path)
+    dir_path = Path(dir_path)
+    work_dir = Path(tempfile.mkdtemp(prefix="export_")) if zip_path else dir_path
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    conn = _open_readonly_connection(db_path)
+    try:
+        row_counts = {
+            t: int(conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0])
+            for t in EXPORT_ALL_TABLES
+        }
+    finally:
+        conn.close()
+    total_rows = max(1, sum(row_counts.values()))
+
+    def report(done: int, note: str) -> None:
+        if progress_cb:
+            try:
+                progress_cb(done, total_rows, note)
+            except Exception as exc:
+                logger.exception("Ignored unexpected error: %s", exc)
+
+    targets = {t: work_dir / f"{t}.xlsx" for t in EXPORT_ALL_TABLES}
+    workers = max_workers or min(len(EXPORT_ALL_TABLES), os.cpu_count() or 1)
+    done_rows = 0
+    report(0, "Экспорт таблиц...")
+    try:
+        # spawn: вызывается из фонового потока GUI, fork при живом Tk небезопасен
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            futures = [
+                pool.submit(
+                    _export_table_in_process,
+                    str(db_path),
+                    table,
+                    str(targets[table]),
+                    chunk_size,
+                )
+                for table in EXPORT_ALL_TABLES
+            ]
+            for fut in as_completed(futures):
+                table, _ = fut.result()
+                done_rows += row_counts[table]
+                report(done_rows, f"Готово: {table}")
+    except (BrokenProcessPool, NotImplementedError, PermissionError) as exc:
+        # Например, запрет на порождение процессов — выгружаем последовательно
+        logger.warning("Параллельный экспорт недоступен (%s), экспорт по очереди", exc)
+        done_rows = 0
+        conn = _open_readonly_connection(db_path)
+        try:
+            for table in EXPORT_ALL_TABLES:
+                export_table_to_excel_streaming(
+                    conn, table, targets[table], chunk_size=chunk_size
+                )
+                done_rows += row_counts[table]
+                report(done_rows, f"Готово: {table}")
+        finally:
+            conn.close()
+
+    outputs = [targets[t] for t in EXPORT_ALL_TABLES]
+    if not zip_path:
+        return outputs
+    zip_path = Path(zip_path)
+    zip_path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for path in outputs:
+            zf.write(path, arcname=path.name)
+    for path in outputs:
+        try:
+            path.unlink()
+        except Exception as exc:
+            logger.exception("Ignored unexpected error: %s", exc)
+    try:
+        work_dir.rmdir()
+    except Exception as exc:
+        logger.exception("Ignored unexpected error: %s", exc)
+    return [zip_path]
+
+
+# Строк листа, которых достаточно analyze_orders_workbook для определения его типа
+_ANALYZE_SAMPLE_ROWS = 5
+
+
 def analyze_orders_workbook(file_path: str | Path) -> list[dict]:
     """
     Dry-run analyzer: parse workbook (xlsx/ods), detect order groups and return
@@ -1016,19 +1291,20 @@ def analyze_orders_workbook(file_path: str | Path) -> list[dict]:
     xls = _open_workbook(file_path)
     summary: list[dict] = []
     for sheet in xls.sheet_names:
+        # Тип листа определяем по шапке и первым строкам, а целиком
+        # разбираем только листы нарядов и прайс-листы
         try:
-            df = xls.parse(sheet)
+            head = xls.parse(sheet, nrows=_ANALYZE_SAMPLE_ROWS)
         except Exception:
             continue
-        lower_cols = [str(c).strip().lower() for c in df.columns]
-        is_jobtypes = (
-            any("наименование" in c for c in lower_cols)
-            and any("ед" in c for c in lower_cols)
-            and any("цена" in c or "расценка" in c for c in lower_cols)
-        )
-        is_orders = any(
-            "фио" in _norm_str(v).lower() for v in df.head(5).iloc[:, 0].tolist()
-        ) or any("дата" in c for c in lower_cols)
+        scan = scan_sheet(head, rows=5, cols=1)
+        is_jobtypes = scan.matches(PRICE_SHEET)
+        is_orders = scan.matches(ORDERS_SHEET_QUICK)
+        if is_orders or is_jobtypes:
+            try:
+                df = xls.parse(sheet)
+            except Exception:
+                continue
         if is_orders:
             groups = _parse_orders_sheet(df)
             for g in groups:
@@ -6,10 +6,12 @@
 import csv
 import re
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Iterable, Iterator, Tuple
 
 from db.sqlite import get_connection
 from db import queries as q
+from utils.csv_stream import iter_csv_rows
+from utils.timing import stage
 
 
 def parse_product_info(text: str) -> Tuple[str, str]:
@@ -76,48 +78,33 @@ def clean_text(text: str) -> str:
     return cleaned
 
 
-def import_products_from_contracts_csv(
-    csv_path: str, progress_callback=None
-) -> Dict[str, int]:
-    """
-    Импортирует изделия с привязкой к контрактам из CSV файла
+# Групп "изделие — договор", записываемых в БД одной транзакцией
+IMPORT_BATCH_GROUPS = 1000
 
-    Args:
-        csv_path: Путь к CSV файлу
-        progress_callback: Функция для отображения прогресса (step, total, note)
+# Признаки строки с контрагентом (организацией)
+_EXECUTOR_KEYWORDS = (
+    "ООО",
+    "АО",
+    "ОАО",
+    "ЗАО",
+    "РПТП",
+    "КСК",
+    "УРАЛТРАНСМАШ",
+    "МК ВИТЯЗЬ",
+    "78 ЦЕНТРАЛЬНАЯ ИНЖЕНЕРНАЯ БАЗА",
+    "МПЗ",
+)
 
-    Returns:
-        Словарь с результатами: {"products": count, "contracts": count, "errors": count}
-    """
-    csv_path = Path(csv_path)
-    if not csv_path.exists():
-        raise FileNotFoundError(f"Файл не найден: {csv_path}")
 
-    # Счетчики
-    stats = {"products": 0, "contracts": 0, "errors": 0}
-
-    # Структуры для хранения данных
-    products_data = {}  # {product_key: {name, number, contract_name, contract_number}}
-    contracts_data = {}  # {contract_key: {name, number, executor, date}}
-
-    # Читаем CSV файл
-    with open(csv_path, "r", encoding="utf-8", errors="ignore") as file:
-        reader = csv.reader(file, delimiter=";")
-        rows = list(reader)
-
-    total_rows = len(rows)
-    current_row = 0
-
-    # Парсим данные по группам
+def _iter_product_groups(rows: Iterable[list[str]]) -> Iterator[dict]:
+    """
+    Собирает строки ведомости в группы по изделиям.
+    Группа: {"product", "contract", "executor", "date"}; отдается, как только
+    начинается следующее изделие (последняя — по окончании строк).
+    """
     current_group = {"product": None, "contract": None, "executor": None, "date": None}
 
     for row in rows:
-        current_row += 1
-        if progress_callback:
-            progress_callback(
-                current_row, total_rows, f"Обработка строки {current_row}/{total_rows}"
-            )
-
         # Объединяем все ячейки в одну строку для анализа
         full_text = " ".join([str(cell) for cell in row if cell])
 
@@ -129,9 +116,9 @@ def import_products_from_contracts_csv(
         if "Двигатель" in full_text and "№" in full_text:
             product_name, product_number = parse_product_info(full_text)
             if product_name and product_number:
-                # Если у нас уже есть изделие, сохраняем предыдущую группу
+                # Если у нас уже есть изделие, отдаем предыдущую группу
                 if current_group["product"]:
-                    _save_current_group(current_group, products_data, contracts_data)
+                    yield current_group
 
                 # Начинаем новую группу
                 current_group = {
@@ -143,21 +130,7 @@ def import_products_from_contracts_csv(
             continue
 
         # Ищем контрагента (организацию)
-        if any(
-            keyword in full_text
-            for keyword in [
-                "ООО",
-                "АО",
-                "ОАО",
-                "ЗАО",
-                "РПТП",
-                "КСК",
-                "УРАЛТРАНСМАШ",
-                "МК ВИТЯЗЬ",
-                "78 ЦЕНТРАЛЬНАЯ ИНЖЕНЕРНАЯ БАЗА",
-                "МПЗ",
-            ]
-        ):
+        if any(keyword in full_text for keyword in _EXECUTOR_KEYWORDS):
             current_group["executor"] = clean_text(full_text)
             continue
 
@@ -179,78 +152,133 @@ def import_products_from_contracts_csv(
             current_group["date"] = current_date
             continue
 
-    # Сохраняем последнюю группу
+    # Последняя группа
     if current_group["product"]:
-        _save_current_group(current_group, products_data, contracts_data)
+        yield current_group
+
 
-    # Импортируем данные в базу
-    if progress_callback:
-        progress_callback(0, 1, "Импорт контрактов...")
+def import_products_from_contracts_csv(
+    csv_path: str, progress_callback=None
+) -> Dict[str, int]:
+    """
+    Импортирует изделия с привязкой к контрактам из CSV файла
+
+    Файл читается потоково, построчно; изделия и контракты записываются
+    в БД порциями по IMPORT_BATCH_GROUPS групп, каждая порция — отдельная транзакция.
+
+    Args:
+        csv_path: Путь к CSV файлу
+        progress_callback: Функция для отображения прогресса (step, total, note);
+            step и total — прочитано байт и размер файла
+
+    Returns:
+        Словарь с результатами: {"products": count, "contracts": count, "errors": count}
+    """
+    csv_path = Path(csv_path)
+    if not csv_path.exists():
+        raise FileNotFoundError(f"Файл не найден: {csv_path}")
+
+    # Счетчики
+    stats = {"products": 0, "contracts": 0, "errors": 0}
+
+    # Данные текущей порции
+    products_data = {}  # {product_key: {name, number, contract_name, contract_number}}
+    contracts_data = {}  # {contract_key: {name, number, executor, date}}
+    # Ключи, уже записанные предыдущими порциями (побеждает первое вхождение)
+    seen_products: set[str] = set()
+    seen_contracts: set[str] = set()
+
+    rows = iter_csv_rows(
+        csv_path, progress_cb=progress_callback, note="Обработка файла"
+    )
 
     with get_connection() as conn:
-        # Сначала импортируем контракты
-        for contract_key, contract_data in contracts_data.items():
-            try:
-                # Создаем или обновляем контракт
-                contract_id = q.upsert_contract(
-                    conn,
-                    code=contract_data["number"] or f"CONTRACT_{contract_key}",
-                    start_date=contract_data["date"],
-                    end_date=None,
-                    description=f"Импортирован из CSV: {contract_data['name']}",
-                    name=contract_data["name"],
-                    contract_type="Договор",
-                    executor=contract_data["executor"],
-                    igk=None,
-                    contract_number=contract_data["number"],
-                    bank_account=None,
-                )
-                stats["contracts"] += 1
-            except Exception:
-                stats["errors"] += 1
-
-        if progress_callback:
-            progress_callback(0, 1, "Импорт изделий...")
-
-        # Затем импортируем изделия
-        for product_key, product_data in products_data.items():
-            try:
-                # Находим контракт по имени
-                contract_id = None
-                if product_data["contract_name"]:
-                    contract = q.get_contract_by_name(
-                        conn, product_data["contract_name"]
+        no_contract_id = None
+
+        def flush() -> None:
+            nonlocal no_contract_id
+            # Сначала импортируем контракты
+            for contract_key, contract_data in contracts_data.items():
+                if contract_key in seen_contracts:
+                    continue
+                seen_contracts.add(contract_key)
+                try:
+                    # Создаем или обновляем контракт
+                    q.upsert_contract(
+                        conn,
+                        code=contract_data["number"] or f"CONTRACT_{contract_key}",
+                        start_date=contract_data["date"],
+                        end_date=None,
+                        description=f"Импортирован из CSV: {contract_data['name']}",
+                        name=contract_data["name"],
+                        contract_type="Договор",
+                        executor=contract_data["executor"],
+                        igk=None,
+                        contract_number=contract_data["number"],
+                        bank_account=None,
                     )
-                    if contract:
-                        contract_id = contract["id"]
-
-                # Если контракт не найден, создаем "Без контракта"
-                if not contract_id:
-                    no_contract = q.get_contract_by_code(conn, "Без контракта")
-                    if not no_contract:
-                        contract_id = q.insert_contract(
-                            conn,
-                            "Без контракта",
-                            None,
-                            None,
-                            "Автоматически создан для изделий без контракта",
-                            name="Без контракта",
-                            contract_type="Системный",
-                            executor="Система",
+                    stats["contracts"] += 1
+                except Exception:
+                    stats["errors"] += 1
+
+            # Затем импортируем изделия
+            for product_key, product_data in products_data.items():
+                if product_key in seen_products:
+                    continue
+                seen_products.add(product_key)
+                try:
+                    # Находим контракт по имени
+                    contract_id = None
+                    if product_data["contract_name"]:
+                        contract = q.get_contract_by_name(
+                            conn, product_data["contract_name"]
                         )
-                    else:
-                        contract_id = no_contract["id"]
-
-                # Создаем или обновляем изделие
-                q.upsert_product(
-                    conn,
-                    name=product_data["name"],
-                    product_no=product_data["number"],
-                    contract_id=contract_id,
-                )
-                stats["products"] += 1
-            except Exception:
-                stats["errors"] += 1
+                        if contract:
+                            contract_id = contract["id"]
+
+                    # Если контракт не найден, берем (или создаем) "Без контракта"
+                    if not contract_id:
+                        if no_contract_id is None:
+                            no_contract = q.get_contract_by_code(conn, "Без контракта")
+                            if not no_contract:
+                                no_contract_id = q.insert_contract(
+                                    conn,
+                                    "Без контракта",
+                                    None,
+                                    None,
+                                    "Автоматически создан для изделий без контракта",
+                                    name="Без контракта",
+                                    contract_type="Системный",
+                                    executor="Система",
+                                )
+                            else:
+                                no_contract_id = no_contract["id"]
+                        contract_id = no_contract_id
+
+                    # Создаем или обновляем изделие
+                    q.upsert_product(
+                        conn,
+                        name=product_data["name"],
+                        product_no=product_data["number"],
+                        contract_id=contract_id,
+                    )
+                    stats["products"] += 1
+                except Exception:
+                    stats["errors"] += 1
+
+            products_data.clear()
+            contracts_data.clear()
+            conn.commit()
+
+        # Чтение и разбор идут потоково вперемешку с записью порций
+        with stage("parse"):
+            for count, group in enumerate(_iter_product_groups(rows), start=1):
+                _save_current_group(group, products_data, contracts_data)
+                if count % IMPORT_BATCH_GROUPS == 0:
+                    with stage("commit"):
+                        flush()
+        with stage("commit"):
+            flush()
 
     return stats
 
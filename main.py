@@ -358,4 +358,8 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    # Нужно для пула процессов (параллельный экспорт) в собранном exe
+    import multiprocessing
+
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+import logging
+
+# Колонки отчетов (как в БД, так и локализованные), которые пишем в типизированном виде.
+# Денежные суммы хранятся целыми копейками (scale=2 в метаданных поля), чтобы
+# аналитические инструменты не теряли точность на float.
+_MONEY_COLUMNS = {
+    "Начислено",
+    "Сумма",
+    "Цена",
+    "Сумма работнику",
+    "amount",
+    "price",
+    "worker_amount",
+    "line_amount",
+    "unit_price",
+    "total_amount",
+}
+_DATE_COLUMNS = {"Дата", "date"}
+_INT_COLUMNS = {"№", "Номер", "№ наряда", "order_no"}
+_FLOAT_COLUMNS = {"Кол-во", "Количество", "qty", "quantity"}
+
+_FORMATS = {
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+
+# Строк на один RecordBatch при потоковой выгрузке
+COLUMNAR_BATCH_ROWS = 50_000
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as exc:
+        raise RuntimeError(
+            "Для экспорта в Parquet/Arrow установите пакет 'pyarrow' (pip install pyarrow)."
+        ) from exc
+    return pa
+
+
+def _resolve_format(path: Path, fmt: str | None) -> str:
+    if fmt:
+        fmt = fmt.lower()
+        if fmt not in ("parquet", "arrow"):
+            raise ValueError(f"Неизвестный формат: {fmt}. Ожидается parquet или arrow")
+        return fmt
+    return _FORMATS.get(path.suffix.lower(), "parquet")
+
+
+def _parse_date(value: Any) -> date | None:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    s = str(value).strip()
+    for pattern in ("%d.%m.%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(s, pattern).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _to_kopecks(values: pd.Series) -> pd.Series:
+    """Рубли -> целые копейки (округление половины от нуля, как _round_rub)."""
+    num = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64")
+    # +1e-9 гасит двоичную погрешность вида 0.285 * 100 = 28.499999...
+    kop = np.sign(num) * np.floor(np.abs(num) * 100 + 0.5 + 1e-9)
+    return pd.Series(kop, index=values.index).astype("Int64")
+
+
+def _column_type(name: str):
+    pa = _require_pyarrow()
+    if name in _MONEY_COLUMNS:
+        return pa.field(name, pa.int64(), metadata={"unit": "kopecks", "scale": "2"})
+    if name in _DATE_COLUMNS:
+        return pa.field(name, pa.date32())
+    if name in _INT_COLUMNS:
+        return pa.field(name, pa.int64())
+    if name in _FLOAT_COLUMNS:
+        return pa.field(name, pa.float64())
+    return pa.field(name, pa.string())
+
+
+def report_schema(columns: Iterable[str]):
+    """Arrow-схема для набора колонок отчета."""
+    pa = _require_pyarrow()
+    return pa.schema([_column_type(str(c)) for c in columns])
+
+
+def dataframe_to_arrow(df: pd.DataFrame):
+    """Приводит DataFrame отчета к Arrow-таблице с корректными типами колонок."""
+    pa = _require_pyarrow()
+    schema = report_schema(df.columns)
+    arrays = []
+    for field, col in zip(schema, df.columns):
+        s = df[col]
+        if field.name in _MONEY_COLUMNS:
+            arr = pa.array(_to_kopecks(s), type=pa.int64(), from_pandas=True)
+        elif field.name in _DATE_COLUMNS:
+            arr = pa.array([_parse_date(v) for v in s.tolist()], type=pa.date32())
+        elif field.name in _INT_COLUMNS:
+            arr = pa.array(
+                pd.to_numeric(s, errors="coerce").astype("Int64"),
+                type=pa.int64(),
+                from_pandas=True,
+            )
+        elif field.name in _FLOAT_COLUMNS:
+            arr = pa.array(
+                pd.to_numeric(s, errors="coerce"), type=pa.float64(), from_pandas=True
+            )
+        else:
+            arr = pa.array(
+                [None if pd.isna(v) else str(v) for v in s.tolist()], type=pa.string()
+            )
+        arrays.append(arr)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def save_columnar(
+    df: pd.DataFrame, path: str | Path, *, fmt: str | None = None
+) -> Path:
+    """Сохраняет DataFrame отчета в Parquet или Arrow IPC (по fmt или расширению файла).
+
+    Подходит для work_orders_report_df, build_orders_1c_df и build_workers_1c_df.
+    """
+    _require_pyarrow()
+    path = Path(path)
+    table = dataframe_to_arrow(df)
+    if _resolve_format(path, fmt) == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, str(path))
+    else:
+        import pyarrow.feather as feather
+
+        feather.write_feather(table, str(path))
+    return path
+
+
+class _ColumnarSink:
+    """Писатель RecordBatch-ей в Parquet или Arrow IPC файл."""
+
+    def __init__(self, path: Path, schema, fmt: str) -> None:
+        pa = _require_pyarrow()
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(str(path), schema)
+        else:
+            self._writer = pa.ipc.new_file(str(path), schema)
+
+    def write(self, batch) -> None:
+        self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def _rows_to_batch(rows: list[sqlite3.Row] | list[tuple], columns: list[str], schema):
+    pa = _require_pyarrow()
+    arrays = []
+    for j, field in enumerate(schema):
+        values = [r[j] for r in rows]
+        if field.name in _MONEY_COLUMNS:
+            s = _to_kopecks(pd.Series(values, dtype="object"))
+            arrays.append(pa.array(s, type=pa.int64(), from_pandas=True))
+        elif field.name in _DATE_COLUMNS:
+            arrays.append(pa.array([_parse_date(v) for v in values], type=pa.date32()))
+        elif field.name in _INT_COLUMNS:
+            arrays.append(
+                pa.array([None if v is None else int(v) for v in values], pa.int64())
+            )
+        elif field.name in _FLOAT_COLUMNS:
+            arrays.append(
+                pa.array([None if v is None else float(v) for v in values], pa.float64())
+            )
+        else:
+            arrays.append(
+                pa.array([None if v is None else str(v) for v in values], pa.string())
+            )
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def stream_query_to_columnar(
+    conn: sqlite3.Connection,
+    sql: str,
+    path: str | Path,
+    params: Iterable[Any] | None = None,
+    *,
+    fmt: str | None = None,
+    batch_rows: int = COLUMNAR_BATCH_ROWS,
+    progress_cb: callable | None = None,
+) -> int:
+    """Выгружает результат запроса в Parquet/Arrow порциями, не собирая его в памяти.
+
+    Имена колонок результата определяют типы (см. _MONEY_COLUMNS и др.).
+    progress_cb(rows_written) вызывается после каждой порции. Возвращает число строк.
+    """
+    path = Path(path)
+    cur = conn.execute(sql, list(params or []))
+    columns = [d[0] for d in cur.description]
+    schema = report_schema(columns)
+    sink = _ColumnarSink(path, schema, _resolve_format(path, fmt))
+    written = 0
+    try:
+        while True:
+            rows = cur.fetchmany(batch_rows)
+            if not rows:
+                break
+            sink.write(_rows_to_batch(rows, columns, schema))
+            written += len(rows)
+            if progress_cb:
+                try:
+                    progress_cb(written)
+                except Exception as exc:
+                    logging.getLogger(__name__).exception(
+                        "Ignored unexpected error: %s", exc
+                    )
+    finally:
+        sink.close()
+    return written
+
+
+# Вся история строк нарядов: одна строка на позицию работ, изделия наряда через запятую
+_WORK_ORDER_LINES_HISTORY_SQL = """
+SELECT
+    wo.order_no AS order_no,
+    wo.date AS date,
+    c.code AS contract_code,
+    c.name AS contract_name,
+    (
+        SELECT GROUP_CONCAT(p.product_no, ', ')
+        FROM work_order_products wop
+        JOIN products p ON p.id = wop.product_id
+        WHERE wop.work_order_id = wo.id
+    ) AS product_no,
+    jt.name AS job_name,
+    jt.unit AS unit,
+    woi.quantity AS qty,
+    woi.unit_price AS price,
+    woi.line_amount AS amount,
+    wo.total_amount AS total_amount
+FROM work_order_items woi
+JOIN work_orders wo ON wo.id = woi.work_order_id
+JOIN job_types jt ON jt.id = woi.job_type_id
+LEFT JOIN contracts c ON c.id = wo.contract_id
+ORDER BY wo.id, woi.id
+"""
+
+# Вся история начислений работникам по нарядам
+_WORKER_AMOUNTS_HISTORY_SQL = """
+SELECT
+    wo.order_no AS order_no,
+    wo.date AS date,
+    c.code AS contract_code,
+    w.full_name AS worker_name,
+    w.personnel_no AS personnel_no,
+    w.dept AS worker_dept,
+    COALESCE(wow.amount, 0) AS worker_amount
+FROM work_order_workers wow
+JOIN work_orders wo ON wo.id = wow.work_order_id
+JOIN workers w ON w.id = wow.worker_id
+LEFT JOIN contracts c ON c.id = wo.contract_id
+ORDER BY wo.id, w.full_name
+"""
+
+
+def export_work_order_lines_history(
+    conn: sqlite3.Connection,
+    path: str | Path,
+    *,
+    fmt: str | None = None,
+    progress_cb: callable | None = None,
+) -> int:
+    """Потоковая выгрузка всех строк нарядов за всю историю."""
+    return stream_query_to_columnar(
+        conn, _WORK_ORDER_LINES_HISTORY_SQL, path, fmt=fmt, progress_cb=progress_cb
+    )
+
+
+def export_worker_amounts_history(
+    conn: sqlite3.Connection,
+    path: str | Path,
+    *,
+    fmt: str | None = None,
+    progress_cb: callable | None = None,
+) -> int:
+    """Потоковая выгрузка начислений работникам за всю историю."""
+    return stream_query_to_columnar(
+        conn, _WORKER_AMOUNTS_HISTORY_SQL, path, fmt=fmt, progress_cb=progress_cb
+    )
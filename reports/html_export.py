@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import html as _html
+import json
+
 import pandas as pd
-from typing import Any
+from typing import Any, TextIO
 
 import logging
 
@@ -12,6 +15,13 @@ _ABBR = {
     "Номер_изделия": "№ изд.",
 }
 
+# Начиная с этого числа строк save_html пишет отчет потоково (JSON + скрипт)
+HTML_STREAMING_MIN_ROWS = 2000
+# Строк на одну страницу в потоковом отчете
+HTML_PAGE_ROWS = 500
+# Строк, сериализуемых и записываемых в файл за один раз
+HTML_CHUNK_ROWS = 2000
+
 
 def normalize_headers(df: pd.DataFrame) -> pd.DataFrame:
     # Сначала применим известные сокращения
@@ -28,66 +38,222 @@ def normalize_headers(df: pd.DataFrame) -> pd.DataFrame:
     return df1.rename(columns={c: norm(c) for c in df1.columns})
 
 
-def dataframe_to_html(
-    df: pd.DataFrame, title: str | None = None, context: dict[str, Any] | None = None
-) -> str:
-    df2 = normalize_headers(df)
+def _drop_single_worker_columns(
+    df: pd.DataFrame, context: dict[str, Any] | None
+) -> pd.DataFrame:
     # Если отчет по одному работнику — убираем колонки Работник/Цех из таблицы
     if context and context.get("single_worker_short"):
         for c in ("Работник", "Цех"):
-            if c in df2.columns:
+            if c in df.columns:
                 try:
-                    df2 = df2.drop(columns=[c])
+                    df = df.drop(columns=[c])
                 except Exception as exc:
                     logging.getLogger(__name__).exception(
                         "Ignored unexpected error: %s", exc
                     )
+    return df
+
+
+def _context_header_parts(context: dict[str, Any] | None) -> list[str]:
+    if not context:
+        return []
+    header_lines: list[str] = []
+    created = context.get("created_at")
+    if created:
+        header_lines.append(f"Дата составления: {created}")
+    period = context.get("period")
+    if period:
+        header_lines.append(period)
+    single_worker = context.get("single_worker_short")
+    dept = context.get("dept_name")
+    # Если один работник — показываем только его цех, иначе общий цех фильтра
+    if single_worker:
+        single_worker_dept = context.get("single_worker_dept")
+        header_lines.append(f"Работник: {single_worker}")
+        if single_worker_dept:
+            header_lines.append(f"Цех: {single_worker_dept}")
+    else:
+        if dept:
+            header_lines.append(f"Цех: {dept}")
+    if header_lines:
+        return ["<p>" + "<br/>".join(header_lines) + "</p>"]
+    return []
+
+
+def _context_footer_parts(context: dict[str, Any] | None) -> list[str]:
+    if not context:
+        return []
+    parts: list[str] = ["<hr/>"]
+    total = context.get("total_amount")
+    if total is not None:
+        parts.append(f"<p><b>Итого по отчету: {float(total):.2f}</b></p>")
+    workers = context.get("worker_signatures") or []
+    single_worker = context.get("single_worker_short")
+    if single_worker:
+        parts.append("<p><b>Подписи:</b></p>")
+        parts.append(f"<p>{single_worker} _____________</p>")
+    elif workers:
+        parts.append("<p><b>Подписи работников:</b></p>")
+        parts.append("<p>" + ", &nbsp;".join(workers) + "</p>")
+    dept_head = context.get("dept_head")
+    hr_head = context.get("hr_head")
+    parts.append(f"<p>Начальник цеха: {dept_head or ''} _____________</p>")
+    parts.append(f"<p>Начальник отдела кадров: {hr_head or ''} _____________</p>")
+    return parts
+
+
+def dataframe_to_html(
+    df: pd.DataFrame, title: str | None = None, context: dict[str, Any] | None = None
+) -> str:
+    df2 = _drop_single_worker_columns(normalize_headers(df), context)
     html = df2.to_html(index=False)
     parts: list[str] = []
     if title:
         parts.append(f"<h2>{title}</h2>")
-    if context:
-        header_lines: list[str] = []
-        created = context.get("created_at")
-        if created:
-            header_lines.append(f"Дата составления: {created}")
-        period = context.get("period")
-        if period:
-            header_lines.append(period)
-        single_worker = context.get("single_worker_short")
-        dept = context.get("dept_name")
-        # Если один работник — показываем только его цех, иначе общий цех фильтра
-        if single_worker:
-            single_worker_dept = context.get("single_worker_dept")
-            header_lines.append(f"Работник: {single_worker}")
-            if single_worker_dept:
-                header_lines.append(f"Цех: {single_worker_dept}")
-        else:
-            if dept:
-                header_lines.append(f"Цех: {dept}")
-        if header_lines:
-            parts.append("<p>" + "<br/>".join(header_lines) + "</p>")
+    parts.extend(_context_header_parts(context))
     parts.append(html)
-    if context:
-        parts.append("<hr/>")
-        total = context.get("total_amount")
-        if total is not None:
-            parts.append(f"<p><b>Итого по отчету: {float(total):.2f}</b></p>")
-        workers = context.get("worker_signatures") or []
-        single_worker = context.get("single_worker_short")
-        if single_worker:
-            parts.append("<p><b>Подписи:</b></p>")
-            parts.append(f"<p>{single_worker} _____________</p>")
-        elif workers:
-            parts.append("<p><b>Подписи работников:</b></p>")
-            parts.append("<p>" + ", &nbsp;".join(workers) + "</p>")
-        dept_head = context.get("dept_head")
-        hr_head = context.get("hr_head")
-        parts.append(f"<p>Начальник цеха: {dept_head or ''} _____________</p>")
-        parts.append(f"<p>Начальник отдела кадров: {hr_head or ''} _____________</p>")
+    parts.extend(_context_footer_parts(context))
     return "\n".join(parts)
 
 
+# --- Потоковый отчет ---
+#
+# Таблица не разворачивается в DOM целиком: строки пишутся в файл порциями в виде
+# компактного JSON (массив массивов), а небольшой скрипт рисует одну страницу,
+# сортирует по клику на заголовок и фильтрует по строке поиска.
+
+_STREAM_STYLE = (
+    "<style>"
+    "body{font-family:Segoe UI,Arial,sans-serif}"
+    "table{border-collapse:collapse}"
+    "td,th{border:1px solid #999;padding:3px 6px}"
+    "th{background:#eee;cursor:pointer;user-select:none}"
+    "nav a{margin-right:6px}nav a.cur{font-weight:bold;text-decoration:none}"
+    "#rep-filter{margin:6px 0;width:320px}"
+    "</style>"
+)
+
+_STREAM_SCRIPT = """<script>
+(function(){
+var cols=JSON.parse(document.getElementById('rep-cols').textContent);
+var rows=[];
+document.querySelectorAll('script.rep-data').forEach(function(s){
+  var part=JSON.parse(s.textContent);for(var i=0;i<part.length;i++)rows.push(part[i]);
+});
+var pageRows=%(page_rows)d,view=rows,page=0,sortCol=-1,sortDir=1;
+var thead=document.getElementById('rep-head'),tbody=document.getElementById('rep-body');
+var nav=document.getElementById('rep-index'),info=document.getElementById('rep-info');
+function txt(v){return v===null?'':String(v);}
+function render(){
+  var pages=Math.max(1,Math.ceil(view.length/pageRows));
+  if(page>=pages)page=pages-1;
+  var start=page*pageRows,end=Math.min(view.length,start+pageRows);
+  var frag=document.createDocumentFragment();
+  for(var i=start;i<end;i++){
+    var tr=document.createElement('tr'),r=view[i];
+    for(var j=0;j<r.length;j++){var td=document.createElement('td');td.textContent=txt(r[j]);tr.appendChild(td);}
+    frag.appendChild(tr);
+  }
+  tbody.textContent='';tbody.appendChild(frag);
+  nav.textContent='';
+  for(var p=0;p<pages;p++){
+    var a=document.createElement('a');a.href='#';a.textContent=String(p+1);
+    if(p===page)a.className='cur';
+    a.onclick=(function(n){return function(e){e.preventDefault();page=n;render();};})(p);
+    nav.appendChild(a);
+  }
+  info.textContent='Строк: '+view.length+(view.length!==rows.length?' из '+rows.length:'')+
+    (view.length?', показаны '+(start+1)+'–'+end:'');
+}
+function cmp(a,b){
+  if(a===b)return 0;if(a===null)return 1;if(b===null)return -1;
+  if(typeof a==='number'&&typeof b==='number')return a-b;
+  return String(a).localeCompare(String(b),'ru',{numeric:true});
+}
+cols.forEach(function(c,j){
+  var th=document.createElement('th');th.textContent=c;
+  th.onclick=function(){
+    sortDir=(sortCol===j)?-sortDir:1;sortCol=j;
+    view=view.slice().sort(function(x,y){return sortDir*cmp(x[j],y[j]);});
+    page=0;render();
+  };
+  thead.appendChild(th);
+});
+document.getElementById('rep-filter').oninput=function(){
+  var q=this.value.toLowerCase();
+  view=!q?rows:rows.filter(function(r){
+    for(var j=0;j<r.length;j++){if(txt(r[j]).toLowerCase().indexOf(q)>=0)return true;}
+    return false;
+  });
+  if(sortCol>=0){view=view.slice().sort(function(x,y){return sortDir*cmp(x[sortCol],y[sortCol]);});}
+  page=0;render();
+};
+render();
+})();
+</script>"""
+
+
+def _json_for_script(value: Any) -> str:
+    # "</" внутри <script> закрыл бы тег раньше времени
+    return json.dumps(value, ensure_ascii=False, default=str).replace("</", "<\\/")
+
+
+def _write_rows_json(out: TextIO, df: pd.DataFrame, chunk_rows: int) -> None:
+    """Пишет строки df как JSON-массивы порциями по chunk_rows (по тегу на порцию)."""
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start : start + chunk_rows]
+        values = chunk.astype(object).where(chunk.notna(), None).values.tolist()
+        out.write('<script type="application/json" class="rep-data">')
+        out.write(_json_for_script(values))
+        out.write("</script>\n")
+
+
+def write_html_streaming(
+    df: pd.DataFrame,
+    title: str | None,
+    path: str,
+    context: dict[str, Any] | None = None,
+    *,
+    page_rows: int = HTML_PAGE_ROWS,
+    chunk_rows: int = HTML_CHUNK_ROWS,
+) -> str:
+    """Пишет отчет в HTML по частям, не собирая весь документ в памяти.
+
+    Данные таблицы сохраняются компактным JSON, разбитым на порции по chunk_rows;
+    встроенный скрипт показывает страницы по page_rows строк с оглавлением
+    страниц, сортировкой по колонкам и фильтром по тексту.
+    """
+    df2 = _drop_single_worker_columns(normalize_headers(df), context)
+    cols = [str(c) for c in df2.columns]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html>\n<html><head><meta charset='utf-8'>")
+        f.write(f"<title>{_html.escape(title or 'Отчет')}</title>")
+        f.write(_STREAM_STYLE)
+        f.write("</head><body>\n")
+        if title:
+            f.write(f"<h2>{title}</h2>\n")
+        for part in _context_header_parts(context):
+            f.write(part + "\n")
+        f.write(
+            '<input id="rep-filter" type="search" placeholder="Фильтр по тексту">\n'
+            '<div id="rep-info"></div>\n'
+            '<nav id="rep-index"></nav>\n'
+            '<table><thead><tr id="rep-head"></tr></thead>'
+            '<tbody id="rep-body"></tbody></table>\n'
+            "<noscript>Для просмотра таблицы включите JavaScript.</noscript>\n"
+        )
+        f.write('<script type="application/json" id="rep-cols">')
+        f.write(_json_for_script(cols))
+        f.write("</script>\n")
+        _write_rows_json(f, df2, max(1, int(chunk_rows)))
+        f.write(_STREAM_SCRIPT % {"page_rows": max(1, int(page_rows))})
+        f.write("\n")
+        for part in _context_footer_parts(context):
+            f.write(part + "\n")
+        f.write("</body></html>\n")
+    return path
+
+
 def save_html(
     df: pd.DataFrame,
     title: str | None,
@@ -95,6 +261,8 @@ def save_html(
     context: dict[str, Any] | None = None,
 ) -> str:
     df2 = normalize_headers(df)
+    if len(df2) >= HTML_STREAMING_MIN_ROWS:
+        return write_html_streaming(df2, title=title, path=path, context=context)
     html = dataframe_to_html(df2, title=title, context=context)
     with open(path, "w", encoding="utf-8") as f:
         f.write(html)
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
-from typing import List, Tuple, Any
+from typing import Iterable, List, Tuple, Any
 
 import pandas as pd
 from reportlab.lib import colors
@@ -12,6 +13,8 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
+from config.settings import CONFIG
+
 import logging
 
 _ABBR = {
@@ -122,6 +125,184 @@ def _ensure_font_registered(prefer_family: str | None = None) -> tuple[str, str]
     return "Helvetica", "Helvetica-Bold"
 
 
+# --- Кэш ширин глифов ---
+#
+# Ширина строки в reportlab — это сумма ширин глифов (в 1/1000 кегля), умноженная на
+# кегль. Поэтому ширину каждой строки достаточно посчитать один раз «в единицах»,
+# а для любого размера шрифта просто домножить. Таблицы ширин глифов хранятся
+# на диске, чтобы не строить их при каждом запуске.
+
+_FONT_METRICS_VERSION = 1
+_GLYPH_TABLES: dict[str, _GlyphAdvances] = {}
+
+
+def _font_metrics_path(font_name: str) -> Path:
+    safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in font_name)
+    return CONFIG.cache_dir / "fonts" / f"{safe}.json"
+
+
+class _GlyphAdvances:
+    """Таблица ширин глифов (в 1/1000 кегля) одного зарегистрированного шрифта."""
+
+    def __init__(self, font_name: str) -> None:
+        self.font_name = font_name
+        font = pdfmetrics.getFont(font_name)
+        face = getattr(font, "face", None)
+        source = getattr(face, "filename", None)
+        self._source = str(source) if source else None
+        self._advances: dict[str, float] = {}
+        self._dirty = False
+        self._text_cache: dict[str, float] = {}
+        if not self._load():
+            char_widths = getattr(face, "charWidths", None)
+            if isinstance(char_widths, dict):
+                # TrueType: таблица уже разобрана reportlab, забираем целиком
+                self._advances = {
+                    chr(code): float(w) for code, w in char_widths.items()
+                }
+                self._dirty = True
+
+    def _signature(self) -> dict[str, Any]:
+        sig: dict[str, Any] = {
+            "version": _FONT_METRICS_VERSION,
+            "font": self.font_name,
+            "source": self._source,
+        }
+        if self._source:
+            try:
+                st = Path(self._source).stat()
+                sig["mtime"] = int(st.st_mtime)
+                sig["size"] = int(st.st_size)
+            except OSError:
+                pass
+        return sig
+
+    def _load(self) -> bool:
+        path = _font_metrics_path(self.font_name)
+        try:
+            if not path.exists():
+                return False
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("signature") != self._signature():
+                return False
+            self._advances = {
+                str(k): float(v) for k, v in (data.get("advances") or {}).items()
+            }
+            return True
+        except Exception as exc:
+            logging.getLogger(__name__).debug(
+                "Кэш метрик шрифта %s не прочитан: %s", self.font_name, exc
+            )
+            return False
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        path = _font_metrics_path(self.font_name)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(
+                json.dumps(
+                    {
+                        "signature": self._signature(),
+                        "advances": self._advances,
+                    },
+                    ensure_ascii=False,
+                ),
+                encoding="utf-8",
+            )
+            self._dirty = False
+        except Exception as exc:
+            logging.getLogger(__name__).debug(
+                "Кэш метрик шрифта %s не сохранен: %s", self.font_name, exc
+            )
+
+    def _advance(self, ch: str) -> float:
+        adv = self._advances.get(ch)
+        if adv is None:
+            # Type1 / отсутствующий в таблице символ: спрашиваем reportlab один раз
+            adv = float(pdfmetrics.stringWidth(ch, self.font_name, 1000))
+            self._advances[ch] = adv
+            self._dirty = True
+        return adv
+
+    def unit_width(self, text: str) -> float:
+        """Ширина строки при кегле 1 pt."""
+        w = self._text_cache.get(text)
+        if w is None:
+            advances = self._advances
+            total = 0.0
+            for ch in text:
+                adv = advances.get(ch)
+                total += adv if adv is not None else self._advance(ch)
+            w = total / 1000.0
+            self._text_cache[text] = w
+        return w
+
+    def max_unit_width(self, texts: Iterable[str]) -> float:
+        """Максимальная ширина по набору строк при кегле 1 pt (каждая уникальная строка меряется один раз)."""
+        best = 0.0
+        for text in set(texts):
+            w = self.unit_width(text)
+            if w > best:
+                best = w
+        return best
+
+
+def _glyph_advances(font_name: str) -> _GlyphAdvances:
+    table = _GLYPH_TABLES.get(font_name)
+    if table is None:
+        table = _GlyphAdvances(font_name)
+        _GLYPH_TABLES[font_name] = table
+    return table
+
+
+def _column_unit_widths(
+    df: pd.DataFrame, font_name: str, sample_rows: int = 200
+) -> List[float]:
+    """Ширины колонок (заголовок + первые sample_rows строк) при кегле 1 pt."""
+    glyphs = _glyph_advances(font_name)
+    sample = df.head(sample_rows).astype(str)
+    widths: List[float] = []
+    for j, col in enumerate(df.columns):
+        w = max(
+            glyphs.unit_width(str(col)),
+            glyphs.max_unit_width(sample.iloc[:, j].tolist()),
+        )
+        widths.append(w)
+    return widths
+
+
+def _word_unit_widths(df: pd.DataFrame, cols: list[str], font_name: str) -> List[float]:
+    """Ширина самого длинного слова в переносимых колонках при кегле 1 pt (0 для прочих)."""
+    glyphs = _glyph_advances(font_name)
+    units: List[float] = []
+    for j, c in enumerate(cols):
+        if _is_long_text_column(str(c)):
+            tokens = (
+                df.iloc[:, j].astype(str).head(1000).str.split().explode().dropna()
+            )
+            units.append(glyphs.max_unit_width(tokens.tolist()))
+        else:
+            units.append(0.0)
+    return units
+
+
+def _scale_widths(
+    units: List[float], font_size: float, padding: float = 8.0
+) -> List[float]:
+    return [u * font_size + padding for u in units]
+
+
+def _scale_word_widths(
+    units: List[float], cols: list[str], font_size: float, padding: float = 8.0
+) -> List[float]:
+    return [
+        u * font_size + padding if _is_long_text_column(str(c)) else 0.0
+        for u, c in zip(units, cols)
+    ]
+
+
 def _measure_col_widths(
     df: pd.DataFrame,
     font_name: str,
@@ -129,18 +310,8 @@ def _measure_col_widths(
     padding: float = 8.0,
     sample_rows: int = 200,
 ) -> List[float]:
-    cols = list(df.columns)
-    values = df.head(sample_rows).astype(str).values.tolist()
-    widths: List[float] = []
-    for j, col in enumerate(cols):
-        max_w = pdfmetrics.stringWidth(str(col), font_name, font_size)
-        for row in values:
-            text = str(row[j])
-            w = pdfmetrics.stringWidth(text, font_name, font_size)
-            if w > max_w:
-                max_w = w
-        widths.append(max_w + padding)
-    return widths
+    units = _column_unit_widths(df, font_name, sample_rows)
+    return _scale_widths(units, font_size, padding)
 
 
 def _is_long_text_column(name: str) -> bool:
@@ -158,19 +329,8 @@ def _min_word_widths_for_wrap_cols(
     """Минимальная ширина для колонок, где разрешен перенос: ширина самого длинного слова + padding.
     Для не-переносимых колонок возвращает 0 (нет минимума кроме общей ширины).
     """
-    mins: List[float] = []
-    for c in cols:
-        if _is_long_text_column(str(c)):
-            max_token = 0.0
-            for text in df[c].astype(str).head(1000):
-                for token in text.split():
-                    w = pdfmetrics.stringWidth(token, font_name, font_size)
-                    if w > max_token:
-                        max_token = w
-            mins.append(max_token + padding)
-        else:
-            mins.append(0.0)
-    return mins
+    units = _word_unit_widths(df, cols, font_name)
+    return _scale_word_widths(units, cols, font_size, padding)
 
 
 def save_pdf(
@@ -229,6 +389,11 @@ def save_pdf(
     # Применяем нормализацию заголовков
     cols = [_normalize_header(c) for c in cols]
 
+    # Ширины колонок и самых длинных слов считаем один раз при кегле 1 pt,
+    # дальше для каждого кандидата кегля только масштабируем
+    col_units = _column_unit_widths(df, regular_font)
+    word_units = _word_unit_widths(df, cols, regular_font)
+
     # Подбор шрифта/страницы
     for page_size in page_candidates:
         page_w, _ = page_size
@@ -242,13 +407,13 @@ def save_pdf(
                 + list(range(font_base - 1, font_min - 1, -1))
             )
         for fs in fs_iter:
-            widths = _measure_col_widths(df, regular_font, fs)
+            widths = _scale_widths(col_units, fs)
             total = sum(widths)
             if total <= avail_w:
                 best_page, best_font, best_widths = page_size, fs, widths
                 break
             # Попробуем ужать только длинные текстовые колонки (для переносов по словам), соблюдая минимальную ширину слова
-            mins = _min_word_widths_for_wrap_cols(df, cols, regular_font, fs)
+            mins = _scale_word_widths(word_units, cols, fs)
             nonwrap_total = sum(
                 w for w, c in zip(widths, cols) if not _is_long_text_column(str(c))
             )
@@ -300,14 +465,14 @@ def save_pdf(
             font_base if font_size is None else max(font_min, min(font_size, font_max))
         )
     if best_widths is None:
-        best_widths = _measure_col_widths(df, regular_font, best_font)
+        best_widths = _scale_widths(col_units, best_font)
 
     page_w, _ = best_page
     avail_w = page_w - (left_mm + right_mm) * mm
     total = sum(best_widths)
     if total > avail_w:
         # финальный пересчет с учетом минимальной ширины слов
-        mins = _min_word_widths_for_wrap_cols(df, cols, regular_font, best_font)
+        mins = _scale_word_widths(word_units, cols, best_font)
         nonwrap_total = sum(
             w for w, c in zip(best_widths, cols) if not _is_long_text_column(str(c))
         )
@@ -348,6 +513,7 @@ def save_pdf(
                 logging.getLogger(__name__).exception(
                     "Ignored unexpected error: %s", exc
                 )
+    _glyph_advances(regular_font).save()
 
     doc = SimpleDocTemplate(
         str(file_path),
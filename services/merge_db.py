@@ -192,9 +192,9 @@ def merge_from_file(
                         "SELECT 1 FROM work_orders WHERE order_no=?", (desired_no,)
                     ).fetchone()
                     if row:
-                        use_order_no = q.next_order_no(tgt_conn)
+                        use_order_no = q.reserve_order_nos(tgt_conn, 1)
                 else:
-                    use_order_no = q.next_order_no(tgt_conn)
+                    use_order_no = q.reserve_order_nos(tgt_conn, 1)
 
                 # Insert header (total will be recomputed by sum of items below)
                 new_wo_id = q.insert_work_order(
@@ -0,0 +1,266 @@
+"""Пересчет нарядов после изменения расценок (job_types.price).
+
+Цена в строке наряда фиксируется при сохранении, поэтому новый прайс-лист
+не меняет уже выписанные наряды. plan_repricing за период (и при
+необходимости по выбранным видам работ) считает новые суммы строк, итоги
+нарядов и доли работников — несколькими запросами на весь период и NumPy,
+без открытия нарядов по одному. План можно показать как черновой прогон
+(RepricingPlan.summary), а apply_repricing записывает его одной транзакцией.
+
+Доли работников масштабируются пропорционально прежним суммам (если все
+суммы наряда нулевые — поровну), копейки раздаются utils.allocation.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Iterable
+
+import numpy as np
+
+from db.batch_commit import savepoint
+from db.schema import work_order_date_key_sql
+from services.validation import validate_date
+from utils.allocation import allocate_batch, from_kopecks, to_kopecks
+
+logger = logging.getLogger(__name__)
+
+# Дата наряда как ГГГГ-ММ-ДД (индекс idx_work_orders_date_key)
+_DATE_KEY_SQL = work_order_date_key_sql("wo.")
+
+
+@dataclass
+class RepricedOrder:
+    work_order_id: int
+    order_no: int
+    date: str
+    old_total: float
+    new_total: float
+    lines: int  # Строк с новой ценой
+
+    @property
+    def delta(self) -> float:
+        return from_kopecks(to_kopecks(self.new_total) - to_kopecks(self.old_total))
+
+
+@dataclass
+class RepricingPlan:
+    """Результат чернового прогона: что и на что будет заменено."""
+
+    orders: list[RepricedOrder] = field(default_factory=list)
+    # (item_id, старая цена, новая цена, новая сумма строки, количество,
+    #  старая сумма строки)
+    items: list[tuple[int, float, float, float, float, float]] = field(
+        default_factory=list
+    )
+    # (work_order_id, worker_id, новая сумма работника, старая сумма)
+    workers: list[tuple[int, int, float, float]] = field(default_factory=list)
+
+    @property
+    def old_total(self) -> float:
+        return from_kopecks(sum(to_kopecks(o.old_total) for o in self.orders))
+
+    @property
+    def new_total(self) -> float:
+        return from_kopecks(sum(to_kopecks(o.new_total) for o in self.orders))
+
+    def summary(self, limit: int = 50) -> str:
+        if not self.orders:
+            return "Наряды с устаревшими расценками не найдены"
+        delta = from_kopecks(to_kopecks(self.new_total) - to_kopecks(self.old_total))
+        lines = [
+            f"Нарядов к пересчету: {len(self.orders)}, строк: {len(self.items)}",
+            f"Сумма нарядов: {self.old_total:.2f} -> {self.new_total:.2f}"
+            f" ({delta:+.2f})",
+            "",
+        ]
+        for o in self.orders[:limit]:
+            lines.append(
+                f"№{o.order_no} от {o.date}: {o.old_total:.2f} -> {o.new_total:.2f}"
+                f" ({o.delta:+.2f}), строк: {o.lines}"
+            )
+        if len(self.orders) > limit:
+            lines.append(f"... и еще {len(self.orders) - limit}")
+        return "\n".join(lines)
+
+
+def _iso(date_str: str) -> str:
+    validate_date(date_str)
+    day, month, year = date_str.split(".")
+    return f"{year}-{month}-{day}"
+
+
+def _line_kopecks(price: float, quantity: float) -> int:
+    return to_kopecks(Decimal(str(price)) * Decimal(str(quantity)))
+
+
+def plan_repricing(
+    conn: sqlite3.Connection,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    job_type_ids: Iterable[int] | None = None,
+) -> RepricingPlan:
+    """Черновой прогон пересчета нарядов по текущим ценам видов работ.
+
+    date_from/date_to — ДД.ММ.ГГГГ включительно (None — без границы),
+    job_type_ids — только эти виды работ (None — все). В базу ничего
+    не пишется.
+    """
+    where = ["woi.unit_price <> jt.price"]
+    params: list = []
+    if date_from:
+        where.append(f"{_DATE_KEY_SQL} >= ?")
+        params.append(_iso(date_from))
+    if date_to:
+        where.append(f"{_DATE_KEY_SQL} <= ?")
+        params.append(_iso(date_to))
+    if job_type_ids is not None:
+        where.append("woi.job_type_id IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(sorted({int(i) for i in job_type_ids})))
+    changed = conn.execute(
+        "SELECT woi.id, woi.work_order_id, woi.quantity, woi.unit_price,"
+        " woi.line_amount, jt.price"
+        " FROM work_order_items woi"
+        " JOIN work_orders wo ON wo.id = woi.work_order_id"
+        " JOIN job_types jt ON jt.id = woi.job_type_id"
+        f" WHERE {' AND '.join(where)}"
+        " ORDER BY woi.work_order_id, woi.id",
+        params,
+    ).fetchall()
+    plan = RepricingPlan()
+    if not changed:
+        return plan
+
+    # Суммы строк: одинаковых пар (цена, количество) в периоде немного
+    line_cache: dict[tuple[float, float], int] = {}
+    new_line: dict[int, int] = {}
+    lines_per_order: dict[int, int] = {}
+    for r in changed:
+        key = (r["price"], r["quantity"])
+        kop = line_cache.get(key)
+        if kop is None:
+            kop = line_cache[key] = _line_kopecks(*key)
+        new_line[r["id"]] = kop
+        lines_per_order[r["work_order_id"]] = (
+            lines_per_order.get(r["work_order_id"], 0) + 1
+        )
+        plan.items.append(
+            (
+                r["id"],
+                r["unit_price"],
+                float(r["price"]),
+                from_kopecks(kop),
+                r["quantity"],
+                r["line_amount"],
+            )
+        )
+
+    ids_json = json.dumps(sorted(lines_per_order))
+    headers = conn.execute(
+        "SELECT id, order_no, date, total_amount FROM work_orders"
+        " WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id",
+        (ids_json,),
+    ).fetchall()
+    order_ids = np.array([h["id"] for h in headers], dtype=np.int64)
+
+    # Итоги: все строки затронутых нарядов, измененные — с новой суммой
+    items = conn.execute(
+        "SELECT id, work_order_id, line_amount FROM work_order_items"
+        " WHERE work_order_id IN (SELECT value FROM json_each(?))",
+        (ids_json,),
+    ).fetchall()
+    item_order = np.searchsorted(order_ids, [r["work_order_id"] for r in items])
+    item_kop = np.array(
+        [new_line.get(r["id"], to_kopecks(r["line_amount"])) for r in items],
+        dtype=np.int64,
+    )
+    totals = np.zeros(len(order_ids), dtype=np.int64)
+    np.add.at(totals, item_order, item_kop)
+
+    workers = conn.execute(
+        "SELECT work_order_id, worker_id, amount FROM work_order_workers"
+        " WHERE work_order_id IN (SELECT value FROM json_each(?))"
+        " ORDER BY work_order_id, worker_id",
+        (ids_json,),
+    ).fetchall()
+    if workers:
+        worker_order = np.searchsorted(order_ids, [r["work_order_id"] for r in workers])
+        sizes = np.bincount(worker_order, minlength=len(order_ids))
+        weights = np.array([to_kopecks(r["amount"]) for r in workers], dtype=np.int64)
+        # Отрицательных сумм в базе быть не должно; если есть — считаем нулевыми
+        shares = allocate_batch(totals, sizes, np.maximum(weights, 0))
+        plan.workers = [
+            (r["work_order_id"], r["worker_id"], from_kopecks(int(kop)), r["amount"])
+            for r, kop in zip(workers, shares)
+        ]
+
+    plan.orders = [
+        RepricedOrder(
+            work_order_id=h["id"],
+            order_no=h["order_no"],
+            date=h["date"],
+            old_total=float(h["total_amount"] or 0),
+            new_total=from_kopecks(int(total)),
+            lines=lines_per_order[h["id"]],
+        )
+        for h, total in zip(headers, totals)
+    ]
+    return plan
+
+
+def _check_rowcount(actual: int, expected: int) -> None:
+    if actual != expected:
+        raise ValueError(
+            "Наряды изменились после расчета пересчета. Выполните проверку заново."
+        )
+
+
+def apply_repricing(conn: sqlite3.Connection, plan: RepricingPlan) -> int:
+    """Записывает план одной транзакцией; возвращает число нарядов.
+
+    Каждая строка, итог и доля работника пишутся только если в базе еще
+    прежние значения (цена, количество, суммы), а состав работников тот же.
+    Если после чернового прогона наряды успели измениться, ничего не
+    записывается и возбуждается ValueError — план нужно построить заново.
+    """
+    if not plan.orders:
+        return 0
+    with savepoint(conn, "repricing"):
+        cur = conn.executemany(
+            "UPDATE work_order_items SET unit_price = ?, line_amount = ?"
+            " WHERE id = ? AND unit_price = ? AND quantity = ? AND line_amount = ?",
+            [
+                (new_price, amount, item_id, old_price, quantity, old_amount)
+                for item_id, old_price, new_price, amount, quantity, old_amount in (
+                    plan.items
+                )
+            ],
+        )
+        _check_rowcount(cur.rowcount, len(plan.items))
+        cur = conn.executemany(
+            "UPDATE work_orders SET total_amount = ? WHERE id = ? AND total_amount = ?",
+            [(o.new_total, o.work_order_id, o.old_total) for o in plan.orders],
+        )
+        _check_rowcount(cur.rowcount, len(plan.orders))
+        cur = conn.executemany(
+            "UPDATE work_order_workers SET amount = ?"
+            " WHERE work_order_id = ? AND worker_id = ? AND amount = ?",
+            [
+                (amount, wo_id, worker_id, old_amount)
+                for wo_id, worker_id, amount, old_amount in plan.workers
+            ],
+        )
+        _check_rowcount(cur.rowcount, len(plan.workers))
+        # Добавленный работник не виден по UPDATE — сверяем состав бригад
+        (workers_now,) = conn.execute(
+            "SELECT COUNT(*) FROM work_order_workers"
+            " WHERE work_order_id IN (SELECT value FROM json_each(?))",
+            (json.dumps([o.work_order_id for o in plan.orders]),),
+        ).fetchone()
+        _check_rowcount(workers_now, len(plan.workers))
+    logger.info("Пересчитано нарядов: %s, строк: %s", len(plan.orders), len(plan.items))
+    return len(plan.orders)
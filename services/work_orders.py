@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import json
 import logging
 import sqlite3
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Sequence
+from difflib import SequenceMatcher
+from typing import Iterable, Sequence
 
 from db import queries as q
 from services.validation import validate_date, validate_positive_quantity
+from utils.allocation import from_kopecks, split_kopecks, to_kopecks
 
 logger = logging.getLogger(__name__)
 
@@ -40,120 +44,25 @@ def _round_rub(value: Decimal) -> Decimal:
     return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
 
-def create_work_order(conn: sqlite3.Connection, data: WorkOrderInput) -> int:
-    validate_date(data.date)
-    if not data.items:
-        raise ValueError("Наряд должен содержать хотя бы одну строку работ")
-    # Требуем обязательный выбор изделий из БД
-    if not data.extra_product_ids:
-        raise ValueError("Добавьте хотя бы одно изделие")
-
-    product_ids = [int(x) for x in data.extra_product_ids if x is not None]
-    if not product_ids:
-        raise ValueError("Добавьте хотя бы одно изделие")
-
-    # Валидация контракта (может быть None, если изделия не связаны с контрактами)
-    if data.contract_id is not None:
-        c_row = conn.execute(
-            "SELECT id FROM contracts WHERE id = ?", (data.contract_id,)
-        ).fetchone()
-        if not c_row:
-            raise ValueError(
-                "Выбранный контракт не найден. Выберите контракт из списка."
-            )
-    for pid in product_ids:
-        p_row = conn.execute(
-            "SELECT id, contract_id FROM products WHERE id = ?", (pid,)
-        ).fetchone()
-        if not p_row:
-            raise ValueError(
-                "Выбранное изделие не найдено. Выберите изделие из списка или очистьте поле."
-            )
-        # Жесткая привязка изделия к одному контракту: если не задан — привяжем к 'Без контракта'; если задан и не совпадает — ошибка
-        try:
-            prod_contract_id = (
-                p_row["contract_id"] if isinstance(p_row, dict) else p_row[1]
-            )
-        except Exception:
-            prod_contract_id = None
-        if prod_contract_id is None:
-            default_cid = q.get_or_create_default_contract(conn)
-            q.set_product_contract(conn, int(pid), int(default_cid))
-            prod_contract_id = default_cid
-        if int(prod_contract_id) != int(data.contract_id):
-            raise ValueError(
-                "Изделие привязано к другому контракту. Выберите изделие, соответствующее контракту."
-            )
-
-    total = Decimal("0")
-    line_values: list[tuple[int, float, float, float]] = []
-
-    for item in data.items:
-        validate_positive_quantity(item.quantity)
-        jt = conn.execute(
-            "SELECT id, price FROM job_types WHERE id = ?", (item.job_type_id,)
-        ).fetchone()
-        if not jt:
-            raise ValueError(f"Вид работ id={item.job_type_id} не найден")
-        unit_price = Decimal(str(jt["price"]))
-        line_amount = _round_rub(unit_price * Decimal(str(item.quantity)))
-        total += line_amount
-        line_values.append(
-            (
-                item.job_type_id,
-                float(item.quantity),
-                float(unit_price),
-                float(line_amount),
-            )
-        )
-
-    total = _round_rub(total)
-
-    # Определяем номер наряда: из данных или следующий по счетчику
-    order_no = (
-        int(data.order_no)
-        if (getattr(data, "order_no", None) not in (None, ""))
-        else q.next_order_no(conn)
-    )
-    # Проверим уникальность, чтобы не уткнуться в UNIQUE
-    if q.order_no_in_use(conn, order_no):
-        raise ValueError(
-            f"Номер наряда {order_no} уже используется. Укажите другой номер."
-        )
-    # Сохраним заголовок наряда
-    work_order_id = q.insert_work_order(
-        conn, order_no, data.date, data.contract_id, float(total)
-    )
-    # Сохраним множественные изделия (контракты — только один, не сохраняем связи)
-    try:
-        if product_ids:
-            q.set_work_order_products(conn, work_order_id, product_ids)
-    except Exception:
-        logger.warning(
-            "Не удалось сохранить дополнительные изделия для наряда %s", work_order_id
-        )
-
-    for job_type_id, quantity, unit_price, line_amount in line_values:
-        q.insert_work_order_item(
-            conn, work_order_id, job_type_id, quantity, unit_price, line_amount
-        )
-
-    # Проверим работников
-    if not data.workers:
+def _unique_workers(
+    workers: Sequence[WorkOrderWorkerInput],
+) -> list[WorkOrderWorkerInput]:
+    """Работники наряда без дублей id; допускаются только работники из базы."""
+    if not workers:
         raise ValueError("Добавьте работников в бригаду")
 
     # Убираем дубликаты и проверяем корректность ID
     unique_workers = []
     seen_ids = set()
-    for worker in data.workers:
+    for worker in workers:
         if worker.worker_id not in seen_ids:
             unique_workers.append(worker)
             seen_ids.add(worker.worker_id)
 
-    if len(unique_workers) != len(data.workers):
+    if len(unique_workers) != len(workers):
         logger.warning(
             "Обнаружены дублирующиеся ID работников: %s -> %s",
-            [w.worker_id for w in data.workers],
+            [w.worker_id for w in workers],
             [w.worker_id for w in unique_workers],
         )
 
@@ -162,41 +71,42 @@ def create_work_order(conn: sqlite3.Connection, data: WorkOrderInput) -> int:
         raise ValueError(
             "Все работники должны быть выбраны из подсказки (из базы). Если работника нет — добавьте его в справочник 'Работники'."
         )
-    existing_workers = unique_workers
 
     # Проверяем корректность ID
     for worker in unique_workers:
         if not isinstance(worker.worker_id, int):
             raise ValueError(f"Некорректный ID работника: {worker.worker_id}")
+    return unique_workers
+
+
+def _check_workers_found(
+    worker_ids: Sequence[int], statuses: dict[int, str | None]
+) -> None:
+    """Все работники есть в базе (statuses: id -> статус) и не уволены."""
+    found_map = {
+        wid: (statuses[wid] or "Работает") for wid in worker_ids if wid in statuses
+    }
+    # Проверка наличия
+    if len(found_map) != len(worker_ids):
+        missing_ids = set(worker_ids) - set(found_map.keys())
+        logger.error("Работники не найдены в базе: %s", missing_ids)
+        raise ValueError(
+            f"Работники с ID {missing_ids} не найдены в базе данных. Выберите работников из списка."
+        )
+    # Блокировать уволенных
+    fired_ids = [
+        wid for wid in worker_ids if found_map.get(wid, "Работает") != "Работает"
+    ]
+    if fired_ids:
+        raise ValueError(f"Нельзя добавить уволенных работников в наряд: {fired_ids}")
 
-    # Проверяем существование работников в базе (только для положительных ID)
-    if existing_workers:
-        existing_ids = [w.worker_id for w in existing_workers]
-        placeholders = ",".join(["?"] * len(existing_ids))
-        found = conn.execute(
-            f"SELECT id, status FROM workers WHERE id IN ({placeholders})",
-            tuple(existing_ids),
-        ).fetchall()
-        found_map = {int(row["id"]): (row["status"] or "Работает") for row in found}
-        # Проверка наличия
-        if len(found_map) != len(existing_ids):
-            missing_ids = set(existing_ids) - set(found_map.keys())
-            logger.error("Работники не найдены в базе: %s", missing_ids)
-            raise ValueError(
-                f"Работники с ID {missing_ids} не найдены в базе данных. Выберите работников из списка."
-            )
-        # Блокировать уволенных
-        fired_ids = [
-            wid for wid in existing_ids if found_map.get(wid, "Работает") != "Работает"
-        ]
-        if fired_ids:
-            raise ValueError(
-                f"Нельзя добавить уволенных работников в наряд: {fired_ids}"
-            )
 
+def _allocate_amounts(
+    total: Decimal, unique_workers: Sequence[WorkOrderWorkerInput]
+) -> list[tuple[int, float]]:
+    """Распределение суммы наряда: заданные суммы как есть, остаток поровну."""
     # Сохраняем заданные суммы по исходному ID (все они положительные)
-    final_worker_ids: list[int] = []
-    specified_by_orig: dict[int, Decimal] = {}
+    specified_by_final: dict[int, Decimal] = {}
     for w in unique_workers:
         if w.amount is not None:
             try:
@@ -205,48 +115,386 @@ def create_work_order(conn: sqlite3.Connection, data: WorkOrderInput) -> int:
                 raise ValueError("Некорректная сумма распределения для работника")
             if val < 0:
                 raise ValueError("Сумма для работника не может быть отрицательной")
-            specified_by_orig[w.worker_id] = val
-
-    # Добавляем существующих работников
-    final_worker_ids.extend([w.worker_id for w in existing_workers])
+            specified_by_final[w.worker_id] = val
 
     # Исключаем возможные дубликаты id
-    final_worker_ids = list(dict.fromkeys(final_worker_ids))
+    final_worker_ids = list(dict.fromkeys(w.worker_id for w in unique_workers))
 
-    # Построим итоговую карту заданных сумм по финальным ID
-    specified_by_final: dict[int, Decimal] = {}
-    for orig_id, amount in specified_by_orig.items():
-        specified_by_final[orig_id] = amount
-
-    # Распределим суммы: заданные берем как есть, остаток равномерно по незаданным
+    # Распределим суммы: заданные берем как есть, остаток поровну по незаданным
+    # (в копейках, методом наибольших остатков)
     sum_specified = sum(specified_by_final.values(), Decimal("0"))
     if sum_specified > total:
         raise ValueError("Сумма распределений превышает итоговую сумму наряда")
-    remainder = total - sum_specified
+    remainder = to_kopecks(total) - sum(map(to_kopecks, specified_by_final.values()))
     unspecified_ids = [wid for wid in final_worker_ids if wid not in specified_by_final]
-    allocations: list[tuple[int, float]] = []
-    if unspecified_ids:
-        per = (
-            _round_rub(remainder / Decimal(len(unspecified_ids)))
-            if remainder > 0
-            else Decimal("0")
+    allocations: list[tuple[int, float]] = [
+        (wid, from_kopecks(kop))
+        for wid, kop in zip(
+            unspecified_ids, split_kopecks(remainder, len(unspecified_ids))
         )
-        amounts = [per] * len(unspecified_ids)
-        diff = _round_rub(remainder - per * Decimal(len(unspecified_ids)))
-        if amounts and diff != Decimal("0"):
-            amounts[-1] = _round_rub(amounts[-1] + diff)
-        for wid, amt in zip(unspecified_ids, amounts):
-            allocations.append((wid, float(amt)))
+    ]
     for wid, amt in specified_by_final.items():
         allocations.append((wid, float(amt)))
+    return allocations
+
+
+@dataclass
+class _CheckedOrder:
+    """Наряд после проверки: что писать в БД."""
+
+    product_ids: list[int]
+    line_values: list[tuple[int, float, float, float]]
+    total: Decimal
+    allocations: list[tuple[int, float]]
+    # Изделия без контракта, которые привязываются к 'Без контракта'
+    bind_default: list[int]
+
+
+class ValidationPlanner:
+    """Справочники для проверки нарядов: один запрос на таблицу.
+
+    prefetch собирает id контрактов, изделий, видов работ и работников из
+    всех переданных нарядов и читает их по запросу IN на таблицу. Контракты
+    и привязки изделий к контрактам кэшируются, пока планировщик работает
+    с той же БД: форма наряда держит один на сессию и сбрасывает его
+    (invalidate) после изменения справочников и ошибок сохранения.
+    Отсутствующие id не кэшируются. Расценки и статусы работников
+    перечитываются при каждом prefetch: их может поменять другой
+    пользователь общей базы, а в наряд пишется цена на момент сохранения.
+    """
+
+    def __init__(self) -> None:
+        self._database: str | None = None
+        self._default_contract_id: int | None = None
+        self.contracts: set[int] = set()
+        self.product_contracts: dict[int, int | None] = {}
+        self.prices: dict[int, Decimal] = {}
+        self.worker_statuses: dict[int, str | None] = {}
+
+    def invalidate(self) -> None:
+        self._database = None
+        self._default_contract_id = None
+        self.contracts.clear()
+        self.product_contracts.clear()
+        self.prices.clear()
+        self.worker_statuses.clear()
+
+    def prefetch(
+        self, conn: sqlite3.Connection, inputs: Iterable[WorkOrderInput]
+    ) -> int:
+        """Дочитывает справочники для нарядов. Возвращает число таблиц,
+        к которым пришлось обратиться."""
+        database = conn.execute("PRAGMA database_list").fetchone()[2]
+        if database != self._database:
+            self.invalidate()
+            self._database = database
+        inputs = list(inputs)
+        contract_ids = {
+            int(d.contract_id) for d in inputs if d.contract_id is not None
+        } - self.contracts
+        product_ids = {
+            int(pid)
+            for d in inputs
+            for pid in (*(d.extra_product_ids or ()), d.product_id)
+            if pid is not None
+        } - set(self.product_contracts)
+        job_type_ids = {
+            int(it.job_type_id)
+            for d in inputs
+            for it in d.items
+            if it.job_type_id is not None
+        }
+        worker_ids = {
+            int(w.worker_id) for d in inputs for w in d.workers if w.worker_id
+        }
+        tables = 0
+        if contract_ids:
+            self.contracts.update(q.get_rows_by_ids(conn, "contracts", contract_ids))
+            tables += 1
+        if product_ids:
+            rows = q.get_rows_by_ids(conn, "products", product_ids, "contract_id")
+            self.product_contracts.update(
+                (pid, r["contract_id"]) for pid, r in rows.items()
+            )
+            tables += 1
+        # Цены и статусы — только свежие, по id этих нарядов
+        self.prices.clear()
+        self.worker_statuses.clear()
+        if job_type_ids:
+            rows = q.get_rows_by_ids(conn, "job_types", job_type_ids, "price")
+            self.prices.update(
+                (jt_id, Decimal(str(r["price"]))) for jt_id, r in rows.items()
+            )
+            tables += 1
+        if worker_ids:
+            rows = q.get_rows_by_ids(conn, "workers", worker_ids, "status")
+            self.worker_statuses.update((wid, r["status"]) for wid, r in rows.items())
+            tables += 1
+        return tables
+
+    def default_contract_id(self, conn: sqlite3.Connection) -> int:
+        if self._default_contract_id is None:
+            self._default_contract_id = q.get_or_create_default_contract(conn)
+        return self._default_contract_id
+
+    def check(
+        self,
+        conn: sqlite3.Connection,
+        data: WorkOrderInput,
+        product_ids: Sequence[int],
+        *,
+        editing: bool = False,
+    ) -> _CheckedOrder:
+        """Проверки наряда по уже прочитанным справочникам (см. prefetch).
+
+        editing — правила update_work_order: с контрактом сверяется только
+        первое изделие, уволенные работники допустимы (наряд мог быть выписан
+        до увольнения). Изделия к контракту здесь не привязываются — только
+        попадают в bind_default (см. bind_default_contract).
+        """
+        validate_date(data.date)
+        if not data.items:
+            raise ValueError("Наряд должен содержать хотя бы одну строку работ")
+        if not product_ids:
+            raise ValueError("Добавьте хотя бы одно изделие")
+        if data.contract_id is not None and int(data.contract_id) not in self.contracts:
+            raise ValueError(
+                "Выбранный контракт не найден. Выберите контракт из списка."
+            )
+        bind_default: list[int] = []
+        for idx, pid in enumerate(product_ids):
+            if pid not in self.product_contracts:
+                raise ValueError(
+                    "Выбранное изделие не найдено. Выберите изделие из списка или очистьте поле."
+                )
+            if editing and idx:
+                continue
+            # Жесткая привязка изделия к одному контракту: если не задан —
+            # привяжем к 'Без контракта'; если задан и не совпадает — ошибка
+            prod_contract_id = self.product_contracts[pid]
+            if prod_contract_id is None:
+                prod_contract_id = self.default_contract_id(conn)
+                bind_default.append(pid)
+            if data.contract_id is None or int(prod_contract_id) != int(
+                data.contract_id
+            ):
+                raise ValueError(
+                    "Изделие привязано к другому контракту. Выберите изделие, соответствующее контракту."
+                )
+
+        total = Decimal("0")
+        line_values: list[tuple[int, float, float, float]] = []
+        for item in data.items:
+            validate_positive_quantity(item.quantity)
+            unit_price = self.prices.get(item.job_type_id)
+            if unit_price is None:
+                raise ValueError(f"Вид работ id={item.job_type_id} не найден")
+            line_amount = _round_rub(unit_price * Decimal(str(item.quantity)))
+            total += line_amount
+            line_values.append(
+                (
+                    item.job_type_id,
+                    float(item.quantity),
+                    float(unit_price),
+                    float(line_amount),
+                )
+            )
+        total = _round_rub(total)
+
+        if editing:
+            if not data.workers:
+                raise ValueError("Добавьте работников в бригаду")
+            if any((w.worker_id is None) or (w.worker_id <= 0) for w in data.workers):
+                raise ValueError(
+                    "Все работники должны быть выбраны из подсказки (из базы). Если работника нет — добавьте его в справочник 'Работники'."
+                )
+            missing = {int(w.worker_id) for w in data.workers} - set(
+                self.worker_statuses
+            )
+            if missing:
+                raise ValueError(
+                    f"Работники с ID {sorted(missing)} не найдены в базе данных"
+                )
+            allocations = _allocate_amounts(total, data.workers)
+        else:
+            unique_workers = _unique_workers(data.workers)
+            _check_workers_found(
+                [w.worker_id for w in unique_workers], self.worker_statuses
+            )
+            allocations = _allocate_amounts(total, unique_workers)
+        return _CheckedOrder(
+            list(product_ids), line_values, total, allocations, bind_default
+        )
 
+    def bind_default_contract(
+        self, conn: sqlite3.Connection, product_ids: Iterable[int]
+    ) -> None:
+        """Привязывает изделия без контракта к 'Без контракта' (в БД и в кэше)."""
+        pids = list(dict.fromkeys(product_ids))
+        if not pids:
+            return
+        default_cid = self.default_contract_id(conn)
+        conn.executemany(
+            "UPDATE products SET contract_id=? WHERE id=?",
+            [(default_cid, pid) for pid in pids],
+        )
+        self.product_contracts.update(dict.fromkeys(pids, default_cid))
+
+
+def create_work_order(
+    conn: sqlite3.Connection,
+    data: WorkOrderInput,
+    planner: ValidationPlanner | None = None,
+) -> int:
+    """Создает наряд. planner — кэш справочников на сессию формы; без него
+    справочники читаются одним запросом на таблицу."""
+    planner = planner or ValidationPlanner()
+    planner.prefetch(conn, [data])
+    product_ids = [int(x) for x in data.extra_product_ids or () if x is not None]
+    checked = planner.check(conn, data, product_ids)
+
+    # Номер наряда: из данных или следующий по счетчику (зарезервированный
+    # номер заведомо свободен)
+    if data.order_no in (None, ""):
+        order_no = q.reserve_order_nos(conn, 1)
+    else:
+        order_no = int(data.order_no)
+        if q.order_no_in_use(conn, order_no):
+            raise ValueError(
+                f"Номер наряда {order_no} уже используется. Укажите другой номер."
+            )
+    planner.bind_default_contract(conn, checked.bind_default)
+    # Сохраним заголовок наряда
+    work_order_id = q.insert_work_order(
+        conn, order_no, data.date, data.contract_id, float(checked.total)
+    )
+    # Сохраним множественные изделия (контракты — только один, не сохраняем связи)
+    conn.executemany(
+        "INSERT INTO work_order_products(work_order_id, product_id) VALUES (?, ?)",
+        [(work_order_id, pid) for pid in dict.fromkeys(checked.product_ids)],
+    )
+    conn.executemany(
+        "INSERT INTO work_order_items(work_order_id, job_type_id, quantity, unit_price, line_amount)"
+        " VALUES (?, ?, ?, ?, ?)",
+        [(work_order_id, *line) for line in checked.line_values],
+    )
     # Сохраняем работников с суммами
-    q.set_work_order_workers_with_amounts(conn, work_order_id, allocations)
+    conn.executemany(
+        "INSERT INTO work_order_workers(work_order_id, worker_id, amount) VALUES (?, ?, ?)",
+        [(work_order_id, wid, float(amt)) for wid, amt in checked.allocations],
+    )
 
-    logger.info("Создан наряд #%s, сумма: %s", order_no, total)
+    logger.info("Создан наряд #%s, сумма: %s", order_no, checked.total)
     return work_order_id
 
 
+def create_work_orders_bulk(
+    conn: sqlite3.Connection,
+    inputs: Sequence[WorkOrderInput],
+    planner: ValidationPlanner | None = None,
+) -> list[int]:
+    """Пакетный create_work_order: те же проверки и те же строки в БД.
+
+    Цены видов работ, изделия, контракты и работники читаются для всей
+    пачки сразу (ValidationPlanner), номера нарядов резервируются одним
+    блоком (reserve_order_nos), запись — через executemany. Сначала
+    проверяются все наряды, поэтому при ошибке ничего не пишется; ошибка
+    содержит порядковый номер наряда в пачке. Возвращает id нарядов в порядке
+    inputs.
+    """
+    if not inputs:
+        return []
+    planner = planner or ValidationPlanner()
+    planner.prefetch(conn, inputs)
+    explicit_nos = [int(d.order_no) for d in inputs if d.order_no not in (None, "")]
+    used_nos = set(q.get_order_ids_by_numbers(conn, explicit_nos))
+    # Блок номеров для нарядов без явного номера; явный номер выше текущего
+    # сдвигает следующие, как при последовательных вызовах
+    auto_count = len(inputs) - len(explicit_nos)
+    next_no = q.reserve_order_nos(conn, auto_count) if auto_count else 0
+    bind_default: list[int] = []
+
+    # order_no, date, contract_id, total, product_ids, line_values, allocations
+    planned: list[tuple] = []
+    for idx, data in enumerate(inputs, start=1):
+        try:
+            product_ids = [
+                int(x) for x in data.extra_product_ids or () if x is not None
+            ]
+            checked = planner.check(conn, data, product_ids)
+            order_no = (
+                int(data.order_no) if data.order_no not in (None, "") else next_no
+            )
+            if order_no in used_nos:
+                raise ValueError(
+                    f"Номер наряда {order_no} уже используется. Укажите другой номер."
+                )
+        except ValueError as exc:
+            raise ValueError(f"Наряд {idx} из {len(inputs)}: {exc}") from exc
+        used_nos.add(order_no)
+        next_no = max(next_no, order_no + 1)
+        bind_default.extend(checked.bind_default)
+        planned.append(
+            (
+                order_no,
+                data.date,
+                data.contract_id,
+                float(checked.total),
+                list(dict.fromkeys(product_ids)),
+                checked.line_values,
+                checked.allocations,
+            )
+        )
+
+    planner.bind_default_contract(conn, bind_default)
+    conn.executemany(
+        "INSERT INTO work_orders(order_no, date, contract_id, total_amount) VALUES (?, ?, ?, ?)",
+        [p[:4] for p in planned],
+    )
+    order_nos = [p[0] for p in planned]
+    id_by_no = q.get_order_ids_by_numbers(conn, order_nos)
+    ids = [id_by_no[no] for no in order_nos]
+    conn.executemany(
+        "INSERT INTO work_order_products(work_order_id, product_id) VALUES (?, ?)",
+        [(wo_id, pid) for wo_id, p in zip(ids, planned) for pid in p[4]],
+    )
+    conn.executemany(
+        """
+        INSERT INTO work_order_items(work_order_id, job_type_id, quantity, unit_price, line_amount)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        [(wo_id, *line) for wo_id, p in zip(ids, planned) for line in p[5]],
+    )
+    conn.executemany(
+        "INSERT INTO work_order_workers(work_order_id, worker_id, amount) VALUES (?, ?, ?)",
+        [(wo_id, wid, amt) for wo_id, p in zip(ids, planned) for wid, amt in p[6]],
+    )
+    logger.info(
+        "Создано нарядов: %d, номера %s-%s", len(ids), min(order_nos), max(order_nos)
+    )
+    return ids
+
+
+def reserve_order_numbers(conn: sqlite3.Connection, count: int) -> range:
+    """Резервирует count номеров нарядов подряд (в транзакции conn).
+
+    Номера не пересекаются с резервами других пользователей общей БД; при
+    откате транзакции резерв возвращается.
+    """
+    if count <= 0:
+        return range(0)
+    first = q.reserve_order_nos(conn, count)
+    return range(first, first + count)
+
+
+def order_number_gaps(conn: sqlite3.Connection) -> list[tuple[int, int]]:
+    """Неиспользованные номера нарядов (удаленные, невостребованные резервы).
+
+    Диапазоны (с, по) включительно, по возрастанию.
+    """
+    return q.order_no_gaps(conn)
+
+
 @dataclass
 class LoadedWorkOrder:
     id: int
@@ -259,81 +507,212 @@ class LoadedWorkOrder:
     ]  # job_type_id, name, qty, unit_price, line_amount
     workers: list[tuple[int, float]]  # (worker_id, amount)
     total_amount: float
+    # Для показа в форме без дополнительных запросов
+    products: list[tuple[int, str, str]] = field(
+        default_factory=list
+    )  # (id, product_no, name)
+    worker_names: dict[int, str] = field(default_factory=dict)
+    contract_code: str | None = None
+    contract_name: str | None = None
 
 
-def load_work_order(conn: sqlite3.Connection, work_order_id: int) -> LoadedWorkOrder:
-    header = q.get_work_order_header(conn, work_order_id)
-    if not header:
-        raise ValueError("Наряд не найден")
-    items_rows = q.get_work_order_items(conn, work_order_id)
-    workers_rows = q.get_work_order_workers(conn, work_order_id)
-    products_rows = q.get_work_order_products(conn, work_order_id)
+def _loaded_from_row(r: sqlite3.Row) -> LoadedWorkOrder:
     items = [
-        (
-            r["job_type_id"],
-            r["job_name"],
-            float(r["quantity"]),
-            float(r["unit_price"]),
-            float(r["line_amount"]),
-        )
-        for r in items_rows
+        (int(jt_id), name, float(qty), float(price), float(amount))
+        for jt_id, name, qty, price, amount in json.loads(r["items_json"])
     ]
-    worker_allocs = [
-        (int(r["worker_id"]), float(r["amount"]) if r["amount"] is not None else 0.0)
-        for r in workers_rows
+    workers = json.loads(r["workers_json"])
+    products = [
+        (int(pid), str(pno), str(name))
+        for pid, pno, name in json.loads(r["products_json"])
     ]
-    product_ids = [int(r["id"]) for r in products_rows]
     return LoadedWorkOrder(
-        id=int(header["id"]),
-        order_no=int(header["order_no"]),
-        date=str(header["date"]),
-        product_ids=product_ids,
-        contract_id=int(header["contract_id"]),
+        id=int(r["id"]),
+        order_no=int(r["order_no"]),
+        date=str(r["date"]),
+        product_ids=[p[0] for p in products],
+        contract_id=int(r["contract_id"]),
         items=items,
-        workers=worker_allocs,
-        total_amount=float(header["total_amount"]),
+        workers=[(int(wid), float(amount or 0.0)) for wid, _name, amount in workers],
+        total_amount=float(r["total_amount"]),
+        products=products,
+        worker_names={int(wid): name for wid, name, _amount in workers},
+        contract_code=r["contract_code"],
+        contract_name=r["contract_name"],
     )
 
 
+def load_work_orders(
+    conn: sqlite3.Connection, work_order_ids: Iterable[int]
+) -> dict[int, LoadedWorkOrder]:
+    """Несколько нарядов одним запросом; отсутствующие id пропускаются."""
+    return {
+        int(r["id"]): _loaded_from_row(r)
+        for r in q.get_work_orders_full(conn, work_order_ids)
+    }
+
+
+def load_work_order(conn: sqlite3.Connection, work_order_id: int) -> LoadedWorkOrder:
+    loaded = load_work_orders(conn, [work_order_id]).get(int(work_order_id))
+    if loaded is None:
+        raise ValueError("Наряд не найден")
+    return loaded
+
+
+class WorkOrderCache:
+    """LRU-кэш загруженных нарядов для просмотра в форме.
+
+    prefetch догружает недостающие наряды одним запросом (соседей выбранной
+    строки списка), чтобы листание стрелками не ходило в БД. После изменения
+    наряда его нужно сбросить через invalidate.
+    """
+
+    def __init__(self, maxsize: int = 64) -> None:
+        self.maxsize = maxsize
+        self._items: OrderedDict[int, LoadedWorkOrder] = OrderedDict()
+
+    def __contains__(self, work_order_id: int) -> bool:
+        return int(work_order_id) in self._items
+
+    def _put(self, loaded: LoadedWorkOrder) -> None:
+        self._items[loaded.id] = loaded
+        self._items.move_to_end(loaded.id)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def get(self, work_order_id: int) -> LoadedWorkOrder | None:
+        """Наряд из кэша (отмечается как недавно просмотренный) или None."""
+        loaded = self._items.get(int(work_order_id))
+        if loaded is not None:
+            self._items.move_to_end(loaded.id)
+        return loaded
+
+    def load(self, conn: sqlite3.Connection, work_order_id: int) -> LoadedWorkOrder:
+        """Наряд из кэша, а при промахе — из БД с сохранением в кэш."""
+        loaded = self.get(work_order_id)
+        if loaded is None:
+            loaded = load_work_order(conn, work_order_id)
+            self._put(loaded)
+        return loaded
+
+    def prefetch(self, conn: sqlite3.Connection, work_order_ids: Iterable[int]) -> int:
+        """Загружает отсутствующие в кэше наряды. Возвращает число загруженных."""
+        missing = [int(i) for i in work_order_ids if int(i) not in self._items]
+        if not missing:
+            return 0
+        loaded = load_work_orders(conn, missing[: self.maxsize])
+        for wo in loaded.values():
+            self._put(wo)
+        return len(loaded)
+
+    def invalidate(self, work_order_id: int | None = None) -> None:
+        if work_order_id is None:
+            self._items.clear()
+        else:
+            self._items.pop(int(work_order_id), None)
+
+
+@dataclass
+class WorkOrderChanges:
+    """Что изменил update_work_order: для кэшей и журнала синхронизации."""
+
+    work_order_id: int
+    header_fields: list[str] = field(default_factory=list)
+    items_inserted: int = 0
+    items_updated: int = 0
+    items_deleted: int = 0
+    products_added: list[int] = field(default_factory=list)
+    products_removed: list[int] = field(default_factory=list)
+    workers_added: list[int] = field(default_factory=list)
+    workers_removed: list[int] = field(default_factory=list)
+    workers_updated: list[int] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return any(
+            (
+                self.header_fields,
+                self.items_inserted,
+                self.items_updated,
+                self.items_deleted,
+                self.products_added,
+                self.products_removed,
+                self.workers_added,
+                self.workers_removed,
+                self.workers_updated,
+            )
+        )
+
+
+def _match_item_rows(
+    old_keys: Sequence[int], new_keys: Sequence[int]
+) -> list[tuple[int | None, int | None]]:
+    """Сопоставляет старые и новые строки работ по видам работ: пары (old, new).
+
+    Порядок строк наряда — порядок id, поэтому сопоставление монотонно:
+    совпавшие и замененные строки обновляются на месте, лишние старые
+    удаляются, новые добавляются в конец. Если новая строка вставлена перед
+    сопоставленной, хвост начиная с нее переписывается по позициям.
+    """
+    pairs: dict[int, int] = {}
+    matcher = SequenceMatcher(None, list(old_keys), list(new_keys), autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag in ("equal", "replace"):
+            for offset in range(min(i2 - i1, j2 - j1)):
+                pairs[j1 + offset] = i1 + offset
+    last_paired = max(pairs, default=-1)
+    tail = next((j for j in range(last_paired) if j not in pairs), None)
+    if tail is not None:
+        head = [pairs[j] for j in range(tail) if j in pairs]
+        old_start = max(head, default=-1) + 1
+        pairs = {j: pairs[j] for j in range(tail) if j in pairs}
+        for offset, j in enumerate(range(tail, len(new_keys))):
+            if old_start + offset < len(old_keys):
+                pairs[j] = old_start + offset
+    used = set(pairs.values())
+    result: list[tuple[int | None, int | None]] = [
+        (pairs.get(j), j) for j in range(len(new_keys))
+    ]
+    result.extend((i, None) for i in range(len(old_keys)) if i not in used)
+    return result
+
+
 def update_work_order(
-    conn: sqlite3.Connection, work_order_id: int, data: WorkOrderInput
-) -> None:
-    validate_date(data.date)
-    if not data.items:
-        raise ValueError("Наряд должен содержать хотя бы одну строку работ")
+    conn: sqlite3.Connection,
+    work_order_id: int,
+    data: WorkOrderInput,
+    planner: ValidationPlanner | None = None,
+) -> WorkOrderChanges:
+    """Обновляет наряд, переписывая только отличающиеся строки.
+
+    Шапка обновляется при изменении полей; строки работ, изделия и работники
+    сравниваются с сохраненными и добавляются, обновляются или удаляются
+    поштучно. planner — как в create_work_order. Возвращает сводку изменений.
+    """
     # Требуем обязательный выбор изделия и контракта
     if (data.product_id is None) and (not data.extra_product_ids):
         raise ValueError("Выберите изделие из списка (из базы данных)")
     if data.contract_id is None:
         raise ValueError("Выберите контракт из списка")
+    product_ids: list[int] = []
+    if data.extra_product_ids:
+        product_ids = [int(x) for x in data.extra_product_ids if x is not None]
+    else:
+        if data.product_id is not None:
+            product_ids = [int(data.product_id)]
 
-    total = Decimal("0")
-    line_values: list[tuple[int, float, float, float]] = []
-
-    for item in data.items:
-        validate_positive_quantity(item.quantity)
-        jt = conn.execute(
-            "SELECT id, price FROM job_types WHERE id = ?", (item.job_type_id,)
-        ).fetchone()
-        if not jt:
-            raise ValueError(f"Вид работ id={item.job_type_id} не найден")
-        unit_price = Decimal(str(jt["price"]))
-        line_amount = _round_rub(unit_price * Decimal(str(item.quantity)))
-        total += line_amount
-        line_values.append(
-            (
-                item.job_type_id,
-                float(item.quantity),
-                float(unit_price),
-                float(line_amount),
-            )
-        )
-
-    total = _round_rub(total)
+    planner = planner or ValidationPlanner()
+    planner.prefetch(conn, [data])
+    checked = planner.check(conn, data, product_ids, editing=True)
+    total = checked.total
+    line_values = checked.line_values
+    allocations = checked.allocations
 
     # Обновим заголовок, учитывая возможную смену номера наряда
     current = q.get_work_order_header(conn, work_order_id)
-    cur_no = int(current["order_no"]) if current else None
+    if current is None:
+        raise ValueError("Наряд не найден")
+    cur_no = int(current["order_no"])
     new_no = (
         cur_no if getattr(data, "order_no", None) in (None, "") else int(data.order_no)
     )
@@ -342,116 +721,110 @@ def update_work_order(
             raise ValueError(
                 f"Номер наряда {new_no} уже используется. Укажите другой номер."
             )
-    product_ids: list[int] = []
-    if data.extra_product_ids:
-        product_ids = [int(x) for x in data.extra_product_ids if x is not None]
-    else:
-        if data.product_id is not None:
-            product_ids = [int(data.product_id)]
-
-    head_product = product_ids[0] if product_ids else None
-
-    # Проверим соответствие изделия и контракта, как при создании
-    if head_product is not None:
-        p_row = conn.execute(
-            "SELECT id, contract_id FROM products WHERE id = ?", (head_product,)
-        ).fetchone()
-        if not p_row:
-            raise ValueError(
-                "Выбранное изделие не найдено. Выберите изделие из списка или очистьте поле."
-            )
-        try:
-            prod_contract_id = (
-                p_row["contract_id"] if isinstance(p_row, dict) else p_row[1]
-            )
-        except Exception:
-            prod_contract_id = None
-        if prod_contract_id is None:
-            default_cid = q.get_or_create_default_contract(conn)
-            q.set_product_contract(conn, int(head_product), int(default_cid))
-            prod_contract_id = default_cid
-        if int(prod_contract_id) != int(data.contract_id):
-            raise ValueError(
-                "Изделие привязано к другому контракту. Выберите изделие, соответствующее контракту."
-            )
+    planner.bind_default_contract(conn, checked.bind_default)
+
+    changes = WorkOrderChanges(work_order_id=int(work_order_id))
+
+    # Шапка
+    new_header = {
+        "order_no": new_no,
+        "date": data.date,
+        "contract_id": int(data.contract_id),
+        "total_amount": float(total),
+    }
+    changes.header_fields = [
+        name for name, value in new_header.items() if current[name] != value
+    ]
+    if changes.header_fields:
+        q.update_work_order_header(
+            conn,
+            work_order_id,
+            new_no,
+            data.date,
+            data.contract_id,
+            float(total),
+        )
 
-    q.update_work_order_header(
-        conn,
-        work_order_id,
-        new_no,
-        data.date,
-        head_product,
-        data.contract_id,
-        float(total),
+    # Изделия (контракты — один)
+    old_products = set(q.get_work_order_product_ids(conn, work_order_id))
+    new_products = list(dict.fromkeys(product_ids))
+    changes.products_added = [p for p in new_products if p not in old_products]
+    changes.products_removed = sorted(old_products - set(new_products))
+    conn.executemany(
+        "DELETE FROM work_order_products WHERE work_order_id = ? AND product_id = ?",
+        [(work_order_id, pid) for pid in changes.products_removed],
+    )
+    conn.executemany(
+        "INSERT INTO work_order_products(work_order_id, product_id) VALUES (?, ?)",
+        [(work_order_id, pid) for pid in changes.products_added],
     )
-    # Пересохраним изделия (контракты — один)
-    q.set_work_order_products(conn, work_order_id, product_ids)
-
-    q.delete_work_order_items(conn, work_order_id)
-    for job_type_id, quantity, unit_price, line_amount in line_values:
-        q.insert_work_order_item(
-            conn, work_order_id, job_type_id, quantity, unit_price, line_amount
-        )
 
-    # Обрабатываем работников: допускаются только работники из базы
-    if not data.workers:
-        raise ValueError("Добавьте работников в бригаду")
-    if any((w.worker_id is None) or (w.worker_id <= 0) for w in data.workers):
-        raise ValueError(
-            "Все работники должны быть выбраны из подсказки (из базы). Если работника нет — добавьте его в справочник 'Работники'."
-        )
-    existing_ids = [int(w.worker_id) for w in data.workers]
-    placeholders = ",".join(["?"] * len(existing_ids))
-    found = conn.execute(
-        f"SELECT id FROM workers WHERE id IN ({placeholders})",
-        tuple(existing_ids),
+    # Строки работ
+    old_items = conn.execute(
+        "SELECT id, job_type_id, quantity, unit_price, line_amount"
+        " FROM work_order_items WHERE work_order_id = ? ORDER BY id",
+        (work_order_id,),
     ).fetchall()
-    found_ids = {int(r["id"]) if isinstance(r, dict) else int(r[0]) for r in found}
-    missing = set(existing_ids) - found_ids
-    if missing:
-        raise ValueError(f"Работники с ID {sorted(missing)} не найдены в базе данных")
-    final_worker_ids: list[int] = list(dict.fromkeys(existing_ids))
-
-    # Исключаем возможные дубликаты id
-    final_worker_ids = list(dict.fromkeys(final_worker_ids))
-
-    # Сопоставим заданные суммы по финальным ID
-    specified_by_final: dict[int, Decimal] = {}
-    for w in data.workers:
-        if w.amount is None:
-            continue
-        try:
-            val = _round_rub(Decimal(str(w.amount)))
-        except Exception:
-            raise ValueError("Некорректная сумма распределения для работника")
-        if val < 0:
-            raise ValueError("Сумма для работника не может быть отрицательной")
-        specified_by_final[int(w.worker_id)] = val
-
-    sum_specified = sum(specified_by_final.values(), Decimal("0"))
-    if sum_specified > total:
-        raise ValueError("Сумма распределений превышает итоговую сумму наряда")
-    remainder = total - sum_specified
-    unspecified_ids = [wid for wid in final_worker_ids if wid not in specified_by_final]
-    allocations: list[tuple[int, float]] = []
-    if unspecified_ids:
-        per = (
-            _round_rub(remainder / Decimal(len(unspecified_ids)))
-            if remainder > 0
-            else Decimal("0")
+    item_updates: list[tuple] = []
+    item_inserts: list[tuple] = []
+    item_deletes: list[tuple[int]] = []
+    for old_idx, new_idx in _match_item_rows(
+        [int(r["job_type_id"]) for r in old_items], [v[0] for v in line_values]
+    ):
+        if new_idx is None:
+            item_deletes.append((int(old_items[old_idx]["id"]),))
+        elif old_idx is None:
+            item_inserts.append((work_order_id, *line_values[new_idx]))
+        else:
+            old = old_items[old_idx]
+            if tuple(old)[1:] != line_values[new_idx]:
+                item_updates.append((*line_values[new_idx], int(old["id"])))
+    conn.executemany("DELETE FROM work_order_items WHERE id = ?", item_deletes)
+    conn.executemany(
+        "UPDATE work_order_items SET job_type_id = ?, quantity = ?, unit_price = ?,"
+        " line_amount = ? WHERE id = ?",
+        item_updates,
+    )
+    conn.executemany(
+        "INSERT INTO work_order_items(work_order_id, job_type_id, quantity, unit_price, line_amount)"
+        " VALUES (?, ?, ?, ?, ?)",
+        item_inserts,
+    )
+    changes.items_inserted = len(item_inserts)
+    changes.items_updated = len(item_updates)
+    changes.items_deleted = len(item_deletes)
+
+    # Работники и суммы
+    old_workers = {
+        int(r["worker_id"]): float(r["amount"])
+        for r in conn.execute(
+            "SELECT worker_id, amount FROM work_order_workers WHERE work_order_id = ?",
+            (work_order_id,),
         )
-        amounts = [per] * len(unspecified_ids)
-        diff = _round_rub(remainder - per * Decimal(len(unspecified_ids)))
-        if amounts and diff != Decimal("0"):
-            amounts[-1] = _round_rub(amounts[-1] + diff)
-        for wid, amt in zip(unspecified_ids, amounts):
-            allocations.append((wid, float(amt)))
-    for wid, amt in specified_by_final.items():
-        allocations.append((wid, float(amt)))
-
-    q.set_work_order_workers_with_amounts(conn, work_order_id, allocations)
+    }
+    new_workers = dict(allocations)
+    changes.workers_added = [w for w in new_workers if w not in old_workers]
+    changes.workers_removed = sorted(set(old_workers) - set(new_workers))
+    changes.workers_updated = [
+        w for w in new_workers if w in old_workers and old_workers[w] != new_workers[w]
+    ]
+    conn.executemany(
+        "DELETE FROM work_order_workers WHERE work_order_id = ? AND worker_id = ?",
+        [(work_order_id, wid) for wid in changes.workers_removed],
+    )
+    conn.executemany(
+        "UPDATE work_order_workers SET amount = ? WHERE work_order_id = ? AND worker_id = ?",
+        [(new_workers[wid], work_order_id, wid) for wid in changes.workers_updated],
+    )
+    conn.executemany(
+        "INSERT INTO work_order_workers(work_order_id, worker_id, amount) VALUES (?, ?, ?)",
+        [(work_order_id, wid, new_workers[wid]) for wid in changes.workers_added],
+    )
 
-    logger.info("Обновлен наряд id=%s, сумма: %s", work_order_id, total)
+    logger.info(
+        "Обновлен наряд id=%s, сумма: %s, изменения: %s", work_order_id, total, changes
+    )
+    return changes
 
 
 def delete_work_order(conn: sqlite3.Connection, work_order_id: int) -> None:
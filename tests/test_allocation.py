@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import random
+from fractions import Fraction
+from pathlib import Path
+
+import numpy as np
+
+from db.schema import ensure_work_order_workers_amounts, initialize_schema
+from db.sqlite import get_connection
+from utils.allocation import allocate_batch, split_kopecks, to_kopecks
+
+
+def _random_case(rng: random.Random) -> tuple[int, list[int] | None]:
+    total = rng.choice([0, 1, rng.randint(-10_000, 10_000), rng.randint(0, 10**12)])
+    count = rng.randint(1, 12)
+    if rng.random() < 0.4:
+        return total, [1] * count if rng.random() < 0.5 else None
+    weights = [rng.choice([0, 1, rng.randint(0, 10**9)]) for _ in range(count)]
+    return total, weights
+
+
+def test_shares_always_sum_to_total() -> None:
+    rng = random.Random(20240201)
+    cases = [_random_case(rng) for _ in range(3000)]
+    for total, weights in cases:
+        count = len(weights) if weights else rng.randint(1, 12)
+        shares = split_kopecks(total, count, weights)
+        assert sum(shares) == total
+        # Каждая доля отличается от точной пропорциональной меньше чем на копейку
+        w = weights if weights and any(weights) else [1] * count
+        for share, weight in zip(shares, w):
+            assert abs(share - Fraction(total * weight, sum(w))) < 1
+
+    # Пакетный расчет совпадает с поштучным
+    batch = [(t, w) for t, w in cases if w is not None]
+    sizes = np.array([len(w) for _t, w in batch])
+    shares = allocate_batch(
+        np.array([t for t, _w in batch]),
+        sizes,
+        np.concatenate([w for _t, w in batch]),
+    )
+    expected = [s for t, w in batch for s in split_kopecks(t, len(w), w)]
+    assert shares.tolist() == expected
+
+
+def test_equal_split_gives_extra_kopecks_to_first_workers() -> None:
+    assert split_kopecks(to_kopecks("100.00"), 3) == [3334, 3333, 3333]
+    assert allocate_batch(np.array([100, 7]), np.array([3, 0])).tolist() == [34, 33, 33]
+
+
+def test_backfill_of_zero_allocations(tmp_path: Path) -> None:
+    with get_connection(tmp_path / "test.db") as conn:
+        initialize_schema(conn)
+        conn.execute("INSERT INTO contracts(code) VALUES ('К')")
+        for no, total in ((1, 100.0), (2, 0.1), (3, 50.0)):
+            conn.execute(
+                "INSERT INTO work_orders(order_no, date, contract_id, total_amount)"
+                " VALUES (?, '01.02.2024', 1, ?)",
+                (no, total),
+            )
+        for name in ("А", "Б", "В"):
+            conn.execute(
+                "INSERT INTO workers(full_name, personnel_no) VALUES (?, ?)",
+                (name, name),
+            )
+        conn.executemany(
+            "INSERT INTO work_order_workers(work_order_id, worker_id, amount) VALUES (?, ?, ?)",
+            [
+                (1, 1, 0),
+                (1, 2, 0),
+                (1, 3, 0),
+                (2, 1, 0),
+                (2, 2, 0),
+                (3, 1, 50.0),
+                (3, 2, 0),
+            ],
+        )
+        ensure_work_order_workers_amounts(conn)
+        rows = conn.execute(
+            "SELECT work_order_id, amount FROM work_order_workers ORDER BY 1, worker_id"
+        ).fetchall()
+    assert [tuple(r) for r in rows] == [
+        (1, 33.34),
+        (1, 33.33),
+        (1, 33.33),
+        (2, 0.05),
+        (2, 0.05),
+        (3, 50.0),
+        (3, 0),
+    ]
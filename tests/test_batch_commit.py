@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from db.batch_commit import BatchCommitter, import_errors
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("CREATE TABLE items(name TEXT NOT NULL UNIQUE)")
+    return conn
+
+
+def _write(conn: sqlite3.Connection, batch: list[str]) -> int:
+    conn.executemany("INSERT INTO items(name) VALUES (?)", [(n,) for n in batch])
+    return len(batch)
+
+
+def _names(conn: sqlite3.Connection) -> list[str]:
+    return [r[0] for r in conn.execute("SELECT name FROM items ORDER BY rowid")]
+
+
+def test_bad_record_is_logged_and_others_are_kept() -> None:
+    conn = _connect()
+    with BatchCommitter(conn, _write, kind="test", batch_size=3) as committer:
+        for name in ["a", "b", "a", "c", "d"]:
+            committer.add(name)
+
+    assert _names(conn) == ["a", "b", "c", "d"]
+    assert sum(committer.results) == 4
+    assert committer.failed == 1
+    errors = import_errors(conn, committer.run_id)
+    assert [(e["record_no"], e["payload"]) for e in errors] == [(2, "a")]
+    assert errors[0]["error"].startswith("IntegrityError")
+    status = conn.execute(
+        "SELECT status, done FROM import_runs WHERE id = ?", (committer.run_id,)
+    ).fetchone()
+    assert tuple(status) == ("done", 5)
+
+
+def test_interrupted_run_resumes_after_last_batch() -> None:
+    conn = _connect()
+    records = [f"r{i}" for i in range(7)]
+    with pytest.raises(RuntimeError):
+        with BatchCommitter(
+            conn, _write, kind="test", source_key="k", batch_size=2
+        ) as c:
+            c.state["header"] = 42
+            for i, name in enumerate(records):
+                if i == 5:
+                    raise RuntimeError("сбой посреди импорта")
+                c.add(name)
+    # Незафиксированная пачка теряется, зафиксированные остаются
+    conn.rollback()
+    assert _names(conn) == records[:4]
+
+    with BatchCommitter(conn, _write, kind="test", source_key="k", batch_size=2) as c:
+        assert c.resumed and c.state == {"header": 42}
+        for name in records:
+            c.add(name)
+    assert _names(conn) == records
+    assert sum(c.results) == 3
+
+
+def test_failed_checkpoint_rolls_back_its_batch(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE items(name TEXT NOT NULL)")
+    records = [f"r{i}" for i in range(6)]
+    checkpoint = BatchCommitter._checkpoint
+    calls = 0
+
+    def failing_checkpoint(self, status: str = "running") -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise sqlite3.OperationalError("database is locked")
+        checkpoint(self, status)
+
+    monkeypatch.setattr(BatchCommitter, "_checkpoint", failing_checkpoint)
+    with pytest.raises(sqlite3.OperationalError):
+        with BatchCommitter(
+            conn, _write, kind="test", source_key="k", batch_size=2
+        ) as c:
+            for name in records:
+                c.add(name)
+    # Вторая пачка не зафиксирована без отметки прогресса
+    assert _names(conn) == records[:2]
+
+    monkeypatch.setattr(BatchCommitter, "_checkpoint", checkpoint)
+    with BatchCommitter(conn, _write, kind="test", source_key="k", batch_size=2) as c:
+        for name in records:
+            c.add(name)
+    assert _names(conn) == records
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from import_engine.detect import explain_sheet
+from utils.column_rules import (
+    CONTRACTS_COLUMNS,
+    KeywordAutomaton,
+    pick_columns,
+)
+
+
+def test_automaton_finds_overlapping_keywords() -> None:
+    automaton = KeywordAutomaton(["таб", "табель", "ель", "номер", "номер контракта"])
+    assert automaton.find("табельный номер контракта") == {
+        "таб",
+        "табель",
+        "ель",
+        "номер",
+        "номер контракта",
+    }
+    assert automaton.find("фио") == frozenset()
+
+
+def test_pick_columns_respects_tiers() -> None:
+    cols = [
+        "Шифр",
+        "Дата исполнения",
+        "Исполнитель",
+        "Плановая дата исполнения контракта",
+    ]
+    picked = pick_columns(cols, CONTRACTS_COLUMNS)
+    assert picked["code"] == "Шифр"
+    # "Исполнитель" важнее любой колонки со словом "исполн"
+    assert picked["executor"] == "Исполнитель"
+    assert picked["end_date"] == "Плановая дата исполнения контракта"
+    assert picked["igk"] is None
+
+
+def test_explain_sheet_lists_fired_rules() -> None:
+    df = pd.DataFrame(
+        [["Сварка", "м", 12.5]], columns=["Наименование работ", "Ед. изм.", "Цена"]
+    )
+    kind, score, hints, reasons = explain_sheet(df)
+    assert (kind, score) == ("job_types", 4)
+    assert hints == {
+        "name_col": "Наименование работ",
+        "unit_col": "Ед. изм.",
+        "price_col": "Цена",
+    }
+    assert "job_types +2: заголовок «цена»" in reasons
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import datetime as dt
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from db import queries as q
+from db.schema import initialize_schema
+from db.sqlite import get_connection
+from reports.columnar_export import (
+    export_work_order_lines_history,
+    save_columnar,
+    stream_query_to_columnar,
+)
+from services.work_orders import (
+    WorkOrderInput,
+    WorkOrderItemInput,
+    WorkOrderWorkerInput,
+    create_work_order,
+)
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+feather = pytest.importorskip("pyarrow.feather")
+
+
+def _assert_money(field) -> None:
+    assert field.type == pa.int64()
+    assert field.metadata == {b"unit": b"kopecks", b"scale": b"2"}
+
+
+def test_save_columnar_types_roundtrip(tmp_path: Path) -> None:
+    df = pd.DataFrame(
+        {
+            "№": [1, 2],
+            "Дата": ["01.02.2024", "2024-02-10"],
+            "Кол-во": [2.5, None],
+            "Сумма": [0.285, 1234.5],
+            "Работник": ["Иванов И.И.", None],
+        }
+    )
+    for name in ("report.parquet", "report.arrow"):
+        table = (
+            pq.read_table(save_columnar(df, tmp_path / name))
+            if name.endswith(".parquet")
+            else feather.read_table(save_columnar(df, tmp_path / name))
+        )
+        schema = table.schema
+        assert schema.field("№").type == pa.int64()
+        assert schema.field("Дата").type == pa.date32()
+        assert schema.field("Кол-во").type == pa.float64()
+        assert schema.field("Работник").type == pa.string()
+        _assert_money(schema.field("Сумма"))
+        assert table.to_pydict() == {
+            "№": [1, 2],
+            "Дата": [dt.date(2024, 2, 1), dt.date(2024, 2, 10)],
+            "Кол-во": [2.5, None],
+            "Сумма": [29, 123450],
+            "Работник": ["Иванов И.И.", None],
+        }
+
+
+def test_history_is_streamed_in_batches_with_types(tmp_path: Path) -> None:
+    with get_connection(tmp_path / "test.db") as conn:
+        initialize_schema(conn)
+        cid = q.get_or_create_default_contract(conn)
+        q.upsert_product(conn, "Изделие 001", "001", cid)
+        q.upsert_worker(conn, "Петров П.П.", None, None, "1")
+        q.upsert_job_type(conn, "Сварка", "м", 12.5)
+        q.upsert_job_type(conn, "Резка", "шт.", 3.33)
+        for date in ("01.02.2024", "15.03.2024"):
+            create_work_order(
+                conn,
+                WorkOrderInput(
+                    date=date,
+                    product_id=None,
+                    contract_id=cid,
+                    items=[WorkOrderItemInput(1, 2.5), WorkOrderItemInput(2, 3)],
+                    workers=[WorkOrderWorkerInput(1, "")],
+                    extra_product_ids=[1],
+                ),
+            )
+        batches: list[int] = []
+        path = tmp_path / "lines.arrow"
+        written = stream_query_to_columnar(
+            conn,
+            "SELECT order_no, date, quantity, line_amount FROM work_orders wo"
+            " JOIN work_order_items woi ON woi.work_order_id = wo.id ORDER BY woi.id",
+            path,
+            batch_rows=3,
+            progress_cb=batches.append,
+        )
+        assert written == 4
+        assert batches == [3, 4]
+        table = feather.read_table(path)
+        _assert_money(table.schema.field("line_amount"))
+        assert table.to_pydict() == {
+            "order_no": [1, 1, 2, 2],
+            "date": [dt.date(2024, 2, 1)] * 2 + [dt.date(2024, 3, 15)] * 2,
+            "quantity": [2.5, 3.0, 2.5, 3.0],
+            "line_amount": [3125, 999, 3125, 999],
+        }
+
+        assert export_work_order_lines_history(conn, tmp_path / "h.parquet") == 4
+        history = pq.read_table(tmp_path / "h.parquet")
+        _assert_money(history.schema.field("total_amount"))
+        assert history.column("total_amount").to_pylist() == [4124] * 4
+        assert history.column("product_no").to_pylist() == ["001"] * 4
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from utils.drafts import DraftJournal
+
+
+def test_draft_journal_appends_coalesced_states_and_replays(tmp_path: Path) -> None:
+    path = tmp_path / "drafts.jsonl"
+    journal = DraftJournal(path, compact_bytes=1024)
+    state = {"date": "01.02.2024", "items": [[1, "Сварка", 2.5, 12.5]]}
+
+    # Несколько изменений между сбросами дают одну строку
+    journal.stage("new", {"date": "01.02.2024", "items": []})
+    journal.stage("new", state)
+    journal.stage("7", {"workers": [[1, "Петров П.П.", 10.0]]})
+    assert journal.flush() == 2
+    journal.stage("new", dict(state))
+    assert journal.flush() == 0
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 2
+
+    # Удаление и оборванная при сбое последняя строка
+    journal.discard("7")
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write('{"key":"new","at":1,"state":{"da')
+    journal = DraftJournal(path, compact_bytes=1024)
+    drafts = journal.load()
+    assert list(drafts) == ["new"] and drafts["new"].state == state
+
+    # Новая запись не склеивается с оборванной; журнал сжимается
+    for i in range(30):
+        journal.stage("new", {**state, "order_no": str(i)})
+        journal.flush()
+    assert len(path.read_text(encoding="utf-8").splitlines()) <= 10
+    assert DraftJournal(path).load()["new"].state["order_no"] == "29"
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from import_engine import engine
+from import_engine.engine import _route_sheets
+from import_engine.readers import TabularSource
+
+_spec = importlib.util.spec_from_file_location(
+    "import_bench", Path(__file__).resolve().parents[1] / "tools" / "import_bench.py"
+)
+bench = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench)
+
+
+def test_corpus_files_are_routed(tmp_path: Path) -> None:
+    expected = {"price": "job_types", "workers": "workers", "contracts": "contracts"}
+    for kind, route in expected.items():
+        path = bench.corpus_file(tmp_path, kind, 30)
+        source = TabularSource(path)
+        try:
+            routes, _ = _route_sheets(source.samples(), bench.KINDS[kind][2])
+        finally:
+            source.close()
+        assert (route, 0) in routes, kind
+
+
+def test_compare_results_flags_regressions() -> None:
+    baseline = {
+        "results": {
+            "price_1000": {"total": 1.0, "stages": {"read": 0.5, "commit": 0.01}},
+            "orders_csv_1000": {"error": "TypeError"},
+        }
+    }
+    current = {
+        "results": {
+            # commit вырос в 3 раза, но на 0.02 с — это шум; read вырос заметно
+            "price_1000": {"total": 1.4, "stages": {"read": 0.9, "commit": 0.03}},
+            "orders_csv_1000": {"total": 5.0, "stages": {}},
+            "workers_1000": {"total": 9.0, "stages": {}},
+        }
+    }
+    problems = bench.compare_results(current, baseline, threshold=0.25, min_delta=0.05)
+    assert problems == [
+        "price_1000/total: 1.000 с -> 1.400 с",
+        "price_1000/read: 0.500 с -> 0.900 с",
+    ]
+    assert bench.compare_results(baseline, baseline) == []
+
+
+def test_workbook_is_closed_when_routing_fails(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    closed: list[TabularSource] = []
+    close = TabularSource.close
+
+    def tracked_close(self) -> None:
+        closed.append(self)
+        close(self)
+
+    monkeypatch.setattr(TabularSource, "close", tracked_close)
+
+    def fail(*_args):
+        raise RuntimeError("детектор")
+
+    monkeypatch.setattr(engine, "_route_sheets", fail)
+    with pytest.raises(RuntimeError, match="детектор"):
+        engine.import_data(bench.corpus_file(tmp_path, "price", 10))
+    assert len(closed) == 1
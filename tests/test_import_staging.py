@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+
+from import_engine import staging
+from import_engine.staging import ImportSession, load_import_session
+
+
+@pytest.fixture(autouse=True)
+def _staging_db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(staging, "staging_db_path", lambda: tmp_path / "staging.db")
+
+
+def test_session_roundtrip_and_invalidation(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    src = tmp_path / "refs.csv"
+    src.write_text("ФИО;Таб. номер\nИванов И.И.;101\n", encoding="utf-8")
+    steps = [
+        ("workers", [{"full_name": "Иванов И.И.", "personnel_no": "101"}]),
+        ("job_types", []),
+        ("job_types", [{"name": "Сварка", "unit": "м", "price": 12.5}]),
+    ]
+    session = ImportSession.for_file(src, "auto")
+    session.steps = steps
+    session.save()
+
+    loaded = load_import_session(src, "auto")
+    assert loaded is not None
+    assert loaded.steps == steps
+    # другой профиль импорта — другая сессия
+    assert load_import_session(src, "refs") is None
+
+    # разбор другой версии формата не применяется
+    monkeypatch.setattr(staging, "STAGING_FORMAT_VERSION", 2)
+    assert load_import_session(src, "auto") is None
+    monkeypatch.setattr(staging, "STAGING_FORMAT_VERSION", 1)
+    assert load_import_session(src, "auto") is not None
+
+    # устаревшая сессия не применяется
+    with closing(sqlite3.connect(tmp_path / "staging.db")) as conn, conn:
+        conn.execute("UPDATE sessions SET created_at = '2000-01-01T00:00:00'")
+    assert load_import_session(src, "auto") is None
+    session.save()
+
+    # файл изменен после чернового прогона — сохраненный разбор не используется
+    src.write_text("ФИО;Таб. номер\nПетров П.П.;102\n", encoding="utf-8")
+    st = src.stat()
+    os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert load_import_session(src, "auto") is None
+
+    session.discard()
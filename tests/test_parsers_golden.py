@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from import_engine.parsers import (
+    parse_contracts,
+    parse_job_types,
+    parse_products,
+    parse_workers,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+GOLDEN = Path(__file__).parent / "golden" / "parsers_primer.json"
+
+# Движки pandas для примеров из data/primer.*
+ENGINES = {".xlsx": "openpyxl", ".xls": "xlrd", ".xlsb": "pyxlsb", ".ods": "odf"}
+# Модули, которые нужны движкам (xlsx читается обязательным openpyxl)
+ENGINE_MODULES = {"xlrd": "xlrd", "pyxlsb": "pyxlsb", "odf": "odf"}
+PARSERS = (parse_job_types, parse_products, parse_contracts, parse_workers)
+
+
+def _digest(rows: list[dict]) -> str:
+    blob = json.dumps(rows, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+@pytest.mark.parametrize(
+    "file_name", sorted(json.loads(GOLDEN.read_text(encoding="utf-8")))
+)
+def test_parsers_match_golden(file_name: str) -> None:
+    """Результаты парсеров на примерах совпадают с эталоном построчной версии.
+
+    Каждый лист разбирается дважды: с заголовком из первой строки ("header")
+    и без него ("raw"), чтобы задеть поиск строки заголовков.
+    """
+    golden = json.loads(GOLDEN.read_text(encoding="utf-8"))[file_name]
+    path = ROOT / "data" / file_name
+    engine = ENGINES[path.suffix]
+    if engine in ENGINE_MODULES:
+        pytest.importorskip(ENGINE_MODULES[engine])
+    xls = pd.ExcelFile(path, engine=engine)
+    for sheet, modes in golden.items():
+        for mode, expected in modes.items():
+            df = xls.parse(sheet, header=0 if mode == "header" else None)
+            for parser in PARSERS:
+                rows = parser(df)
+                exp = expected[parser.__name__]
+                where = f"{file_name} / {sheet} / {mode} / {parser.__name__}"
+                assert len(rows) == exp["rows"], where
+                assert _digest(rows) == exp["sha256"], where
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from db import queries as q
+from db.schema import initialize_schema
+from db.sqlite import get_connection
+from services.repricing import apply_repricing, plan_repricing
+from services.work_orders import (
+    WorkOrderInput,
+    WorkOrderItemInput,
+    WorkOrderWorkerInput,
+    create_work_order,
+    load_work_order,
+)
+
+
+@pytest.fixture
+def conn(tmp_path: Path):
+    with get_connection(tmp_path / "test.db") as conn:
+        initialize_schema(conn)
+        cid = q.get_or_create_default_contract(conn)
+        q.upsert_product(conn, "Изделие 001", "001", cid)
+        for name in ("Петров П.П.", "Иванов И.И.", "Сидоров С.С."):
+            q.upsert_worker(conn, name, None, None, name[:6])
+        q.upsert_job_type(conn, "Сварка", "м", 12.5)
+        q.upsert_job_type(conn, "Резка", "шт.", 3.3)
+        yield conn
+
+
+def _create(conn, date: str, workers=(1, 2, 3), **amounts) -> int:
+    return create_work_order(
+        conn,
+        WorkOrderInput(
+            date=date,
+            product_id=None,
+            contract_id=q.get_or_create_default_contract(conn),
+            items=[WorkOrderItemInput(1, 2.5), WorkOrderItemInput(2, 3)],
+            workers=[
+                WorkOrderWorkerInput(w, "", amounts.get(f"w{w}")) for w in workers
+            ],
+            extra_product_ids=[1],
+        ),
+    )
+
+
+def test_repricing_plan_and_apply(conn) -> None:
+    in_range = _create(conn, "15.01.2024")
+    manual = _create(conn, "31.01.2024", workers=(1, 2), w1=10.0)
+    before_range = _create(conn, "31.12.2023")
+    q.upsert_job_type(conn, "Резка", "шт.", 4.15)
+
+    plan = plan_repricing(conn, "01.01.2024", "31.01.2024")
+    assert [o.work_order_id for o in plan.orders] == [in_range, manual]
+    assert [o.lines for o in plan.orders] == [1, 1]
+    # 12.5 * 2.5 + 4.15 * 3
+    assert plan.orders[0].new_total == 43.7 and plan.orders[0].delta == 2.55
+    assert "Нарядов к пересчету: 2" in plan.summary()
+    assert plan_repricing(conn, "01.01.2024", "31.01.2024", [1]).orders == []
+
+    assert apply_repricing(conn, plan) == 2
+    wo = load_work_order(conn, in_range)
+    assert wo.total_amount == 43.7
+    assert [it[3:] for it in wo.items] == [(12.5, 31.25), (4.15, 12.45)]
+    assert sorted(a for _w, a in wo.workers) == [14.56, 14.57, 14.57]
+    # Ручное распределение сохраняет пропорции: 10 из 41.15 -> 10.62 из 43.7
+    assert sorted(load_work_order(conn, manual).workers) == [(1, 10.62), (2, 33.08)]
+    assert load_work_order(conn, before_range).total_amount == 41.15
+    assert plan_repricing(conn, "01.01.2024", "31.01.2024").orders == []
+
+    # Устаревший план не применяется частично
+    q.upsert_job_type(conn, "Резка", "шт.", 5.0)
+    stale = plan_repricing(conn)
+    conn.execute("UPDATE work_order_items SET unit_price = 1 WHERE id = 6")
+    with pytest.raises(ValueError, match="изменились"):
+        apply_repricing(conn, stale)
+    assert load_work_order(conn, in_range).total_amount == 43.7
+
+
+def test_repricing_plan_is_rejected_after_quantity_or_crew_change(conn) -> None:
+    wo_id = _create(conn, "15.01.2024")
+    q.upsert_job_type(conn, "Резка", "шт.", 4.15)
+
+    plan = plan_repricing(conn)
+    # Количество в строке с новой ценой поменяли между проверкой и применением
+    conn.execute(
+        "UPDATE work_order_items SET quantity = 4, line_amount = 13.2"
+        " WHERE work_order_id = ? AND job_type_id = 2",
+        (wo_id,),
+    )
+    with pytest.raises(ValueError, match="изменились"):
+        apply_repricing(conn, plan)
+    assert [it[2:] for it in load_work_order(conn, wo_id).items] == [
+        (2.5, 12.5, 31.25),
+        (4, 3.3, 13.2),
+    ]
+
+    # Бригаду сократили: доли старого плана не пишутся
+    plan = plan_repricing(conn)
+    conn.execute(
+        "DELETE FROM work_order_workers WHERE work_order_id = ? AND worker_id = 3",
+        (wo_id,),
+    )
+    with pytest.raises(ValueError, match="изменились"):
+        apply_repricing(conn, plan)
+    assert load_work_order(conn, wo_id).items[1][3] == 3.3
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from utils import sheet_cache
+from utils.sheet_cache import CachedWorkbook, open_workbook
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_cached_workbook_reads_sheets_without_reopening(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pytest.importorskip("xlrd")
+    monkeypatch.setattr(sheet_cache, "sheet_cache_dir", lambda: tmp_path / "sheets")
+    path = ROOT / "data" / "primer2.xls"
+    reference = pd.ExcelFile(path)
+    names = list(reference.sheet_names)[:3]
+
+    with open_workbook(path) as xls:
+        assert isinstance(xls, CachedWorkbook)
+        first = [xls.parse(name) for name in names]
+        head = xls.parse(names[0], nrows=5)
+
+    # Второе открытие берет все из кэша: сама книга больше не читается
+    def fail(*args, **kwargs):
+        raise AssertionError("книга не должна открываться повторно")
+
+    monkeypatch.setattr(sheet_cache.pd, "ExcelFile", fail)
+    with open_workbook(path) as xls:
+        assert xls.sheet_names == list(reference.sheet_names)
+        for name, df in zip(names, first):
+            cached = xls.parse(name)
+            pd.testing.assert_frame_equal(cached, df)
+            pd.testing.assert_frame_equal(cached, reference.parse(name))
+        pd.testing.assert_frame_equal(xls.parse(names[0], nrows=5), head)
+
+
+def test_transient_read_error_is_not_cached(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(sheet_cache, "sheet_cache_dir", lambda: tmp_path / "sheets")
+    path = tmp_path / "book.xls"
+    path.write_bytes(b"book")
+    failures = [PermissionError("файл открыт в Excel"), ValueError("лист поврежден")]
+
+    class FakeExcelFile:
+        sheet_names = ["Лист1", "Лист2"]
+
+        def __init__(self, *args, **kwargs) -> None:
+            pass
+
+        def parse(self, sheet_name, nrows=None) -> pd.DataFrame:
+            if failures and sheet_name == "Лист1":
+                raise failures.pop(0)
+            return pd.DataFrame({"a": [1]})
+
+        def close(self) -> None:
+            pass
+
+    monkeypatch.setattr(sheet_cache.pd, "ExcelFile", FakeExcelFile)
+    with open_workbook(path) as xls:
+        with pytest.raises(PermissionError):
+            xls.parse("Лист1")
+        # Временная ошибка не запомнена: следующая попытка читает книгу
+        with pytest.raises(ValueError, match="поврежден"):
+            xls.parse("Лист1")
+    # Ошибка разбора запомнена и не требует открывать книгу
+    with open_workbook(path) as xls:
+        with pytest.raises(ValueError, match="поврежден"):
+            xls.parse("Лист1")
+        assert xls.parse("Лист2")["a"].tolist() == [1]
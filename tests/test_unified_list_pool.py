@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import tkinter
+
+import pytest
+
+ulw = pytest.importorskip("gui.widgets.unified_list_widget")
+
+
+class _Widget:
+    """Заглушка виджета: без дисплея запоминает pack, бинды и команду."""
+
+    created = 0
+    packed: list["_Widget"] = []
+    children: dict[object, list["_Widget"]] = {}
+
+    def __init__(self, parent=None, text="", command=None, **_kwargs) -> None:
+        type(self).created += 1
+        _Widget.children.setdefault(parent, []).append(self)
+        self.text = text
+        self.command = command
+        self.bindings: dict[str, object] = {}
+
+    def pack(self, **_kwargs) -> None:
+        if self not in _Widget.packed:
+            _Widget.packed.append(self)
+
+    def pack_forget(self) -> None:
+        _Widget.packed.remove(self)
+
+    def bind(self, sequence: str, func, add=None) -> None:
+        self.bindings[sequence] = func
+
+
+class _Frame(_Widget):
+    pass
+
+
+@pytest.fixture
+def jobs(monkeypatch: pytest.MonkeyPatch):
+    # Переменным Tk нужен интерпретатор, окно не нужно
+    monkeypatch.setattr(tkinter, "_default_root", tkinter.Tcl())
+    monkeypatch.setattr(_Widget, "packed", [])
+    monkeypatch.setattr(_Widget, "children", {})
+    monkeypatch.setattr(_Frame, "created", 0)
+    monkeypatch.setattr(ulw, "create_modern_frame", _Frame)
+    monkeypatch.setattr(ulw, "create_modern_entry", _Widget)
+    monkeypatch.setattr(ulw, "create_modern_button", _Widget)
+    widget = ulw.UnifiedListWidget.__new__(ulw.UnifiedListWidget)
+    widget.config = ulw.ListConfig(
+        title="Виды работ",
+        placeholder="",
+        show_quantity_field=True,
+        show_price_field=True,
+        show_total_field=True,
+    )
+    widget.on_item_add = widget.on_item_remove = widget.on_amount_change = None
+    widget.readonly = False
+    widget.items = {}
+    widget.manual_counter = -1
+    widget._total_vars, widget._price_vars = {}, {}
+    widget._quantity_vars, widget._amount_vars = {}, {}
+    widget._rows, widget._visible_rows = [], 0
+    widget._saved_values = {}
+    widget.list_frame = None
+    return widget
+
+
+def _delete_button(row) -> _Widget:
+    return next(w for w in _Widget.children[row.frame] if w.text == "Удалить")
+
+
+def _shown(widget) -> list[tuple]:
+    rows = [r for r in widget._rows if r.frame in _Widget.packed]
+    assert [r.frame for r in rows] == [
+        f for f in _Widget.packed if isinstance(f, _Frame)
+    ]
+    return [
+        (r.item_id, r.name_var.get(), r.quantity_var.get(), r.total_var.get())
+        for r in rows
+    ]
+
+
+def test_rows_are_rebound_hidden_and_reused(jobs) -> None:
+    jobs.set_items(
+        [
+            (1, "Сварка", {"quantity": 2, "price": 12.5}),
+            (2, "Резка", {"quantity": 3, "price": 3.3}),
+            (1, "Сварка", {"quantity": 1, "price": 12.5}),
+        ]
+    )
+    assert _Frame.created == 4
+    empty = jobs.manual_counter
+    assert _shown(jobs) == [
+        (1, "Сварка", "2", "25.00"),
+        (2, "Резка", "3", "9.90"),
+        (empty + 1, "Сварка", "1", "12.50"),
+        (empty, "", "1", "0.00"),
+    ]
+    # Повтор вида работ получил свой ключ строки, но id из базы сохранен
+    assert [d["id"] for d in jobs.get_items_data()] == [1, 2, 1, empty]
+
+    # Правка количества переживает удаление строки выше: строки сдвигаются
+    jobs._rows[1].quantity_var.set("5")
+    _Widget.children[jobs._rows[1].frame][1].bindings["<KeyRelease>"]()
+    _delete_button(jobs._rows[3]).command()  # пустая строка
+    _delete_button(jobs._rows[0]).command()  # первая «Сварка»
+    assert _shown(jobs) == [
+        (2, "Резка", "5", "16.50"),
+        (empty + 1, "Сварка", "1", "12.50"),
+    ]
+    assert len(jobs._rows) == 4 and jobs._visible_rows == 2
+
+    # Новый наряд: строки пула переиспользуются, старые значения не переносятся
+    jobs.set_items([(2, "Резка", {"quantity": 1, "price": 3.3})])
+    assert _Frame.created == 4
+    assert _shown(jobs)[0] == (2, "Резка", "1", "3.30")
+    assert len(_shown(jobs)) == 2
+    # Скрытая строка возвращается в конец списка
+    jobs.add_item(3, "Гибка", {"quantity": 2, "price": 1.5})
+    assert _shown(jobs)[-1] == (3, "Гибка", "2", "3.00")
+    assert _Frame.created == 4
@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from db import queries as q
+from db.schema import initialize_schema
+from db.sqlite import get_connection
+from services.work_orders import (
+    ValidationPlanner,
+    WorkOrderCache,
+    WorkOrderInput,
+    WorkOrderItemInput,
+    WorkOrderWorkerInput,
+    create_work_order,
+    create_work_orders_bulk,
+    load_work_order,
+    load_work_orders,
+    order_number_gaps,
+    reserve_order_numbers,
+    update_work_order,
+)
+
+
+@pytest.fixture
+def conn(tmp_path: Path):
+    with get_connection(tmp_path / "test.db") as conn:
+        initialize_schema(conn)
+        contract_id = q.get_or_create_default_contract(conn)
+        for no in ("002", "001"):
+            q.upsert_product(conn, f"Изделие {no}", no, contract_id)
+        for name in ("Петров П.П.", "Иванов И.И."):
+            q.upsert_worker(conn, name, None, None, name[:6])
+        q.upsert_job_type(conn, "Сварка", "м", 12.5)
+        q.upsert_job_type(conn, "Резка", "шт.", 3.3)
+        yield conn
+
+
+def _ids(conn, table: str) -> list[int]:
+    return [r[0] for r in conn.execute(f"SELECT id FROM {table} ORDER BY id")]
+
+
+def _input(conn, **overrides) -> WorkOrderInput:
+    workers = [WorkOrderWorkerInput(wid, "") for wid in _ids(conn, "workers")]
+    data = dict(
+        date="01.02.2024",
+        product_id=None,
+        contract_id=q.get_or_create_default_contract(conn),
+        items=[WorkOrderItemInput(jt, 1.5 + jt) for jt in _ids(conn, "job_types")],
+        workers=workers,
+        extra_product_ids=_ids(conn, "products"),
+    )
+    data.update(overrides)
+    return WorkOrderInput(**data)
+
+
+def test_load_work_orders_matches_per_table_queries(conn) -> None:
+    first = create_work_order(conn, _input(conn))
+    second = create_work_order(conn, _input(conn, extra_product_ids=[1]))
+
+    loaded = load_work_orders(conn, [first, second, 999])
+    assert sorted(loaded) == [first, second]
+    wo = loaded[first]
+    assert wo.items == [
+        (
+            r["job_type_id"],
+            r["job_name"],
+            r["quantity"],
+            r["unit_price"],
+            r["line_amount"],
+        )
+        for r in q.get_work_order_items(conn, first)
+    ]
+    assert wo.workers == [
+        (r["worker_id"], r["amount"]) for r in q.get_work_order_workers(conn, first)
+    ]
+    assert wo.worker_names == {
+        r["worker_id"]: r["full_name"] for r in q.get_work_order_workers(conn, first)
+    }
+    assert wo.products == [
+        (r["id"], r["product_no"], r["name"])
+        for r in q.get_work_order_products(conn, first)
+    ]
+    assert wo.contract_code == "Без контракта"
+    assert loaded[second].product_ids == [1]
+    with pytest.raises(ValueError):
+        load_work_order(conn, 999)
+
+
+def test_work_order_cache_prefetch_and_eviction(conn) -> None:
+    ids = [create_work_order(conn, _input(conn)) for _ in range(4)]
+    cache = WorkOrderCache(maxsize=3)
+    assert cache.prefetch(conn, ids[:2]) == 2
+    assert cache.prefetch(conn, ids[:2]) == 0
+    assert cache.get(ids[0]).id == ids[0]
+    cache.load(conn, ids[2])
+    cache.load(conn, ids[3])
+    # Вытеснен наименее недавно использованный
+    assert ids[1] not in cache and ids[0] in cache
+    cache.invalidate(ids[0])
+    assert cache.get(ids[0]) is None
+
+
+def _dump(conn) -> dict[str, list[tuple]]:
+    tables = {
+        "work_orders": "order_no, date, contract_id, total_amount",
+        "work_order_items": "work_order_id, job_type_id, quantity, unit_price, line_amount",
+        "work_order_workers": "work_order_id, worker_id, amount",
+        "work_order_products": "work_order_id, product_id",
+        "products": "id, contract_id",
+    }
+    return {
+        t: [tuple(r) for r in conn.execute(f"SELECT {cols} FROM {t} ORDER BY 1, 2")]
+        for t, cols in tables.items()
+    }
+
+
+def test_bulk_create_matches_sequential_calls(tmp_path: Path) -> None:
+    dumps = []
+    for bulk in (False, True):
+        with get_connection(tmp_path / f"bulk{int(bulk)}.db") as conn:
+            initialize_schema(conn)
+            q.upsert_product(conn, "Изделие 001", "001", None)
+            for name in ("Петров П.П.", "Иванов И.И.", "Сидоров С.С."):
+                q.upsert_worker(conn, name, None, None, name[:6])
+            q.upsert_job_type(conn, "Сварка", "м", 12.5)
+            q.upsert_job_type(conn, "Резка", "шт.", 3.33)
+            cid = q.get_or_create_default_contract(conn)
+            workers = [WorkOrderWorkerInput(wid, "") for wid in _ids(conn, "workers")]
+            inputs = [
+                _input(conn, contract_id=cid),
+                _input(conn, order_no=10, workers=workers[:1]),
+                _input(
+                    conn,
+                    items=[WorkOrderItemInput(2, 7)],
+                    workers=[WorkOrderWorkerInput(1, "", 5.0), *workers],
+                ),
+                _input(conn, order_no=5, extra_product_ids=[1, 1]),
+            ]
+            if bulk:
+                ids = create_work_orders_bulk(conn, inputs)
+            else:
+                ids = [create_work_order(conn, d) for d in inputs]
+            assert ids == [1, 2, 3, 4]
+            dumps.append(_dump(conn))
+    assert dumps[0] == dumps[1]
+
+
+def test_bulk_create_validates_whole_batch_before_writing(conn) -> None:
+    inputs = [_input(conn), _input(conn, order_no=1)]
+    with pytest.raises(ValueError, match="Наряд 2 из 2: Номер наряда 1"):
+        create_work_orders_bulk(conn, inputs)
+    assert conn.execute("SELECT COUNT(*) FROM work_orders").fetchone()[0] == 0
+
+
+def _item_rows(conn, wo_id: int) -> list[tuple]:
+    return [
+        tuple(r)
+        for r in conn.execute(
+            "SELECT id, job_type_id, quantity FROM work_order_items"
+            " WHERE work_order_id = ? ORDER BY id",
+            (wo_id,),
+        )
+    ]
+
+
+def test_update_work_order_rewrites_only_changed_rows(conn) -> None:
+    for name in ("Гибка", "Покраска"):
+        q.upsert_job_type(conn, name, "шт.", 2.0)
+    items = [WorkOrderItemInput(jt, 1.0) for jt in (1, 2, 3, 4)]
+    wo_id = create_work_order(conn, _input(conn, items=items))
+    before = _item_rows(conn, wo_id)
+
+    changes = update_work_order(
+        conn, wo_id, _input(conn, items=items, date="02.02.2024")
+    )
+    assert changes.header_fields == ["date"]
+    assert _item_rows(conn, wo_id) == before
+    assert not update_work_order(
+        conn, wo_id, _input(conn, items=items, date="02.02.2024")
+    ).changed
+
+    # Удалили вторую строку и изменили количество в последней
+    edited = [items[0], items[2], WorkOrderItemInput(4, 3.0)]
+    changes = update_work_order(
+        conn, wo_id, _input(conn, items=edited, workers=[WorkOrderWorkerInput(1, "")])
+    )
+    assert (changes.items_deleted, changes.items_updated, changes.items_inserted) == (
+        1,
+        1,
+        0,
+    )
+    assert changes.workers_removed == [2] and changes.workers_updated == [1]
+    assert _item_rows(conn, wo_id) == [before[0], before[2], (before[3][0], 4, 3.0)]
+
+    # Вставка в начало сохраняет порядок строк
+    edited = [WorkOrderItemInput(2, 1.0), *edited]
+    update_work_order(conn, wo_id, _input(conn, items=edited))
+    loaded = load_work_order(conn, wo_id)
+    assert [(it[0], it[2]) for it in loaded.items] == [
+        (2, 1.0),
+        (1, 1.0),
+        (3, 1.0),
+        (4, 3.0),
+    ]
+    assert loaded.total_amount == sum(it[4] for it in loaded.items)
+
+
+def test_order_numbers_are_reserved_in_blocks(conn) -> None:
+    assert reserve_order_numbers(conn, 3) == range(1, 4)
+    first = create_work_order(conn, _input(conn))
+    assert load_work_order(conn, first).order_no == 4
+    # Номер, введенный вручную выше счетчика, сдвигает следующий блок
+    create_work_order(conn, _input(conn, order_no=10))
+    assert reserve_order_numbers(conn, 2) == range(11, 13)
+    assert q.next_order_no(conn) == 13
+    assert order_number_gaps(conn) == [(1, 3), (5, 9), (11, 12)]
+
+
+def test_validation_planner_reads_each_table_once(conn) -> None:
+    statements: list[str] = []
+    conn.set_trace_callback(statements.append)
+    planner = ValidationPlanner()
+
+    def reference_reads() -> list[str]:
+        tables = ("contracts", "products", "job_types", "workers")
+        return [t for s in statements for t in tables if f"FROM {t} WHERE id" in s]
+
+    create_work_order(conn, _input(conn), planner)
+    assert reference_reads() == ["contracts", "products", "job_types", "workers"]
+    statements.clear()
+    # Контракты и изделия — из кэша, цены и статусы перечитываются
+    create_work_order(conn, _input(conn), planner)
+    assert reference_reads() == ["job_types", "workers"]
+
+    # Неизвестные id не кэшируются, ошибка — до записи
+    with pytest.raises(ValueError, match="Вид работ id=99"):
+        create_work_order(
+            conn, _input(conn, items=[WorkOrderItemInput(99, 1)]), planner
+        )
+    conn.set_trace_callback(None)
+    assert conn.execute("SELECT COUNT(*) FROM work_orders").fetchone()[0] == 2
+
+
+def test_validation_planner_sees_price_and_status_changes(conn) -> None:
+    planner = ValidationPlanner()
+    create_work_order(conn, _input(conn), planner)
+    # Другой пользователь общей базы меняет расценку и увольняет работника
+    conn.execute("UPDATE job_types SET price = 20 WHERE id = 1")
+    second = create_work_order(
+        conn, _input(conn, items=[WorkOrderItemInput(1, 2)]), planner
+    )
+    assert load_work_order(conn, second).total_amount == 40.0
+    conn.execute("UPDATE workers SET status = 'Уволен' WHERE id = 2")
+    with pytest.raises(ValueError, match="уволенных"):
+        create_work_order(conn, _input(conn), planner)
+
+
+def test_orders_list_pages_by_key_with_server_side_filters(conn) -> None:
+    dates = ["05.03.2024", "01.02.2024", "15.01.2025", "01.02.2024", "28.12.2023"]
+    ids = [
+        create_work_order(
+            conn,
+            _input(
+                conn,
+                date=d,
+                extra_product_ids=[1 + i % 2],
+                workers=[WorkOrderWorkerInput(1 + i % 2, "")],
+            ),
+        )
+        for i, d in enumerate(dates)
+    ]
+    # Наряд из импорта CSV с датой ГГГГ-ММ-ДД
+    conn.execute("UPDATE work_orders SET date = '2024-02-10' WHERE id = ?", (ids[4],))
+
+    def all_pages(**kwargs) -> list[int]:
+        seen: list[int] = []
+        after = None
+        while True:
+            rows = q.list_work_orders_page(conn, after=after, limit=2, **kwargs)
+            seen.extend(r["id"] for r in rows)
+            if len(rows) < 2:
+                return seen
+            after = (rows[-1]["sort_key"], rows[-1]["id"])
+
+    assert all_pages() == ids[::-1]
+    assert all_pages(sort="date", descending=False) == [
+        ids[1],
+        ids[3],
+        ids[4],
+        ids[0],
+        ids[2],
+    ]
+    assert all_pages(date_from="01.02.2024", date_to="31.12.2024", sort="date") == [
+        ids[0],
+        ids[4],
+        ids[3],
+        ids[1],
+    ]
+    assert all_pages(worker="иванов") == [ids[3], ids[1]]
+    assert all_pages(product="002", sort="product") == [ids[4], ids[2], ids[0]]
+
+    # Названия изделий поддерживаются при правке наряда и переименовании изделия
+    def names(wo_id: int) -> str:
+        rows = q.list_work_orders_page(conn, limit=10)
+        return next(r["product_name"] for r in rows if r["id"] == wo_id)
+
+    assert names(ids[0]) == "Изделие 002"
+    update_work_order(conn, ids[0], _input(conn, extra_product_ids=[1, 2]))
+    assert names(ids[0]) == "Изделие 001, Изделие 002"
+    conn.execute("UPDATE products SET name = 'Втулка' WHERE product_no = '002'")
+    assert names(ids[0]) == "Втулка, Изделие 001"
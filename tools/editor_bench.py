@@ -0,0 +1,142 @@
+"""Замер открытия наряда в редакторе: заполнение списков видов работ и работников.
+
+Примеры:
+    python tools/editor_bench.py
+    python tools/editor_bench.py --lines 40 --workers 8 --repeat 30 --out editor.json
+    xvfb-run python tools/editor_bench.py   # на сервере без дисплея
+
+Нужен дисплей: виджеты настоящие (UnifiedListWidget), база не используется.
+Два наряда по --lines строк попеременно загружаются через set_items, как в
+WorkOrdersForm._fill_form_from_loaded, время — до update_idletasks, то есть
+вместе с раскладкой. Режимы на одних и тех же списках:
+    recreate — перед каждым открытием строки уничтожаются, и все виджеты
+               создаются заново (поведение до пула строк);
+    pool     — строки пула перепривязываются к новым данным.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+from pathlib import Path
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+MODES = ("recreate", "pool")
+
+
+def _order(lines: int, workers: int, seed: int) -> tuple[list, list]:
+    job_items = [
+        (
+            seed * 1000 + i,
+            f"Вид работ {seed}-{i}",
+            {"quantity": 1 + i % 5, "price": 10.0 + i},
+        )
+        for i in range(lines)
+    ]
+    worker_items = [
+        (seed * 1000 + i, f"Работник {seed}-{i}", {"amount": 100.0 + i})
+        for i in range(workers)
+    ]
+    return job_items, worker_items
+
+
+def _drop_pool(widget) -> None:
+    for row in widget._rows:
+        row.frame.destroy()
+    widget._rows.clear()
+    widget._visible_rows = 0
+
+
+def run(lines: int, workers: int, repeat: int) -> dict:
+    import customtkinter as ctk
+
+    from gui.widgets.unified_list_widget import (
+        create_job_types_list,
+        create_workers_list,
+    )
+
+    root = ctk.CTk()
+    root.geometry("1200x800")
+    jobs = create_job_types_list(root)
+    jobs.pack(fill="both", expand=True)
+    crew = create_workers_list(root)
+    crew.pack(fill="both", expand=True)
+    root.update()
+    orders = [_order(lines, workers, seed) for seed in (1, 2)]
+
+    def open_order(i: int) -> None:
+        job_items, worker_items = orders[i % 2]
+        jobs.set_items(job_items)
+        crew.set_items(worker_items)
+        root.update_idletasks()
+
+    results: dict[str, dict] = {}
+    try:
+        for mode in MODES:
+            # Первое открытие заполняет пул; оно же — стоимость старого пути
+            open_order(0)
+            times: list[float] = []
+            for i in range(1, repeat + 1):
+                started = perf_counter()
+                if mode == "recreate":
+                    _drop_pool(jobs)
+                    _drop_pool(crew)
+                open_order(i)
+                times.append((perf_counter() - started) * 1000)
+            times.sort()
+            results[mode] = {
+                "median_ms": round(statistics.median(times), 2),
+                "p95_ms": round(times[max(0, int(len(times) * 0.95) - 1)], 2),
+                "rows_created": len(jobs._rows) + len(crew._rows),
+            }
+    finally:
+        root.destroy()
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=40, help="строк работ в наряде")
+    parser.add_argument("--workers", type=int, default=8, help="работников в наряде")
+    parser.add_argument("--repeat", type=int, default=20, help="открытий на режим")
+    parser.add_argument("--out", type=Path, help="записать результат в JSON")
+    args = parser.parse_args(argv)
+
+    import tkinter
+
+    try:
+        results = run(args.lines, args.workers, args.repeat)
+    except tkinter.TclError as exc:
+        print(f"Нет дисплея ({exc}); запустите через xvfb-run", file=sys.stderr)
+        return 2
+    report = {
+        "lines": args.lines,
+        "workers": args.workers,
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    for mode, r in results.items():
+        print(f"{mode:>9}: медиана {r['median_ms']:.1f} мс, p95 {r['p95_ms']:.1f} мс")
+    # Строка для таблицы результатов в tools/README.md
+    cells = [f"{args.lines}×{args.workers}"] + [
+        f"{results[m]['median_ms']:.1f} / {results[m]['p95_ms']:.1f}" for m in MODES
+    ]
+    print("| " + " | ".join([*cells, report["platform"]]) + " |")
+    if args.out:
+        args.out.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,406 @@
+"""Бенчмарк импорта: синтетический корпус файлов и замер import_data по этапам.
+
+Примеры:
+    python tools/import_bench.py --sizes 1000,10000 --out bench.json
+    python tools/import_bench.py --save-baseline
+    python tools/import_bench.py --baseline tools/import_bench_baseline.json
+
+Каждый случай (вид файла x размер) запускается в отдельном процессе с чистой
+БД во временном APP_BASE_DIR. Время пишется в JSON: общее и по этапам
+read / detect / parse / commit (см. utils.timing). При сравнении с базовой
+линией команда завершается с кодом 1, если какой-либо этап стал медленнее
+больше чем на --threshold (и больше чем на --min-delta секунд).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_CORPUS = Path(tempfile.gettempdir()) / "sdelka_import_corpus"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "import_bench_baseline.json"
+STAGES = ("read", "detect", "parse", "commit")
+
+# Строк нарядов на один лист в многолистовых книгах
+ORDERS_ROWS_PER_SHEET = 500
+
+_JOBS = (
+    "Сборка б/у двигателей",
+    "Инструментальные работы",
+    "Разборка двигателя",
+    "Мойка деталей",
+    "Дефектовка",
+    "Покраска корпуса",
+    "Сварочные работы",
+    "Обкатка на стенде",
+)
+_UNITS = ("шт.", "час.", "компл.", "м")
+_SURNAMES = ("Иванов", "Петров", "Сидоров", "Кузнецов", "Смирнов", "Попов", "Зайцев")
+
+
+def _job_name(i: int) -> str:
+    return f"{_JOBS[i % len(_JOBS)]} {i // len(_JOBS) + 1}"
+
+
+def _person(i: int) -> str:
+    return f"{_SURNAMES[i % len(_SURNAMES)]} Работник{i} Иванович"
+
+
+# --- Генераторы корпуса ---
+
+
+def gen_price_list(path: Path, n: int) -> None:
+    """Прайс видов работ: № п/п, Наименование, Ед. изм., Цена."""
+    import pandas as pd
+
+    rnd = random.Random(n)
+    pd.DataFrame(
+        {
+            "№ п/п": range(1, n + 1),
+            "Наименование работ": [_job_name(i) for i in range(n)],
+            "Ед. изм.": [_UNITS[i % len(_UNITS)] for i in range(n)],
+            "Цена": [round(rnd.uniform(10, 5000), 2) for _ in range(n)],
+        }
+    ).to_excel(path, index=False)
+
+
+def gen_workers(path: Path, n: int) -> None:
+    """Список работников цеха с шапкой, как в выгрузках из 1С."""
+    import pandas as pd
+
+    rows: list[list] = [
+        ["Список работников цеха № 3", None, None, None, None],
+        ["№", "ФИО", "Таб. номер", "Должность", "Цех"],
+    ]
+    for i in range(n):
+        rows.append([i + 1, _person(i), f"{10000 + i:06d}", "слесарь", str(1 + i % 9)])
+    pd.DataFrame(rows).to_excel(path, index=False, header=False)
+
+
+def gen_contracts_csv(path: Path, n: int) -> None:
+    """Справочник контрактов в CSV с разделителем ';'."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(
+            "Шифр контракта;Наименование;Вид контракта;Исполнитель;ИГК;"
+            "Номер контракта;Дата начала;Дата окончания\n"
+        )
+        for i in range(n):
+            f.write(
+                f"К-{i:06d};Контракт {i};Госконтракт;Исполнитель {i % 50};"
+                f"ИГК{i:09d};{2024000 + i}/{i % 12 + 1};"
+                f"{1 + i % 28:02d}.{1 + i % 12:02d}.2024;31.12.2026\n"
+            )
+
+
+def gen_ledger_csv(path: Path, n: int) -> None:
+    """Оборотно-сальдовая ведомость по счету 002: изделие, контрагент, договор, дата."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("Оборотно-сальдовая ведомость по счету 002;;;\n")
+        for i in range(n // 4):
+            f.write(f"Двигатель В-{i} № {i}АТ{i % 97} БУ;;;\n")
+            f.write("РПТП ГРАНИТ АО;;;\n")
+            f.write(f"Договор №{2224000 + i % 500} ГРАНИТ ({2020 + i % 5}) БУ;;;\n")
+            f.write(f"{1 + i % 28:02d}.{1 + i % 12:02d}.2024;1;;\n")
+
+
+def gen_orders_csv(path: Path, n: int) -> None:
+    """Наряд на сдельные работы в CSV: шапка с работниками, изделия, строки работ."""
+    rnd = random.Random(n)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("Наряд на сдельные работы 2024г.;;;;;\n")
+        f.write("ФИО сотрудника: Иванов Иван Иванович Таб № 00377;;;;;\n")
+        f.write("ФИО сотрудника: Петров Петр Петрович Таб № 00378;;;;;\n")
+        f.write("Изделие № К01АТ0317/84, К01АТ0318/84;;;;;\n")
+        f.write("Дата;Наименование выполненых работ;Ед. изм.;Расценка;Объем;Сумма\n")
+        for i in range(n):
+            date = f"{1 + i % 28:02d}.06." if i % 20 == 0 else ""
+            price = round(rnd.uniform(10, 900), 2)
+            qty = rnd.randint(1, 20)
+            f.write(
+                f"{date};{_job_name(i % 400)};{_UNITS[i % len(_UNITS)]};"
+                f"{price};{qty};{round(price * qty, 2)}\n"
+            )
+
+
+def _orders_sheet_rows(sheet_no: int, n: int, rnd: random.Random) -> list[list]:
+    blank = [None] * 7
+    rows: list[list] = [
+        blank,
+        [
+            f"ФИО сотрудника: {_person(sheet_no)}",
+            None,
+            None,
+            None,
+            "Таб №",
+            f"{sheet_no:05d}",
+            None,
+        ],
+        blank,
+        [
+            "Дата",
+            "Наименование выполненых работ",
+            "Ед. изм.",
+            "Расценка  (руб.)",
+            "Объем выполненных работ",
+            "Сумма  (руб)",
+            "Примечание",
+        ],
+    ]
+    for i in range(n):
+        if i % 25 == 0:
+            rows.append([f"Изделие № К{sheet_no:02d}АТ{i:04d}/84", *blank[1:]])
+            rows.append([f"{1 + (i // 25) % 28:02d}.06.", *blank[1:]])
+        price = round(rnd.uniform(10, 900), 2)
+        qty = rnd.randint(1, 20)
+        rows.append(
+            [
+                None,
+                _job_name(i % 400),
+                _UNITS[i % len(_UNITS)],
+                price,
+                qty,
+                round(price * qty, 2),
+                None,
+            ]
+        )
+    rows.append(["ИТОГО", *blank[1:]])
+    return rows
+
+
+def gen_orders_workbook(path: Path, n: int) -> None:
+    """Многолистовая книга нарядов (.xlsx/.ods): по ORDERS_ROWS_PER_SHEET строк на лист."""
+    import pandas as pd
+
+    rnd = random.Random(n)
+    engine = "odf" if path.suffix.lower() == ".ods" else "openpyxl"
+    with pd.ExcelWriter(path, engine=engine) as writer:
+        sheet_no = 0
+        for start in range(0, n, ORDERS_ROWS_PER_SHEET):
+            rows = _orders_sheet_rows(
+                sheet_no, min(ORDERS_ROWS_PER_SHEET, n - start), rnd
+            )
+            pd.DataFrame(rows).to_excel(
+                writer, sheet_name=f"Работник {sheet_no}", index=False, header=False
+            )
+            sheet_no += 1
+
+
+# вид -> (генератор, расширение, профиль импорта)
+KINDS: dict[str, tuple] = {
+    "price": (gen_price_list, ".xlsx", "price"),
+    "workers": (gen_workers, ".xlsx", "refs"),
+    "contracts": (gen_contracts_csv, ".csv", "refs"),
+    "ledger": (gen_ledger_csv, ".csv", "auto"),
+    "orders_csv": (gen_orders_csv, ".csv", "auto"),
+    "orders_xlsx": (gen_orders_workbook, ".xlsx", "orders"),
+    "orders_ods": (gen_orders_workbook, ".ods", "orders"),
+}
+
+
+def corpus_file(corpus: Path, kind: str, size: int) -> Path:
+    """Путь к файлу корпуса; файл создается, если его еще нет (генерация детерминирована)."""
+    gen, suffix, _ = KINDS[kind]
+    path = corpus / f"{kind}_{size}{suffix}"
+    if not path.exists():
+        corpus.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.tmp{suffix}")
+        gen(tmp, size)
+        tmp.replace(path)
+    return path
+
+
+# --- Запуск и сравнение ---
+
+
+def _run_case_here(path: Path, preset: str) -> dict:
+    """Выполняется в дочернем процессе: импорт файла в пустую БД с замером этапов."""
+    from db.schema import initialize_schema
+    from db.sqlite import get_connection
+    from import_engine.engine import import_data
+    from utils.timing import record_stages
+
+    with get_connection() as conn:
+        initialize_schema(conn)
+    with record_stages() as stages:
+        started = time.perf_counter()
+        res = import_data(path, dry_run=False, preset=preset, backup_before=False)
+        total = time.perf_counter() - started
+    return {
+        "total": round(total, 4),
+        "stages": {k: round(v, 4) for k, v in stages.items()},
+        "added": int(getattr(res, "added", 0) or 0),
+        "updated": int(getattr(res, "updated", 0) or 0),
+    }
+
+
+def run_case(path: Path, preset: str) -> dict:
+    """Запускает случай в отдельном процессе с временным APP_BASE_DIR."""
+    with tempfile.TemporaryDirectory(prefix="import_bench_") as base:
+        env = dict(os.environ, APP_BASE_DIR=base)
+        proc = subprocess.run(
+            [sys.executable, __file__, "--case", str(path), preset],
+            cwd=base,
+            env=env,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+    if proc.returncode != 0:
+        tail = (proc.stderr or "").strip().splitlines()[-1:] or [
+            "exit code %d" % proc.returncode
+        ]
+        return {"error": tail[0]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run_benchmarks(
+    corpus: Path, kinds: list[str], sizes: list[int], repeat: int = 1
+) -> dict:
+    results: dict[str, dict] = {}
+    for kind in kinds:
+        for size in sizes:
+            name = f"{kind}_{size}"
+            path = corpus_file(corpus, kind, size)
+            best: dict | None = None
+            for _ in range(max(1, repeat)):
+                res = run_case(path, KINDS[kind][2])
+                if "error" in res or best is None or res["total"] < best["total"]:
+                    best = res
+                if "error" in res:
+                    break
+            results[name] = best
+            if "error" in best:
+                print(f"{name:<22} ОШИБКА: {best['error']}")
+            else:
+                parts = " ".join(
+                    f"{s}={best['stages'].get(s, 0.0):.3f}" for s in STAGES
+                )
+                print(f"{name:<22} {best['total']:8.3f} с  {parts}")
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare_results(
+    current: dict, baseline: dict, threshold: float = 0.25, min_delta: float = 0.05
+) -> list[str]:
+    """Список регрессий: этапы (и общее время), ставшие медленнее базовой линии.
+
+    Регрессия — рост больше чем в (1 + threshold) раз и больше чем на min_delta
+    секунд (чтобы шум на коротких этапах не ронял проверку). Случаи, которых нет
+    в базовой линии или которые завершились ошибкой там, пропускаются; ошибка
+    в текущем прогоне при успешной базовой линии — тоже регрессия.
+    """
+    problems: list[str] = []
+    base_results = baseline.get("results", {})
+    for name, cur in current.get("results", {}).items():
+        base = base_results.get(name)
+        if not base or "error" in base:
+            continue
+        if "error" in cur:
+            problems.append(f"{name}: ошибка импорта ({cur['error']})")
+            continue
+        pairs = [("total", base.get("total", 0.0), cur.get("total", 0.0))]
+        for stage_name in sorted(
+            set(base.get("stages", {})) | set(cur.get("stages", {}))
+        ):
+            pairs.append(
+                (
+                    stage_name,
+                    base.get("stages", {}).get(stage_name, 0.0),
+                    cur.get("stages", {}).get(stage_name, 0.0),
+                )
+            )
+        for label, was, now in pairs:
+            if now - was > min_delta and now > was * (1 + threshold):
+                problems.append(f"{name}/{label}: {was:.3f} с -> {now:.3f} с")
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк импорта import_data")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument(
+        "--kinds", default=",".join(KINDS), help="Виды файлов через запятую"
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="Размеры (строк) через запятую",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Повторов, берется лучший"
+    )
+    parser.add_argument("--out", type=Path, default=None, help="JSON с результатами")
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--min-delta", type=float, default=0.05)
+    parser.add_argument("--generate-only", action="store_true")
+    parser.add_argument(
+        "--case", nargs=2, metavar=("FILE", "PRESET"), help=argparse.SUPPRESS
+    )
+    args = parser.parse_args(argv)
+
+    if args.case:
+        print(json.dumps(_run_case_here(Path(args.case[0]), args.case[1])))
+        return 0
+
+    kinds = [k.strip() for k in args.kinds.split(",") if k.strip()]
+    unknown = [k for k in kinds if k not in KINDS]
+    if unknown:
+        parser.error(f"Неизвестные виды: {', '.join(unknown)}")
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    if args.generate_only:
+        for kind in kinds:
+            for size in sizes:
+                print(corpus_file(args.corpus, kind, size))
+        return 0
+
+    current = run_benchmarks(args.corpus, kinds, sizes, repeat=args.repeat)
+    if args.out:
+        args.out.write_text(
+            json.dumps(current, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+    if args.save_baseline:
+        target = args.baseline or DEFAULT_BASELINE
+        target.write_text(
+            json.dumps(current, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"Базовая линия сохранена: {target}")
+        return 0
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        problems = compare_results(
+            current, baseline, threshold=args.threshold, min_delta=args.min_delta
+        )
+        if problems:
+            print("Регрессии производительности:")
+            for line in problems:
+                print("  " + line)
+            return 1
+        print("Регрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,100 @@
+"""Распределение сумм нарядов между работниками в целых копейках.
+
+Остаток от деления раздается методом наибольших остатков: доли считаются
+пропорционально весам (по умолчанию поровну), округляются вниз до копейки,
+а недостающие копейки получают доли с наибольшей дробной частью (при
+равенстве — стоящие раньше). Сумма долей всегда в точности равна итогу.
+
+split_kopecks — одна сумма, allocate_batch — много нарядов сразу (NumPy),
+для пересчетов и заполнения по всей базе.
+"""
+
+from __future__ import annotations
+
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Sequence
+
+import numpy as np
+
+
+def to_kopecks(value: Decimal | float | int | str | None) -> int:
+    """Рубли -> копейки с округлением половины вверх (как _round_rub)."""
+    if value is None:
+        return 0
+    return int(
+        (Decimal(str(value)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP)
+    )
+
+
+def from_kopecks(kopecks: int) -> float:
+    return kopecks / 100
+
+
+def split_kopecks(
+    total: int, count: int, weights: Sequence[int] | None = None
+) -> list[int]:
+    """Делит total копеек на count долей (по весам weights, иначе поровну)."""
+    if count <= 0:
+        return []
+    if weights is None or not any(weights):
+        weights = [1] * count
+    if len(weights) != count or any(w < 0 for w in weights):
+        raise ValueError("Веса долей должны быть неотрицательными, по одному на долю")
+    weight_sum = sum(weights)
+    shares = [total * w // weight_sum for w in weights]
+    remainders = [total * w - s * weight_sum for w, s in zip(weights, shares)]
+    missing = total - sum(shares)
+    # Наибольшие остатки первыми, при равенстве — по порядку
+    for idx in sorted(range(count), key=lambda i: -remainders[i])[:missing]:
+        shares[idx] += 1
+    return shares
+
+
+def _group_sums(
+    values: np.ndarray, starts: np.ndarray, sizes: np.ndarray
+) -> np.ndarray:
+    # Точные целые суммы по подряд идущим группам (bincount считает во float)
+    cumulative = np.concatenate(([0], np.cumsum(values, dtype=np.int64)))
+    return cumulative[starts + sizes] - cumulative[starts]
+
+
+def allocate_batch(
+    totals: np.ndarray, group_sizes: np.ndarray, weights: np.ndarray | None = None
+) -> np.ndarray:
+    """split_kopecks для многих нарядов сразу.
+
+    totals — итоги нарядов в копейках, group_sizes — число долей каждого
+    наряда; доли идут подряд по нарядам. weights — вес каждой доли (нулевые
+    веса всего наряда означают «поровну»). Возвращает копейки долей (int64).
+    """
+    totals = np.asarray(totals, dtype=np.int64)
+    sizes = np.asarray(group_sizes, dtype=np.int64)
+    n = int(sizes.sum())
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    group = np.repeat(np.arange(len(sizes)), sizes)
+    starts = np.cumsum(sizes) - sizes
+    position = np.arange(n) - starts[group]
+    w = np.ones(n, dtype=np.int64) if weights is None else np.asarray(weights, np.int64)
+    if (w < 0).any():
+        raise ValueError("Веса долей должны быть неотрицательными")
+    weight_sum = _group_sums(w, starts, sizes)
+    # Наряды с нулевыми весами делим поровну
+    equal = (weight_sum == 0)[group]
+    w = np.where(equal, 1, w)
+    weight_sum = np.where(weight_sum == 0, sizes, weight_sum)
+    if int(np.abs(totals).max()) * int(w.max()) < 2**63:
+        numer = totals[group] * w
+    else:
+        # Произведение не помещается в int64: считаем целыми Python (доли и
+        # остатки по модулю не больше итога и суммы весов — обратно в int64)
+        numer = totals[group].astype(object) * w.astype(object)
+    shares = numer // weight_sum[group]
+    remainders = (numer - shares * weight_sum[group]).astype(np.int64)
+    shares = shares.astype(np.int64)
+    missing = totals - _group_sums(shares, starts, sizes)
+    # Ранг доли внутри наряда: по убыванию остатка, при равенстве — по порядку
+    order = np.lexsort((position, -remainders, group))
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n) - starts[group[order]]
+    return shares + (rank < missing[group])
@@ -0,0 +1,544 @@
+"""Правила распознавания листов и колонок импорта.
+
+Все ключевые слова, по которым импорт узнает тип листа и выбирает колонки,
+собраны здесь в таблицы правил. Из словаря всех таблиц один раз строится
+автомат Ахо — Корасик: каждый заголовок и каждая строка шапки проходятся
+им один раз, а правила дальше проверяют только множества найденных слов.
+Тексты сравниваются в виде str(значение).strip().casefold().
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Iterable, Literal
+
+import pandas as pd
+
+# Сколько первых строк листа считается шапкой при распознавании
+SCAN_ROWS = 8
+# Разделитель ячеек строки: ни одно ключевое слово не может его перешагнуть
+_CELL_SEP = "\x1f"
+
+
+class KeywordAutomaton:
+    """Автомат Ахо — Корасик: все ключевые слова, входящие в текст, за один проход."""
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        goto: list[dict[str, int]] = [{}]
+        out: list[set[str]] = [set()]
+        for kw in dict.fromkeys(keywords):
+            state = 0
+            for ch in kw:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(set())
+                state = nxt
+            out[state].add(kw)
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                out[nxt] |= out[fail[nxt]]
+        self._goto = goto
+        self._fail = fail
+        self._out = [frozenset(o) for o in out]
+
+    def find(self, text: str) -> frozenset[str]:
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        found: set[str] = set()
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return frozenset(found)
+
+
+@dataclass(frozen=True)
+class Clause:
+    """Условие на один текст (заголовок колонки).
+
+    Все слова all входят в текст и ни одно из none не входит; если заданы
+    equals/prefix — текст целиком равен equals / начинается с prefix.
+    """
+
+    all: tuple[str, ...] = ()
+    none: tuple[str, ...] = ()
+    equals: str | None = None
+    prefix: str | None = None
+
+    def matches(self, text: str, words: frozenset[str]) -> bool:
+        if self.equals is not None and text != self.equals:
+            return False
+        if self.prefix is not None and not text.startswith(self.prefix):
+            return False
+        return all(k in words for k in self.all) and not any(
+            k in words for k in self.none
+        )
+
+
+def anyword(*keys: str) -> tuple[Clause, ...]:
+    """Условия «текст содержит хотя бы одно из слов»."""
+    return tuple(Clause(all=(k,)) for k in keys)
+
+
+@dataclass(frozen=True)
+class ColumnRule:
+    """Как найти колонку field.
+
+    tiers — уровни условий по убыванию приоритета: сначала ищется первая
+    колонка, подходящая под какое-либо условие первого уровня, и только если
+    такой нет — под условия следующего.
+    """
+
+    field: str
+    tiers: tuple[tuple[Clause, ...], ...]
+
+
+def column(field: str, *tiers: tuple[Clause, ...]) -> ColumnRule:
+    return ColumnRule(field, tuple(tiers))
+
+
+@dataclass(frozen=True)
+class Term:
+    """Слова keys встречаются в заголовках (where="header") или в первых rows
+    строках шапки (where="head"); exact — заголовок целиком равен слову."""
+
+    keys: tuple[str, ...]
+    where: Literal["header", "head"] = "header"
+    rows: int | None = None
+    exact: bool = False
+
+
+def header(*keys: str, exact: bool = False) -> Term:
+    return Term(keys, "header", exact=exact)
+
+
+def head(*keys: str, rows: int | None = None) -> Term:
+    return Term(keys, "head", rows=rows)
+
+
+# Условие на лист: дизъюнкция конъюнкций Term
+Condition = tuple[tuple[Term, ...], ...]
+
+
+@dataclass(frozen=True)
+class KindRule:
+    """Правило оценки типа листа: points очков типу kind, если выполнено when."""
+
+    kind: str
+    points: int
+    when: Condition
+
+
+def _norm(value: Any) -> str:
+    try:
+        if value is None or pd.isna(value):
+            return ""
+    except (TypeError, ValueError):
+        pass
+    return str(value).strip().casefold()
+
+
+# --- Таблицы правил ---
+
+_UNIT = ("ед", "unit", "единиц", "изм")
+_PRICE = ("цена", "тариф", "расцен", "стоим")
+_CONTRACT = ("контракт", "договор", "шифр")
+_TAB_NO = ("таб", "табел", "табель", "персонал", "tn", "personnel")
+_POSITION = ("разряд", "должн")
+_DEPT = ("цех", "отдел", "подраздел", "участок", "бригада")
+_FIO = ("фио", "сотрудник", "работник")
+_FIO_PARTS = ("фамил", "имя", "отче")
+
+# Колонки прайс-листа видов работ (parse_job_types)
+JOB_TYPES_COLUMNS = (
+    column("name", anyword("вид", "наимен")),
+    column("unit", anyword("ед", "unit", "изм")),
+    column("price", anyword(*_PRICE)),
+    column("code", anyword("код")),
+)
+
+# Строка заголовков прайс-листа, если он прочитан без шапки: по слову из каждой группы
+JOB_TYPES_HEADER_ROW = (("вид", "наимен"), ("ед", "изм", "unit"), _PRICE)
+
+PRODUCTS_COLUMNS = (
+    column("name", anyword("издел", "наимен")),
+    column("product_no", anyword("зав", "номер", "№")),
+    column("contract_code", anyword(*_CONTRACT)),
+)
+
+CONTRACTS_COLUMNS = (
+    column("code", anyword("шифр", "номер")),
+    column("name", anyword("наимен")),
+    column(
+        "contract_type",
+        (Clause(all=("вид контракт",)), Clause(all=("вид", "контракт"))),
+    ),
+    column(
+        "executor",
+        anyword("исполнител"),
+        (Clause(all=("исполн",), none=("дата",)),),
+    ),
+    column("igk", anyword("игк")),
+    column(
+        "contract_number",
+        (Clause(all=("номер контракт",)), Clause(all=("номер", "контракт"))),
+    ),
+    column("bank_account", anyword("счет", "р/с")),
+    # Даты: различаем начало и окончание, не путая их с "исполнитель"
+    column(
+        "start_date",
+        anyword("начал", "заключ") + (Clause(all=("срок",), none=("по", "до")),),
+    ),
+    column(
+        "end_date",
+        anyword("оконч", "действует до")
+        + tuple(Clause(all=(a, b)) for a in ("срок", "действ") for b in ("до", "по")),
+        # Явное правило под столбец "Плановая дата исполнения контракта"
+        (Clause(all=("планов", "дата", "исполн", "контракт")),),
+        anyword("end", "finish", "valid to", "valid until"),
+    ),
+    column("description", anyword("коммент", "опис", "примеч")),
+)
+
+WORKERS_COLUMNS = (
+    column("full_name", anyword(*_FIO)),
+    column("last_name", anyword("фамил")),
+    column("first_name", (Clause(equals="имя"),)),
+    column("middle_name", anyword("отче")),
+    column(
+        "personnel_no",
+        anyword(*_TAB_NO, "таб.№", "таб. №", "таб.н"),
+    ),
+    column("position", anyword(*_POSITION, "роль", "позиция")),
+    column("dept", anyword(*_DEPT, "цех№", "цех №", "dept", "department")),
+    column("status", anyword("статус", "уволен", "работает")),
+)
+
+# Слова строки заголовков списка работников: основные весят 2, дополнительные 1
+WORKERS_HEADER_MAIN = ("фио", *_FIO_PARTS, "сотрудник", "работник")
+WORKERS_HEADER_EXTRA = (*_TAB_NO, *_POSITION, *_DEPT)
+
+# Заголовки листа нарядов XLSX (_parse_orders_sheet): точное совпадение
+ORDERS_SHEET_COLUMNS = (
+    column("date", (Clause(equals="дата"),)),
+    column(
+        "job_name",
+        (
+            Clause(equals="наименование выполненых работ"),
+            Clause(equals="наименование выполненных работ"),
+        ),
+    ),
+    column("unit", (Clause(equals="ед. изм."), Clause(equals="ед. изм"))),
+    column(
+        "unit_price",
+        (
+            Clause(equals="расценка  (руб.)"),
+            Clause(equals="расценка (руб.)"),
+            Clause(equals="расценка"),
+        ),
+    ),
+    column(
+        "qty",
+        (
+            Clause(equals="объем выполненных работ"),
+            Clause(equals="объем"),
+            Clause(equals="кол-во"),
+        ),
+    ),
+    column(
+        "amount",
+        (
+            Clause(equals="сумма  (руб)"),
+            Clause(equals="сумма (руб)"),
+            Clause(equals="сумма"),
+        ),
+    ),
+    column("note", (Clause(equals="примечание"),)),
+)
+
+# Заголовки прайс-листа в книге нарядов (_parse_jobtypes_sheet)
+PRICE_SHEET_COLUMNS = (
+    column("name", anyword("наименование")),
+    column("unit", (Clause(prefix="ед"),)),
+    column("price", anyword("цена", "расценка")),
+    column("idx", (Clause(prefix="№"),) + anyword("п/п")),
+)
+
+# Признаки листа работников, по которым он импортируется при любой оценке
+_WORKER_ATTRS = (
+    "таб",
+    "табел",
+    "табель",
+    "персонал",
+    *_POSITION,
+    "цех",
+    "отдел",
+    "участок",
+    "бригада",
+)
+WORKER_MARKERS: Condition = (
+    (header("фио"), header(*_WORKER_ATTRS)),
+    (header("список"), header("работник", "сотрудник")),
+    (head("фио", rows=6), head(*_WORKER_ATTRS, rows=6)),
+    (head("список", rows=6), head("работник", "сотрудник", rows=6)),
+)
+
+# Листы книги нарядов (import_xlsx_full, analyze_orders_workbook)
+PRICE_SHEET: Condition = (
+    (header("наименование"), header("ед"), header("цена", "расценка")),
+)
+ORDERS_SHEET: Condition = (
+    (
+        header("дата"),
+        header("наимен"),
+        header("ед"),
+        header("цена", "расценка", "сумма"),
+    ),
+    (head("изделие №", rows=10),),
+)
+# Быстрая проверка analyze_orders_workbook: шапка первой колонки или колонка даты
+ORDERS_SHEET_QUICK: Condition = ((head("фио", rows=5),), (header("дата"),))
+
+# Оценка типа листа общим импортом (detect_sheet); лист с суммой меньше 3 не распознан
+DETECT_KINDS = ("orders", "job_types", "products", "contracts", "workers")
+DETECT_RULES = (
+    KindRule("orders", 2, ((header("номер наряда", "order", "наряд"),),)),
+    KindRule("orders", 1, ((header("дата"),),)),
+    KindRule(
+        "orders",
+        3,
+        (
+            (
+                header("вид", "работ"),
+                header("ед"),
+                header("цена", "расценка"),
+                header("сумма"),
+            ),
+        ),
+    ),
+    KindRule("contracts", 2, ((header("номер контракта", *_CONTRACT),),)),
+    KindRule(
+        "contracts",
+        2,
+        (
+            (
+                header(
+                    "игк",
+                    "исполнител",
+                    "вид контракт",
+                    "начал",
+                    "заключ",
+                    "оконч",
+                    "действует до",
+                ),
+            ),
+        ),
+    ),
+    KindRule("job_types", 2, ((header("вид", "наимен"), header(*_UNIT)),)),
+    KindRule("job_types", 2, ((header(*_PRICE),),)),
+    KindRule(
+        "job_types",
+        2,
+        ((head("вид", "наимен"), head(*_UNIT), head(*_PRICE)),),
+    ),
+    KindRule("products", 2, ((header("изделие", "зав", "серийн", "изд."),),)),
+    KindRule(
+        "products",
+        2,
+        ((header("№", "номер"), header(*_CONTRACT, "номер контракта")),),
+    ),
+    KindRule("workers", 3, ((header(*_FIO), header("таб", "персонал", *_POSITION)),)),
+    KindRule(
+        "workers",
+        2,
+        (
+            (
+                header("фамил"),
+                header("имя", exact=True),
+                header(*_TAB_NO, *_POSITION, *_DEPT),
+            ),
+            (header("отче"), header(*_TAB_NO, *_POSITION, *_DEPT)),
+        ),
+    ),
+    KindRule("workers", 1, ((head("список"), head("работник", "сотрудник")),)),
+)
+
+
+def _vocabulary() -> Iterable[str]:
+    for rules in (
+        JOB_TYPES_COLUMNS,
+        PRODUCTS_COLUMNS,
+        CONTRACTS_COLUMNS,
+        WORKERS_COLUMNS,
+        ORDERS_SHEET_COLUMNS,
+        PRICE_SHEET_COLUMNS,
+    ):
+        for rule in rules:
+            for tier in rule.tiers:
+                for clause in tier:
+                    yield from clause.all
+                    yield from clause.none
+    yield from WORKERS_HEADER_MAIN
+    yield from WORKERS_HEADER_EXTRA
+    for group in JOB_TYPES_HEADER_ROW:
+        yield from group
+    for cond in (
+        WORKER_MARKERS,
+        PRICE_SHEET,
+        ORDERS_SHEET,
+        ORDERS_SHEET_QUICK,
+        *(r.when for r in DETECT_RULES),
+    ):
+        for conj in cond:
+            for term in conj:
+                if not term.exact:
+                    yield from term.keys
+
+
+_AUTOMATON = KeywordAutomaton(_vocabulary())
+
+
+@lru_cache(maxsize=4096)
+def keywords_in(text: str) -> frozenset[str]:
+    """Ключевые слова таблиц правил, входящие в нормализованный текст."""
+    return _AUTOMATON.find(text)
+
+
+def row_keywords(values: Iterable[Any]) -> frozenset[str]:
+    """Ключевые слова, найденные хотя бы в одной ячейке строки."""
+    return keywords_in(_CELL_SEP.join(_norm(v) for v in values))
+
+
+# --- Применение правил ---
+
+
+def has_groups(words: frozenset[str], groups: Iterable[Iterable[str]]) -> bool:
+    """Из каждой группы слов найдено хотя бы одно."""
+    return all(any(k in words for k in group) for group in groups)
+
+
+def pick_columns(columns: Iterable[Any], rules: Iterable[ColumnRule]) -> dict[str, Any]:
+    """Для каждого правила — первая подходящая колонка (или None)."""
+    cols = list(columns)
+    texts = [_norm(c) for c in cols]
+    words = [keywords_in(t) for t in texts]
+    picked: dict[str, Any] = {}
+    for rule in rules:
+        picked[rule.field] = None
+        for tier in rule.tiers:
+            found = next(
+                (
+                    i
+                    for i, (t, w) in enumerate(zip(texts, words))
+                    if any(cl.matches(t, w) for cl in tier)
+                ),
+                None,
+            )
+            if found is not None:
+                picked[rule.field] = cols[found]
+                break
+    return picked
+
+
+def rename_columns(
+    columns: Iterable[Any], rules: Iterable[ColumnRule]
+) -> dict[Any, str]:
+    """{колонка: field} для колонок, подошедших под правило (первое по порядку)."""
+    rules = list(rules)
+    rename: dict[Any, str] = {}
+    for c in columns:
+        text = _norm(c)
+        words = keywords_in(text)
+        for rule in rules:
+            if any(cl.matches(text, words) for tier in rule.tiers for cl in tier):
+                rename[c] = rule.field
+                break
+    return rename
+
+
+@dataclass
+class SheetScan:
+    """Результат одного прохода по заголовкам и первым строкам листа."""
+
+    texts: list[str]
+    headers: list[frozenset[str]]
+    rows: list[frozenset[str]]
+    _union: dict[Any, frozenset[str]] = field(default_factory=dict, repr=False)
+
+    def words(self, term: Term) -> frozenset[str]:
+        key = ("header",) if term.where == "header" else ("head", term.rows)
+        found = self._union.get(key)
+        if found is None:
+            sets = self.headers if term.where == "header" else self.rows[: term.rows]
+            found = frozenset().union(*sets)
+            self._union[key] = found
+        return found
+
+    def found(self, term: Term) -> list[str]:
+        """Слова term, найденные на листе (в порядке term.keys)."""
+        if term.exact:
+            return [k for k in term.keys if k in self.texts]
+        words = self.words(term)
+        return [k for k in term.keys if k in words]
+
+    def matched(self, cond: Condition) -> tuple[Term, ...] | None:
+        """Первая выполненная конъюнкция условия или None."""
+        for conj in cond:
+            if all(self.found(t) for t in conj):
+                return conj
+        return None
+
+    def matches(self, cond: Condition) -> bool:
+        return self.matched(cond) is not None
+
+
+def scan_sheet(
+    df: pd.DataFrame, rows: int = SCAN_ROWS, cols: int | None = None
+) -> SheetScan:
+    """Проходит заголовки листа и первые rows строк (первые cols ячеек)."""
+    texts = [_norm(c) for c in df.columns]
+    values = df.iloc[:rows, :cols].values if len(df.columns) else []
+    return SheetScan(
+        texts=texts,
+        headers=[keywords_in(t) for t in texts],
+        rows=[row_keywords(r) for r in values],
+    )
+
+
+def _explain(rule: KindRule, conj: tuple[Term, ...], scan: SheetScan) -> str:
+    parts = []
+    for term in conj:
+        where = "заголовок" if term.where == "header" else "шапка"
+        parts.append(f"{where} «{scan.found(term)[0]}»")
+    return f"{rule.kind} +{rule.points}: " + ", ".join(parts)
+
+
+def score_sheet(
+    scan: SheetScan, rules: Iterable[KindRule] = DETECT_RULES
+) -> tuple[dict[str, int], list[str]]:
+    """Очки по типам листа и объяснение: какое правило сработало и на каких словах."""
+    scores: dict[str, int] = dict.fromkeys(DETECT_KINDS, 0)
+    reasons: list[str] = []
+    for rule in rules:
+        scores.setdefault(rule.kind, 0)
+        conj = scan.matched(rule.when)
+        if conj is not None:
+            scores[rule.kind] += rule.points
+            reasons.append(_explain(rule, conj, scan))
+    return scores, reasons
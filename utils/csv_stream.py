@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import csv
+import io
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Iterator
+
+# Сообщать о прогрессе не чаще, чем раз на столько прочитанных байт
+CSV_PROGRESS_BYTES = 1 << 20
+
+
+def iter_csv_rows(
+    path: str | Path,
+    *,
+    delimiter: str = ";",
+    progress_cb: Callable[[int, int, str], None] | None = None,
+    note: str = "Чтение файла",
+    every_bytes: int = CSV_PROGRESS_BYTES,
+) -> Iterator[list[str]]:
+    """Построчно читает CSV в UTF-8 (битые байты пропускаются), не держа файл в памяти.
+
+    progress_cb(прочитано_байт, размер_файла, заметка) вызывается не чаще, чем раз
+    на every_bytes прочитанных байт, и один раз по окончании файла.
+    """
+    total = max(1, os.path.getsize(path))
+
+    def report(done: int) -> None:
+        try:
+            progress_cb(done, total, f"{note}: {min(100, done * 100 // total)}%")
+        except Exception as exc:
+            logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
+
+    with open(path, "rb") as raw, io.TextIOWrapper(
+        raw, encoding="utf-8", errors="ignore"
+    ) as text:
+        next_report = every_bytes
+        for row in csv.reader(text, delimiter=delimiter):
+            yield row
+            if progress_cb:
+                # Позиция в байтах: насколько TextIOWrapper уже прочитал файл
+                done = raw.tell()
+                if done >= next_report:
+                    report(done)
+                    next_report = done + every_bytes
+        if progress_cb:
+            report(total)
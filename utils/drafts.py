@@ -0,0 +1,151 @@
+"""Черновики форм: журнал с дозаписью в отдельном файле, не в общей базе.
+
+Каждая запись черновика — одна строка JSON в конце data/work_order_drafts.jsonl,
+поэтому автосохранение не открывает транзакций в БД, которую может держать
+синхронизация. При чтении строки проигрываются по порядку: последняя запись
+ключа побеждает, state=null удаляет черновик, оборванная при сбое строка
+пропускается. Когда файл разрастается, он переписывается одними живыми
+черновиками (через временный файл и os.replace).
+
+Запись отложенная: stage() только запоминает состояние, flush() дописывает
+накопленное одним вызовом write — форма вызывает его по таймеру раз в
+несколько секунд. Состояние, совпадающее с уже записанным, не дублируется.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from config.settings import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Размер журнала, после которого он сжимается до живых черновиков
+DRAFTS_COMPACT_BYTES = 256 << 10
+
+
+def drafts_path() -> Path:
+    return CONFIG.data_dir / "work_order_drafts.jsonl"
+
+
+@dataclass
+class Draft:
+    key: str
+    saved_at: int  # Unix-время записи
+    state: dict[str, Any]
+
+
+class DraftJournal:
+    """Черновики по ключам (например, "new" или id наряда) в журнале JSON Lines."""
+
+    def __init__(
+        self, path: str | Path | None = None, compact_bytes: int = DRAFTS_COMPACT_BYTES
+    ) -> None:
+        self.path = Path(path) if path is not None else drafts_path()
+        self.compact_bytes = compact_bytes
+        self._pending: dict[str, dict[str, Any] | None] = {}
+        # Последнее записанное состояние ключа (JSON; None — черновик удален)
+        self._written: dict[str, str | None] = {}
+        self._tail_checked = False
+
+    def load(self) -> dict[str, Draft]:
+        """Живые черновики; порядок — по времени последней записи."""
+        drafts: dict[str, Draft] = {}
+        try:
+            with self.path.open(encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                        key = str(record["key"])
+                        state = record["state"]
+                        saved_at = int(record.get("at") or 0)
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    drafts.pop(key, None)
+                    if state is not None:
+                        drafts[key] = Draft(key, saved_at, state)
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            logger.warning("Не удалось прочитать черновики: %s", exc)
+        return drafts
+
+    def stage(self, key: str, state: dict[str, Any] | None) -> None:
+        """Запомнить состояние ключа до следующего flush (None — удалить)."""
+        self._pending[key] = state
+
+    def discard(self, key: str) -> None:
+        """Удалить черновик сразу (после сохранения или отмены)."""
+        self.stage(key, None)
+        self.flush()
+
+    def flush(self) -> int:
+        """Дописывает накопленные изменения; возвращает число записанных строк."""
+        if not self._pending:
+            return 0
+        now = int(time.time())
+        lines: list[str] = []
+        texts: dict[str, str | None] = {}
+        for key, state in self._pending.items():
+            text = (
+                None
+                if state is None
+                else json.dumps(state, ensure_ascii=False, separators=(",", ":"))
+            )
+            if key in self._written and self._written[key] == text:
+                continue
+            texts[key] = text
+            lines.append(
+                f'{{"key":{json.dumps(key, ensure_ascii=False)},"at":{now},'
+                f'"state":{"null" if text is None else text}}}\n'
+            )
+        written = len(lines)
+        if lines:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                if not self._tail_checked and self._torn_tail():
+                    lines.insert(0, "\n")
+                with self.path.open("a", encoding="utf-8") as fh:
+                    fh.write("".join(lines))
+                self._tail_checked = True
+                size = self.path.stat().st_size
+            except OSError as exc:
+                # Накопленное остается в очереди до следующей попытки
+                logger.warning("Не удалось записать черновик: %s", exc)
+                return 0
+            self._written.update(texts)
+            if size > self.compact_bytes:
+                self.compact()
+        self._pending.clear()
+        return written
+
+    def _torn_tail(self) -> bool:
+        # Строка, оборванная прошлым сбоем, не должна склеиться с новой
+        try:
+            with self.path.open("rb") as fh:
+                fh.seek(-1, os.SEEK_END)
+                return fh.read(1) != b"\n"
+        except OSError:
+            return False
+
+    def compact(self) -> None:
+        """Переписать журнал, оставив по одной строке на живой черновик."""
+        drafts = self.load()
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            with tmp.open("w", encoding="utf-8") as fh:
+                for d in drafts.values():
+                    record = {"key": d.key, "at": d.saved_at, "state": d.state}
+                    fh.write(
+                        json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+                        + "\n"
+                    )
+            os.replace(tmp, self.path)
+        except OSError as exc:
+            logger.warning("Не удалось сжать журнал черновиков: %s", exc)
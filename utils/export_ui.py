@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import logging
+import threading
 from datetime import datetime
+from pathlib import Path
 
 import customtkinter as ctk
+import tkinter as tk
 from tkinter import filedialog, messagebox
 
 from db.sqlite import get_connection
+from utils.text import sanitize_filename
+from utils.user_prefs import get_current_db_path
 
 
 def _export_table_to_excel(table: str, target_path: str) -> None:
@@ -52,3 +58,78 @@ def create_export_button(
 
     btn = ctk.CTkButton(parent, text=button_text, command=_on_export)
     return btn
+
+
+def export_all_tables_with_progress(parent: ctk.CTkBaseClass) -> None:
+    """Ask for a target folder and export all tables in parallel with a progress window.
+
+    Таблицы выгружаются в отдельных процессах (export_all_tables_parallel),
+    по желанию пользователя результат упаковывается в один ZIP-архив.
+    """
+    from import_export.excel_io import export_all_tables_parallel
+
+    directory = filedialog.askdirectory(title="Выберите папку для экспорта")
+    if not directory:
+        return
+    zip_path: Path | None = None
+    if messagebox.askyesno("Экспорт", "Упаковать все таблицы в один ZIP-архив?"):
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        zip_path = Path(directory) / (sanitize_filename(f"экспорт_{stamp}") + ".zip")
+    db_path = get_current_db_path()
+
+    win = ctk.CTkToplevel(parent)
+    win.title("Экспорт всего набора")
+    win.geometry("420x140")
+    ctk.CTkLabel(win, text="Выполняется экспорт...").pack(
+        anchor="w", padx=10, pady=(10, 6)
+    )
+    pb = ctk.CTkProgressBar(win)
+    pb.pack(fill="x", padx=10)
+    pb.set(0)
+    note_var = tk.StringVar(value="")
+    ctk.CTkLabel(win, textvariable=note_var).pack(anchor="w", padx=10, pady=(6, 10))
+
+    def _ui(fn) -> None:
+        try:
+            parent.after(0, fn)
+        except Exception as exc:
+            logging.getLogger(__name__).exception("Ignored unexpected error: %s", exc)
+
+    def progress_cb(step: int, total: int, note: str) -> None:
+        def _do():
+            try:
+                if not tk.Toplevel.winfo_exists(win):
+                    return
+                pb.set(step / max(total, 1))
+                note_var.set(note)
+            except Exception as exc:
+                logging.getLogger(__name__).exception(
+                    "Ignored unexpected error: %s", exc
+                )
+
+        _ui(_do)
+
+    def run() -> None:
+        try:
+            outputs = export_all_tables_parallel(
+                db_path, directory, progress_cb=progress_cb, zip_path=zip_path
+            )
+            target = str(outputs[0]) if zip_path else directory
+            _ui(lambda: messagebox.showinfo("Экспорт", f"Готово: {target}"))
+        except Exception as exc:
+            err = str(exc)
+            _ui(lambda: messagebox.showerror("Экспорт", err))
+        finally:
+
+            def _close():
+                try:
+                    if tk.Toplevel.winfo_exists(win):
+                        win.destroy()
+                except Exception as exc:
+                    logging.getLogger(__name__).exception(
+                        "Ignored unexpected error: %s", exc
+                    )
+
+            _ui(_close)
+
+    threading.Thread(target=run, daemon=True).start()
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+
+from config.settings import CONFIG
+from utils.hashing import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Форматы, которые pandas читает медленно (odf, xlrd, pyxlsb): их листы
+# после первого чтения сохраняются в кэш и дальше берутся оттуда
+SHEET_CACHE_SUFFIXES = frozenset({".xls", ".xlsb", ".ods"})
+# Предельный размер кэша; при превышении удаляются давно не использованные книги
+SHEET_CACHE_MAX_BYTES = 512 << 20
+
+_MANIFEST = "sheets.json"
+
+
+def _deterministic_errors() -> tuple[type[BaseException], ...]:
+    # Ошибки разбора, которые повторятся при каждом чтении того же файла.
+    # Остальные (PermissionError, пока файл открыт в Excel, MemoryError, нет
+    # движка чтения) не запоминаются — лист будет прочитан заново
+    errors: list[type[BaseException]] = [ValueError, zipfile.BadZipFile]
+    try:
+        from xlrd.biffh import XLRDError
+
+        errors.append(XLRDError)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+def sheet_cache_dir() -> Path:
+    return CONFIG.cache_dir / "sheets"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # Листы одной книги могут писать параллельно несколько процессов импорта
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.iterdir() if f.is_file())
+
+
+def prune_sheet_cache(
+    max_bytes: int = SHEET_CACHE_MAX_BYTES, keep: Path | None = None
+) -> None:
+    """Удаляет книги, к которым дольше всего не обращались, пока кэш больше max_bytes."""
+    root = sheet_cache_dir()
+    if not root.exists():
+        return
+    books = []
+    for d in root.iterdir():
+        manifest = d / _MANIFEST
+        if d.is_dir() and manifest.exists():
+            books.append((manifest.stat().st_mtime, d, _dir_size(d)))
+    total = sum(size for _, _, size in books)
+    for _, d, size in sorted(books, key=lambda b: b[0]):
+        if total <= max_bytes:
+            break
+        if keep is not None and d == keep:
+            continue
+        shutil.rmtree(d, ignore_errors=True)
+        total -= size
+
+
+class CachedWorkbook:
+    """Книга, листы которой после первого чтения берутся из кэша.
+
+    Кэш лежит в cache/sheets/<sha256 файла>/: список листов и по одному
+    pickle-файлу DataFrame на каждый вариант чтения листа (целиком или
+    первые nrows строк); ошибка чтения листа тоже запоминается. Сама книга
+    открывается, только если нужного листа в кэше нет. Повторяет используемую
+    импортом часть pd.ExcelFile: sheet_names, parse(), close().
+    """
+
+    def __init__(self, path: str | Path, engine: str | None = None) -> None:
+        self.path = Path(path)
+        self.engine = engine
+        self._xls: pd.ExcelFile | None = None
+        self._dir = sheet_cache_dir() / file_sha256(self.path)
+        manifest = self._dir / _MANIFEST
+        names = None
+        try:
+            names = json.loads(manifest.read_text(encoding="utf-8"))
+            os.utime(manifest)
+        except FileNotFoundError:
+            pass
+        except Exception as exc:
+            logger.warning("Кэш листов %s поврежден: %s", self.path.name, exc)
+        if names is None:
+            names = list(self._book().sheet_names)
+            try:
+                self._dir.mkdir(parents=True, exist_ok=True)
+                _write_atomic(
+                    manifest, json.dumps(names, ensure_ascii=False).encode("utf-8")
+                )
+                prune_sheet_cache(keep=self._dir)
+            except Exception as exc:
+                logger.warning("Не удалось сохранить кэш листов: %s", exc)
+        self.sheet_names: list[str] = names
+
+    def _book(self) -> pd.ExcelFile:
+        if self._xls is None:
+            self._xls = pd.ExcelFile(self.path, engine=self.engine)
+        return self._xls
+
+    def _entry(self, sheet_name: str | int, nrows: int | None) -> Path:
+        index = (
+            sheet_name
+            if isinstance(sheet_name, int)
+            else self.sheet_names.index(sheet_name)
+        )
+        suffix = "" if nrows is None else f".head{int(nrows)}"
+        return self._dir / f"{index}{suffix}.pkl"
+
+    def parse(
+        self, sheet_name: str | int = 0, nrows: int | None = None
+    ) -> pd.DataFrame:
+        """Как pd.ExcelFile.parse(sheet_name, nrows=nrows), но с кэшем."""
+        entry = self._entry(sheet_name, nrows)
+        error = entry.with_suffix(".err")
+        if error.exists():
+            # Лист, который не удалось прочитать, не заставляет снова открывать книгу
+            raise ValueError(error.read_text(encoding="utf-8"))
+        try:
+            return pd.read_pickle(entry)
+        except FileNotFoundError:
+            pass
+        except Exception as exc:
+            logger.warning("Кэш листа %s поврежден: %s", entry.name, exc)
+        try:
+            df = self._book().parse(sheet_name, nrows=nrows)
+        except _deterministic_errors() as exc:
+            self._store(error, f"{type(exc).__name__}: {exc}".encode("utf-8"))
+            raise
+        tmp = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+        try:
+            df.to_pickle(tmp)
+            os.replace(tmp, entry)
+        except Exception as exc:
+            logger.warning("Не удалось сохранить кэш листа: %s", exc)
+        return df
+
+    def _store(self, path: Path, data: bytes) -> None:
+        try:
+            _write_atomic(path, data)
+        except Exception as exc:
+            logger.warning("Не удалось сохранить кэш листа: %s", exc)
+
+    def close(self) -> None:
+        if self._xls is not None:
+            self._xls.close()
+            self._xls = None
+
+    def __enter__(self) -> "CachedWorkbook":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_workbook(
+    path: str | Path, engine: str | None = None
+) -> pd.ExcelFile | CachedWorkbook:
+    """Открывает книгу; медленные форматы (SHEET_CACHE_SUFFIXES) — через кэш листов."""
+    if Path(path).suffix.lower() in SHEET_CACHE_SUFFIXES:
+        return CachedWorkbook(path, engine=engine)
+    return pd.ExcelFile(path, engine=engine)
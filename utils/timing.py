@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Iterator
+
+
+class StageTimer:
+    """Суммарное время по этапам (read, detect, parse, commit, ...).
+
+    Время вложенного этапа не засчитывается объемлющему, поэтому сумма
+    по этапам не превышает общего времени.
+    """
+
+    def __init__(self) -> None:
+        self.totals: dict[str, float] = {}
+        self._stack: list[list] = []  # [имя этапа, момент начала текущего отрезка]
+
+    def _add(self, name: str, seconds: float) -> None:
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        now = perf_counter()
+        if self._stack:
+            outer = self._stack[-1]
+            self._add(outer[0], now - outer[1])
+        self._stack.append([name, now])
+        try:
+            yield
+        finally:
+            end = perf_counter()
+            _, started = self._stack.pop()
+            self._add(name, end - started)
+            if self._stack:
+                self._stack[-1][1] = end
+
+
+_current: ContextVar[StageTimer | None] = ContextVar("stage_timer", default=None)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Засчитывает время блока этапу name, если включен сбор (см. record_stages)."""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+@contextmanager
+def record_stages() -> Iterator[dict[str, float]]:
+    """Включает сбор времени этапов для текущего потока; отдает словарь итогов."""
+    timer = StageTimer()
+    token = _current.set(timer)
+    try:
+        yield timer.totals
+    finally:
+        _current.reset(token)